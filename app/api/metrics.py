@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition of request, DB, pool and cache metrics
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
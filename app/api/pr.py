@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.schemas.schemas import PullRequestReassignResponse, PullRequestResponse, pr_to_schema
+from app.schemas.encoders import JSONBytesResponse, encode_pr
+from app.schemas.schemas import (
+    PullRequestBatchResponse,
+    PullRequestReassignResponse,
+    PullRequestResponse,
+)
 from app.services.pr_service import (
+    MAX_BATCH_SIZE,
     AuthorNotFoundError,
     NoCandidateError,
     PRExistsError,
@@ -24,6 +30,10 @@ class CreatePRRequest(BaseModel):
     author_id: str
 
 
+class CreatePRBatchRequest(BaseModel):
+    pull_requests: list[CreatePRRequest] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class MergePRRequest(BaseModel):
     pull_request_id: str
 
@@ -40,7 +50,7 @@ async def create_pr(payload: CreatePRRequest, db: AsyncSession = Depends(get_db)
         pr = await service.create_pr(
             payload.pull_request_id, payload.pull_request_name, payload.author_id
         )
-        return {"pr": pr_to_schema(pr)}
+        return JSONBytesResponse({"pr": encode_pr(pr)}, status_code=201)
 
     except PRExistsError as e:
         raise HTTPException(
@@ -53,12 +63,37 @@ async def create_pr(payload: CreatePRRequest, db: AsyncSession = Depends(get_db)
         ) from e
 
 
+@router.post("/createBatch", response_model=PullRequestBatchResponse)
+async def create_pr_batch(payload: CreatePRBatchRequest, db: AsyncSession = Depends(get_db)):
+    service = PullRequestService(db)
+    results = await service.create_batch(
+        [
+            (item.pull_request_id, item.pull_request_name, item.author_id)
+            for item in payload.pull_requests
+        ]
+    )
+
+    items = []
+    for item, result in zip(payload.pull_requests, results, strict=True):
+        pr, error = None, None
+        if isinstance(result, PRExistsError):
+            error = {"code": "PR_EXISTS", "message": str(result)}
+        elif isinstance(result, (AuthorNotFoundError, TeamNotFoundError)):
+            error = {"code": "NOT_FOUND", "message": str(result)}
+        else:
+            pr = encode_pr(result)
+        items.append({"pull_request_id": item.pull_request_id, "pr": pr, "error": error})
+
+    created = sum(1 for item in items if item["pr"] is not None)
+    return JSONBytesResponse({"created": created, "failed": len(items) - created, "results": items})
+
+
 @router.post("/merge", response_model=PullRequestResponse)
 async def merge_pr(payload: MergePRRequest, db: AsyncSession = Depends(get_db)):
     service = PullRequestService(db)
     try:
         pr = await service.merge_pr(payload.pull_request_id)
-        return {"pr": pr_to_schema(pr)}
+        return JSONBytesResponse({"pr": encode_pr(pr)})
 
     except PRNotFoundError as e:
         raise HTTPException(
@@ -73,7 +108,7 @@ async def reassign_reviewer(payload: ReassignRequest, db: AsyncSession = Depends
         pr, replaced_by = await service.reassign_reviewer(
             payload.pull_request_id, payload.old_user_id
         )
-        return {"pr": pr_to_schema(pr), "replaced_by": replaced_by}
+        return JSONBytesResponse({"pr": encode_pr(pr), "replaced_by": replaced_by})
 
     except PRNotFoundError as e:
         raise HTTPException(
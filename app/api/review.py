@@ -1,35 +1,85 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.etag import etag_headers, make_etag, matches, not_modified
+from app.core.pagination import InvalidCursorError
 from app.db.session import get_db
-from app.models.models import PullRequest as PullRequestModel
-from app.schemas.schemas import PullRequestShort
+from app.models.models import PRStatus
+from app.schemas.encoders import JSONBytesResponse, encode_pr_shorts
+from app.schemas.schemas import UserReviewsResponse
+from app.services import review_feed
 from app.services.pr_service import PullRequestService
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/getReview", response_model=dict)
+@router.get("/getReview", response_model=UserReviewsResponse)
 async def get_review(
+    request: Request,
     user_id: str = Query(..., description="Идентификатор пользователя"),
+    status: PRStatus | None = Query(None, description="Фильтр по статусу PR"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Размер страницы"),
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get PRs where the user is assigned as a reviewer
+
+    Without `limit` the whole list is returned (as before), ordered by creation time.
+    The ETag is the reviewer's version: any page of an unchanged list answers
+    If-None-Match with 304 after one version lookup.
     """
     service = PullRequestService(db)
-    prs: list[PullRequestModel] = await service.get_prs_by_reviewer(user_id)
+    # список есть у любого user_id (пустой для неизвестного), так что "*" совпадает всегда
+    etag = make_etag(await service.get_reviewer_version(user_id))
+    if matches(request, etag, exists=True):
+        return not_modified(etag)
+    try:
+        rows, next_cursor = await service.get_prs_by_reviewer(
+            user_id, status=status, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=400, detail={"error": {"code": "INVALID_CURSOR", "message": str(e)}}
+        ) from e
 
     # according to OpenAPI: get_review should always return 200, even if the list is empty
-    return {
-        "user_id": user_id,
-        "pull_requests": [
-            PullRequestShort(
-                pull_request_id=pr.pull_request_id,
-                pull_request_name=pr.pull_request_name,
-                author_id=pr.author_id,
-                status=pr.status.value if hasattr(pr.status, "value") else pr.status,
-            )
-            for pr in prs
-        ],
-    }
+    return JSONBytesResponse(
+        {"user_id": user_id, "pull_requests": encode_pr_shorts(rows), "next_cursor": next_cursor},
+        headers=etag_headers(etag),
+    )
+
+
+@router.get("/reviewStream", response_class=StreamingResponse)
+async def review_stream(
+    user_id: str = Query(..., description="Идентификатор пользователя"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Server-Sent Events stream of the user's reviews
+
+    The first `snapshot` event has the getReview body, then `assigned`,
+    `unassigned` and `merged` deltas follow. After `resync` the client must
+    reconnect for a new snapshot.
+    """
+    # подписка до чтения снимка: изменение между ними придёт дельтой
+    subscription = review_feed.review_hub.subscribe(user_id)
+    try:
+        rows, _ = await PullRequestService(db).get_prs_by_reviewer(user_id)
+    except Exception:
+        subscription.close()
+        raise
+    # соединение с базой не держим всё время жизни потока
+    await db.close()
+
+    return StreamingResponse(
+        review_feed.event_stream(
+            subscription,
+            {"user_id": user_id, "pull_requests": encode_pr_shorts(rows)},
+            settings.REVIEW_STREAM_HEARTBEAT,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
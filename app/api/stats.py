@@ -2,13 +2,18 @@
 Statistics endpoint - дополнительное задание
 """
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from sqlalchemy import func, select
+import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.etag import etag_headers, make_etag, matches, not_modified
 from app.db.session import get_db
-from app.models.models import PRStatus, PullRequest, PullRequestReviewer
+from app.schemas.encoders import JSONBytesResponse
+from app.services.pr_service_errors import InvalidWindowError
+from app.services.stats_service import StatsService
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
@@ -30,10 +35,81 @@ class StatsResponse(BaseModel):
     top_reviewers: list[UserReviewStats]
 
 
-@router.get("", response_model=StatsResponse)
+class ReviewCountsStats(BaseModel):
+    created: int
+    merged: int
+    open: int
+
+
+class TeamReviewStats(BaseModel):
+    team_name: str | None
+    created: int
+    merged: int
+    open: int
+
+
+class UserBreakdownStats(BaseModel):
+    user_id: str
+    team_name: str | None
+    created: int
+    merged: int
+    open: int
+
+
+class StatsReportResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    created_from: datetime.datetime | None = Field(alias="from")
+    created_to: datetime.datetime | None = Field(alias="to")
+    team_name: str | None
+    total: ReviewCountsStats
+    teams: list[TeamReviewStats]
+    users: list[UserBreakdownStats]
+
+
+class TimeToMergeStats(BaseModel):
+    # PR, смёрженных в окне; квантили — в секундах, null если таких нет
+    merged: int
+    p50: float | None
+    p90: float | None
+    p99: float | None
+
+
+class ThroughputBucket(BaseModel):
+    bucket_start: datetime.datetime
+    created: int
+    merged: int
+
+
+class LatencyResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    bucket: Literal["hour", "day"]
+    since: datetime.datetime = Field(alias="from")
+    until: datetime.datetime = Field(alias="to")
+    team_name: str | None
+    time_to_merge: TimeToMergeStats
+    series: list[ThroughputBucket]
+
+
+def _invalid_window(e: InvalidWindowError) -> HTTPException:
+    return HTTPException(
+        status_code=400, detail={"error": {"code": "INVALID_WINDOW", "message": str(e)}}
+    )
+
+
+@router.get("", response_model=StatsResponse | StatsReportResponse)
 async def get_stats(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     limit: int = 10,
+    created_from: datetime.datetime | None = Query(
+        None, alias="from", description="Начало окна по createdAt PR, включительно"
+    ),
+    created_to: datetime.datetime | None = Query(
+        None, alias="to", description="Конец окна по createdAt PR, не включительно"
+    ),
+    team_name: str | None = Query(None, description="Только ревьюверы этой команды"),
 ):
     """
     Получить статистику по PR и назначениям ревьюверов.
@@ -42,53 +118,52 @@ async def get_stats(
     - total_reviews: общее количество назначений на ревью
     - prs_by_status: распределение PR по статусам (OPEN/MERGED)
     - top_reviewers: топ ревьюверов по количеству назначений
+
+    Счётчики поддерживаются в тех же транзакциях, что create/merge/reassign,
+    поэтому запрос читает готовые значения вместо агрегатов по всем таблицам.
+    Их версия — ETag: при совпадении If-None-Match ответ 304 без чтения счётчиков.
+
+    С from / to / team_name — отчёт по окну: назначения на PR, созданные в окне
+    (всего, на смёрженных и на открытых PR), итого, по командам ревьюверов и по
+    пользователям. Считается одним агрегатным запросом по исходным таблицам,
+    без ETag: отчёт зависит и от переходов пользователей между командами.
     """
-    # Общее количество PR
-    total_prs_result = await db.execute(select(func.count(PullRequest.pull_request_id)))
-    total_prs = total_prs_result.scalar() or 0
-
-    # Общее количество назначений
-    total_reviews_result = await db.execute(select(func.count(PullRequestReviewer.id)))
-    total_reviews = total_reviews_result.scalar() or 0
-
-    # PR по статусам
-    status_query = select(
-        PullRequest.status, func.count(PullRequest.pull_request_id).label("count")
-    ).group_by(PullRequest.status)
-    status_result = await db.execute(status_query)
-    prs_by_status = [
-        PRStatusStats(
-            status=row.status.value if hasattr(row.status, "value") else row.status,
-            count=row.count,
-        )
-        for row in status_result.all()
-    ]
-
-    # Добавим отсутствующие статусы с count=0
-    existing_statuses = {s.status for s in prs_by_status}
-    for status in PRStatus:
-        if status.value not in existing_statuses:
-            prs_by_status.append(PRStatusStats(status=status.value, count=0))
-
-    # Топ ревьюверов
-    top_query = (
-        select(
-            PullRequestReviewer.reviewer_id,
-            func.count(PullRequestReviewer.id).label("review_count"),
-        )
-        .group_by(PullRequestReviewer.reviewer_id)
-        .order_by(func.count(PullRequestReviewer.id).desc())
-        .limit(limit)
-    )
-    top_result = await db.execute(top_query)
-    top_reviewers = [
-        UserReviewStats(user_id=row.reviewer_id, review_count=row.review_count)
-        for row in top_result.all()
-    ]
-
-    return StatsResponse(
-        total_prs=total_prs,
-        total_reviews=total_reviews,
-        prs_by_status=prs_by_status,
-        top_reviewers=top_reviewers,
-    )
+    service = StatsService(db)
+    if created_from is not None or created_to is not None or team_name is not None:
+        try:
+            report = await service.get_report(created_from, created_to, team_name)
+        except InvalidWindowError as e:
+            raise _invalid_window(e) from e
+        return JSONBytesResponse(report)
+    etag = make_etag(await service.get_version())
+    if matches(request, etag, exists=True):
+        return not_modified(etag)
+    return JSONBytesResponse(await service.get_stats(limit), headers=etag_headers(etag))
+
+
+@router.get("/latency", response_model=LatencyResponse)
+async def get_latency(
+    bucket: Literal["hour", "day"] = "day",
+    since: datetime.datetime | None = Query(
+        None, alias="from", description="Начало окна, по умолчанию 48 ч (hour) или 30 дней (day)"
+    ),
+    until: datetime.datetime | None = Query(
+        None,
+        alias="to",
+        description="Конец окна, не включительно; по умолчанию конец текущего интервала",
+    ),
+    team_name: str | None = Query(None, description="Только PR авторов этой команды"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Время до merge (p50 / p90 / p99, секунды) и созданные / смёрженные PR по часам или дням
+
+    Квантили — по PR, смёрженным в окне; ряд — созданные и смёрженные в окне PR
+    по интервалам UTC, пустые интервалы с нулями. Считается в базе
+    (percentile_cont и date_trunc в PostgreSQL), ответ кэшируется на LATENCY_CACHE_TTL.
+    """
+    try:
+        latency = await StatsService(db).get_latency(bucket, since, until, team_name)
+    except InvalidWindowError as e:
+        raise _invalid_window(e) from e
+    return JSONBytesResponse(latency)
@@ -1,34 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.etag import etag_headers, make_etag, matches, not_modified
 from app.db.session import get_db
-from app.schemas.schemas import Team, TeamResponse, team_to_schema
+from app.schemas.encoders import JSONBytesResponse, encode_team
+from app.schemas.schemas import (
+    DeactivateUsersResponse,
+    ImportResponse,
+    ReviewerStrategyResponse,
+    Team,
+    TeamResponse,
+    TeamSyncResponse,
+)
+from app.services.import_service import ImportService, iter_lines
+from app.services.pr_service_errors import TeamNotFoundError
 from app.services.team_service import TeamService
 
 router = APIRouter(prefix="/team", tags=["Teams"])
 
 
+class DeactivateUsersRequest(BaseModel):
+    team_name: str
+    # если не передан — деактивируется вся команда
+    user_ids: list[str] | None = None
+
+
+class ReviewerStrategyRequest(BaseModel):
+    team_name: str
+    # None — стратегия по умолчанию (REVIEWER_STRATEGY)
+    strategy: Literal["least_loaded", "weighted", "round_robin", "random"] | None = None
+
+
 @router.post("/add", response_model=TeamResponse, status_code=201)
 async def add_team(team: Team, db: AsyncSession = Depends(get_db)):
     service = TeamService(db)
     try:
         result = await service.add_team(team.team_name, [m.model_dump() for m in team.members])
-        return {"team": team_to_schema(result)}
-    except Exception as e:
+        return JSONBytesResponse({"team": encode_team(result)}, status_code=201)
+    except IntegrityError as e:
         raise HTTPException(
             status_code=400, detail={"error": {"code": "TEAM_EXISTS", "message": str(e)}}
         ) from e
 
 
+@router.post("/sync", response_model=TeamSyncResponse)
+async def sync_team(team: Team, db: AsyncSession = Depends(get_db)):
+    """
+    Привести состав команды к переданному списку: пишется только разница
+    """
+    service = TeamService(db)
+    result = await service.sync_team(team.team_name, [m.model_dump() for m in team.members])
+    return JSONBytesResponse(
+        {
+            "team": encode_team(result.roster),
+            "created": result.created,
+            "added": result.added,
+            "updated": result.updated,
+            "deactivated": result.deactivated,
+            "reassignments": [
+                {"pull_request_id": pr_id, "old_user_id": old_id, "new_user_id": new_id}
+                for pr_id, old_id, new_id in result.reassignments
+            ],
+        }
+    )
+
+
 @router.get("/get", response_model=Team)
 async def get_team(
+    request: Request,
     team_name: str = Query(..., description="Уникальное имя команды"),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Get the team; with a matching If-None-Match answers 304 after one version lookup
+    """
     service = TeamService(db)
-    team = await service.get_team(team_name)
+    version = await service.get_team_version(team_name)
+    etag = make_etag(version)
+    # команды не удаляются: ненулевая версия значит, что команда есть
+    if matches(request, etag, exists=version > 0):
+        return not_modified(etag)
+    # из кэша — только состав, загруженный при этой же версии: запись, закэшированная
+    # до изменения в другом воркере, старее версии и перечитывается
+    team = await service.get_team(team_name, version=version)
     if not team:
         raise HTTPException(
             status_code=404, detail={"error": {"code": "NOT_FOUND", "message": "Team not found"}}
         )
-    return team_to_schema(team)
+    # команда без версии (не менялась с появления версий) — проверка после чтения
+    if not version and matches(request, etag, exists=True):
+        return not_modified(etag)
+    return JSONBytesResponse(encode_team(team), headers=etag_headers(etag))
+
+
+@router.post("/deactivateUsers", response_model=DeactivateUsersResponse)
+async def deactivate_users(payload: DeactivateUsersRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Массовая деактивация участников команды с переназначением открытых PR
+    """
+    service = TeamService(db)
+    try:
+        deactivated, reassignments = await service.deactivate_users(
+            payload.team_name, payload.user_ids
+        )
+    except TeamNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail={"error": {"code": "NOT_FOUND", "message": str(e)}}
+        ) from e
+
+    return JSONBytesResponse(
+        {
+            "team_name": payload.team_name,
+            "deactivated": deactivated,
+            "reassignments": [
+                {"pull_request_id": pr_id, "old_user_id": old_id, "new_user_id": new_id}
+                for pr_id, old_id, new_id in reassignments
+            ],
+        }
+    )
+
+
+@router.post("/setReviewerStrategy", response_model=ReviewerStrategyResponse)
+async def set_reviewer_strategy(
+    payload: ReviewerStrategyRequest, db: AsyncSession = Depends(get_db)
+):
+    """
+    Выбрать стратегию назначения ревьюверов для команды
+    """
+    service = TeamService(db)
+    try:
+        strategy = await service.set_reviewer_strategy(payload.team_name, payload.strategy)
+    except TeamNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail={"error": {"code": "NOT_FOUND", "message": str(e)}}
+        ) from e
+    return JSONBytesResponse({"team_name": payload.team_name, "reviewer_strategy": strategy})
+
+
+@router.post(
+    "/import",
+    response_model=ImportResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_teams(
+    request: Request,
+    fmt: Literal["ndjson", "csv"] | None = Query(
+        None,
+        alias="format",
+        description="Формат тела; по умолчанию — по Content-Type (text/csv или NDJSON)",
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Потоковый импорт команд и пользователей (upsert), строки пишутся пакетами
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if content_type.startswith("text/csv") else "ndjson"
+    result = await ImportService(db).import_lines(iter_lines(request.stream()), fmt)
+    return {
+        "rows": result.rows,
+        "teams_created": result.teams_created,
+        "users_created": result.users_created,
+        "users_updated": result.users_updated,
+        "users_unchanged": result.users_unchanged,
+        "reviews_reassigned": result.reviews_reassigned,
+        "error_count": result.error_count,
+        "errors": [{"line": line, "message": message} for line, message in result.errors],
+    }
@@ -3,7 +3,8 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.schemas.schemas import UserResponse, user_to_schema
+from app.schemas.encoders import JSONBytesResponse, encode_user
+from app.schemas.schemas import UserResponse
 from app.services.user_service import UserService
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -22,4 +23,4 @@ async def set_is_active(payload: SetIsActiveRequest, db: AsyncSession = Depends(
         raise HTTPException(
             status_code=404, detail={"error": {"code": "NOT_FOUND", "message": "User not found"}}
         )
-    return {"user": user_to_schema(user)}
+    return JSONBytesResponse({"user": encode_user(user)})
@@ -0,0 +1,175 @@
+"""
+Бенчмарк массовой деактивации (TeamService.deactivate_users)
+
+Объём из условий задачи: 20 команд по 10 человек, 3000 открытых PR по два
+ревьювера. Каждый повтор пересоздаёт схему, засевает данные и замеряет
+деактивацию половины команды t0 с переназначением всех её открытых ревью
+(~300 переназначений) в новой сессии, как отдельный запрос.
+
+Использование:
+    python -m app.bench.deactivate                                   # SQLite in-memory
+    python -m app.bench.deactivate --database-url $TEST_DATABASE_URL  # PostgreSQL (БД очищается!)
+    python -m app.bench.deactivate --database-url memory://
+
+Код возврата 1, если медиана больше --target-ms (по умолчанию 100 мс).
+"""
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+import datetime
+import gc
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.bench.load import percentile
+from app.bench.service import MEMORY_URL, backend_name, make_engine
+from app.models.models import Base, PRStatus, PullRequest, PullRequestReviewer, Team, User
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.repositories.team_repository import roster_cache
+from app.services.team_service import TeamService
+
+TEAMS = 20
+USERS_PER_TEAM = 10
+PRS = 3000
+TARGET_MS = 100.0
+# половина команды t0: у каждого ~30 открытых ревью
+TEAM = "t0"
+DEACTIVATED = [f"t0u{u}" for u in range(5)]
+
+
+def build_rows() -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+    """
+    Rows of teams, users, open PRs and reviewers: PR i belongs to team i % TEAMS,
+    its reviewers are the next two members after the author
+    """
+    now = datetime.datetime.now(datetime.UTC)
+    teams = [{"team_name": f"t{t}"} for t in range(TEAMS)]
+    users = [
+        {"user_id": f"t{t}u{u}", "username": f"u{u}", "is_active": True, "team_name": f"t{t}"}
+        for t in range(TEAMS)
+        for u in range(USERS_PER_TEAM)
+    ]
+    prs, reviewers = [], []
+    for i in range(PRS):
+        team, author = i % TEAMS, i % USERS_PER_TEAM
+        prs.append(
+            {
+                "pull_request_id": f"pr{i}",
+                "pull_request_name": f"PR {i}",
+                "author_id": f"t{team}u{author}",
+                "status": PRStatus.OPEN,
+                "createdAt": now,
+                "mergedAt": None,
+            }
+        )
+        for shift in (1, 2):
+            reviewer = f"t{team}u{(author + shift) % USERS_PER_TEAM}"
+            reviewers.append(
+                {"id": f"pr{i}_{reviewer}", "pull_request_id": f"pr{i}", "reviewer_id": reviewer}
+            )
+    return teams, users, prs, reviewers
+
+
+async def seed(session: AsyncSession | MemorySession) -> None:
+    teams, users, prs, reviewers = build_rows()
+    if isinstance(session, MemorySession):
+        for row in teams:
+            session.write("team", row["team_name"])
+        for row in users:
+            session.write("user", *row.values())
+        for row in prs:
+            session.write("pr", *row.values())
+        for row in reviewers:
+            session.write("add_reviewer", row["pull_request_id"], row["reviewer_id"])
+        session.write("rebuild")
+        await session.commit()
+        return
+
+    await session.execute(insert(Team), teams)
+    await session.execute(insert(User), users)
+    await session.execute(insert(PullRequest), prs)
+    await session.execute(insert(PullRequestReviewer), reviewers)
+    await session.commit()
+
+
+async def run(url: str, repeat: int = 5) -> dict[str, float]:
+    """
+    Time deactivate_users on a fresh seed `repeat` times
+    """
+    engine = None if url == MEMORY_URL else make_engine(url)
+    timings = []
+    reassignments = 0
+    try:
+        for _ in range(repeat):
+            roster_cache.clear()
+            if engine is None:
+                store = MemoryStore()
+
+                def sessions(store: MemoryStore = store) -> MemorySession:
+                    return MemorySession(store)
+
+            else:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+                    await conn.run_sync(Base.metadata.create_all)
+                sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+            async with sessions() as session:
+                await seed(session)
+            # полная сборка мусора внутри замера добавляет десятки мс шума
+            gc.collect()
+            async with sessions() as session:
+                started = time.perf_counter()
+                _, result = await TeamService(session).deactivate_users(TEAM, DEACTIVATED)
+                timings.append((time.perf_counter() - started) * 1000)
+            reassignments = len(result)
+        if engine is not None:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        roster_cache.clear()
+        if engine is not None:
+            await engine.dispose()
+    return {
+        "n": len(timings),
+        "reassignments": reassignments,
+        "median_ms": statistics.median(timings),
+        "p95_ms": percentile(timings, 95),
+        "max_ms": max(timings),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bench.deactivate",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:"),
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.database_url, args.repeat))
+    print(
+        f"{backend_name(args.database_url)}: deactivateUsers, {result['reassignments']} "
+        f"reassignments: median {result['median_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+        f"max {result['max_ms']:.1f} ms (target {args.target_ms:.0f} ms)"
+    )
+    if result["median_ms"] > args.target_ms:
+        print("\nover target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
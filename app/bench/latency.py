@@ -0,0 +1,234 @@
+"""
+Бенчмарк /stats/latency (StatsService.get_latency) на большом засеве
+
+Засевает --prs PR (по умолчанию миллион) за последние --days дней: авторы —
+пользователи команд по 10 человек, смержена примерно половина PR, время до
+merge — экспоненциальное со средним --merge-hours. Затем замеряет отчёт по
+дням и по часам, по всем PR и по одной команде:
+
+- cold — кэш отчёта сброшен перед каждым вызовом, оба запроса идут в базу;
+- warm — повторный вызов с тем же окном, ответ из кэша latency.
+
+Использование:
+    python -m app.bench.latency                                    # SQLite-файл в /tmp
+    python -m app.bench.latency --database-url $TEST_DATABASE_URL   # PostgreSQL
+    python -m app.bench.latency --database-url memory:// --prs 200000
+    python -m app.bench.latency --prs 100000 --json /tmp/latency.json
+
+БД по --database-url очищается (drop_all)!
+"""
+
+import argparse
+import asyncio
+from collections.abc import Iterator, Sequence
+import datetime
+import json
+import os
+from pathlib import Path
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from app.bench.load import percentile
+from app.bench.service import MEMORY_URL, SEED_CHUNK, TEAM_SIZE, backend_name, make_engine
+from app.models.models import Base, PRStatus, PullRequest, Team, User
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.repositories.stats_repository import Bucket
+from app.services.stats_service import StatsService, latency_cache
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:////tmp/bench_latency.db"
+USERS = 1000
+# (bucket, отчёт по одной команде)
+CASES: tuple[tuple[Bucket, bool], ...] = (
+    ("day", False),
+    ("day", True),
+    ("hour", False),
+    ("hour", True),
+)
+
+
+def pr_rows(
+    prs: int, days: int, merge_hours: float, now: datetime.datetime, seed: int
+) -> Iterator[dict]:
+    """
+    PR rows, generated lazily: a million dicts at once do not fit comfortably
+    """
+    rng = random.Random(seed)
+    span = days * 86400
+    for n in range(prs):
+        created = now - datetime.timedelta(seconds=rng.uniform(0, span))
+        merged = None
+        if rng.random() < 0.5:
+            merged = created + datetime.timedelta(hours=rng.expovariate(1 / merge_hours))
+            if merged > now:
+                merged = None
+        yield {
+            "pull_request_id": f"pr{n}",
+            "pull_request_name": f"PR {n}",
+            "author_id": f"u{rng.randrange(USERS)}",
+            "status": PRStatus.OPEN if merged is None else PRStatus.MERGED,
+            "createdAt": created,
+            "mergedAt": merged,
+        }
+
+
+def _chunks(rows: Iterator[dict]) -> Iterator[list[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == SEED_CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def seed(engine: AsyncEngine | None, store: MemoryStore, rows: Iterator[dict]) -> None:
+    teams = [{"team_name": f"t{i}"} for i in range(USERS // TEAM_SIZE)]
+    users = [
+        {
+            "user_id": f"u{i}",
+            "username": f"User {i}",
+            "is_active": True,
+            "team_name": f"t{i // TEAM_SIZE}",
+        }
+        for i in range(USERS)
+    ]
+    if engine is None:
+        async with MemorySession(store) as session:
+            for row in teams:
+                session.write("team", row["team_name"])
+            for row in users:
+                session.write("user", *row.values())
+            for row in rows:
+                session.write("pr", *row.values())
+            await session.commit()
+        return
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Team), teams)
+        await conn.execute(insert(User), users)
+        for chunk in _chunks(rows):
+            await conn.execute(insert(PullRequest), chunk)
+    # свежая статистика планировщика, как после autovacuum / ANALYZE в проде
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+def _summary(timings: list[float]) -> dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+    }
+
+
+async def run(
+    url: str,
+    prs: int,
+    days: int = 90,
+    merge_hours: float = 20,
+    repeat: int = 5,
+    seed_value: int = 0,
+) -> dict[str, dict]:
+    """
+    Seed `prs` PRs and time cold and warm get_latency, keyed "backend/bucket/scope"
+    """
+    engine = None if url == MEMORY_URL else make_engine(url)
+    store = MemoryStore()
+    now = datetime.datetime.now(datetime.UTC)
+    results: dict[str, dict] = {}
+    try:
+        started = time.perf_counter()
+        await seed(engine, store, pr_rows(prs, days, merge_hours, now, seed_value))
+        results[f"{backend_name(url)}/seed"] = {
+            "prs": prs,
+            "seconds": round(time.perf_counter() - started, 1),
+        }
+
+        if engine is None:
+
+            def sessions() -> MemorySession:
+                return MemorySession(store)
+
+        else:
+            sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+        for bucket, per_team in CASES:
+            team_name = "t0" if per_team else None
+            cold, warm = [], []
+            for _ in range(repeat):
+                for timings in (cold, warm):
+                    if timings is cold:
+                        latency_cache.clear()
+                    async with sessions() as session:
+                        started = time.perf_counter()
+                        report = await StatsService(session).get_latency(
+                            bucket, None, None, team_name
+                        )
+                        timings.append((time.perf_counter() - started) * 1000)
+            scope = "team" if per_team else "all"
+            results[f"{backend_name(url)}/{bucket}/{scope}"] = {
+                "merged": report["time_to_merge"]["merged"],
+                "buckets": len(report["series"]),
+                "cold": _summary(cold),
+                "warm": _summary(warm),
+            }
+        if engine is not None:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        latency_cache.clear()
+        if engine is not None:
+            await engine.dispose()
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    header = f"{'report':<24}{'merged':>10}{'buckets':>9}{'cold p50':>11}{'cold p95':>11}"
+    header += f"{'warm p50':>11}"
+    lines = [header, "-" * len(header)]
+    for key, r in results.items():
+        if "cold" not in r:
+            lines.insert(0, f"{key}: {r['prs']} PRs in {r['seconds']} s\n")
+            continue
+        lines.append(
+            f"{key:<24}{r['merged']:>10}{r['buckets']:>9}"
+            f"{r['cold']['median_ms']:>11.2f}{r['cold']['p95_ms']:>11.2f}"
+            f"{r['warm']['median_ms']:>11.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bench.latency",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL)
+    )
+    parser.add_argument("--prs", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90, help="глубина засева, дней")
+    parser.add_argument("--merge-hours", type=float, default=20, help="среднее время до merge, ч")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="записать результаты в JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(
+        run(args.database_url, args.prs, args.days, args.merge_hours, args.repeat, args.seed)
+    )
+    print(format_results(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,397 @@
+"""
+Нагрузочное тестирование запущенного сервиса
+
+Засевает команды и PR, затем в режиме open loop (запросы отправляются с
+заданной частотой независимо от ответов) гоняет смесь операций и печатает
+throughput, p50/p95/p99 по эндпойнтам и долю ошибок в сравнении с SLI
+из task.md: время ответа 300 мс, успешность 99.9%.
+
+Использование:
+    python -m app.bench.load --base-url http://localhost:8080 --rps 50 --duration 60
+    python -m app.bench.load --mix create=5,get_review=5 --json report.json
+
+Код возврата 1, если SLI не выполнены, — удобно для проверки перед релизом.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+import json
+import math
+import random
+import secrets
+import sys
+import time
+
+import httpx
+
+# доли операций по умолчанию: чтения преобладают, как в обычной работе
+DEFAULT_MIX = {
+    "team_add": 1,
+    "create": 25,
+    "reassign": 10,
+    "merge": 10,
+    "get_review": 44,
+    "stats": 10,
+}
+
+ENDPOINTS = {
+    "team_add": "POST /team/add",
+    "create": "POST /pullRequest/create",
+    "reassign": "POST /pullRequest/reassign",
+    "merge": "POST /pullRequest/merge",
+    "get_review": "GET /users/getReview",
+    "stats": "GET /stats",
+}
+
+
+@dataclass
+class LoadConfig:
+    duration: float = 30.0
+    # целевая частота запросов (open loop)
+    rps: float = 5.0
+    # максимум одновременных запросов
+    concurrency: int = 50
+    teams: int = 20
+    users_per_team: int = 10
+    seed_prs: int = 200
+    mix: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    # SLI из task.md
+    sli_latency_ms: float = 300.0
+    sli_success: float = 0.999
+    # префикс id, чтобы повторные прогоны не конфликтовали с уже записанными данными
+    run_id: str = field(default_factory=lambda: secrets.token_hex(3))
+    random_seed: int | None = None
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    latency: float
+    # None — ошибка транспорта (таймаут, обрыв соединения)
+    status: int | None
+
+    @property
+    def ok(self) -> bool:
+        # 4xx — ожидаемые бизнес-ответы (NO_CANDIDATE, PR_MERGED), ошибка — только 5xx
+        return self.status is not None and self.status < 500
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile, `q` in [0, 100]
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Workload:
+    """
+    Operation mix with client-side state: users, open PRs and their reviewers
+    """
+
+    def __init__(self, client: httpx.AsyncClient, cfg: LoadConfig):
+        self.client = client
+        self.cfg = cfg
+        self.rng = random.Random(cfg.random_seed)
+        self.samples: list[Sample] = []
+        self.users: list[str] = []
+        self.open_prs: dict[str, list[str]] = {}
+        self._teams = 0
+        self._prs = 0
+
+    async def _call(
+        self, action: str, method: str, url: str, started: float | None = None, **kwargs
+    ) -> httpx.Response | None:
+        # задержка считается от запланированного старта — ожидание в очереди
+        # тоже входит, иначе перегрузка прячется (coordinated omission)
+        started = time.perf_counter() if started is None else started
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.samples.append(
+            Sample(
+                ENDPOINTS[action],
+                time.perf_counter() - started,
+                response.status_code if response is not None else None,
+            )
+        )
+        return response
+
+    def _next_team(self) -> tuple[str, list[dict]]:
+        self._teams += 1
+        team_name = f"{self.cfg.run_id}-team{self._teams}"
+        members = [
+            {"user_id": f"{team_name}-u{i}", "username": f"User {i}", "is_active": True}
+            for i in range(self.cfg.users_per_team)
+        ]
+        return team_name, members
+
+    def _track_pr(self, response: httpx.Response | None) -> None:
+        if response is not None and response.status_code in (200, 201):
+            pr = response.json()["pr"]
+            self.open_prs[pr["pull_request_id"]] = pr["assigned_reviewers"]
+
+    async def seed(self) -> None:
+        for _ in range(self.cfg.teams):
+            await self.team_add()
+        for _ in range(self.cfg.seed_prs):
+            await self.create()
+        # засев не входит в отчёт
+        self.samples.clear()
+
+    async def team_add(self, started: float | None = None) -> None:
+        team_name, members = self._next_team()
+        response = await self._call(
+            "team_add",
+            "POST",
+            "/team/add",
+            started,
+            json={"team_name": team_name, "members": members},
+        )
+        if response is not None and response.status_code == 201:
+            self.users.extend(m["user_id"] for m in members)
+
+    async def create(self, started: float | None = None) -> None:
+        if not self.users:
+            return
+        self._prs += 1
+        response = await self._call(
+            "create",
+            "POST",
+            "/pullRequest/create",
+            started,
+            json={
+                "pull_request_id": f"{self.cfg.run_id}-pr{self._prs}",
+                "pull_request_name": f"Load PR {self._prs}",
+                "author_id": self.rng.choice(self.users),
+            },
+        )
+        self._track_pr(response)
+
+    async def reassign(self, started: float | None = None) -> None:
+        candidates = [pr_id for pr_id, reviewers in self.open_prs.items() if reviewers]
+        if not candidates:
+            return
+        pr_id = self.rng.choice(candidates)
+        response = await self._call(
+            "reassign",
+            "POST",
+            "/pullRequest/reassign",
+            started,
+            json={
+                "pull_request_id": pr_id,
+                "old_user_id": self.rng.choice(self.open_prs[pr_id]),
+            },
+        )
+        if pr_id in self.open_prs:
+            self._track_pr(response)
+
+    async def merge(self, started: float | None = None) -> None:
+        if not self.open_prs:
+            return
+        # убираем из открытых до запроса, чтобы параллельные операции его не выбрали
+        pr_id = self.rng.choice(list(self.open_prs))
+        del self.open_prs[pr_id]
+        await self._call(
+            "merge", "POST", "/pullRequest/merge", started, json={"pull_request_id": pr_id}
+        )
+
+    async def get_review(self, started: float | None = None) -> None:
+        if not self.users:
+            return
+        await self._call(
+            "get_review",
+            "GET",
+            "/users/getReview",
+            started,
+            params={"user_id": self.rng.choice(self.users)},
+        )
+
+    async def stats(self, started: float | None = None) -> None:
+        await self._call("stats", "GET", "/stats", started)
+
+    def action(self, name: str) -> Callable[[float], Awaitable[None]]:
+        return getattr(self, name)
+
+
+async def run_load(client: httpx.AsyncClient, cfg: LoadConfig) -> dict:
+    """
+    Seed data, run the mix for `cfg.duration` seconds and build a report
+    """
+    unknown = set(cfg.mix) - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+
+    workload = Workload(client, cfg)
+    await workload.seed()
+
+    names = [name for name, weight in cfg.mix.items() if weight > 0]
+    weights = [cfg.mix[name] for name in names]
+    semaphore = asyncio.Semaphore(cfg.concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    async def fire(name: str, scheduled: float) -> None:
+        async with semaphore:
+            await workload.action(name)(scheduled)
+
+    interval = 1 / cfg.rps
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        scheduled = start + sent * interval
+        if scheduled - start >= cfg.duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(fire(workload.rng.choices(names, weights)[0], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sent += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    return build_report(workload.samples, time.perf_counter() - start, cfg)
+
+
+def _summary(samples: Sequence[Sample], elapsed: float) -> dict:
+    latencies = [s.latency * 1000 for s in samples]
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+    }
+
+
+def build_report(samples: Sequence[Sample], elapsed: float, cfg: LoadConfig) -> dict:
+    by_endpoint: dict[str, list[Sample]] = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+    total = _summary(samples, elapsed)
+    success_ratio = 1 - total["error_rate"] if samples else 1.0
+    latency_ok = total["p99_ms"] <= cfg.sli_latency_ms
+    success_ok = success_ratio >= cfg.sli_success
+    return {
+        "run_id": cfg.run_id,
+        "duration_s": elapsed,
+        "target_rps": cfg.rps,
+        "total": total,
+        "endpoints": {
+            name: _summary(items, elapsed) for name, items in sorted(by_endpoint.items())
+        },
+        "sli": {
+            "latency_p99_target_ms": cfg.sli_latency_ms,
+            "latency_p99_ms": total["p99_ms"],
+            "latency_ok": latency_ok,
+            "success_target": cfg.sli_success,
+            "success_ratio": success_ratio,
+            "success_ok": success_ok,
+            "passed": latency_ok and success_ok,
+        },
+    }
+
+
+def format_report(report: dict) -> str:
+    header = f"{'endpoint':<28}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines = [
+        f"run {report['run_id']}: {report['duration_s']:.1f}s, target {report['target_rps']} rps",
+        header,
+        "-" * len(header),
+    ]
+    rows = [*report["endpoints"].items(), ("total", report["total"])]
+    for name, s in rows:
+        lines.append(
+            f"{name:<28}{s['requests']:>8}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}"
+        )
+    sli = report["sli"]
+    latency = (
+        f"SLI latency: p99 {sli['latency_p99_ms']:.1f} ms "
+        f"(target <= {sli['latency_p99_target_ms']:.0f} ms) "
+        f"{'OK' if sli['latency_ok'] else 'FAIL'}"
+    )
+    success = (
+        f"SLI success: {sli['success_ratio']:.4%} "
+        f"(target >= {sli['success_target']:.1%}) {'OK' if sli['success_ok'] else 'FAIL'}"
+    )
+    lines += ["", latency, success]
+    return "\n".join(lines)
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def parse_args(argv: Sequence[str] | None = None) -> tuple[str, LoadConfig, str | None]:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(prog="python -m app.bench.load", description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--duration", type=float, default=defaults.duration)
+    parser.add_argument("--rps", type=float, default=defaults.rps)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--teams", type=int, default=defaults.teams)
+    parser.add_argument("--users-per-team", type=int, default=defaults.users_per_team)
+    parser.add_argument("--seed-prs", type=int, default=defaults.seed_prs)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=defaults.mix,
+        help=f"веса операций, например create=25,get_review=44; операции: {', '.join(ENDPOINTS)}",
+    )
+    parser.add_argument("--sli-latency-ms", type=float, default=defaults.sli_latency_ms)
+    parser.add_argument("--sli-success", type=float, default=defaults.sli_success)
+    parser.add_argument("--seed", type=int, default=None, help="seed генератора случайных чисел")
+    parser.add_argument("--json", default=None, help="записать отчёт в JSON-файл")
+    args = parser.parse_args(argv)
+
+    cfg = LoadConfig(
+        duration=args.duration,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        teams=args.teams,
+        users_per_team=args.users_per_team,
+        seed_prs=args.seed_prs,
+        mix=args.mix,
+        sli_latency_ms=args.sli_latency_ms,
+        sli_success=args.sli_success,
+        random_seed=args.seed,
+    )
+    return args.base_url, cfg, args.json
+
+
+async def _run(base_url: str, cfg: LoadConfig) -> dict:
+    limits = httpx.Limits(max_connections=cfg.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10.0) as client:
+        return await run_load(client, cfg)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    base_url, cfg, json_path = parse_args(argv)
+    report = asyncio.run(_run(base_url, cfg))
+
+    print(format_report(report))
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["sli"]["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Офлайн-симулятор стратегий выбора ревьюверов: справедливость и время выбора
+
+Поток событий «PR создан / PR смёржен» проигрывается через каждую стратегию из
+app.services.reviewer_selection — тот же код, что в PullRequestService, без базы.
+Нагрузка ревьювера — число его открытых ревью, как у count_open_reviews.
+
+Поток:
+
+- синтетический (по умолчанию): PR приходят пуассоновским потоком, автор —
+  случайный участник случайной команды, ревью длится экспоненциальное время;
+- записанный (--events): NDJSON из outbox-синка file:// (события pr.created и
+  pr.merged), состав команд — файл импорта (--roster, NDJSON как у
+  /team/import); без него все участники событий считаются одной командой.
+
+Метрики по каждой стратегии:
+
+- variance_mean, variance_p95 — дисперсия нагрузки участников команды после
+  каждого назначения;
+- max_depth — наибольшая очередь открытых ревью у одного ревьювера;
+- assignments_cv — коэффициент вариации числа назначений за весь прогон;
+- pick_us_p50, pick_us_p99 — время одного выбора, мкс.
+
+Использование:
+    python -m app.bench.selection
+    python -m app.bench.selection --teams 20 --team-size 6 --prs 50000
+    python -m app.bench.selection --events /tmp/outbox.ndjson --roster org.ndjson \\
+        --json /tmp/selection.json
+"""
+
+import argparse
+from collections.abc import Iterable, Sequence
+import datetime
+import json
+from pathlib import Path
+import random
+import statistics
+import time
+from typing import NamedTuple
+
+from app.bench.load import percentile
+from app.services.events import PR_CREATED, PR_MERGED
+from app.services.pr_service import MAX_REVIEWERS
+from app.services.reviewer_selection import STRATEGIES, SelectionState
+
+# без --roster все участники записанного потока — одна команда
+DEFAULT_TEAM = "all"
+
+
+class TraceEvent(NamedTuple):
+    at: float
+    created: bool
+    pr_id: str
+    author_id: str | None
+
+
+class Trace(NamedTuple):
+    # события по возрастанию времени
+    events: list[TraceEvent]
+    # team_name -> активные участники
+    teams: dict[str, list[str]]
+
+
+def synthetic_trace(
+    teams: int, team_size: int, prs: int, rate: float, review_hours: float, seed: int
+) -> Trace:
+    """
+    Poisson arrivals (`rate` PRs per hour), exponential review time, random authors
+    """
+    rng = random.Random(seed)
+    members = {f"team-{t}": [f"t{t}-u{i}" for i in range(team_size)] for t in range(teams)}
+    users = [user_id for team in members.values() for user_id in team]
+
+    events = []
+    at = 0.0
+    for i in range(prs):
+        at += rng.expovariate(rate)
+        events.append(TraceEvent(at, True, f"pr-{i}", users[rng.randrange(len(users))]))
+        events.append(TraceEvent(at + rng.expovariate(1 / review_hours), False, f"pr-{i}", None))
+    # при равном времени создание идёт раньше мержа
+    events.sort(key=lambda e: (e.at, not e.created))
+    return Trace(events, members)
+
+
+def _timestamp(value: str) -> float:
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def recorded_trace(event_lines: Iterable[str], roster_lines: Iterable[str] | None = None) -> Trace:
+    """
+    Trace from outbox NDJSON and an optional import-format roster
+
+    Only pr.created and pr.merged are replayed, in file order: the reviewers
+    assigned then are ignored, every strategy picks its own.
+    """
+    events = []
+    seen: dict[str, None] = {}
+    for line in event_lines:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        payload = event["payload"]
+        if event["type"] == PR_CREATED:
+            author_id = payload["author_id"]
+            seen.setdefault(author_id)
+            for user_id in payload["assigned_reviewers"]:
+                seen.setdefault(user_id)
+            events.append(
+                TraceEvent(
+                    _timestamp(event["createdAt"]), True, payload["pull_request_id"], author_id
+                )
+            )
+        elif event["type"] == PR_MERGED:
+            events.append(
+                TraceEvent(_timestamp(event["createdAt"]), False, payload["pull_request_id"], None)
+            )
+
+    if roster_lines is None:
+        return Trace(events, {DEFAULT_TEAM: list(seen)})
+    teams: dict[str, list[str]] = {}
+    for line in roster_lines:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if row.get("is_active", True):
+            teams.setdefault(row["team_name"], []).append(row["user_id"])
+    return Trace(events, teams)
+
+
+def simulate(trace: Trace, strategy_name: str, seed: int = 0) -> dict[str, float]:
+    """
+    Replay the trace through one strategy and summarise fairness and pick time
+    """
+    strategy = STRATEGIES[strategy_name]
+    team_of = {user_id: team for team, members in trace.teams.items() for user_id in members}
+    # нагрузка общая для всех команд, как в базе; курсор — у каждой команды свой
+    loads: dict[str, int] = {}
+    states = {team: SelectionState(loads) for team in trace.teams}
+    assigned_total = dict.fromkeys(team_of, 0)
+    open_reviews: dict[str, list[str]] = {}
+    variances: list[float] = []
+    pick_ns: list[int] = []
+    max_depth = 0
+
+    # random, weighted и least_loaded (при равной нагрузке) берут случайность
+    # из модуля random — прогон воспроизводим
+    random.seed(seed)
+
+    for event in trace.events:
+        if not event.created:
+            for user_id in open_reviews.pop(event.pr_id, ()):
+                loads[user_id] -= 1
+            continue
+        team = team_of.get(event.author_id)
+        if team is None:
+            continue
+        members = trace.teams[team]
+        started = time.perf_counter_ns()
+        chosen = strategy.pick(members, {event.author_id}, MAX_REVIEWERS, states[team])
+        pick_ns.append(time.perf_counter_ns() - started)
+
+        open_reviews[event.pr_id] = chosen
+        for user_id in chosen:
+            assigned_total[user_id] += 1
+            max_depth = max(max_depth, loads[user_id])
+        variances.append(statistics.pvariance([loads.get(user_id, 0) for user_id in members]))
+
+    totals = list(assigned_total.values())
+    pick_us = [ns / 1000 for ns in pick_ns]
+    return {
+        "decisions": len(pick_ns),
+        "variance_mean": round(statistics.fmean(variances), 3) if variances else 0.0,
+        "variance_p95": round(percentile(variances, 95), 3),
+        "max_depth": max_depth,
+        "assignments_cv": (
+            round(statistics.pstdev(totals) / statistics.fmean(totals), 3) if sum(totals) else 0.0
+        ),
+        "pick_us_p50": round(percentile(pick_us, 50), 2),
+        "pick_us_p99": round(percentile(pick_us, 99), 2),
+    }
+
+
+def run(trace: Trace, strategies: Sequence[str], seed: int = 0) -> dict[str, dict[str, float]]:
+    return {name: simulate(trace, name, seed) for name in strategies}
+
+
+COLUMNS = (
+    "decisions",
+    "variance_mean",
+    "variance_p95",
+    "max_depth",
+    "assignments_cv",
+    "pick_us_p50",
+    "pick_us_p99",
+)
+
+
+def format_results(results: dict[str, dict[str, float]]) -> str:
+    lines = [f"{'strategy':<14}" + "".join(f"{column:>16}" for column in COLUMNS)]
+    for name, r in results.items():
+        lines.append(f"{name:<14}" + "".join(f"{r[column]:>16}" for column in COLUMNS))
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bench.selection",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--team-size", type=int, default=8)
+    parser.add_argument("--prs", type=int, default=20_000)
+    parser.add_argument("--rate", type=float, default=20, help="новых PR в час")
+    parser.add_argument("--review-hours", type=float, default=8, help="среднее время ревью, ч")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--events", type=Path, help="NDJSON outbox-синка вместо синтетики")
+    parser.add_argument("--roster", type=Path, help="состав команд в формате импорта (NDJSON)")
+    parser.add_argument(
+        "--strategies",
+        default=",".join(STRATEGIES),
+        help="стратегии через запятую",
+    )
+    parser.add_argument("--json", type=Path, help="записать результаты в JSON")
+    args = parser.parse_args(argv)
+
+    if args.events:
+        with args.events.open() as events:
+            if args.roster:
+                with args.roster.open() as roster:
+                    trace = recorded_trace(events, roster)
+            else:
+                trace = recorded_trace(events)
+    else:
+        trace = synthetic_trace(
+            args.teams, args.team_size, args.prs, args.rate, args.review_hours, args.seed
+        )
+
+    results = run(trace, args.strategies.split(","), args.seed)
+    print(format_results(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,166 @@
+"""
+Бенчмарк сериализации ответа /users/getReview: Pydantic + response_model против orjson
+
+Для каждого размера списка строит строки как из ReviewerRepository и замеряет
+процессорное время на запрос:
+
+- pydantic — прежний путь: объекты PullRequestShort, валидация и сериализация
+  через response_model маршрута (fastapi.routing.serialize_response), JSONResponse;
+- orjson — текущий путь: кодировщики app.schemas.encoders и JSONBytesResponse.
+
+Байты ответа обоих путей сверяются.
+
+Использование:
+    python -m app.bench.serialization
+    python -m app.bench.serialization --rows 100,1000,10000 --repeat 200 --json out.json
+"""
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+import datetime
+import json
+from pathlib import Path
+import statistics
+import time
+from typing import NamedTuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.review import router as review_router
+from app.models.models import PRStatus
+from app.schemas.encoders import JSONBytesResponse, encode_pr_shorts
+from app.schemas.schemas import PullRequestShort
+
+DEFAULT_ROWS = (10, 100, 1000, 10_000)
+
+
+class ReviewRow(NamedTuple):
+    """
+    Same attributes as a row of ReviewerRepository.get_prs_by_reviewer
+    """
+
+    pull_request_id: str
+    pull_request_name: str
+    author_id: str
+    status: PRStatus
+    createdAt: datetime.datetime
+
+
+def make_rows(n: int) -> list[ReviewRow]:
+    started = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+    return [
+        ReviewRow(
+            f"pr-{i:07d}",
+            f"Feature #{i}: подготовка релиза",
+            f"u{i % 97}",
+            PRStatus.MERGED if i % 3 == 0 else PRStatus.OPEN,
+            started + datetime.timedelta(seconds=i),
+        )
+        for i in range(n)
+    ]
+
+
+def _response_field():
+    for route in review_router.routes:
+        if isinstance(route, APIRoute) and route.path.endswith("/getReview"):
+            return route.response_field
+    raise LookupError("/users/getReview route not found")
+
+
+async def render_pydantic(rows: Sequence[ReviewRow], field) -> bytes:
+    content = {
+        "user_id": "u1",
+        "pull_requests": [
+            PullRequestShort(
+                pull_request_id=row.pull_request_id,
+                pull_request_name=row.pull_request_name,
+                author_id=row.author_id,
+                status=row.status.value,
+            )
+            for row in rows
+        ],
+        "next_cursor": None,
+    }
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+def render_orjson(rows: Sequence[ReviewRow]) -> bytes:
+    return JSONBytesResponse(
+        {"user_id": "u1", "pull_requests": encode_pr_shorts(rows), "next_cursor": None}
+    ).body
+
+
+async def _median_us(render, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time_ns()
+        await render()
+        samples.append((time.process_time_ns() - started) / 1000)
+    return statistics.median(samples)
+
+
+async def run(sizes: Sequence[int], repeat: int) -> dict[int, dict[str, float]]:
+    field = _response_field()
+    results = {}
+    for n in sizes:
+        rows = make_rows(n)
+        slow = await render_pydantic(rows, field)
+        fast = render_orjson(rows)
+        if slow != fast:
+            raise AssertionError(f"{n} rows: responses differ")
+
+        async def pydantic_path(rows=rows):
+            await render_pydantic(rows, field)
+
+        async def orjson_path(rows=rows):
+            render_orjson(rows)
+
+        # достаточно повторов и для маленьких списков (process_time грубее perf_counter)
+        times = max(repeat, 20_000 // max(n, 1))
+        pydantic_us = await _median_us(pydantic_path, times)
+        orjson_us = await _median_us(orjson_path, times)
+        results[n] = {
+            "bytes": len(fast),
+            "pydantic_us": round(pydantic_us, 1),
+            "orjson_us": round(orjson_us, 1),
+            "saved_us": round(pydantic_us - orjson_us, 1),
+            "speedup": round(pydantic_us / orjson_us, 1) if orjson_us else float("inf"),
+        }
+    return results
+
+
+def format_results(results: dict[int, dict[str, float]]) -> str:
+    lines = [
+        f"{'rows':>8} {'bytes':>10} {'pydantic µs':>12} {'orjson µs':>10} {'saved µs':>10} {'x':>6}"
+    ]
+    for n, r in results.items():
+        lines.append(
+            f"{n:>8} {r['bytes']:>10} {r['pydantic_us']:>12} {r['orjson_us']:>10}"
+            f" {r['saved_us']:>10} {r['speedup']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bench.serialization", description=__doc__)
+    parser.add_argument(
+        "--rows",
+        default=",".join(map(str, DEFAULT_ROWS)),
+        help="размеры списка ревью через запятую",
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", type=Path, help="записать результаты в JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [int(n) for n in args.rows.split(",")]
+    results = asyncio.run(run(sizes, args.repeat))
+    print(format_results(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,370 @@
+"""
+Микробенчмарки сервисного слоя на SQLite, PostgreSQL и в памяти
+
+Для каждого масштаба (число пользователей) пересоздаёт схему, засевает
+команды по 10 человек, по 2 PR на пользователя (половина смержена) с двумя
+ревьюверами, и замеряет горячие пути сервисов без HTTP. Результаты пишутся
+в JSON и сравниваются с сохранённым baseline.
+
+Использование:
+    python -m app.bench.service                                   # SQLite in-memory
+    python -m app.bench.service --database-url $TEST_DATABASE_URL  # PostgreSQL
+    python -m app.bench.service --database-url memory://           # бэкенд в памяти
+    python -m app.bench.service --scales 200,10000 --update-baseline
+
+Код возврата 1, если медиана какого-либо бенчмарка хуже baseline больше
+чем в --threshold раз. БД по --database-url очищается (drop_all)!
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+import datetime
+import json
+import os
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import StaticPool
+
+from app.bench.load import percentile
+from app.models.models import Base, PRStatus, PullRequest, PullRequestReviewer, Team, User
+from app.repositories.backend import get_repositories
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.repositories.stats_repository import StatsRepository
+from app.repositories.team_repository import roster_cache
+from app.repositories.user_repository import USER_COLUMNS
+from app.services.pr_service import PullRequestService
+from app.services.pr_service_errors import NoCandidateError
+from app.services.stats_service import StatsService
+
+DEFAULT_SCALES = (200, 10_000, 100_000)
+DEFAULT_BASELINE = Path("benchmarks/service_baseline.json")
+# --database-url для бэкенда в памяти (STORAGE_BACKEND=memory)
+MEMORY_URL = "memory://"
+TEAM_SIZE = 10
+# строк в одном INSERT при засеве: укладываемся в лимит параметров asyncpg (32767)
+SEED_CHUNK = 4000
+
+
+def make_engine(url: str) -> AsyncEngine:
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(
+            url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+    return create_async_engine(url)
+
+
+def backend_name(url: str) -> str:
+    if url == MEMORY_URL:
+        return "memory"
+    return make_url(url).get_backend_name()
+
+
+class Dataset:
+    """
+    Seeded data and the client-side state benchmarks draw their inputs from
+    """
+
+    def __init__(self, users: int, rng: random.Random):
+        self.rng = rng
+        self.user_ids = [f"u{i}" for i in range(users)]
+        self.open_prs: dict[str, list[str]] = {}
+        self._seq = 0
+
+    def next_id(self, prefix: str) -> str:
+        self._seq += 1
+        return f"{prefix}-bench{self._seq}"
+
+    def build_rows(self) -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+        """
+        Rows of teams, users, PRs and reviewers to seed
+        """
+        users = len(self.user_ids)
+        teams = max(users // TEAM_SIZE, 1)
+        now = datetime.datetime.now(datetime.UTC)
+
+        team_rows = [{"team_name": f"t{i}"} for i in range(teams)]
+        user_rows = [
+            {
+                "user_id": user_id,
+                "username": f"User {i}",
+                # каждый десятый неактивен
+                "is_active": i % TEAM_SIZE != TEAM_SIZE - 1,
+                "team_name": f"t{min(i // TEAM_SIZE, teams - 1)}",
+            }
+            for i, user_id in enumerate(self.user_ids)
+        ]
+
+        prs, reviewers = [], []
+        for n in range(users * 2):
+            author = n % users
+            team_start = min(author // TEAM_SIZE, teams - 1) * TEAM_SIZE
+            team = [
+                i
+                for i in range(team_start, min(team_start + TEAM_SIZE, users))
+                if i != author and i % TEAM_SIZE != TEAM_SIZE - 1
+            ]
+            pr_id = f"pr{n}"
+            merged = n % 2 == 1
+            prs.append(
+                {
+                    "pull_request_id": pr_id,
+                    "pull_request_name": f"PR {n}",
+                    "author_id": self.user_ids[author],
+                    "status": PRStatus.MERGED if merged else PRStatus.OPEN,
+                    "createdAt": now - datetime.timedelta(seconds=users * 2 - n),
+                    "mergedAt": now if merged else None,
+                }
+            )
+            chosen = [self.user_ids[i] for i in self.rng.sample(team, min(2, len(team)))]
+            reviewers += [
+                {"id": f"{pr_id}_{r}", "pull_request_id": pr_id, "reviewer_id": r} for r in chosen
+            ]
+            if not merged:
+                self.open_prs[pr_id] = chosen
+        return team_rows, user_rows, prs, reviewers
+
+    async def seed(self, session: AsyncSession | MemorySession) -> None:
+        teams, users, prs, reviewers = self.build_rows()
+        if isinstance(session, MemorySession):
+            for row in teams:
+                session.write("team", row["team_name"])
+            for row in users:
+                session.write("user", *(row[name] for name in USER_COLUMNS))
+            for row in prs:
+                session.write("pr", *row.values())
+            for row in reviewers:
+                session.write("add_reviewer", row["pull_request_id"], row["reviewer_id"])
+            session.write("rebuild")
+            await session.commit()
+            return
+
+        await _insert_chunks(session, Team, teams)
+        await _insert_chunks(session, User, users)
+        await _insert_chunks(session, PullRequest, prs)
+        await _insert_chunks(session, PullRequestReviewer, reviewers)
+        await StatsRepository(session).rebuild()
+        await session.commit()
+
+
+async def _insert_chunks(session: AsyncSession, model: type[Base], rows: list[dict]) -> None:
+    for start in range(0, len(rows), SEED_CHUNK):
+        await session.execute(insert(model), rows[start : start + SEED_CHUNK])
+
+
+async def bench_create_pr(session: AsyncSession, data: Dataset) -> None:
+    pr_id = data.next_id("pr")
+    pr = await PullRequestService(session).create_pr(pr_id, "bench", data.rng.choice(data.user_ids))
+    data.open_prs[pr_id] = [r.reviewer_id for r in pr.reviewers]
+
+
+async def bench_reassign_reviewer(session: AsyncSession, data: Dataset) -> None:
+    pr_id = data.rng.choice([pr_id for pr_id, reviewers in data.open_prs.items() if reviewers])
+    old = data.rng.choice(data.open_prs[pr_id])
+    try:
+        _pr, new = await PullRequestService(session).reassign_reviewer(pr_id, old)
+    except NoCandidateError:
+        return
+    data.open_prs[pr_id] = [new if r == old else r for r in data.open_prs[pr_id]]
+
+
+async def bench_merge_pr(session: AsyncSession, data: Dataset) -> None:
+    pr_id = data.rng.choice(list(data.open_prs))
+    del data.open_prs[pr_id]
+    await PullRequestService(session).merge_pr(pr_id)
+
+
+async def bench_get_prs_by_reviewer(session: AsyncSession, data: Dataset) -> None:
+    await PullRequestService(session).get_prs_by_reviewer(data.rng.choice(data.user_ids), limit=50)
+
+
+async def bench_add_team(session: AsyncSession, data: Dataset) -> None:
+    team_name = data.next_id("team")
+    await get_repositories(session).team.add_team(
+        team_name,
+        [
+            {"user_id": f"{team_name}-u{i}", "username": f"User {i}", "is_active": True}
+            for i in range(TEAM_SIZE)
+        ],
+    )
+
+
+async def bench_get_stats(session: AsyncSession, data: Dataset) -> None:
+    await StatsService(session).get_stats(limit=10)
+
+
+BENCHMARKS: dict[str, Callable[[AsyncSession, Dataset], Awaitable[None]]] = {
+    "create_pr": bench_create_pr,
+    "reassign_reviewer": bench_reassign_reviewer,
+    "merge_pr": bench_merge_pr,
+    "get_prs_by_reviewer": bench_get_prs_by_reviewer,
+    "add_team": bench_add_team,
+    "get_stats": bench_get_stats,
+}
+
+
+async def run_scale(
+    engine: AsyncEngine | None, users: int, repeat: int, warmup: int, seed: int | None
+) -> dict[str, dict]:
+    """
+    Recreate the schema (a new store for engine=None), seed `users` users and time every benchmark
+    """
+    roster_cache.clear()
+    if engine is None:
+        store = MemoryStore()
+
+        def sessions() -> MemorySession:
+            return MemorySession(store)
+
+    else:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    data = Dataset(users, random.Random(seed))
+    async with sessions() as session:
+        await data.seed(session)
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        timings = []
+        for i in range(warmup + repeat):
+            # каждая операция — в новой сессии, как отдельный запрос
+            async with sessions() as session:
+                started = time.perf_counter()
+                await bench(session, data)
+                elapsed = time.perf_counter() - started
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+        results[name] = {
+            "n": len(timings),
+            "median_ms": statistics.median(timings),
+            "p95_ms": percentile(timings, 95),
+            "min_ms": min(timings),
+        }
+    return results
+
+
+async def run_suite(
+    url: str,
+    scales: Sequence[int] = DEFAULT_SCALES,
+    repeat: int = 30,
+    warmup: int = 3,
+    seed: int | None = 0,
+) -> dict[str, dict]:
+    """
+    Run all benchmarks at every scale, results are keyed "backend/users/benchmark"
+    """
+    engine = None if url == MEMORY_URL else make_engine(url)
+    backend = backend_name(url)
+    results = {}
+    try:
+        for users in scales:
+            for name, result in (await run_scale(engine, users, repeat, warmup, seed)).items():
+                results[f"{backend}/{users}/{name}"] = result
+        if engine is not None:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        if engine is not None:
+            await engine.dispose()
+    return results
+
+
+def find_regressions(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    threshold: float = 1.25,
+    min_delta_ms: float = 0.5,
+) -> list[str]:
+    """
+    Benchmarks whose median got worse than baseline by `threshold` times
+
+    `min_delta_ms` ignores noise on sub-millisecond operations.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        current, previous = result["median_ms"], base["median_ms"]
+        if current > previous * threshold and current - previous > min_delta_ms:
+            regressions.append(
+                f"{key}: median {current:.2f} ms vs baseline {previous:.2f} ms "
+                f"(x{current / previous:.2f})"
+            )
+    return regressions
+
+
+def format_results(results: dict[str, dict], baseline: dict[str, dict]) -> str:
+    header = f"{'benchmark':<44}{'median':>10}{'p95':>10}{'baseline':>10}"
+    lines = [header, "-" * len(header)]
+    for key, r in results.items():
+        base = baseline.get(key)
+        base_col = f"{base['median_ms']:>10.2f}" if base else f"{'-':>10}"
+        lines.append(f"{key:<44}{r['median_ms']:>10.2f}{r['p95_ms']:>10.2f}{base_col}")
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bench.service", description=__doc__)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:"),
+    )
+    parser.add_argument(
+        "--scales",
+        type=lambda v: [int(s) for s in v.split(",")],
+        default=list(DEFAULT_SCALES),
+        help="числа пользователей через запятую",
+    )
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_suite(args.database_url, args.scales, args.repeat, args.warmup))
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    print(format_results(results, stored))
+
+    # baseline меняется только явно: обычный прогон с ним лишь сравнивается.
+    # Результаты других бэкендов и масштабов в нём сохраняются
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({**stored, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+    # без baseline регрессию не найти — это ошибка прогона, а не «нет регрессий»
+    missing = sorted(results.keys() - stored.keys())
+    if missing:
+        print(f"\nMISSING BASELINE in {args.baseline} (record it with --update-baseline):")
+        print("\n".join(missing))
+        return 2
+
+    regressions = find_regressions(results, stored, args.threshold)
+    if regressions:
+        print("\nREGRESSIONS:")
+        print("\n".join(regressions))
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
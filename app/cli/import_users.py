@@ -0,0 +1,58 @@
+"""
+Массовый импорт команд и пользователей из NDJSON или CSV
+
+Использование:
+    python -m app.cli.import_users org.ndjson
+    python -m app.cli.import_users org.csv --batch-size 5000
+    cat org.ndjson | python -m app.cli.import_users -
+
+Формат определяется по расширению файла (.csv — CSV, иначе NDJSON) или --format.
+Колонки/поля: team_name, user_id, username, is_active.
+
+Пишет в бэкенд из STORAGE_BACKEND; для memory импорт сохраняется только в
+журнал MEMORY_SNAPSHOT_PATH, который сервис проигрывает при старте.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import TextIO
+
+from app.db.session import engine, new_session
+from app.services.import_service import FORMATS, ImportResult, ImportService, aiter_sync
+
+
+async def run(source: TextIO, fmt: str, batch_size: int | None) -> ImportResult:
+    async with new_session() as session:
+        result = await ImportService(session, batch_size).import_lines(aiter_sync(source), fmt)
+    await engine.dispose()
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="файл NDJSON/CSV или '-' для stdin")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    if args.path == "-":
+        result = asyncio.run(run(sys.stdin, fmt, args.batch_size))
+    else:
+        with open(args.path, encoding="utf-8", newline="") as source:
+            result = asyncio.run(run(source, fmt, args.batch_size))
+
+    print(
+        f"rows={result.rows} teams_created={result.teams_created} "
+        f"users_created={result.users_created} users_updated={result.users_updated} "
+        f"users_unchanged={result.users_unchanged} "
+        f"reviews_reassigned={result.reviews_reassigned} errors={result.error_count}"
+    )
+    for line, message in result.errors:
+        print(f"  line {line}: {message}", file=sys.stderr)
+    return 1 if result.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Пересчёт счётчиков статистики с нуля по исходным таблицам
+
+Использование:
+    python -m app.cli.rebuild_stats
+"""
+
+import asyncio
+
+from app.db.session import SessionLocal, engine
+from app.services.stats_service import StatsService
+
+
+async def main() -> None:
+    async with SessionLocal() as session:
+        await StatsService(session).rebuild()
+        stats = await StatsService(session).get_stats(limit=0)
+    await engine.dispose()
+    print(f"stats rebuilt: total_prs={stats['total_prs']} total_reviews={stats['total_reviews']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
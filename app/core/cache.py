@@ -0,0 +1,83 @@
+# In-process LRU cache with optional TTL
+#
+# Кэш живёт в памяти процесса и не разделяется между воркерами, поэтому
+# для данных, которые могут поменяться в другом процессе, задаётся TTL —
+# он ограничивает время, в течение которого запись может быть устаревшей.
+from collections import OrderedDict
+from collections.abc import Hashable
+import time
+
+# именованные кэши — для метрик (/metrics)
+caches: dict[str, "LRUCache"] = {}
+
+
+class LRUCache[K: Hashable, V]:
+    """
+    Bounded LRU cache with hit/miss/eviction counters
+
+    `token()` + `set(..., token=...)` protect from a lost invalidation: a value
+    loaded before an invalidation is not stored after it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None, name: str | None = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if name is not None:
+            caches[name] = self
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at >= time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def token(self) -> int:
+        return self._generation
+
+    def set(self, key: K, value: V, token: int | None = None) -> None:
+        if token is not None and token != self._generation:
+            # между загрузкой и записью была инвалидация — значение могло устареть
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._data.clear()
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
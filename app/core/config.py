@@ -6,6 +6,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Settings:
     PROJECT_NAME: str = "PR Reviewer Assignment Service"
     PROJECT_VERSION: str = "1.0.0"
@@ -23,5 +30,66 @@ class Settings:
     )
     API_PREFIX: str = ""
 
+    # хранилище: "sql" — база по DATABASE_URL, "memory" — память процесса
+    # (один воркер) с необязательным append-only журналом для восстановления
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "sql")
+    MEMORY_SNAPSHOT_PATH: str = os.getenv("MEMORY_SNAPSHOT_PATH", "")
+
+    # логирование каждого SQL-запроса — только для отладки
+    DB_ECHO: bool = _env_bool("DB_ECHO", False)
+
+    # пул соединений на один процесс: всего соединений до
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW), это должно быть меньше max_connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", True)
+
+    # кэш подготовленных выражений asyncpg на соединение (0 — выключен)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # режим PgBouncer (pool_mode=transaction): без кэша prepared statements
+    DB_PGBOUNCER: bool = _env_bool("DB_PGBOUNCER", False)
+    # statement_timeout на стороне сервера, мс (0 — без ограничения)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+    # кэш составов команд (app.repositories.team_repository.roster_cache)
+    ROSTER_CACHE_SIZE: int = int(os.getenv("ROSTER_CACHE_SIZE", "1024"))
+    ROSTER_CACHE_TTL: float = float(os.getenv("ROSTER_CACHE_TTL", "30"))
+
+    # шарды глобальных счётчиков stats_counters и версий resource_versions:
+    # записи разных PR / команд идут в разные строки и не ждут блокировок друг друга
+    COUNTER_SHARDS: int = int(os.getenv("COUNTER_SHARDS", "16"))
+
+    # кэш ответов /stats/latency (app.services.stats_service.latency_cache)
+    LATENCY_CACHE_SIZE: int = int(os.getenv("LATENCY_CACHE_SIZE", "256"))
+    LATENCY_CACHE_TTL: float = float(os.getenv("LATENCY_CACHE_TTL", "60"))
+
+    # стратегия выбора ревьюверов для команд без своей (app.services.reviewer_selection)
+    REVIEWER_STRATEGY: str = os.getenv("REVIEWER_STRATEGY", "least_loaded")
+
+    # строк на одну транзакцию массового импорта (/team/import, app.cli.import_users)
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+    # ответы POST-запросов с Idempotency-Key (app.core.idempotency)
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+
+    # доставка событий outbox (app.services.outbox_dispatcher, синки — app.core.sinks):
+    # none — диспетчер в этом процессе не запускается, null — события отбрасываются
+    OUTBOX_SINK: str = os.getenv("OUTBOX_SINK", "null")
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.5"))
+    OUTBOX_SINK_TIMEOUT: float = float(os.getenv("OUTBOX_SINK_TIMEOUT", "5"))
+    # повтор после ошибки через RETRY_BASE * 2^(попытка-1), но не дольше RETRY_MAX, с
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE: float = float(os.getenv("OUTBOX_RETRY_BASE", "1"))
+    OUTBOX_RETRY_MAX: float = float(os.getenv("OUTBOX_RETRY_MAX", "300"))
+
+    # /users/reviewStream (SSE): комментарий-пинг раз в HEARTBEAT с (0 — без пингов),
+    # подписчик, отставший на QUEUE_SIZE событий, получает resync и отключается
+    REVIEW_STREAM_HEARTBEAT: float = float(os.getenv("REVIEW_STREAM_HEARTBEAT", "15"))
+    REVIEW_STREAM_QUEUE_SIZE: int = int(os.getenv("REVIEW_STREAM_QUEUE_SIZE", "100"))
+
 
 settings = Settings()
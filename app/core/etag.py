@@ -0,0 +1,40 @@
+# ETag / If-None-Match for read endpoints
+#
+# ETag — версия ресурса из resource_versions (VersionRepository): сервисы
+# увеличивают её в транзакции каждого изменения, поэтому тот же ETag значит
+# те же байты ответа (strong ETag). Эндпойнт читает версию до основных
+# запросов: если изменение успеет между ними, ответ уйдёт со старым ETag и
+# следующий опрос получит 200 — лишняя передача, но не устаревшие данные.
+#
+# Команда с версией 0 могла не существовать: If-None-Match для неё проверяется
+# только после чтения, иначе "*" или '"0"' дали бы 304 вместо 404. Список
+# ревью и статистика есть всегда (пустые), для них версия 0 — обычная версия.
+from fastapi import Request, Response
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    # no-cache: кэши могут хранить ответ, но обязаны перепроверять его по ETag
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def matches(request: Request, etag: str, exists: bool) -> bool:
+    """
+    If-None-Match lists the tag or is "*" (weak comparison, RFC 9110);
+    a resource without a current representation matches nothing
+    """
+    header = request.headers.get("if-none-match")
+    if not header or not exists:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,178 @@
+# Idempotency-Key for POST endpoints: stored response replay
+#
+# Клиент повторяет POST с тем же заголовком Idempotency-Key — ответ первого
+# вызова отдаётся из кэша без повторного выполнения логики: повторный create
+# не получает 409, повторный reassign не переназначает второй раз. Ключ
+# действует в пределах пути; запрос сверяется по sha256 от query string,
+# Content-Type и тела (/team/import?format=csv и ?format=ndjson с одним телом —
+# разные запросы), тот же ключ с другим запросом — ошибка. Кэш — LRU с TTL в памяти процесса, поэтому при
+# нескольких воркерах повтор, попавший в другой процесс, выполнится заново.
+from dataclasses import dataclass
+import hashlib
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+CONTENT_TYPE_HEADER = b"content-type"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+# ответы больше не сохраняются (выгрузки, большие пакеты)
+MAX_STORED_BODY = 1 << 20
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    fingerprint: bytes
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    # маршрут первого вызова — чтобы метрики повтора шли с тем же route
+    route: Any
+
+
+idempotency_cache: LRUCache[tuple[str, str], StoredResponse] = LRUCache(
+    settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL, name="idempotency"
+)
+
+
+def _error(status: int, code: str, message: str) -> JSONResponse:
+    # тот же формат, что у HTTPException в эндпойнтах
+    return JSONResponse({"detail": {"error": {"code": code, "message": message}}}, status)
+
+
+def _request_digest(scope) -> "hashlib._Hash":
+    # sha256 с уже учтёнными query string и Content-Type, тело дописывается при чтении
+    content_type = next((v for k, v in scope["headers"] if k == CONTENT_TYPE_HEADER), b"")
+    digest = hashlib.sha256()
+    for part in (scope.get("query_string", b""), content_type):
+        digest.update(len(part).to_bytes(4, "big") + part)
+    return digest
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware: replay the stored response of a POST with a seen Idempotency-Key
+
+    Only complete responses with status < 500 are stored, so a retry after
+    a server error runs again. A second request with a key that is still
+    being processed gets 409 instead of running concurrently.
+    """
+
+    def __init__(self, app, cache: LRUCache[tuple[str, str], StoredResponse] = idempotency_cache):
+        self.app = app
+        self.cache = cache
+        self._in_flight: set[tuple[str, str]] = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        raw_key = next((v for k, v in scope["headers"] if k == IDEMPOTENCY_HEADER), None)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = raw_key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = _error(
+                400,
+                "INVALID_IDEMPOTENCY_KEY",
+                f"Idempotency-Key must be 1..{MAX_KEY_LENGTH} characters",
+            )
+            await response(scope, receive, send)
+            return
+
+        cache_key = (scope["path"], key)
+        stored = self.cache.get(cache_key)
+        if stored is not None:
+            await self._replay(stored, scope, receive, send)
+            return
+        if cache_key in self._in_flight:
+            response = _error(
+                409, "IDEMPOTENCY_IN_PROGRESS", "Request with this key is still in progress"
+            )
+            await response(scope, receive, send)
+            return
+
+        # тело хэшируется по мере чтения — потоковые эндпойнты (/team/import) не буферизуются
+        digest = _request_digest(scope)
+        body_read = False
+        start: dict | None = None
+        chunks: list[bytes] = []
+        size = 0
+        complete = False
+
+        async def receive_hashing():
+            nonlocal body_read
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+                body_read = not message.get("more_body", False)
+            return message
+
+        async def send_capturing(message):
+            nonlocal start, size, complete
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= MAX_STORED_BODY:
+                    chunks.append(body)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        self._in_flight.add(cache_key)
+        try:
+            await self.app(scope, receive_hashing, send_capturing)
+        finally:
+            self._in_flight.discard(cache_key)
+
+        # без полного тела запроса нечем сверять повтор
+        if start is None or not complete or not body_read or size > MAX_STORED_BODY:
+            return
+        if start["status"] >= 500:
+            return
+        self.cache.set(
+            cache_key,
+            StoredResponse(
+                digest.digest(),
+                start["status"],
+                list(start.get("headers", [])),
+                b"".join(chunks),
+                scope.get("route"),
+            ),
+        )
+
+    async def _replay(self, stored: StoredResponse, scope, receive, send) -> None:
+        digest = _request_digest(scope)
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            digest.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        if digest.digest() != stored.fingerprint:
+            response = _error(
+                422,
+                "IDEMPOTENCY_KEY_REUSED",
+                "Idempotency-Key was already used with a different request",
+            )
+            await response(scope, receive, send)
+            return
+
+        if stored.route is not None:
+            scope["route"] = stored.route
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [*stored.headers, (REPLAYED_HEADER, b"true")],
+            }
+        )
+        await send({"type": "http.response.body", "body": stored.body})
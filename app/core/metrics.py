@@ -0,0 +1,409 @@
+# Prometheus-style metrics without external dependencies
+#
+# Метрики копятся в памяти процесса и отдаются в текстовом формате
+# Prometheus (exposition format 0.0.4) эндпойнтом /metrics. Запросы к БД
+# считаются событиями движка SQLAlchemy и привязываются к HTTP-запросу
+# через ContextVar, который выставляет MetricsMiddleware.
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import math
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.cache import caches
+from app.core.pubsub import hubs
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 0.3 — граница SLI времени ответа
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.3, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+# задержка доставки событий outbox: от секунд до минут при повторах
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+LabelValues = tuple[str, ...]
+# семейство метрик, собираемое при чтении: (name, type, description, [(labels, value)])
+Family = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, key, strict=True))
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # по каждому набору меток: счётчики по корзинам (не накопительные), сумма, число
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+        counts, totals = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[1][1]) if series else 0
+
+    def total(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1][0] if series else 0.0
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, (counts, (total, count)) in sorted(self._series.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += n
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def register[M: _Metric](self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += [
+                f"# HELP {metric.name} {metric.description}",
+                f"# TYPE {metric.name} {metric.type}",
+            ]
+            lines += metric.render()
+        for collector in self._collectors:
+            for name, type_, description, samples in collector():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {type_}"]
+                lines += [
+                    f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    for labels, value in samples
+                ]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template and status code",
+        ("method", "route", "status"),
+    )
+)
+HTTP_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being processed")
+)
+DB_QUERIES_PER_REQUEST = registry.register(
+    Histogram(
+        "db_queries_per_request",
+        "SQL statements executed per HTTP request",
+        ("method", "route"),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+DB_TIME_PER_REQUEST = registry.register(
+    Histogram(
+        "db_time_per_request_seconds",
+        "Time spent in SQL statements per HTTP request",
+        ("method", "route"),
+    )
+)
+DB_QUERY_DURATION = registry.register(
+    Histogram("db_query_duration_seconds", "SQL statement execution time")
+)
+DB_POOL_CHECKOUT = registry.register(
+    Histogram("db_pool_checkout_seconds", "Time waiting for a pooled DB connection")
+)
+DB_POOL_WAITING = registry.register(
+    Gauge("db_pool_waiting", "Requests currently waiting for a pooled DB connection")
+)
+# 0 с самого старта, а не пропуск до первого запроса
+DB_POOL_WAITING.inc(0)
+OUTBOX_DELIVERED = registry.register(
+    Counter("outbox_events_delivered_total", "Outbox events delivered", ("sink",))
+)
+OUTBOX_FAILED_BATCHES = registry.register(
+    Counter("outbox_failed_batches_total", "Outbox batches the sink failed to take", ("sink",))
+)
+OUTBOX_DEAD = registry.register(
+    Counter("outbox_events_dead_total", "Outbox events that ran out of delivery attempts")
+)
+OUTBOX_BATCH_DURATION = registry.register(
+    Histogram("outbox_batch_duration_seconds", "Time to deliver one outbox batch", ("sink",))
+)
+OUTBOX_LAG = registry.register(
+    Histogram(
+        "outbox_event_lag_seconds",
+        "Time from the committed change to the delivery of its event",
+        buckets=LAG_BUCKETS,
+    )
+)
+
+
+@dataclass
+class RequestDBUsage:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_request_db: ContextVar[RequestDBUsage | None] = ContextVar("request_db", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    usage = _request_db.get()
+    if usage is not None:
+        usage.queries += 1
+        usage.seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # запрос упал — after_cursor_execute не вызовется, снимаем отметку времени
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+_pool_engine: AsyncEngine | None = None
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Count statements of `engine` and expose its pool gauges (the last instrumented engine)
+    """
+    global _pool_engine
+    _pool_engine = engine
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def pool_checkout() -> Iterator[None]:
+    """
+    Wrap a request's connection checkout: db_pool_waiting while it waits, then its latency
+
+    Only checkouts of request sessions (get_db) are seen; background sessions
+    take connections from the same pool unobserved.
+    """
+    DB_POOL_WAITING.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_POOL_WAITING.dec()
+        DB_POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+
+def _collect_pool() -> Iterable[Family]:
+    if _pool_engine is None:
+        return
+    pool = _pool_engine.pool
+    # у StaticPool / NullPool нет размеров — только у QueuePool
+    for name, attr, description in (
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checkedout", "Connections currently checked out"),
+        ("db_pool_checked_in", "checkedin", "Idle connections in the pool"),
+        ("db_pool_overflow", "overflow", "Connections opened above pool_size"),
+    ):
+        getter = getattr(pool, attr, None)
+        if getter is None:
+            continue
+        value = getter()
+        if attr == "overflow":
+            # QueuePool.overflow() отрицателен, пока пул не заполнен (от -pool_size)
+            value = max(0, value)
+        yield name, "gauge", description, [({}, float(value))]
+
+
+def _collect_caches() -> Iterable[Family]:
+    named = sorted(caches.items())
+    if not named:
+        return
+    for field, type_, description in (
+        ("hits", "counter", "Cache hits"),
+        ("misses", "counter", "Cache misses"),
+        ("evictions", "counter", "Entries evicted by the size bound"),
+        ("size", "gauge", "Entries currently cached"),
+    ):
+        yield (
+            f"cache_{field}" + ("_total" if type_ == "counter" else ""),
+            type_,
+            description,
+            [({"cache": name}, float(cache.stats()[field])) for name, cache in named],
+        )
+    yield (
+        "cache_hit_ratio",
+        "gauge",
+        "Hits / (hits + misses) since start",
+        [({"cache": name}, cache.hit_ratio()) for name, cache in named],
+    )
+
+
+def _collect_hubs() -> Iterable[Family]:
+    named = sorted(hubs.items())
+    if not named:
+        return
+    for field, name, type_, description in (
+        ("subscribers", "pubsub_subscribers", "gauge", "Open subscriptions"),
+        ("topics", "pubsub_topics", "gauge", "Topics with at least one subscriber"),
+        ("published", "pubsub_published_total", "counter", "Messages published to subscribers"),
+        ("dropped", "pubsub_dropped_total", "counter", "Subscribers dropped for falling behind"),
+    ):
+        yield (
+            name,
+            type_,
+            description,
+            [({"hub": hub_name}, float(hub.stats()[field])) for hub_name, hub in named],
+        )
+
+
+registry.add_collector(_collect_pool)
+registry.add_collector(_collect_caches)
+registry.add_collector(_collect_hubs)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: latency histogram, in-flight gauge and DB usage per request
+
+    Route label is the route template (`/pullRequest/create`), so cardinality
+    stays bounded; requests that matched no route are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = RequestDBUsage()
+        token = _request_db.set(usage)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_db.reset(token)
+
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=path, status=str(status))
+            DB_QUERIES_PER_REQUEST.observe(usage.queries, method=method, route=path)
+            DB_TIME_PER_REQUEST.observe(usage.seconds, method=method, route=path)
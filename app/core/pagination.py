@@ -0,0 +1,31 @@
+# Keyset (cursor) pagination helpers
+#
+# Курсор непрозрачен для клиента: base64(json([createdAt, pull_request_id]))
+# последней отданной строки. Следующая страница — строки строго после неё
+# в порядке (createdAt, pull_request_id).
+import base64
+import binascii
+import datetime
+import json
+
+
+class InvalidCursorError(ValueError):
+    """
+    Cursor can't be decoded
+    """
+
+
+def encode_cursor(created_at: datetime.datetime | None, pr_id: str) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, pr_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime | None, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pr_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(pr_id, str):
+            raise TypeError("pull_request_id must be a string")
+        return (datetime.datetime.fromisoformat(created_at) if created_at else None), pr_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
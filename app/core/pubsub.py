@@ -0,0 +1,97 @@
+# In-process publish/subscribe hub
+#
+# Подписка — ограниченная очередь asyncio на топик (например, id ревьювера).
+# Подписчик без сообщений просто ждёт на queue.get(): ни опроса, ни таймеров,
+# а publish в топик без подписчиков — один поиск в словаре. Хаб живёт в
+# памяти процесса: подписчик видит только публикации своего воркера.
+import asyncio
+from typing import Any
+
+# именованные хабы — для метрик (/metrics)
+hubs: dict[str, "Hub"] = {}
+
+# сообщение: (тип события, данные)
+Message = tuple[str, dict[str, Any]]
+
+
+class Subscription:
+    """
+    Messages of one topic; get() returns None once the subscriber fell behind
+    """
+
+    def __init__(self, hub: "Hub", topic: str, maxsize: int):
+        self.hub = hub
+        self.topic = topic
+        self.queue: asyncio.Queue[Message | None] = asyncio.Queue(maxsize)
+        self.closed = False
+
+    async def get(self) -> Message | None:
+        if self.closed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+    def _overflow(self) -> None:
+        # медленный подписчик: место под маркер конца освобождается за счёт самого
+        # старого сообщения — пропуск всё равно требует полной пересинхронизации
+        self.closed = True
+        self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self, queue_size: int = 100, name: str | None = None):
+        if queue_size <= 0:
+            raise ValueError("queue_size must be positive")
+        if name is not None:
+            hubs[name] = self
+        self.queue_size = queue_size
+        self._topics: dict[str, set[Subscription]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(self, topic, self.queue_size)
+        self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._topics.get(subscription.topic)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._topics[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def publish(self, topic: str, message: Message) -> int:
+        """
+        Put the message into every subscription of the topic, return their number
+
+        A full subscription is dropped (its reader gets None), so a stalled
+        reader costs at most queue_size messages of memory.
+        """
+        subscriptions = self._topics.get(topic)
+        if not subscriptions:
+            return 0
+        for subscription in list(subscriptions):
+            if subscription.queue.full():
+                subscription._overflow()
+                self.unsubscribe(subscription)
+                self.dropped += 1
+            else:
+                subscription.queue.put_nowait(message)
+        self.published += 1
+        return len(subscriptions)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
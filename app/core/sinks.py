@@ -0,0 +1,119 @@
+# Outbox sinks: where the dispatcher delivers batches of events
+#
+# Синк получает пачку событий и либо доставляет её целиком, либо бросает
+# исключение — тогда диспетчер повторит пачку позже. Доставка «хотя бы
+# один раз»: после сбоя между доставкой и commit пачка придёт повторно,
+# потребители убирают дубли по id события.
+#
+# Синк задаётся строкой OUTBOX_SINK:
+#   null                 — события подтверждаются и отбрасываются;
+#   file:///path.ndjson  — дописываются в файл, одна JSON-строка на событие;
+#   http://host/path     — POST {"events": [...]} (например, локальная заглушка
+#                          сервиса уведомлений), успех — любой 2xx.
+import asyncio
+from collections.abc import Sequence
+import datetime
+import os
+from pathlib import Path
+from typing import Any, Protocol
+from urllib.parse import urlsplit
+
+import httpx
+import orjson
+
+
+class Event(Protocol):
+    id: int
+    event_type: str
+    payload: dict[str, Any]
+    created_at: datetime.datetime
+
+
+def encode_event(event: Event) -> dict[str, Any]:
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "createdAt": event.created_at,
+        "payload": event.payload,
+    }
+
+
+class Sink(Protocol):
+    name: str
+
+    async def send(self, events: Sequence[Event]) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class NullSink:
+    name = "null"
+
+    async def send(self, events: Sequence[Event]) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """
+    Appends NDJSON lines; the batch is fsynced before it counts as delivered
+    """
+
+    name = "file"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def _write(self, data: bytes) -> None:
+        with self.path.open("ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def send(self, events: Sequence[Event]) -> None:
+        data = b"".join(orjson.dumps(encode_event(event)) + b"\n" for event in events)
+        # запись с fsync — в потоке, чтобы не останавливать event loop
+        await asyncio.to_thread(self._write, data)
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpSink:
+    name = "http"
+
+    def __init__(
+        self, url: str, timeout: float = 5.0, transport: httpx.AsyncBaseTransport | None = None
+    ):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout, transport=transport)
+
+    async def send(self, events: Sequence[Event]) -> None:
+        response = await self._client.post(
+            self.url,
+            content=orjson.dumps({"events": [encode_event(event) for event in events]}),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_sink(spec: str, timeout: float = 5.0) -> Sink | None:
+    """
+    Sink from an OUTBOX_SINK string; "" or "none" — no dispatcher in this process
+    """
+    spec = spec.strip()
+    if spec in ("", "none"):
+        return None
+    if spec == "null":
+        return NullSink()
+    scheme = urlsplit(spec).scheme
+    if scheme == "file":
+        return FileSink(urlsplit(spec).path)
+    if scheme in ("http", "https"):
+        return HttpSink(spec, timeout=timeout)
+    raise ValueError(f"unsupported OUTBOX_SINK {spec!r}: expected none, null, file://, http(s)://")
@@ -0,0 +1,88 @@
+# Query counting and per-method query budgets
+#
+# Публичные методы сервисов объявляют бюджет — максимум SQL-запросов на вызов
+# (с холодным кэшем). Тесты (tests/integration/test_query_budgets.py) проверяют
+# бюджеты на SQLite и PostgreSQL, так что лишний round trip на горячем пути
+# роняет CI со списком выполненных запросов.
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import re
+from typing import Self
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+BUDGET_ATTR = "__query_budget__"
+
+
+def query_budget[F: Callable](budget: int) -> Callable[[F], F]:
+    """
+    Declare the max number of SQL statements a method may execute
+    """
+
+    def decorator(func: F) -> F:
+        setattr(func, BUDGET_ATTR, budget)
+        return func
+
+    return decorator
+
+
+def get_query_budget(func: Callable) -> int | None:
+    return getattr(func, BUDGET_ATTR, None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _short(statement: str, width: int = 140) -> str:
+    statement = re.sub(r"\s+", " ", statement).strip()
+    return statement if len(statement) <= width else statement[: width - 3] + "..."
+
+
+class QueryCounter:
+    """
+    Collect SQL statements executed on `engine` while the context is active
+    """
+
+    def __init__(self, engine: AsyncEngine | Engine):
+        self._engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> Self:
+        event.listen(self._engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self._engine, "before_cursor_execute", self._record)
+
+    def report(self, budget: int | None = None) -> str:
+        """
+        Numbered statements, the ones over `budget` are marked with "+"
+        """
+        return "\n".join(
+            f"{'+' if budget is not None and i > budget else ' '} {i:>2} {_short(statement)}"
+            for i, statement in enumerate(self.statements, start=1)
+        )
+
+
+@contextmanager
+def expect_max_queries(
+    engine: AsyncEngine | Engine, budget: int, label: str = "block"
+) -> Iterator[QueryCounter]:
+    """
+    Raise QueryBudgetExceeded if the block executes more than `budget` statements
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(
+            f"{label}: {counter.count} statements, budget {budget}\n{counter.report(budget)}"
+        )
@@ -1,25 +1,86 @@
 # Database config and session management
-import os
+from typing import Any
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-# read postgres creds from env
-_pg_user = os.getenv("POSTGRES_USER", "app_user")
-_pg_password = os.getenv("POSTGRES_PASSWORD", "app_password")
-_pg_db = os.getenv("POSTGRES_DB", "app_db")
-_pg_host = os.getenv("POSTGRES_HOST", "db")
-_pg_port = os.getenv("POSTGRES_PORT", "5432")
+from app.core.config import Settings, settings
+from app.core.metrics import instrument_engine, pool_checkout
+from app.repositories.backend import BACKENDS, get_memory_store
+from app.repositories.memory_store import MemorySession
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    f"postgresql+asyncpg://{_pg_user}:{_pg_password}@{_pg_host}:{_pg_port}/{_pg_db}",
-)
 
-engine = create_async_engine(DATABASE_URL, future=True, echo=True)
+def engine_options(cfg: Settings) -> dict[str, Any]:
+    """
+    create_async_engine kwargs built from settings
+
+    Pool sizing applies to PostgreSQL only, SQLite picks its own pool class.
+    """
+    url = make_url(cfg.DATABASE_URL)
+    options: dict[str, Any] = {"echo": cfg.DB_ECHO, "pool_pre_ping": cfg.DB_POOL_PRE_PING}
+    if url.get_backend_name() != "postgresql":
+        return options
+
+    options.update(
+        pool_size=cfg.DB_POOL_SIZE,
+        max_overflow=cfg.DB_MAX_OVERFLOW,
+        pool_timeout=cfg.DB_POOL_TIMEOUT,
+        pool_recycle=cfg.DB_POOL_RECYCLE,
+    )
+    if url.get_driver_name() != "asyncpg":
+        return options
+
+    connect_args: dict[str, Any] = {}
+    if cfg.DB_PGBOUNCER:
+        # в transaction pooling соединение с сервером меняется между транзакциями,
+        # поэтому prepared statements не кэшируем, а имена делаем уникальными
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    else:
+        connect_args.update(
+            statement_cache_size=cfg.DB_STATEMENT_CACHE_SIZE,
+            prepared_statement_cache_size=cfg.DB_STATEMENT_CACHE_SIZE,
+        )
+    if cfg.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(cfg.DB_STATEMENT_TIMEOUT_MS)}
+    options["connect_args"] = connect_args
+    return options
+
+
+def build_engine(cfg: Settings = settings) -> AsyncEngine:
+    return create_async_engine(cfg.DATABASE_URL, **engine_options(cfg))
+
+
+if settings.STORAGE_BACKEND not in BACKENDS:
+    raise ValueError(f"STORAGE_BACKEND must be one of {BACKENDS}, got {settings.STORAGE_BACKEND!r}")
+
+engine = build_engine()
+instrument_engine(engine)
 SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+def new_session() -> AsyncSession | MemorySession:
+    """
+    Session of the configured backend for work outside requests (background tasks)
+    """
+    if settings.STORAGE_BACKEND == "memory":
+        return MemorySession(get_memory_store())
+    return SessionLocal()
+
+
 async def get_db():
+    if settings.STORAGE_BACKEND == "memory":
+        async with MemorySession(get_memory_store()) as session:
+            yield session
+        return
+
     async with SessionLocal() as session:
+        # соединение берётся из пула сразу, чтобы измерить ожидание пула
+        with pool_checkout():
+            await session.connection()
         yield session
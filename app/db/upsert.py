@@ -0,0 +1,29 @@
+# INSERT ... ON CONFLICT для поддерживаемых диалектов (PostgreSQL, SQLite)
+import zlib
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+def dialect_insert(db: AsyncSession, table):
+    """
+    Dialect-specific insert() of the session's backend, supports on_conflict_do_*
+    """
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def shard_of(key: str | None) -> int:
+    """
+    Shard of a counter row written on behalf of `key` (PR id, team name); None — shard 0
+
+    Global counters are split into COUNTER_SHARDS rows and summed on read, so
+    transactions with different keys upsert different rows and don't wait for
+    each other's row locks until commit.
+    """
+    if key is None:
+        return 0
+    return zlib.crc32(key.encode()) % settings.COUNTER_SHARDS
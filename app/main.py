@@ -1,18 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.api.metrics import router as metrics_router
 from app.api.pr import router as pr_router
 from app.api.review import router as review_router
 from app.api.stats import router as stats_router
 from app.api.team import router as team_router
 from app.api.user import router as user_router
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.db.session import new_session
+from app.services.outbox_dispatcher import build_dispatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # доставка событий outbox в фоне; OUTBOX_SINK=none — без диспетчера
+    dispatcher = build_dispatcher(new_session)
+    if dispatcher is not None:
+        dispatcher.start()
+    yield
+    if dispatcher is not None:
+        await dispatcher.stop()
+
 
-app = FastAPI(title="PR Reviewer Assignment Service", version="1.0.0")
+app = FastAPI(title="PR Reviewer Assignment Service", version="1.0.0", lifespan=lifespan)
+# метрики снаружи — учитывают и повторы из кэша идемпотентности
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(team_router)
 app.include_router(user_router)
 app.include_router(pr_router)
 app.include_router(review_router)
 app.include_router(stats_router)
+app.include_router(metrics_router)
 
 @app.get("/health", tags=["Health"])
 async def health():
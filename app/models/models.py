@@ -4,7 +4,7 @@
 import datetime
 import enum
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, mapped_column, relationship
 
 
@@ -19,13 +19,21 @@ class PRStatus(enum.StrEnum):
 
 class Team(Base):
     __tablename__   = "teams"
-    team_name       = mapped_column(String, primary_key=True, index=True)
+    team_name       = mapped_column(String, primary_key=True)
+    # стратегия выбора ревьюверов; NULL — REVIEWER_STRATEGY из настроек
+    reviewer_strategy = mapped_column(String, nullable=True)
+    # позиция round-robin в списке активных участников, по user_id
+    rr_cursor       = mapped_column(Integer, nullable=False, default=0, server_default="0")
     members         = relationship("User", back_populates="team")
 
 
 class User(Base):
     __tablename__   = "users"
-    user_id         = mapped_column(String, primary_key=True, index=True)
+    __table_args__  = (
+        # загрузка активных участников команды (выбор ревьюверов, /team/get)
+        Index("ix_users_team_name_is_active", "team_name", "is_active"),
+    )
+    user_id         = mapped_column(String, primary_key=True)
     username        = mapped_column(String, nullable=False)
     is_active       = mapped_column(Boolean, default=True)
     team_name       = mapped_column(String, ForeignKey("teams.team_name"))
@@ -35,7 +43,21 @@ class User(Base):
 
 class PullRequest(Base):
     __tablename__   = "pull_requests"
-    pull_request_id     = mapped_column(String, primary_key=True, index=True)
+    __table_args__  = (
+        # отчёт /stats по окну читает PR окна только из индекса
+        Index(
+            "ix_pull_requests_created_at",
+            "createdAt",
+            postgresql_include=["pull_request_id", "status"],
+        ),
+        # /stats/latency: смёрженные в окне PR и их время до merge
+        Index(
+            "ix_pull_requests_merged_at",
+            "mergedAt",
+            postgresql_include=["createdAt", "author_id"],
+        ),
+    )
+    pull_request_id     = mapped_column(String, primary_key=True)
     pull_request_name   = mapped_column(String, nullable=False)
     author_id           = mapped_column(String, ForeignKey("users.user_id"))
     status              = mapped_column(Enum(PRStatus), default=PRStatus.OPEN)
@@ -47,8 +69,79 @@ class PullRequest(Base):
 
 class PullRequestReviewer(Base):
     __tablename__   = "pull_request_reviewers"
+    __table_args__  = (
+        # PR ревьювера (/users/getReview, нагрузка) и ревьюверы PR — index-only scan
+        Index(
+            "ix_pull_request_reviewers_reviewer_id",
+            "reviewer_id",
+            postgresql_include=["pull_request_id"],
+        ),
+        Index(
+            "ix_pull_request_reviewers_pull_request_id",
+            "pull_request_id",
+            postgresql_include=["reviewer_id"],
+        ),
+    )
     id              = mapped_column(String, primary_key=True)
     pull_request_id = mapped_column(String, ForeignKey("pull_requests.pull_request_id"))
     reviewer_id     = mapped_column(String, ForeignKey("users.user_id"))
     pull_request    = relationship("PullRequest", back_populates="reviewers")
     reviewer        = relationship("User", back_populates="reviews")
+
+
+class StatsCounter(Base):
+    """
+    Global counters for /stats, maintained in the same transaction as the writes
+    """
+    __tablename__   = "stats_counters"
+    name            = mapped_column(String, primary_key=True)
+    # значение счётчика — сумма по шардам (app.db.upsert.shard_of)
+    shard           = mapped_column(Integer, primary_key=True, default=0)
+    value           = mapped_column(Integer, nullable=False, default=0)
+
+
+class ReviewerStats(Base):
+    """
+    Number of assignments (pull_request_reviewers rows) per reviewer
+    """
+    __tablename__   = "reviewer_stats"
+    __table_args__  = (
+        # топ ревьюверов читается по индексу, без сортировки всей таблицы
+        Index("ix_reviewer_stats_review_count", "review_count"),
+    )
+    reviewer_id     = mapped_column(String, primary_key=True)
+    review_count    = mapped_column(Integer, nullable=False, default=0)
+
+
+class OutboxEvent(Base):
+    """
+    Domain event written in the transaction of the change, delivered by the dispatcher
+    """
+    __tablename__   = "outbox_events"
+    __table_args__  = (
+        # выборка готовых к доставке событий диспетчером
+        Index("ix_outbox_events_available_at", "available_at"),
+    )
+    # в SQLite автоинкремент есть только у INTEGER PRIMARY KEY
+    id              = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type      = mapped_column(String, nullable=False)
+    payload         = mapped_column(JSON, nullable=False)
+    created_at      = mapped_column(DateTime(timezone=True), nullable=False)
+    # следующая попытка доставки; растёт экспоненциально после ошибок
+    available_at    = mapped_column(DateTime(timezone=True), nullable=False)
+    attempts        = mapped_column(Integer, nullable=False, default=0)
+    last_error      = mapped_column(String, nullable=True)
+
+
+class ResourceVersion(Base):
+    """
+    Version of a readable resource, bumped in the transaction of every change to it
+
+    Read endpoints build their ETag from it (see app/core/etag.py).
+    """
+    __tablename__   = "resource_versions"
+    # "stats", "team:<team_name>", "reviewer:<user_id>"
+    name            = mapped_column(String, primary_key=True)
+    # версия — сумма по шардам: растёт при каждом изменении, в каком бы шарде оно ни было
+    shard           = mapped_column(Integer, primary_key=True, default=0)
+    version         = mapped_column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,82 @@
+# Storage backend selection: repositories for a session
+#
+# settings.STORAGE_BACKEND = "sql" (PostgreSQL / SQLite через SQLAlchemy) или
+# "memory" (MemoryStore процесса). get_db отдаёт AsyncSession или
+# MemorySession, сервисы берут репозитории через get_repositories.
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.repositories.memory_repository import (
+    MemoryOutboxRepository,
+    MemoryPRRepository,
+    MemoryReviewerRepository,
+    MemoryStatsRepository,
+    MemoryTeamRepository,
+    MemoryUserRepository,
+    MemoryVersionRepository,
+)
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.repositories.outbox_repository import OutboxRepository
+from app.repositories.pr_repository import PRRepository
+from app.repositories.protocols import (
+    OutboxRepositoryProtocol,
+    PRRepositoryProtocol,
+    ReviewerRepositoryProtocol,
+    Session,
+    StatsRepositoryProtocol,
+    TeamRepositoryProtocol,
+    UserRepositoryProtocol,
+    VersionRepositoryProtocol,
+)
+from app.repositories.reviewer_repository import ReviewerRepository
+from app.repositories.stats_repository import StatsRepository
+from app.repositories.team_repository import TeamRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.version_repository import VersionRepository
+
+BACKENDS = ("sql", "memory")
+
+
+class Repositories(NamedTuple):
+    pr: PRRepositoryProtocol
+    team: TeamRepositoryProtocol
+    user: UserRepositoryProtocol
+    reviewer: ReviewerRepositoryProtocol
+    stats: StatsRepositoryProtocol
+    outbox: OutboxRepositoryProtocol
+    version: VersionRepositoryProtocol
+
+
+def get_repositories(db: Session) -> Repositories:
+    if isinstance(db, MemorySession):
+        return Repositories(
+            MemoryPRRepository(db),
+            MemoryTeamRepository(db),
+            MemoryUserRepository(db),
+            MemoryReviewerRepository(db),
+            MemoryStatsRepository(db),
+            MemoryOutboxRepository(db),
+            MemoryVersionRepository(db),
+        )
+    return Repositories(
+        PRRepository(db),
+        TeamRepository(db),
+        UserRepository(db),
+        ReviewerRepository(db),
+        StatsRepository(db),
+        OutboxRepository(db),
+        VersionRepository(db),
+    )
+
+
+_memory_store: MemoryStore | None = None
+
+
+def get_memory_store() -> MemoryStore:
+    """
+    Process-wide store, loaded from MEMORY_SNAPSHOT_PATH on first use
+    """
+    global _memory_store
+    if _memory_store is None:
+        _memory_store = MemoryStore(settings.MEMORY_SNAPSHOT_PATH or None)
+    return _memory_store
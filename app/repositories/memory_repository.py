@@ -0,0 +1,492 @@
+"""
+Repositories over MemoryStore with the same methods as the SQL ones
+
+Ограничения целостности (первичные и внешние ключи) проверяются до записи
+и нарушаются с IntegrityError, как в базе, — сервисы обрабатывают их так же.
+"""
+
+from collections.abc import Collection, Iterable, Mapping, Sequence
+import datetime
+import heapq
+from typing import Any, NamedTuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models.models import PRStatus
+from app.repositories.memory_store import (
+    MemorySession,
+    OutboxRecord,
+    PRRecord,
+    ReviewerRecord,
+    UserRecord,
+)
+from app.repositories.outbox_repository import NewEvent
+from app.repositories.stats_repository import (
+    TEAM_LEVEL,
+    TOTAL_LEVEL,
+    USER_LEVEL,
+    Bucket,
+    StatsBreakdown,
+    build_breakdown,
+    percentile_cont,
+    truncate,
+)
+from app.repositories.team_repository import Roster, RosterMember
+
+
+class CreateContext(NamedTuple):
+    pr_exists: bool
+    author_exists: bool
+    team_name: str | None
+
+
+class PRShortRow(NamedTuple):
+    pull_request_id: str
+    pull_request_name: str
+    author_id: str
+    status: PRStatus
+    createdAt: datetime.datetime
+
+
+class AssignmentRow(NamedTuple):
+    pull_request_id: str
+    author_id: str
+    reviewer_id: str
+    pull_request_name: str
+
+
+def _integrity_error(message: str) -> IntegrityError:
+    return IntegrityError(message, None, ValueError(message))
+
+
+class MemoryPRRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def get_pr(self, pr_id: str, for_update: bool = False) -> PRRecord | None:
+        """
+        Get PR; with for_update a session copy whose changes are written on commit
+        """
+        pr = self.store.prs.get(pr_id)
+        if pr is not None and for_update:
+            return self.db.track(pr)
+        return pr
+
+    async def get_pr_with_reviewers(self, pr_id: str) -> PRRecord | None:
+        return self.store.prs.get(pr_id)
+
+    async def get_create_context(self, pr_id: str, author_id: str) -> CreateContext:
+        author = self.store.users.get(author_id)
+        return CreateContext(
+            pr_id in self.store.prs, author is not None, author.team_name if author else None
+        )
+
+    async def get_existing_ids(self, pr_ids: Collection[str]) -> set[str]:
+        return {pr_id for pr_id in pr_ids if pr_id in self.store.prs}
+
+    async def create_pr_with_reviewers(
+        self, pr_id: str, pr_name: str, author_id: str, reviewer_ids: Sequence[str]
+    ) -> PRRecord:
+        prs = await self.create_prs_with_reviewers([(pr_id, pr_name, author_id, reviewer_ids)])
+        return prs[0]
+
+    async def create_prs_with_reviewers(
+        self, items: Sequence[tuple[str, str, str, Sequence[str]]]
+    ) -> list[PRRecord]:
+        """
+        Insert (pr_id, pr_name, author_id, reviewer_ids) items without commit
+        """
+        ids = [pr_id for pr_id, *_ in items]
+        if len(set(ids)) != len(ids) or any(pr_id in self.store.prs for pr_id in ids):
+            raise _integrity_error("duplicate pull_request_id")
+        users = self.store.users
+        for _pr_id, _pr_name, author_id, reviewer_ids in items:
+            if author_id not in users or any(r not in users for r in reviewer_ids):
+                raise _integrity_error("user not found")
+
+        now = datetime.datetime.now(datetime.UTC)
+        for pr_id, pr_name, author_id, reviewer_ids in items:
+            self.db.write("pr", pr_id, pr_name, author_id, PRStatus.OPEN, now, None)
+            for reviewer_id in reviewer_ids:
+                self.db.write("add_reviewer", pr_id, reviewer_id)
+        return [self.store.prs[pr_id] for pr_id in ids]
+
+    async def add_reviewer(self, pr_id: str, reviewer_id: str) -> None:
+        pr = self.store.prs.get(pr_id)
+        if pr is None or reviewer_id not in self.store.users:
+            raise _integrity_error("pull request or user not found")
+        if any(r.reviewer_id == reviewer_id for r in pr.reviewers):
+            raise _integrity_error("reviewer already assigned")
+        self.db.write("add_reviewer", pr_id, reviewer_id)
+
+
+class MemoryTeamRepository:
+    """
+    Rosters are built from the team indexes, roster_cache is not used
+    """
+
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def get_team(self, team_name: str) -> Roster | None:
+        return await self.get_roster(team_name)
+
+    async def get_roster(
+        self, team_name: str, fresh: bool = False, version: int | None = None
+    ) -> Roster | None:
+        members = self.store.team_members.get(team_name)
+        if members is None:
+            return None
+        return Roster(
+            team_name,
+            tuple(RosterMember(u.user_id, u.username, u.is_active) for u in members.values()),
+            tuple(self.store.team_active[team_name]),
+            self.store.team_strategy.get(team_name),
+        )
+
+    async def get_rosters(self, team_names: Collection[str]) -> dict[str, Roster]:
+        rosters = {}
+        for team_name in team_names:
+            roster = await self.get_roster(team_name)
+            if roster is not None:
+                rosters[team_name] = roster
+        return rosters
+
+    def invalidate_roster(self, team_name: str) -> None:
+        # составы не кэшируются — инвалидировать нечего
+        pass
+
+    async def upsert_teams(self, team_names: Collection[str]) -> list[str]:
+        created = sorted(name for name in set(team_names) if name not in self.store.team_members)
+        for team_name in created:
+            self.db.write("team", team_name)
+        return created
+
+    async def set_strategy(self, team_name: str, strategy: str | None) -> bool:
+        if team_name not in self.store.team_members:
+            return False
+        self.db.write("team_strategy", team_name, strategy)
+        return True
+
+    async def lock_rr_cursors(self, team_names: Collection[str]) -> dict[str, int]:
+        # блокировка не нужна: сервис выполняется без переключений до commit
+        return {
+            team_name: self.store.rr_cursors.get(team_name, 0)
+            for team_name in team_names
+            if team_name in self.store.team_members
+        }
+
+    async def set_rr_cursors(self, cursors: Mapping[str, int]) -> None:
+        for team_name, cursor in cursors.items():
+            self.db.write("rr_cursor", team_name, cursor)
+
+    async def team_exists(self, team_name: str) -> bool:
+        return team_name in self.store.team_members
+
+    async def add_team(
+        self, team_name: str, members: list[dict], version: int | None = None
+    ) -> Roster:
+        ids = [member["user_id"] for member in members]
+        if team_name in self.store.team_members:
+            raise _integrity_error("team already exists")
+        if len(set(ids)) != len(ids) or any(user_id in self.store.users for user_id in ids):
+            raise _integrity_error("user already exists")
+
+        self.db.write("team", team_name)
+        for member in members:
+            self.db.write(
+                "user", member["user_id"], member["username"], member["is_active"], team_name
+            )
+        await self.db.commit()
+        return await self.get_roster(team_name)
+
+
+class MemoryUserRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def get_user(self, user_id: str) -> UserRecord | None:
+        return self.store.users.get(user_id)
+
+    async def get_team_names(self, user_ids: Collection[str]) -> dict[str, str | None]:
+        users = self.store.users
+        return {user_id: users[user_id].team_name for user_id in user_ids if user_id in users}
+
+    async def get_users_state(
+        self, user_ids: Collection[str]
+    ) -> dict[str, tuple[str, bool, str | None]]:
+        users = self.store.users
+        return {
+            user_id: (users[user_id].username, users[user_id].is_active, users[user_id].team_name)
+            for user_id in user_ids
+            if user_id in users
+        }
+
+    async def upsert_users(self, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Insert or update users by user_id without commit
+        """
+        if any(row["team_name"] not in self.store.team_members for row in rows):
+            raise _integrity_error("team not found")
+        for row in rows:
+            self.db.write(
+                "user", row["user_id"], row["username"], row["is_active"], row["team_name"]
+            )
+
+    async def set_is_active(self, user_id: str, is_active: bool) -> UserRecord | None:
+        user = self.store.users.get(user_id)
+        if user and user.is_active != is_active:
+            self.db.write("user", user_id, user.username, is_active, user.team_name)
+            await self.db.commit()
+        return self.store.users.get(user_id)
+
+    async def deactivate_users(
+        self, team_name: str, user_ids: Collection[str] | None = None
+    ) -> list[str]:
+        """
+        Deactivate team members without commit, returns ids of users that were active
+        """
+        members = self.store.team_members.get(team_name, {})
+        if user_ids is None:
+            matched = list(members.values())
+        else:
+            matched = [members[user_id] for user_id in set(user_ids) if user_id in members]
+        matched = [user for user in matched if user.is_active]
+        for user in matched:
+            self.db.write("user", user.user_id, user.username, False, team_name)
+        return sorted(user.user_id for user in matched)
+
+
+class MemoryReviewerRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def get_reviewers_by_pr(self, pr_id: str) -> list[ReviewerRecord]:
+        pr = self.store.prs.get(pr_id)
+        return list(pr.reviewers) if pr else []
+
+    async def get_prs_by_reviewer(
+        self,
+        reviewer_id: str,
+        status: PRStatus | None = None,
+        limit: int | None = None,
+        after: tuple[datetime.datetime | None, str] | None = None,
+    ) -> list[PRShortRow]:
+        """
+        PRs of a reviewer ordered by (createdAt, pull_request_id), keyset `after`
+        """
+        prs = [self.store.prs[pr_id] for pr_id in self.store.reviewer_prs.get(reviewer_id, ())]
+        if status is not None:
+            prs = [pr for pr in prs if pr.status == status]
+        if after is not None:
+            prs = [pr for pr in prs if (pr.createdAt, pr.pull_request_id) > after]
+
+        def key(pr: PRRecord) -> tuple[datetime.datetime, str]:
+            return pr.createdAt, pr.pull_request_id
+
+        prs = heapq.nsmallest(limit, prs, key=key) if limit is not None else sorted(prs, key=key)
+        return [
+            PRShortRow(
+                pr.pull_request_id, pr.pull_request_name, pr.author_id, pr.status, pr.createdAt
+            )
+            for pr in prs
+        ]
+
+    async def count_open_reviews(self, user_ids: Collection[str]) -> dict[str, int]:
+        load = self.store.open_load
+        return {user_id: load[user_id] for user_id in user_ids if user_id in load}
+
+    async def get_open_loads(self, team_name: str) -> dict[str, int]:
+        load = self.store.open_load
+        return {user_id: load.get(user_id, 0) for user_id in self.store.team_active[team_name]}
+
+    async def get_open_assignments(self, reviewer_ids: Collection[str]) -> list[AssignmentRow]:
+        prs = self.store.prs
+        affected = {
+            pr_id
+            for reviewer_id in reviewer_ids
+            for pr_id in self.store.reviewer_prs.get(reviewer_id, ())
+            if prs[pr_id].status == PRStatus.OPEN
+        }
+        return [
+            AssignmentRow(pr_id, prs[pr_id].author_id, reviewer_id, prs[pr_id].pull_request_name)
+            for pr_id in sorted(affected)
+            for reviewer_id in sorted(r.reviewer_id for r in prs[pr_id].reviewers)
+        ]
+
+    async def remove_from_open_prs(self, reviewer_ids: Collection[str]) -> None:
+        for reviewer_id in reviewer_ids:
+            for pr_id in sorted(self.store.reviewer_prs.get(reviewer_id, ())):
+                if self.store.prs[pr_id].status == PRStatus.OPEN:
+                    self.db.write("remove_reviewer", pr_id, reviewer_id)
+
+    async def add_reviewers(self, assignments: Collection[tuple[str, str]]) -> None:
+        pr_repo = MemoryPRRepository(self.db)
+        for pr_id, reviewer_id in assignments:
+            await pr_repo.add_reviewer(pr_id, reviewer_id)
+
+
+class MemoryStatsRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def apply(
+        self,
+        counters: Mapping[str, int],
+        reviewers: Mapping[str, int],
+        shard_key: str | None = None,
+    ) -> None:
+        # блокировок строк нет — шарды не нужны
+        counters = {name: delta for name, delta in counters.items() if delta}
+        reviewers = {reviewer_id: delta for reviewer_id, delta in reviewers.items() if delta}
+        if counters or reviewers:
+            self.db.write("counters", counters, reviewers)
+
+    async def get_counters(self) -> dict[str, int]:
+        return dict(self.store.counters)
+
+    async def get_top_reviewers(self, limit: int) -> list[tuple[str, int]]:
+        """
+        Top reviewers by count desc, then id; walks only the highest count buckets
+        """
+        top: list[tuple[str, int]] = []
+        buckets = self.store.reviewers_by_count
+        for count in sorted(buckets, reverse=True):
+            if len(top) >= limit:
+                break
+            top += [
+                (reviewer_id, count)
+                for reviewer_id in heapq.nsmallest(limit - len(top), buckets[count])
+            ]
+        return top
+
+    async def get_breakdown(
+        self,
+        created_from: datetime.datetime | None,
+        created_to: datetime.datetime | None,
+        team_name: str | None,
+    ) -> StatsBreakdown:
+        """
+        Same rows as the SQL grouping, one pass over the PRs of the window
+        """
+        groups: dict[tuple[str | None, str | None, int], list[int]] = {
+            (None, None, TOTAL_LEVEL): [0, 0, 0]
+        }
+        for pr in self.store.prs.values():
+            if created_from is not None and pr.createdAt < created_from:
+                continue
+            if created_to is not None and pr.createdAt >= created_to:
+                continue
+            for reviewer in pr.reviewers:
+                user = self.store.users.get(reviewer.reviewer_id)
+                if user is None or (team_name is not None and user.team_name != team_name):
+                    continue
+                for key in (
+                    (user.team_name, user.user_id, USER_LEVEL),
+                    (user.team_name, None, TEAM_LEVEL),
+                    (None, None, TOTAL_LEVEL),
+                ):
+                    counts = groups.setdefault(key, [0, 0, 0])
+                    counts[0] += 1
+                    counts[1] += pr.status == PRStatus.MERGED
+                    counts[2] += pr.status == PRStatus.OPEN
+        return build_breakdown((*key, *counts) for key, counts in groups.items())
+
+    def _prs_of(self, team_name: str | None) -> Iterable[PRRecord]:
+        if team_name is None:
+            return self.store.prs.values()
+        users = self.store.users
+        return (
+            pr
+            for pr in self.store.prs.values()
+            if (author := users.get(pr.author_id)) is not None and author.team_name == team_name
+        )
+
+    async def get_merge_latency(
+        self,
+        merged_from: datetime.datetime,
+        merged_to: datetime.datetime,
+        team_name: str | None,
+        quantiles: Sequence[float],
+    ) -> tuple[int, list[float | None]]:
+        seconds = sorted(
+            (pr.mergedAt - pr.createdAt).total_seconds()
+            for pr in self._prs_of(team_name)
+            if pr.mergedAt is not None and merged_from <= pr.mergedAt < merged_to
+        )
+        if not seconds:
+            return 0, [None] * len(quantiles)
+        ranked = dict(enumerate(seconds))
+        return len(seconds), [percentile_cont(ranked, len(seconds), q) for q in quantiles]
+
+    async def get_throughput(
+        self,
+        since: datetime.datetime,
+        until: datetime.datetime,
+        team_name: str | None,
+        bucket: Bucket,
+    ) -> dict[datetime.datetime, tuple[int, int]]:
+        series: dict[datetime.datetime, list[int]] = {}
+        for pr in self._prs_of(team_name):
+            for kind, at in enumerate((pr.createdAt, pr.mergedAt)):
+                if at is not None and since <= at < until:
+                    series.setdefault(truncate(at, bucket), [0, 0])[kind] += 1
+        return {start: (created, merged) for start, (created, merged) in series.items()}
+
+    async def compute_live(self) -> tuple[dict[str, int], dict[str, int]]:
+        return self.store.compute_live()
+
+    async def rebuild(self) -> None:
+        self.db.write("rebuild")
+
+
+class MemoryOutboxRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def add(self, events: Sequence[NewEvent]) -> None:
+        now = datetime.datetime.now(datetime.UTC)
+        for event_type, payload in events:
+            self.db.write("outbox", self.store.outbox_seq + 1, event_type, dict(payload), now)
+
+    async def claim(self, limit: int, max_attempts: int) -> list[OutboxRecord]:
+        """
+        Events due for delivery, oldest first
+
+        Диспетчер в процессе один — блокировать выбранные события не нужно.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        due = (
+            event
+            for event in self.store.outbox.values()
+            if event.available_at <= now and event.attempts < max_attempts
+        )
+        return [event for _, event in zip(range(limit), due, strict=False)]
+
+    async def delete(self, event_ids: Collection[int]) -> None:
+        self.db.write("outbox_delete", list(event_ids))
+
+    async def retry(
+        self, schedule: Sequence[tuple[int, int, datetime.datetime]], error: str
+    ) -> None:
+        for event_id, attempts, available_at in schedule:
+            self.db.write("outbox_retry", event_id, attempts, available_at, error)
+
+
+class MemoryVersionRepository:
+    def __init__(self, db: MemorySession):
+        self.db = db
+        self.store = db.store
+
+    async def bump(self, names: Collection[str], shard_key: str | None = None) -> None:
+        if names:
+            self.db.write("versions", dict.fromkeys(names, 1))
+
+    async def get(self, name: str) -> int:
+        return self.store.versions.get(name, 0)
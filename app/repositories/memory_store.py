@@ -0,0 +1,483 @@
+"""
+In-memory storage: tables, secondary indexes, transactions and snapshot log
+
+Данные живут в словарях процесса, каждый запрос к ним — O(1) по индексу
+или O(размер ответа):
+
+- users / prs — первичные ключи;
+- team_members, team_active — команда -> участники и активные участники;
+- team_strategy, rr_cursors — стратегия выбора ревьюверов и курсор round-robin;
+- reviewer_prs — ревьювер -> его PR (все статусы);
+- open_load — ревьювер -> число OPEN ревью (нагрузка для выбора ревьюверов);
+- counters / reviewer_counts — счётчики /stats, в т.ч. число PR по статусам;
+- reviewers_by_count — число назначений -> ревьюверы (топ ревьюверов);
+- outbox — события для диспетчера по возрастанию id;
+- versions — версии команд, ревьюверов и /stats для ETag.
+
+Все изменения — операции (op, *args): store.apply() меняет данные вместе с
+индексами и возвращает функцию отката. MemorySession копит откаты до commit /
+rollback и на commit дописывает операции транзакции одной строкой в
+append-only журнал (snapshot), при старте журнал проигрывается заново.
+
+Методы бэкенда не отдают управление event loop, поэтому вызов сервиса от
+чтения до commit выполняется атомарно относительно других запросов —
+блокировки не нужны. Бэкенд рассчитан на один процесс (один воркер).
+"""
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, replace
+import datetime
+import logging
+import os
+from pathlib import Path
+from typing import Any, NamedTuple, Self
+
+import orjson
+
+from app.models.models import PRStatus
+from app.repositories.stats_repository import TOTAL_PRS, TOTAL_REVIEWS, status_counter
+
+logger = logging.getLogger(__name__)
+
+Undo = Callable[[], None]
+
+
+class UserRecord(NamedTuple):
+    user_id: str
+    username: str
+    is_active: bool
+    team_name: str | None
+
+
+class ReviewerRecord(NamedTuple):
+    pull_request_id: str
+    reviewer_id: str
+
+
+@dataclass(slots=True)
+class PRRecord:
+    pull_request_id: str
+    pull_request_name: str
+    author_id: str
+    status: PRStatus
+    createdAt: datetime.datetime
+    mergedAt: datetime.datetime | None = None
+    reviewers: list[ReviewerRecord] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class OutboxRecord:
+    id: int
+    event_type: str
+    payload: dict[str, Any]
+    created_at: datetime.datetime
+    available_at: datetime.datetime
+    attempts: int = 0
+    last_error: str | None = None
+
+
+def _as_datetime(value: datetime.datetime | str | None) -> datetime.datetime | None:
+    # в журнале datetime хранится строкой ISO 8601
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+class MemoryStore:
+    def __init__(self, snapshot_path: str | Path | None = None):
+        self.users: dict[str, UserRecord] = {}
+        # dict вместо set — порядок участников как при вставке
+        self.team_members: dict[str, dict[str, UserRecord]] = {}
+        self.team_active: dict[str, dict[str, None]] = {}
+        # только команды с заданной стратегией / сдвинутым курсором
+        self.team_strategy: dict[str, str] = {}
+        self.rr_cursors: dict[str, int] = {}
+        self.prs: dict[str, PRRecord] = {}
+        self.reviewer_prs: dict[str, set[str]] = {}
+        self.open_load: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.reviewer_counts: dict[str, int] = {}
+        # число назначений -> ревьюверы: топ ревьюверов без сортировки всех
+        self.reviewers_by_count: dict[int, set[str]] = {}
+        self.outbox: dict[int, OutboxRecord] = {}
+        # последний выданный id события: не переиспользуется и после доставки
+        self.outbox_seq = 0
+        self.versions: dict[str, int] = {}
+        self.snapshot = SnapshotLog(Path(snapshot_path)) if snapshot_path else None
+        if self.snapshot is not None:
+            self.snapshot.load(self)
+
+    def apply(self, op: str, *args: Any) -> Undo:
+        """
+        Apply one operation with its index updates, return its inverse
+        """
+        return getattr(self, f"_apply_{op}")(*args)
+
+    # --- операции ---------------------------------------------------------
+
+    def _apply_team(self, team_name: str) -> Undo:
+        self.team_members[team_name] = {}
+        self.team_active[team_name] = {}
+
+        def undo() -> None:
+            del self.team_members[team_name]
+            del self.team_active[team_name]
+
+        return undo
+
+    def _apply_team_strategy(self, team_name: str, strategy: str | None) -> Undo:
+        return self._set_team_value(self.team_strategy, team_name, strategy)
+
+    def _apply_rr_cursor(self, team_name: str, cursor: int) -> Undo:
+        return self._set_team_value(self.rr_cursors, team_name, cursor)
+
+    def _set_team_value(self, values: dict[str, Any], team_name: str, value: Any) -> Undo:
+        old = values.get(team_name)
+        if value is None:
+            values.pop(team_name, None)
+        else:
+            values[team_name] = value
+        return lambda: self._set_team_value(values, team_name, old)
+
+    def _apply_user(
+        self, user_id: str, username: str, is_active: bool, team_name: str | None
+    ) -> Undo:
+        old = self.users.get(user_id)
+        new = UserRecord(user_id, username, is_active, team_name)
+        self._replace_user(old, new)
+        return lambda: self._replace_user(new, old)
+
+    def _replace_user(self, old: UserRecord | None, new: UserRecord | None) -> None:
+        if old is not None and (new is None or old.team_name != new.team_name):
+            self.team_members.get(old.team_name, {}).pop(old.user_id, None)
+        if old is not None and (new is None or not new.is_active or old.team_name != new.team_name):
+            self.team_active.get(old.team_name, {}).pop(old.user_id, None)
+        if new is None:
+            del self.users[old.user_id]
+            return
+        self.users[new.user_id] = new
+        if new.team_name is not None:
+            # у существующего ключа место в порядке сохраняется
+            members = self.team_members[new.team_name]
+            members[new.user_id] = new
+            active = self.team_active[new.team_name]
+            if new.is_active and new.user_id not in active:
+                if next(reversed(members)) == new.user_id:
+                    active[new.user_id] = None
+                else:
+                    # активация (или откат деактивации) — порядок как у участников
+                    self.team_active[new.team_name] = {
+                        user_id: None for user_id, user in members.items() if user.is_active
+                    }
+
+    def _apply_pr(
+        self,
+        pr_id: str,
+        pr_name: str,
+        author_id: str,
+        status: str,
+        created_at: datetime.datetime | str,
+        merged_at: datetime.datetime | str | None,
+    ) -> Undo:
+        self.prs[pr_id] = PRRecord(
+            pr_id,
+            pr_name,
+            author_id,
+            PRStatus(status),
+            _as_datetime(created_at),
+            _as_datetime(merged_at),
+        )
+        return lambda: self.prs.pop(pr_id)
+
+    def _apply_status(
+        self, pr_id: str, status: str, merged_at: datetime.datetime | str | None
+    ) -> Undo:
+        pr = self.prs[pr_id]
+        old_status, old_merged_at = pr.status, pr.mergedAt
+        new_status = PRStatus(status)
+        if (old_status == PRStatus.OPEN) != (new_status == PRStatus.OPEN):
+            delta = 1 if new_status == PRStatus.OPEN else -1
+            for reviewer in pr.reviewers:
+                self._add_load(reviewer.reviewer_id, delta)
+        pr.status, pr.mergedAt = new_status, _as_datetime(merged_at)
+        return lambda: self._apply_status(pr_id, old_status, old_merged_at)
+
+    def _apply_add_reviewer(self, pr_id: str, reviewer_id: str) -> Undo:
+        pr = self.prs[pr_id]
+        pr.reviewers.append(ReviewerRecord(pr_id, reviewer_id))
+        self.reviewer_prs.setdefault(reviewer_id, set()).add(pr_id)
+        if pr.status == PRStatus.OPEN:
+            self._add_load(reviewer_id, 1)
+        return lambda: self._apply_remove_reviewer(pr_id, reviewer_id)
+
+    def _apply_remove_reviewer(self, pr_id: str, reviewer_id: str) -> Undo:
+        pr = self.prs[pr_id]
+        pr.reviewers = [r for r in pr.reviewers if r.reviewer_id != reviewer_id]
+        prs = self.reviewer_prs[reviewer_id]
+        prs.discard(pr_id)
+        if not prs:
+            del self.reviewer_prs[reviewer_id]
+        if pr.status == PRStatus.OPEN:
+            self._add_load(reviewer_id, -1)
+        return lambda: self._apply_add_reviewer(pr_id, reviewer_id)
+
+    def _apply_counters(self, counters: dict[str, int], reviewers: dict[str, int]) -> Undo:
+        for name, delta in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + delta
+        for reviewer_id, delta in reviewers.items():
+            old = self.reviewer_counts.get(reviewer_id, 0)
+            self.reviewer_counts[reviewer_id] = old + delta
+            self._move_count(reviewer_id, old, old + delta)
+        return lambda: self._apply_counters(
+            {k: -v for k, v in counters.items()}, {k: -v for k, v in reviewers.items()}
+        )
+
+    def _apply_rebuild(self) -> Undo:
+        old = self.counters, self.reviewer_counts
+        self._set_counts(*self.compute_live())
+        return lambda: self._set_counts(*old)
+
+    def _apply_outbox(
+        self,
+        event_id: int,
+        event_type: str,
+        payload: dict[str, Any],
+        created_at: datetime.datetime | str,
+    ) -> Undo:
+        created_at = _as_datetime(created_at)
+        self.outbox[event_id] = OutboxRecord(event_id, event_type, payload, created_at, created_at)
+        undo_seq = self._apply_outbox_seq(max(self.outbox_seq, event_id))
+
+        def undo() -> None:
+            del self.outbox[event_id]
+            undo_seq()
+
+        return undo
+
+    def _apply_outbox_seq(self, value: int) -> Undo:
+        old, self.outbox_seq = self.outbox_seq, value
+        return lambda: self._apply_outbox_seq(old)
+
+    def _apply_outbox_delete(self, event_ids: list[int]) -> Undo:
+        removed = {event_id: self.outbox.pop(event_id) for event_id in event_ids}
+
+        def undo() -> None:
+            # вернуть на свои места: диспетчер выбирает события по порядку id
+            self.outbox = dict(sorted({**self.outbox, **removed}.items()))
+
+        return undo
+
+    def _apply_outbox_retry(
+        self,
+        event_id: int,
+        attempts: int,
+        available_at: datetime.datetime | str,
+        last_error: str | None,
+    ) -> Undo:
+        event = self.outbox[event_id]
+        old = event.attempts, event.available_at, event.last_error
+        event.attempts, event.available_at = attempts, _as_datetime(available_at)
+        event.last_error = last_error
+        return lambda: self._apply_outbox_retry(event_id, *old)
+
+    def _apply_versions(self, deltas: dict[str, int]) -> Undo:
+        for name, delta in deltas.items():
+            self.versions[name] = self.versions.get(name, 0) + delta
+        return lambda: self._apply_versions({k: -v for k, v in deltas.items()})
+
+    def _set_counts(self, counters: dict[str, int], reviewer_counts: dict[str, int]) -> None:
+        self.counters, self.reviewer_counts = counters, reviewer_counts
+        self.reviewers_by_count = {}
+        for reviewer_id, count in reviewer_counts.items():
+            self._move_count(reviewer_id, 0, count)
+
+    def _move_count(self, reviewer_id: str, old: int, new: int) -> None:
+        if old > 0:
+            bucket = self.reviewers_by_count[old]
+            bucket.discard(reviewer_id)
+            if not bucket:
+                del self.reviewers_by_count[old]
+        if new > 0:
+            self.reviewers_by_count.setdefault(new, set()).add(reviewer_id)
+
+    def _add_load(self, reviewer_id: str, delta: int) -> None:
+        load = self.open_load.get(reviewer_id, 0) + delta
+        if load:
+            self.open_load[reviewer_id] = load
+        else:
+            self.open_load.pop(reviewer_id, None)
+
+    # --- чтение -----------------------------------------------------------
+
+    def compute_live(self) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Counters recomputed from the data, like StatsRepository.compute_live
+        """
+        counters = {status_counter(status): 0 for status in PRStatus}
+        reviewers: dict[str, int] = {}
+        total_reviews = 0
+        for pr in self.prs.values():
+            counters[status_counter(pr.status)] += 1
+            total_reviews += len(pr.reviewers)
+            for reviewer in pr.reviewers:
+                reviewers[reviewer.reviewer_id] = reviewers.get(reviewer.reviewer_id, 0) + 1
+        counters[TOTAL_PRS] = len(self.prs)
+        counters[TOTAL_REVIEWS] = total_reviews
+        return counters, reviewers
+
+    def dump_ops(self) -> Iterator[list[Any]]:
+        """
+        Operations that rebuild the current state from an empty store
+        """
+        for team_name in self.team_members:
+            yield ["team", team_name]
+        for team_name, strategy in self.team_strategy.items():
+            yield ["team_strategy", team_name, strategy]
+        for team_name, cursor in self.rr_cursors.items():
+            yield ["rr_cursor", team_name, cursor]
+        for user in self.users.values():
+            yield ["user", *user]
+        for pr in self.prs.values():
+            yield [
+                "pr",
+                pr.pull_request_id,
+                pr.pull_request_name,
+                pr.author_id,
+                pr.status,
+                pr.createdAt,
+                pr.mergedAt,
+            ]
+            for reviewer in pr.reviewers:
+                yield ["add_reviewer", pr.pull_request_id, reviewer.reviewer_id]
+        yield ["counters", self.counters, self.reviewer_counts]
+        for event in self.outbox.values():
+            yield ["outbox", event.id, event.event_type, event.payload, event.created_at]
+            if event.attempts:
+                yield [
+                    "outbox_retry",
+                    event.id,
+                    event.attempts,
+                    event.available_at,
+                    event.last_error,
+                ]
+        yield ["outbox_seq", self.outbox_seq]
+        yield ["versions", self.versions]
+
+
+class SnapshotLog:
+    """
+    Append-only journal: one JSON line with all operations of a transaction
+
+    A torn last line (crash during a write) is dropped on load, so a
+    transaction is either fully replayed or not at all. On load the journal
+    is compacted to the current state.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def load(self, store: MemoryStore) -> None:
+        transactions = 0
+        if self.path.exists():
+            with self.path.open("rb") as f:
+                for line in f:
+                    try:
+                        ops = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        logger.warning("%s: dropped torn transaction at the end", self.path)
+                        break
+                    for op, *args in ops:
+                        store.apply(op, *args)
+                    transactions += 1
+        self.compact(store)
+        logger.info("%s: replayed %d transactions", self.path, transactions)
+
+    def compact(self, store: MemoryStore) -> None:
+        """
+        Rewrite the journal as one transaction with the current state
+        """
+        self.close()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(orjson.dumps(list(store.dump_ops())) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def append(self, ops: list[list[Any]]) -> None:
+        if self._file is None:
+            self._file = self.path.open("ab")
+        # flush без fsync: переживает падение процесса, но не отключение питания
+        self._file.write(orjson.dumps(ops) + b"\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MemorySession:
+    """
+    Unit of work over a MemoryStore, used by the services like an AsyncSession
+
+    Writes are applied immediately and undone on rollback. Objects returned
+    by get_pr(for_update=True) are copies; their changes are written on commit.
+    """
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self._undo: list[Undo] = []
+        self._ops: list[list[Any]] = []
+        self._tracked: dict[str, PRRecord] = {}
+
+    def write(self, op: str, *args: Any) -> None:
+        self._undo.append(self.store.apply(op, *args))
+        self._ops.append([op, *args])
+
+    def track(self, pr: PRRecord) -> PRRecord:
+        tracked = self._tracked.get(pr.pull_request_id)
+        if tracked is None:
+            tracked = self._tracked[pr.pull_request_id] = replace(pr, reviewers=list(pr.reviewers))
+        return tracked
+
+    def _flush(self) -> None:
+        for pr_id, tracked in self._tracked.items():
+            stored = self.store.prs[pr_id]
+            if (tracked.status, tracked.mergedAt) != (stored.status, stored.mergedAt):
+                self.write("status", pr_id, tracked.status, tracked.mergedAt)
+        self._tracked.clear()
+
+    async def commit(self) -> None:
+        self._flush()
+        if self._ops and self.store.snapshot is not None:
+            try:
+                self.store.snapshot.append(self._ops)
+            except OSError:
+                await self.rollback()
+                raise
+        self._undo.clear()
+        self._ops.clear()
+
+    async def rollback(self) -> None:
+        self._tracked.clear()
+        for undo in reversed(self._undo):
+            undo()
+        self._undo.clear()
+        self._ops.clear()
+
+    async def delete(self, instance: Any) -> None:
+        if not isinstance(instance, ReviewerRecord):
+            raise TypeError(f"can't delete {type(instance).__name__} from memory store")
+        self.write("remove_reviewer", instance.pull_request_id, instance.reviewer_id)
+
+    async def close(self) -> None:
+        # как у AsyncSession: незакоммиченное откатывается
+        await self.rollback()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,77 @@
+from collections.abc import Collection, Mapping, Sequence
+import datetime
+from typing import Any
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.models import OutboxEvent
+
+# событие для записи: (event_type, payload)
+NewEvent = tuple[str, Mapping[str, Any]]
+
+
+class OutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(self, events: Sequence[NewEvent]) -> None:
+        """
+        Insert events with one statement, without commit
+
+        Called by the services before their commit, so an event exists if and
+        only if its change was committed.
+        """
+        if not events:
+            return
+        now = datetime.datetime.now(datetime.UTC)
+        await self.db.execute(
+            insert(OutboxEvent).values(
+                [
+                    {
+                        "event_type": event_type,
+                        "payload": dict(payload),
+                        "created_at": now,
+                        "available_at": now,
+                        "attempts": 0,
+                    }
+                    for event_type, payload in events
+                ]
+            )
+        )
+
+    async def claim(self, limit: int, max_attempts: int) -> list[OutboxEvent]:
+        """
+        Lock up to `limit` events due for delivery, oldest first
+
+        FOR UPDATE SKIP LOCKED: rows claimed by another dispatcher are skipped,
+        not waited for, so several dispatchers split the backlog. The locks
+        are held until the caller commits. SQLite ignores the clause.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        result = await self.db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.available_at <= now, OutboxEvent.attempts < max_attempts)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def delete(self, event_ids: Collection[int]) -> None:
+        await self.db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(list(event_ids))))
+
+    async def retry(
+        self, schedule: Sequence[tuple[int, int, datetime.datetime]], error: str
+    ) -> None:
+        """
+        Store (event_id, attempts, available_at) of failed events, one executemany
+        """
+        await self.db.execute(
+            update(OutboxEvent),
+            [
+                {"id": event_id, "attempts": attempts, "available_at": at, "last_error": error}
+                for event_id, attempts, at in schedule
+            ],
+        )
@@ -1,18 +1,32 @@
+from collections.abc import Collection, Sequence
+import datetime
+
+from sqlalchemy import Row, exists, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.models import PullRequest, PullRequestReviewer
+from app.models.models import PRStatus, PullRequest, PullRequestReviewer, User
 
 
 class PRRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_pr(self, pr_id: str) -> PullRequest | None:
-        result = await self.db.execute(
-            select(PullRequest).where(PullRequest.pull_request_id == pr_id)
-        )
+    async def get_pr(self, pr_id: str, for_update: bool = False) -> PullRequest | None:
+        """
+        Get PR; with for_update the row is locked until the end of the transaction
+
+        SELECT ... FOR UPDATE serializes writers of one PR (merge, reassign,
+        deactivation) and doesn't block other PRs. SQLite has no row locks,
+        there the whole database is locked by the writing transaction.
+        """
+        stmt = select(PullRequest).where(PullRequest.pull_request_id == pr_id)
+        if for_update:
+            # перечитать строку под блокировкой, даже если PR уже в сессии
+            stmt = stmt.with_for_update().execution_options(populate_existing=True)
+        result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
     async def get_pr_with_reviewers(self, pr_id: str) -> PullRequest | None:
@@ -26,15 +40,98 @@ class PRRepository:
         )
         return result.scalar_one_or_none()
 
-    async def add_pr(self, pr: PullRequest) -> PullRequest:
-        self.db.add(pr)
-        await self.db.commit()
-        await self.db.refresh(pr)
-        return pr
+    async def get_create_context(self, pr_id: str, author_id: str) -> Row:
+        """
+        Check PR id and author in one round trip
+
+        Returns row (pr_exists, author_exists, team_name)
+        """
+        result = await self.db.execute(
+            select(
+                exists().where(PullRequest.pull_request_id == pr_id).label("pr_exists"),
+                exists().where(User.user_id == author_id).label("author_exists"),
+                select(User.team_name)
+                .where(User.user_id == author_id)
+                .scalar_subquery()
+                .label("team_name"),
+            )
+        )
+        return result.one()
+
+    async def get_existing_ids(self, pr_ids: Collection[str]) -> set[str]:
+        """
+        Which of `pr_ids` already exist, one query
+        """
+        result = await self.db.execute(
+            select(PullRequest.pull_request_id).where(PullRequest.pull_request_id.in_(list(pr_ids)))
+        )
+        return set(result.scalars().all())
+
+    async def create_pr_with_reviewers(
+        self, pr_id: str, pr_name: str, author_id: str, reviewer_ids: Sequence[str]
+    ) -> PullRequest:
+        """
+        Insert PR and its reviewers (one batched INSERT) without commit
+
+        Rows are built from INSERT ... RETURNING, no reload is needed.
+        """
+        prs = await self.create_prs_with_reviewers([(pr_id, pr_name, author_id, reviewer_ids)])
+        return prs[0]
+
+    async def create_prs_with_reviewers(
+        self, items: Sequence[tuple[str, str, str, Sequence[str]]]
+    ) -> list[PullRequest]:
+        """
+        Insert (pr_id, pr_name, author_id, reviewer_ids) items without commit
+
+        One INSERT ... RETURNING for all PRs and one for all reviewers,
+        PRs are returned in the order of `items`.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        inserted = await self.db.scalars(
+            insert(PullRequest).returning(PullRequest, sort_by_parameter_order=True),
+            [
+                {
+                    "pull_request_id": pr_id,
+                    "pull_request_name": pr_name,
+                    "author_id": author_id,
+                    "status": PRStatus.OPEN,
+                    "createdAt": now,
+                }
+                for pr_id, pr_name, author_id, _reviewer_ids in items
+            ],
+        )
+        prs = list(inserted.all())
+
+        reviewers: dict[str, list[PullRequestReviewer]] = {pr.pull_request_id: [] for pr in prs}
+        reviewer_rows = [
+            {
+                "id": f"{pr_id}_{reviewer_id}",
+                "pull_request_id": pr_id,
+                "reviewer_id": reviewer_id,
+            }
+            for pr_id, _pr_name, _author_id, reviewer_ids in items
+            for reviewer_id in reviewer_ids
+        ]
+        if reviewer_rows:
+            result = await self.db.scalars(
+                insert(PullRequestReviewer).returning(
+                    PullRequestReviewer, sort_by_parameter_order=True
+                ),
+                reviewer_rows,
+            )
+            for reviewer in result.all():
+                reviewers[reviewer.pull_request_id].append(reviewer)
+        # ревьюверы уже известны — заполняем relationship без lazy load
+        for pr in prs:
+            set_committed_value(pr, "reviewers", reviewers[pr.pull_request_id])
+        return prs
 
     async def add_reviewer(self, pr_id: str, reviewer_id: str):
+        """
+        Add reviewer to PR without commit
+        """
         reviewer = PullRequestReviewer(
             id=f"{pr_id}_{reviewer_id}", pull_request_id=pr_id, reviewer_id=reviewer_id
         )
         self.db.add(reviewer)
-        await self.db.commit()
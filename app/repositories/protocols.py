@@ -0,0 +1,171 @@
+# Repository interfaces shared by the SQL and in-memory backends
+#
+# Сервисы работают только через эти методы и через commit / rollback сессии,
+# поэтому одинаково выполняются на SQLAlchemy (app.repositories.*_repository)
+# и на памяти процесса (app.repositories.memory_repository). Возвращаемые
+# объекты сравниваются по атрибутам: ORM-модели в SQL-бэкенде, записи
+# (dataclass) в памяти.
+from collections.abc import Collection, Mapping, Sequence
+import datetime
+from typing import Any, Protocol
+
+from app.models.models import OutboxEvent, PRStatus, PullRequest, PullRequestReviewer, Team, User
+from app.repositories.outbox_repository import NewEvent
+from app.repositories.stats_repository import Bucket, StatsBreakdown
+from app.repositories.team_repository import Roster
+
+
+class Session(Protocol):
+    """
+    Unit of work the services commit or roll back
+    """
+
+    async def commit(self) -> None: ...
+
+    async def rollback(self) -> None: ...
+
+    async def delete(self, instance: Any) -> None: ...
+
+
+class PRRepositoryProtocol(Protocol):
+    async def get_pr(self, pr_id: str, for_update: bool = False) -> PullRequest | None: ...
+
+    async def get_pr_with_reviewers(self, pr_id: str) -> PullRequest | None: ...
+
+    async def get_create_context(self, pr_id: str, author_id: str) -> Any: ...
+
+    async def get_existing_ids(self, pr_ids: Collection[str]) -> set[str]: ...
+
+    async def create_pr_with_reviewers(
+        self, pr_id: str, pr_name: str, author_id: str, reviewer_ids: Sequence[str]
+    ) -> PullRequest: ...
+
+    async def create_prs_with_reviewers(
+        self, items: Sequence[tuple[str, str, str, Sequence[str]]]
+    ) -> list[PullRequest]: ...
+
+    async def add_reviewer(self, pr_id: str, reviewer_id: str) -> None: ...
+
+
+class TeamRepositoryProtocol(Protocol):
+    async def get_team(self, team_name: str) -> Team | None: ...
+
+    async def get_roster(
+        self, team_name: str, fresh: bool = False, version: int | None = None
+    ) -> Roster | None: ...
+
+    async def get_rosters(self, team_names: Collection[str]) -> dict[str, Roster]: ...
+
+    def invalidate_roster(self, team_name: str) -> None: ...
+
+    async def upsert_teams(self, team_names: Collection[str]) -> list[str]: ...
+
+    async def set_strategy(self, team_name: str, strategy: str | None) -> bool: ...
+
+    async def lock_rr_cursors(self, team_names: Collection[str]) -> dict[str, int]: ...
+
+    async def set_rr_cursors(self, cursors: Mapping[str, int]) -> None: ...
+
+    async def team_exists(self, team_name: str) -> bool: ...
+
+    async def add_team(
+        self, team_name: str, members: list[dict], version: int | None = None
+    ) -> Team | Roster: ...
+
+
+class UserRepositoryProtocol(Protocol):
+    async def get_user(self, user_id: str) -> User | None: ...
+
+    async def get_team_names(self, user_ids: Collection[str]) -> dict[str, str | None]: ...
+
+    async def get_users_state(
+        self, user_ids: Collection[str]
+    ) -> dict[str, tuple[str, bool, str | None]]: ...
+
+    async def upsert_users(self, rows: Sequence[dict[str, Any]]) -> None: ...
+
+    async def set_is_active(self, user_id: str, is_active: bool) -> User | None: ...
+
+    async def deactivate_users(
+        self, team_name: str, user_ids: Collection[str] | None = None
+    ) -> list[str]: ...
+
+
+class ReviewerRepositoryProtocol(Protocol):
+    async def get_reviewers_by_pr(self, pr_id: str) -> Sequence[PullRequestReviewer]: ...
+
+    async def get_prs_by_reviewer(
+        self,
+        reviewer_id: str,
+        status: PRStatus | None = None,
+        limit: int | None = None,
+        after: tuple[datetime.datetime | None, str] | None = None,
+    ) -> Sequence[Any]: ...
+
+    async def count_open_reviews(self, user_ids: Collection[str]) -> dict[str, int]: ...
+
+    async def get_open_loads(self, team_name: str) -> dict[str, int]: ...
+
+    async def get_open_assignments(self, reviewer_ids: Collection[str]) -> Sequence[Any]: ...
+
+    async def remove_from_open_prs(self, reviewer_ids: Collection[str]) -> None: ...
+
+    async def add_reviewers(self, assignments: Collection[tuple[str, str]]) -> None: ...
+
+
+class StatsRepositoryProtocol(Protocol):
+    async def apply(
+        self,
+        counters: Mapping[str, int],
+        reviewers: Mapping[str, int],
+        shard_key: str | None = None,
+    ) -> None: ...
+
+    async def get_counters(self) -> dict[str, int]: ...
+
+    async def get_top_reviewers(self, limit: int) -> list[tuple[str, int]]: ...
+
+    async def get_breakdown(
+        self,
+        created_from: datetime.datetime | None,
+        created_to: datetime.datetime | None,
+        team_name: str | None,
+    ) -> StatsBreakdown: ...
+
+    async def get_merge_latency(
+        self,
+        merged_from: datetime.datetime,
+        merged_to: datetime.datetime,
+        team_name: str | None,
+        quantiles: Sequence[float],
+    ) -> tuple[int, list[float | None]]: ...
+
+    async def get_throughput(
+        self,
+        since: datetime.datetime,
+        until: datetime.datetime,
+        team_name: str | None,
+        bucket: Bucket,
+    ) -> dict[datetime.datetime, tuple[int, int]]: ...
+
+    async def compute_live(self) -> tuple[dict[str, int], dict[str, int]]: ...
+
+    async def rebuild(self) -> None: ...
+
+
+class OutboxRepositoryProtocol(Protocol):
+    async def add(self, events: Sequence[NewEvent]) -> None: ...
+
+    async def claim(self, limit: int, max_attempts: int) -> list[OutboxEvent]: ...
+
+    async def delete(self, event_ids: Collection[int]) -> None: ...
+
+    async def retry(
+        self, schedule: Sequence[tuple[int, int, datetime.datetime]], error: str
+    ) -> None: ...
+
+
+class VersionRepositoryProtocol(Protocol):
+    async def bump(self, names: Collection[str], shard_key: str | None = None) -> None: ...
+
+    async def get(self, name: str) -> int: ...
@@ -1,10 +1,11 @@
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
+import datetime
 
+from sqlalchemy import Row, and_, delete, func, insert, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
-from app.models.models import PullRequestReviewer
+from app.models.models import PRStatus, PullRequest, PullRequestReviewer, User
 
 
 class ReviewerRepository:
@@ -17,13 +18,137 @@ class ReviewerRepository:
         )
         return result.scalars().all()
 
-    async def get_prs_by_reviewer(self, reviewer_id: str) -> Sequence[PullRequestReviewer]:
+    async def get_prs_by_reviewer(
+        self,
+        reviewer_id: str,
+        status: PRStatus | None = None,
+        limit: int | None = None,
+        after: tuple[datetime.datetime | None, str] | None = None,
+    ) -> Sequence[Row]:
         """
-        Get all PR for a reviewer with eager loading of pull_request
+        PRs of a reviewer as short rows, ordered by (createdAt, pull_request_id)
+
+        Single join, only the columns PullRequestShort needs.
+        `after` is a keyset position: rows strictly after it are returned.
         """
-        result = await self.db.execute(
-            select(PullRequestReviewer)
-            .options(selectinload(PullRequestReviewer.pull_request))
+        query = (
+            select(
+                PullRequest.pull_request_id,
+                PullRequest.pull_request_name,
+                PullRequest.author_id,
+                PullRequest.status,
+                PullRequest.createdAt,
+            )
+            .join(
+                PullRequestReviewer,
+                PullRequestReviewer.pull_request_id == PullRequest.pull_request_id,
+            )
             .where(PullRequestReviewer.reviewer_id == reviewer_id)
+            .order_by(PullRequest.createdAt, PullRequest.pull_request_id)
+        )
+        if status is not None:
+            query = query.where(PullRequest.status == status)
+        if after is not None:
+            created_at, pr_id = after
+            query = query.where(
+                or_(
+                    PullRequest.createdAt > created_at,
+                    and_(PullRequest.createdAt == created_at, PullRequest.pull_request_id > pr_id),
+                )
+            )
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def count_open_reviews(self, user_ids: Collection[str]) -> dict[str, int]:
+        """
+        OPEN review counts of the given users, users without reviews are omitted
+        """
+        result = await self.db.execute(
+            select(PullRequestReviewer.reviewer_id, func.count())
+            .join(PullRequest, PullRequest.pull_request_id == PullRequestReviewer.pull_request_id)
+            .where(
+                PullRequestReviewer.reviewer_id.in_(list(user_ids)),
+                PullRequest.status == PRStatus.OPEN,
+            )
+            .group_by(PullRequestReviewer.reviewer_id)
+        )
+        return {user_id: count for user_id, count in result.all()}
+
+    async def get_open_loads(self, team_name: str) -> dict[str, int]:
+        """
+        Active team members with their OPEN review counts
+        """
+        result = await self.db.execute(
+            select(User.user_id, func.count(PullRequest.pull_request_id))
+            .outerjoin(PullRequestReviewer, PullRequestReviewer.reviewer_id == User.user_id)
+            .outerjoin(
+                PullRequest,
+                (PullRequest.pull_request_id == PullRequestReviewer.pull_request_id)
+                & (PullRequest.status == PRStatus.OPEN),
+            )
+            .where(User.team_name == team_name, User.is_active.is_(True))
+            .group_by(User.user_id)
+        )
+        return {user_id: count for user_id, count in result.all()}
+
+    async def get_open_assignments(self, reviewer_ids: Collection[str]) -> Sequence[Row]:
+        """
+        All reviewer rows of OPEN PRs where any of `reviewer_ids` is a reviewer
+
+        Returns rows (pull_request_id, author_id, reviewer_id, pull_request_name)
+        ordered by PR.
+        The PR rows are locked FOR UPDATE in PR id order, like merge and
+        reassign lock a single PR, so they wait for each other.
+        """
+        affected = select(PullRequestReviewer.pull_request_id).where(
+            PullRequestReviewer.reviewer_id.in_(list(reviewer_ids))
+        )
+        result = await self.db.execute(
+            select(
+                PullRequestReviewer.pull_request_id,
+                PullRequest.author_id,
+                PullRequestReviewer.reviewer_id,
+                PullRequest.pull_request_name,
+            )
+            .join(PullRequest, PullRequest.pull_request_id == PullRequestReviewer.pull_request_id)
+            .where(
+                PullRequest.status == PRStatus.OPEN,
+                PullRequestReviewer.pull_request_id.in_(affected),
+            )
+            .order_by(PullRequestReviewer.pull_request_id, PullRequestReviewer.reviewer_id)
+            .with_for_update(of=PullRequest)
+        )
+        return result.all()
+
+    async def remove_from_open_prs(self, reviewer_ids: Collection[str]) -> None:
+        """
+        Remove reviewers from all OPEN PRs with one DELETE, without commit
+        """
+        open_prs = select(PullRequest.pull_request_id).where(PullRequest.status == PRStatus.OPEN)
+        await self.db.execute(
+            delete(PullRequestReviewer).where(
+                PullRequestReviewer.reviewer_id.in_(list(reviewer_ids)),
+                PullRequestReviewer.pull_request_id.in_(open_prs),
+            )
+        )
+
+    async def add_reviewers(self, assignments: Collection[tuple[str, str]]) -> None:
+        """
+        Insert (pull_request_id, reviewer_id) pairs with one batched INSERT, without commit
+        """
+        if not assignments:
+            return
+        await self.db.execute(
+            insert(PullRequestReviewer),
+            [
+                {
+                    "id": f"{pr_id}_{reviewer_id}",
+                    "pull_request_id": pr_id,
+                    "reviewer_id": reviewer_id,
+                }
+                for pr_id, reviewer_id in assignments
+            ],
         )
-        return result.scalars().all()
@@ -0,0 +1,370 @@
+from collections.abc import Mapping, Sequence
+import datetime
+from typing import Literal, NamedTuple
+
+from sqlalchemy import (
+    Integer,
+    case,
+    cast,
+    delete,
+    extract,
+    func,
+    insert,
+    literal,
+    literal_column,
+    null,
+    or_,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.upsert import dialect_insert, shard_of
+from app.models.models import (
+    PRStatus,
+    PullRequest,
+    PullRequestReviewer,
+    ReviewerStats,
+    StatsCounter,
+    User,
+)
+
+# имена счётчиков в stats_counters
+TOTAL_PRS = "total_prs"
+TOTAL_REVIEWS = "total_reviews"
+
+
+# уровни строк разбивки — значения grouping(team_name, reviewer_id) в PostgreSQL
+USER_LEVEL = 0
+TEAM_LEVEL = 1
+TOTAL_LEVEL = 3
+
+
+def status_counter(status: PRStatus) -> str:
+    return f"status:{status.value}"
+
+
+class ReviewCounts(NamedTuple):
+    """
+    Review assignments on PRs of the window: all of them, on MERGED and on OPEN PRs
+    """
+
+    created: int = 0
+    merged: int = 0
+    open: int = 0
+
+
+class StatsBreakdown(NamedTuple):
+    total: ReviewCounts
+    # (team_name, counts) по возрастанию team_name
+    teams: list[tuple[str | None, ReviewCounts]]
+    # (user_id, team_name, counts): по команде, затем по убыванию created
+    users: list[tuple[str, str | None, ReviewCounts]]
+
+
+Bucket = Literal["hour", "day"]
+
+# начало интервала в SQLite: strftime по createdAt / mergedAt (хранятся в UTC)
+_SQLITE_BUCKET_FORMATS: dict[str, str] = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+
+def truncate(value: datetime.datetime, bucket: Bucket) -> datetime.datetime:
+    """
+    Start of the UTC hour / day of `value`, like date_trunc
+    """
+    value = value.astimezone(datetime.UTC).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if bucket == "day" else value
+
+
+def percentile_cont(ranked: Mapping[int, float], n: int, q: float) -> float:
+    """
+    Linear interpolation between ranks, like PostgreSQL percentile_cont
+
+    `ranked` maps 0-based ranks of the sorted values to values; only the two
+    ranks around q * (n - 1) are needed.
+    """
+    position = q * (n - 1)
+    low = int(position)
+    if position == low:
+        return ranked[low]
+    return ranked[low] + (position - low) * (ranked[low + 1] - ranked[low])
+
+
+def build_breakdown(rows) -> StatsBreakdown:
+    """
+    Assemble the breakdown from (team_name, user_id, level, created, merged, open) rows
+    """
+    total = ReviewCounts()
+    teams = []
+    users = []
+    for team_name, user_id, level, *counts in rows:
+        if level == TOTAL_LEVEL:
+            total = ReviewCounts(*map(int, counts))
+        elif level == TEAM_LEVEL:
+            teams.append((team_name, ReviewCounts(*map(int, counts))))
+        else:
+            users.append((user_id, team_name, ReviewCounts(*map(int, counts))))
+    teams.sort(key=lambda row: (row[0] is not None, row[0] or ""))
+    users.sort(key=lambda row: (row[1] is not None, row[1] or "", -row[2].created, row[0]))
+    return StatsBreakdown(total, teams, users)
+
+
+class StatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply(
+        self,
+        counters: Mapping[str, int],
+        reviewers: Mapping[str, int],
+        shard_key: str | None = None,
+    ) -> None:
+        """
+        Add deltas to counters without commit: at most one upsert per table
+
+        Global counters go to the shard of `shard_key`, so writes for different
+        keys don't serialize on the same rows. Rows go in key order so
+        concurrent transactions lock them in the same order and can't deadlock.
+        """
+        shard = shard_of(shard_key)
+        counter_rows = [
+            {"name": name, "shard": shard, "value": counters[name]}
+            for name in sorted(counters)
+            if counters[name]
+        ]
+        if counter_rows:
+            stmt = dialect_insert(self.db, StatsCounter).values(counter_rows)
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[StatsCounter.name, StatsCounter.shard],
+                    set_={"value": StatsCounter.value + stmt.excluded.value},
+                )
+            )
+
+        reviewer_rows = [
+            {"reviewer_id": reviewer_id, "review_count": reviewers[reviewer_id]}
+            for reviewer_id in sorted(reviewers)
+            if reviewers[reviewer_id]
+        ]
+        if reviewer_rows:
+            stmt = dialect_insert(self.db, ReviewerStats).values(reviewer_rows)
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ReviewerStats.reviewer_id],
+                    set_={"review_count": ReviewerStats.review_count + stmt.excluded.review_count},
+                )
+            )
+
+    async def get_counters(self) -> dict[str, int]:
+        result = await self.db.execute(
+            select(StatsCounter.name, func.sum(StatsCounter.value)).group_by(StatsCounter.name)
+        )
+        return {name: int(value) for name, value in result.all()}
+
+    async def get_top_reviewers(self, limit: int) -> list[tuple[str, int]]:
+        result = await self.db.execute(
+            select(ReviewerStats.reviewer_id, ReviewerStats.review_count)
+            .where(ReviewerStats.review_count > 0)
+            .order_by(ReviewerStats.review_count.desc(), ReviewerStats.reviewer_id)
+            .limit(limit)
+        )
+        return [(reviewer_id, count) for reviewer_id, count in result.all()]
+
+    async def get_breakdown(
+        self,
+        created_from: datetime.datetime | None,
+        created_to: datetime.datetime | None,
+        team_name: str | None,
+    ) -> StatsBreakdown:
+        """
+        Reviews per user, per team and in total for PRs created in [from, to), one statement
+
+        The team is the reviewer's current team. PostgreSQL groups with GROUPING
+        SETS; SQLite has none, there the three GROUP BY are one UNION ALL.
+        """
+
+        def scoped(*columns):
+            stmt = (
+                select(
+                    *columns,
+                    func.count(PullRequestReviewer.id),
+                    func.coalesce(
+                        func.sum(case((PullRequest.status == PRStatus.MERGED, 1), else_=0)), 0
+                    ),
+                    func.coalesce(
+                        func.sum(case((PullRequest.status == PRStatus.OPEN, 1), else_=0)), 0
+                    ),
+                )
+                .select_from(PullRequestReviewer)
+                .join(
+                    PullRequest, PullRequest.pull_request_id == PullRequestReviewer.pull_request_id
+                )
+                .join(User, User.user_id == PullRequestReviewer.reviewer_id)
+            )
+            # окно — по ix_pull_requests_created_at
+            if created_from is not None:
+                stmt = stmt.where(PullRequest.createdAt >= created_from)
+            if created_to is not None:
+                stmt = stmt.where(PullRequest.createdAt < created_to)
+            if team_name is not None:
+                stmt = stmt.where(User.team_name == team_name)
+            return stmt
+
+        team, reviewer = User.team_name, PullRequestReviewer.reviewer_id
+        if self.db.bind.dialect.name == "postgresql":
+            stmt = scoped(team, reviewer, func.grouping(team, reviewer)).group_by(
+                func.grouping_sets(tuple_(team, reviewer), tuple_(team), tuple_())
+            )
+        else:
+            stmt = union_all(
+                scoped(team, reviewer, literal(USER_LEVEL)).group_by(team, reviewer),
+                scoped(team, null(), literal(TEAM_LEVEL)).group_by(team),
+                scoped(null(), null(), literal(TOTAL_LEVEL)),
+            )
+        return build_breakdown((await self.db.execute(stmt)).all())
+
+    def _author_team(self, stmt, team_name: str | None):
+        if team_name is None:
+            return stmt
+        return stmt.join(User, User.user_id == PullRequest.author_id).where(
+            User.team_name == team_name
+        )
+
+    async def get_merge_latency(
+        self,
+        merged_from: datetime.datetime,
+        merged_to: datetime.datetime,
+        team_name: str | None,
+        quantiles: Sequence[float],
+    ) -> tuple[int, list[float | None]]:
+        """
+        Number of PRs merged in [from, to) and quantiles of their time to merge, s
+
+        PostgreSQL computes percentile_cont; SQLite has none, there the rows are
+        ranked with window functions and only the ranks around each quantile
+        are fetched, then interpolated the same way.
+        """
+        window = (PullRequest.mergedAt >= merged_from, PullRequest.mergedAt < merged_to)
+        if self.db.bind.dialect.name == "postgresql":
+            seconds = extract("epoch", PullRequest.mergedAt - PullRequest.createdAt)
+            stmt = select(
+                func.count(),
+                *(func.percentile_cont(q).within_group(seconds) for q in quantiles),
+            ).where(*window)
+            count, *values = (await self.db.execute(self._author_team(stmt, team_name))).one()
+            return count, [None if value is None else float(value) for value in values]
+
+        seconds = (
+            func.julianday(PullRequest.mergedAt) - func.julianday(PullRequest.createdAt)
+        ) * 86400.0
+        ranked = self._author_team(
+            select(
+                seconds.label("seconds"),
+                (func.row_number().over(order_by=seconds) - 1).label("rank"),
+                func.count().over().label("n"),
+            ).where(*window),
+            team_name,
+        ).subquery()
+        # ранги вокруг q * (n - 1): CAST в SQLite отбрасывает дробную часть, как int()
+        low = [cast(q * (ranked.c.n - 1), Integer) for q in quantiles]
+        result = await self.db.execute(
+            select(ranked.c.n, ranked.c.rank, ranked.c.seconds).where(
+                or_(
+                    *(ranked.c.rank == rank for rank in low),
+                    *(ranked.c.rank == rank + 1 for rank in low),
+                )
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return 0, [None] * len(quantiles)
+        n = rows[0].n
+        values = {row.rank: row.seconds for row in rows}
+        return n, [percentile_cont(values, n, q) for q in quantiles]
+
+    async def get_throughput(
+        self,
+        since: datetime.datetime,
+        until: datetime.datetime,
+        team_name: str | None,
+        bucket: Bucket,
+    ) -> dict[datetime.datetime, tuple[int, int]]:
+        """
+        PRs created and merged per UTC hour / day of [since, until), one statement
+
+        Only buckets with at least one PR are returned.
+        """
+
+        def per_bucket(kind: int, column):
+            # константы — литералами: с параметрами PostgreSQL не сочтёт выражение
+            # в SELECT тем же, что в GROUP BY
+            if self.db.bind.dialect.name == "postgresql":
+                start = func.date_trunc(
+                    literal_column(f"'{bucket}'"), func.timezone(literal_column("'UTC'"), column)
+                )
+            else:
+                start = func.strftime(literal_column(f"'{_SQLITE_BUCKET_FORMATS[bucket]}'"), column)
+            stmt = select(literal_column(str(kind)), start, func.count()).where(
+                column >= since, column < until
+            )
+            return self._author_team(stmt, team_name).group_by(start)
+
+        result = await self.db.execute(
+            union_all(per_bucket(0, PullRequest.createdAt), per_bucket(1, PullRequest.mergedAt))
+        )
+        series: dict[datetime.datetime, list[int]] = {}
+        for kind, start, count in result.all():
+            if isinstance(start, str):
+                start = datetime.datetime.fromisoformat(start)
+            series.setdefault(start.replace(tzinfo=datetime.UTC), [0, 0])[kind] = count
+        return {start: (created, merged) for start, (created, merged) in series.items()}
+
+    async def compute_live(self) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Compute counters from the source tables (full aggregates)
+        """
+        counters = {
+            TOTAL_PRS: await self.db.scalar(select(func.count(PullRequest.pull_request_id))) or 0,
+            TOTAL_REVIEWS: await self.db.scalar(select(func.count(PullRequestReviewer.id))) or 0,
+        }
+        for status in PRStatus:
+            counters[status_counter(status)] = 0
+        status_result = await self.db.execute(
+            select(PullRequest.status, func.count(PullRequest.pull_request_id)).group_by(
+                PullRequest.status
+            )
+        )
+        for status, count in status_result.all():
+            if status is not None:
+                counters[status_counter(PRStatus(status))] = count
+
+        reviewer_result = await self.db.execute(
+            select(PullRequestReviewer.reviewer_id, func.count(PullRequestReviewer.id)).group_by(
+                PullRequestReviewer.reviewer_id
+            )
+        )
+        return counters, {reviewer_id: count for reviewer_id, count in reviewer_result.all()}
+
+    async def rebuild(self) -> None:
+        """
+        Recompute all counters from scratch, without commit
+        """
+        counters, _ = await self.compute_live()
+        await self.db.execute(delete(StatsCounter))
+        await self.db.execute(delete(ReviewerStats))
+        await self.db.execute(
+            insert(StatsCounter), [{"name": k, "value": v} for k, v in counters.items()]
+        )
+        # счётчики ревьюверов пересчитываются на стороне БД одним INSERT ... SELECT
+        await self.db.execute(
+            insert(ReviewerStats).from_select(
+                ["reviewer_id", "review_count"],
+                select(PullRequestReviewer.reviewer_id, func.count(PullRequestReviewer.id))
+                .where(PullRequestReviewer.reviewer_id.is_not(None))
+                .group_by(PullRequestReviewer.reviewer_id),
+            )
+        )
@@ -1,10 +1,61 @@
+from collections.abc import Collection, Mapping
+from typing import NamedTuple
+
+from sqlalchemy import exists, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.upsert import dialect_insert
 from app.models.models import Team, User
 
 
+class RosterMember(NamedTuple):
+    user_id: str
+    username: str
+    is_active: bool
+
+
+class Roster(NamedTuple):
+    """
+    Compact immutable team roster, the value stored in roster_cache
+    """
+
+    team_name: str
+    members: tuple[RosterMember, ...]
+    active_ids: tuple[str, ...]
+    # стратегия выбора ревьюверов команды; None — по умолчанию
+    strategy: str | None = None
+    # версия команды (resource_versions), прочитанная до загрузки состава:
+    # состав не старее неё; None — загружен без версии (выбор ревьюверов)
+    version: int | None = None
+
+    @classmethod
+    def from_members(
+        cls,
+        team_name: str,
+        members: list[RosterMember],
+        strategy: str | None = None,
+        version: int | None = None,
+    ) -> "Roster":
+        return cls(
+            team_name=team_name,
+            members=tuple(members),
+            active_ids=tuple(m.user_id for m in members if m.is_active),
+            strategy=strategy,
+            version=version,
+        )
+
+
+# составы команд читаются на каждой записи PR, а меняются редко —
+# через add_team, set_is_active и deactivate_users, которые инвалидируют кэш
+roster_cache: LRUCache[str, Roster] = LRUCache(
+    settings.ROSTER_CACHE_SIZE, ttl=settings.ROSTER_CACHE_TTL, name="roster"
+)
+
+
 class TeamRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -15,7 +66,137 @@ class TeamRepository:
         )
         return result.scalar_one_or_none()
 
-    async def add_team(self, team_name: str, members: list[dict]) -> Team:
+    async def get_roster(
+        self, team_name: str, fresh: bool = False, version: int | None = None
+    ) -> Roster | None:
+        """
+        Team roster from roster_cache, loaded with one query on a miss
+
+        `fresh=True` skips the cache lookup; the loaded roster is still cached.
+        With `version` (read before this call) only an entry loaded at that
+        version is used: an entry cached before a change made by another
+        worker has an older version and is reloaded, labelled with `version`.
+        """
+        roster = None if fresh else roster_cache.get(team_name)
+        if roster is not None and (version is None or roster.version == version):
+            return roster
+
+        token = roster_cache.token()
+        result = await self.db.execute(
+            select(User.user_id, User.username, User.is_active, Team.reviewer_strategy)
+            .select_from(Team)
+            .outerjoin(User, User.team_name == Team.team_name)
+            .where(Team.team_name == team_name)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        roster = Roster.from_members(
+            team_name,
+            [RosterMember(*row[:3]) for row in rows if row.user_id is not None],
+            rows[0].reviewer_strategy,
+            version,
+        )
+        roster_cache.set(team_name, roster, token=token)
+        return roster
+
+    async def get_rosters(self, team_names: Collection[str]) -> dict[str, Roster]:
+        """
+        Rosters of several teams: cached ones plus one query for all misses
+
+        Teams that don't exist are absent from the result.
+        """
+        rosters: dict[str, Roster] = {}
+        missing = []
+        for team_name in team_names:
+            roster = roster_cache.get(team_name)
+            if roster is not None:
+                rosters[team_name] = roster
+            else:
+                missing.append(team_name)
+        if not missing:
+            return rosters
+
+        token = roster_cache.token()
+        result = await self.db.execute(
+            select(
+                Team.team_name, User.user_id, User.username, User.is_active, Team.reviewer_strategy
+            )
+            .outerjoin(User, User.team_name == Team.team_name)
+            .where(Team.team_name.in_(missing))
+        )
+        members: dict[str, list[RosterMember]] = {}
+        strategies: dict[str, str | None] = {}
+        for team_name, user_id, username, is_active, strategy in result.all():
+            team_members = members.setdefault(team_name, [])
+            strategies[team_name] = strategy
+            if user_id is not None:
+                team_members.append(RosterMember(user_id, username, is_active))
+        for team_name, team_members in members.items():
+            roster = Roster.from_members(team_name, team_members, strategies[team_name])
+            roster_cache.set(team_name, roster, token=token)
+            rosters[team_name] = roster
+        return rosters
+
+    def invalidate_roster(self, team_name: str) -> None:
+        roster_cache.invalidate(team_name)
+
+    async def upsert_teams(self, team_names: Collection[str]) -> list[str]:
+        """
+        Insert missing teams without commit, returns the names actually created
+        """
+        if not team_names:
+            return []
+        stmt = (
+            dialect_insert(self.db, Team)
+            .values([{"team_name": name} for name in sorted(team_names)])
+            .on_conflict_do_nothing(index_elements=[Team.team_name])
+            .returning(Team.team_name)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def set_strategy(self, team_name: str, strategy: str | None) -> bool:
+        """
+        Set the reviewer selection strategy without commit, False if there is no team
+        """
+        result = await self.db.execute(
+            update(Team).where(Team.team_name == team_name).values(reviewer_strategy=strategy)
+        )
+        return result.rowcount > 0
+
+    async def lock_rr_cursors(self, team_names: Collection[str]) -> dict[str, int]:
+        """
+        Round-robin cursors of the teams, rows locked FOR UPDATE until commit
+
+        Concurrent picks of the same team wait here and see the moved cursor.
+        """
+        result = await self.db.execute(
+            select(Team.team_name, Team.rr_cursor)
+            .where(Team.team_name.in_(list(team_names)))
+            .order_by(Team.team_name)
+            .with_for_update()
+        )
+        return {team_name: cursor for team_name, cursor in result.all()}
+
+    async def set_rr_cursors(self, cursors: Mapping[str, int]) -> None:
+        """
+        Store round-robin cursors with one executemany UPDATE, without commit
+        """
+        if cursors:
+            await self.db.execute(
+                update(Team),
+                [{"team_name": name, "rr_cursor": cursor} for name, cursor in cursors.items()],
+            )
+
+    async def team_exists(self, team_name: str) -> bool:
+        result = await self.db.execute(select(exists().where(Team.team_name == team_name)))
+        return bool(result.scalar())
+
+    async def add_team(
+        self, team_name: str, members: list[dict], version: int | None = None
+    ) -> Team:
         team = Team(team_name=team_name)
         self.db.add(team)
         await self.db.flush()
@@ -32,4 +213,14 @@ class TeamRepository:
         result = await self.db.execute(
             select(Team).options(selectinload(Team.members)).where(Team.team_name == team_name)
         )
-        return result.scalar_one()
+        team = result.scalar_one()
+        # write-through: состав новой команды сразу попадает в кэш
+        roster_cache.set(
+            team_name,
+            Roster.from_members(
+                team_name,
+                [RosterMember(m.user_id, m.username, m.is_active) for m in team.members],
+                version=version,
+            ),
+        )
+        return team
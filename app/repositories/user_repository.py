@@ -1,7 +1,25 @@
+from collections.abc import Collection, Sequence
+from typing import Any
+
+from sqlalchemy import column, table, text, update
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.db.upsert import dialect_insert
 from app.models.models import User
+from app.repositories.team_repository import roster_cache
+
+USER_COLUMNS = ("user_id", "username", "is_active", "team_name")
+# с какого числа строк upsert на asyncpg идёт через COPY (для малых — лишние запросы)
+COPY_MIN_ROWS = 500
+
+# промежуточная таблица для COPY: живёт в сессии, строки удаляются на commit
+_IMPORT_STAGE = table("import_users_stage", *(column(name) for name in USER_COLUMNS))
+_CREATE_IMPORT_STAGE = text(
+    "CREATE TEMP TABLE IF NOT EXISTS import_users_stage "
+    "(user_id text, username text, is_active boolean, team_name text) ON COMMIT DELETE ROWS"
+)
 
 
 class UserRepository:
@@ -12,10 +30,96 @@ class UserRepository:
         result = await self.db.execute(select(User).where(User.user_id == user_id))
         return result.scalar_one_or_none()
 
+    async def get_team_names(self, user_ids: Collection[str]) -> dict[str, str | None]:
+        """
+        Team of each existing user among `user_ids`, one query
+        """
+        result = await self.db.execute(
+            select(User.user_id, User.team_name).where(User.user_id.in_(list(user_ids)))
+        )
+        return {user_id: team_name for user_id, team_name in result.all()}
+
+    async def get_users_state(
+        self, user_ids: Collection[str]
+    ) -> dict[str, tuple[str, bool, str | None]]:
+        """
+        (username, is_active, team_name) of each existing user among `user_ids`, one query
+        """
+        result = await self.db.execute(
+            select(User.user_id, User.username, User.is_active, User.team_name).where(
+                User.user_id.in_(list(user_ids))
+            )
+        )
+        return {
+            user_id: (username, is_active, team) for user_id, username, is_active, team in result
+        }
+
+    async def upsert_users(self, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Insert or update users by user_id without commit
+
+        On asyncpg large batches are loaded with COPY into a temp table and
+        merged with one INSERT ... SELECT, otherwise one multi-row INSERT is used.
+        Duplicate user_id within `rows` are not allowed.
+        """
+        if not rows:
+            return
+        rows = sorted(rows, key=lambda row: row["user_id"])
+        if self.db.bind.dialect.driver == "asyncpg" and len(rows) >= COPY_MIN_ROWS:
+            await self._copy_to_stage(rows)
+            stmt = postgresql.insert(User).from_select(
+                list(USER_COLUMNS), select(*(_IMPORT_STAGE.c[name] for name in USER_COLUMNS))
+            )
+        else:
+            stmt = dialect_insert(self.db, User).values(rows)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[User.user_id],
+                set_={
+                    "username": stmt.excluded.username,
+                    "is_active": stmt.excluded.is_active,
+                    "team_name": stmt.excluded.team_name,
+                },
+            )
+        )
+
+    async def _copy_to_stage(self, rows: Sequence[dict[str, Any]]) -> None:
+        await self.db.execute(_CREATE_IMPORT_STAGE)
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "import_users_stage",
+            records=[tuple(row[name] for name in USER_COLUMNS) for row in rows],
+            columns=list(USER_COLUMNS),
+        )
+
     async def set_is_active(self, user_id: str, is_active: bool) -> User | None:
         user = await self.get_user(user_id)
         if user:
             user.is_active = is_active
             await self.db.commit()
+            roster_cache.invalidate(user.team_name)
             await self.db.refresh(user)
         return user
+
+    async def deactivate_users(
+        self, team_name: str, user_ids: Collection[str] | None = None
+    ) -> list[str]:
+        """
+        Deactivate team members with one UPDATE, without commit
+
+        `user_ids=None` deactivates the whole team. Returns ids of users that
+        were active; already inactive ones are not touched.
+        The caller must call TeamRepository.invalidate_roster again after commit.
+        """
+        query = (
+            update(User)
+            .where(User.team_name == team_name, User.is_active.is_(True))
+            .values(is_active=False)
+            .returning(User.user_id)
+        )
+        if user_ids is not None:
+            query = query.where(User.user_id.in_(list(user_ids)))
+        result = await self.db.execute(query)
+        roster_cache.invalidate(team_name)
+        return sorted(result.scalars().all())
@@ -0,0 +1,55 @@
+from collections.abc import Collection
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.upsert import dialect_insert, shard_of
+from app.models.models import ResourceVersion
+
+# имена версий в resource_versions
+STATS_VERSION = "stats"
+
+
+def team_version(team_name: str) -> str:
+    return f"team:{team_name}"
+
+
+def reviewer_version(user_id: str) -> str:
+    return f"reviewer:{user_id}"
+
+
+class VersionRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def bump(self, names: Collection[str], shard_key: str | None = None) -> None:
+        """
+        Increment versions with one upsert, without commit
+
+        Rows of the shard of `shard_key` are incremented: "stats" changes on
+        every write, and different PRs / teams must not wait for one row.
+        Called last before the commit, rows go in name order: the row locks
+        are held for the shortest time and taken in the same order everywhere.
+        """
+        if not names:
+            return
+        shard = shard_of(shard_key)
+        stmt = dialect_insert(self.db, ResourceVersion).values(
+            [{"name": name, "shard": shard, "version": 1} for name in sorted(set(names))]
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ResourceVersion.name, ResourceVersion.shard],
+                set_={"version": ResourceVersion.version + 1},
+            )
+        )
+
+    async def get(self, name: str) -> int:
+        """
+        Current version, the sum over shards; 0 for a resource that was never changed
+        """
+        version = await self.db.scalar(
+            select(func.sum(ResourceVersion.version)).where(ResourceVersion.name == name)
+        )
+        return int(version or 0)
@@ -0,0 +1,89 @@
+# Fast JSON responses: ORM objects / rows -> bytes without Pydantic
+#
+# Эндпойнты возвращают готовый JSONBytesResponse, поэтому FastAPI не валидирует
+# и не сериализует ответ повторно через response_model; response_model остаётся
+# только для OpenAPI. Кодировщики повторяют поля схем из app/schemas/schemas.py
+# литералами словарей (так в разы быстрее, чем обход полей модели), байты
+# совпадают с ответом через Pydantic — это проверяет tests/unit/test_encoders.py.
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from fastapi import Response
+import orjson
+
+if TYPE_CHECKING:
+    from app.models import models as db_models
+    from app.repositories.team_repository import Roster
+
+# "Z" для UTC — как у Pydantic; PRStatus (StrEnum) и datetime orjson пишет сам
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+class JSONBytesResponse(Response):
+    """
+    application/json response rendered with orjson
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def encode_team(team: "db_models.Team | Roster") -> dict[str, Any]:
+    return {
+        "team_name": team.team_name,
+        "members": [
+            {"user_id": m.user_id, "username": m.username, "is_active": m.is_active}
+            for m in team.members
+        ],
+    }
+
+
+def encode_user(user: "db_models.User") -> dict[str, Any]:
+    return {
+        "user_id": user.user_id,
+        "username": user.username,
+        "team_name": user.team_name,
+        "is_active": user.is_active,
+    }
+
+
+def encode_pr(pr: "db_models.PullRequest") -> dict[str, Any]:
+    return {
+        "pull_request_id": pr.pull_request_id,
+        "pull_request_name": pr.pull_request_name,
+        "author_id": pr.author_id,
+        "status": pr.status,
+        "assigned_reviewers": [r.reviewer_id for r in pr.reviewers],
+        "createdAt": pr.createdAt,
+        "mergedAt": pr.mergedAt,
+    }
+
+
+def encode_pr_shorts(rows: Iterable[Any]) -> list[dict[str, Any]]:
+    """
+    PullRequestShort dicts from ReviewerRepository.get_prs_by_reviewer rows
+    """
+    return [
+        {
+            "pull_request_id": row.pull_request_id,
+            "pull_request_name": row.pull_request_name,
+            "author_id": row.author_id,
+            "status": row.status,
+        }
+        for row in rows
+    ]
+
+
+def encode_sse(event: str, data: Any) -> bytes:
+    """
+    One Server-Sent Events message: `event:` line and JSON `data:` line
+    """
+    return (
+        b"event: "
+        + event.encode()
+        + b"\ndata: "
+        + orjson.dumps(data, option=ORJSON_OPTIONS)
+        + b"\n\n"
+    )
@@ -1,12 +1,8 @@
 # Pydantic schemas for API
 import datetime
-from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
 
-if TYPE_CHECKING:
-    from app.models import models as db_models
-
 
 class TeamMember(BaseModel):
     user_id: str
@@ -31,6 +27,68 @@ class TeamResponse(BaseModel):
     team: Team
 
 
+class Reassignment(BaseModel):
+    """
+    Reviewer replaced during mass deactivation (new_user_id is None if nobody was available)
+    """
+
+    pull_request_id: str
+    old_user_id: str
+    new_user_id: str | None
+
+
+class DeactivateUsersResponse(BaseModel):
+    """
+    Result of mass deactivation of team members
+    """
+
+    team_name: str
+    deactivated: list[str]
+    reassignments: list[Reassignment]
+
+
+class ReviewerStrategyResponse(BaseModel):
+    """
+    Reviewer selection strategy in effect for the team
+    """
+
+    team_name: str
+    reviewer_strategy: str
+
+
+class TeamSyncResponse(BaseModel):
+    """
+    Result of roster sync: the resulting team and what was changed
+    """
+
+    team: Team
+    created: bool
+    added: list[str]
+    updated: list[str]
+    deactivated: list[str]
+    reassignments: list[Reassignment]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    message: str
+
+
+class ImportResponse(BaseModel):
+    """
+    Counts of a bulk import, errors lists the first invalid rows
+    """
+
+    rows: int
+    teams_created: int
+    users_created: int
+    users_updated: int
+    users_unchanged: int
+    reviews_reassigned: int
+    error_count: int
+    errors: list[ImportRowError]
+
+
 class User(BaseModel):
     user_id: str
     username: str
@@ -75,6 +133,17 @@ class PullRequestShort(BaseModel):
     status: str
 
 
+class UserReviewsResponse(BaseModel):
+    """
+    PRs where the user is a reviewer (one page)
+    """
+
+    user_id: str
+    pull_requests: list[PullRequestShort]
+    # курсор следующей страницы, None — страница последняя
+    next_cursor: str | None = None
+
+
 class PullRequestResponse(BaseModel):
     """
     Response with PR
@@ -101,50 +170,21 @@ class ErrorResponse(BaseModel):
     error: ErrorDetail
 
 
-# =======
-# Converter functions: SQLAlchemy models - Pydantic schemas
-# =======
-
-
-def team_to_schema(team: "db_models.Team") -> Team:
+class PullRequestBatchItem(BaseModel):
     """
-    Convert SQLAlchemy Team to Pydantic schema
+    Result of one batch item: created PR or error
     """
-    return Team(
-        team_name=team.team_name,
-        members=[
-            TeamMember(
-                user_id=m.user_id,
-                username=m.username,
-                is_active=m.is_active,
-            )
-            for m in team.members
-        ],
-    )
 
-
-def user_to_schema(user: "db_models.User") -> User:
-    """
-    Convert SQLAlchemy User to Pydantic schema
-    """
-    return User(
-        user_id=user.user_id,
-        username=user.username,
-        team_name=user.team_name,
-        is_active=user.is_active,
-    )
+    pull_request_id: str
+    pr: PullRequestSchema | None = None
+    error: ErrorDetail | None = None
 
 
-def pr_to_schema(pr: "db_models.PullRequest") -> PullRequestSchema:
+class PullRequestBatchResponse(BaseModel):
     """
-    Convert SQLAlchemy PullRequest to Pydantic schema with assigned_reviewers
+    Response to batch PR creation, results are in request order
     """
-    return PullRequestSchema(
-        pull_request_id=pr.pull_request_id,
-        pull_request_name=pr.pull_request_name,
-        author_id=pr.author_id,
-        status=pr.status.value if hasattr(pr.status, "value") else pr.status,
-        assigned_reviewers=[r.reviewer_id for r in pr.reviewers],
-        createdAt=pr.createdAt,
-        mergedAt=pr.mergedAt,
-    )
+
+    created: int
+    failed: int
+    results: list[PullRequestBatchItem]
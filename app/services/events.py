@@ -0,0 +1,50 @@
+# Domain events of reviewer assignment, written to the outbox
+#
+# Сервисы пишут события в outbox_events в той же транзакции, что и само
+# изменение, диспетчер (app.services.outbox_dispatcher) доставляет их
+# потребителям. Payload — только JSON-типы: datetime передаётся строкой ISO 8601.
+from collections.abc import Sequence
+import datetime
+
+from app.repositories.outbox_repository import NewEvent
+
+PR_CREATED = "pr.created"
+PR_MERGED = "pr.merged"
+REVIEWER_REASSIGNED = "pr.reviewer_reassigned"
+USER_ACTIVITY_CHANGED = "user.activity_changed"
+USER_TEAM_CHANGED = "user.team_changed"
+
+
+def pr_created(pr_id: str, author_id: str, reviewer_ids: Sequence[str]) -> NewEvent:
+    return PR_CREATED, {
+        "pull_request_id": pr_id,
+        "author_id": author_id,
+        "assigned_reviewers": list(reviewer_ids),
+    }
+
+
+def pr_merged(pr_id: str, merged_at: datetime.datetime) -> NewEvent:
+    return PR_MERGED, {"pull_request_id": pr_id, "mergedAt": merged_at.isoformat()}
+
+
+def reviewer_reassigned(pr_id: str, old_user_id: str, new_user_id: str | None) -> NewEvent:
+    """
+    new_user_id is None when no replacement was found and the reviewer was removed
+    """
+    return REVIEWER_REASSIGNED, {
+        "pull_request_id": pr_id,
+        "old_user_id": old_user_id,
+        "new_user_id": new_user_id,
+    }
+
+
+def user_activity_changed(user_id: str, is_active: bool) -> NewEvent:
+    return USER_ACTIVITY_CHANGED, {"user_id": user_id, "is_active": is_active}
+
+
+def user_team_changed(user_id: str, old_team_name: str | None, new_team_name: str) -> NewEvent:
+    return USER_TEAM_CHANGED, {
+        "user_id": user_id,
+        "old_team_name": old_team_name,
+        "new_team_name": new_team_name,
+    }
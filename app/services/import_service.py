@@ -0,0 +1,292 @@
+"""
+Потоковый импорт команд и пользователей (NDJSON / CSV)
+
+Вход читается построчно и пишется пакетами по settings.IMPORT_BATCH_SIZE
+строк, каждый пакет — отдельная транзакция, поэтому память не зависит от
+размера файла. Импорт идемпотентен: команды создаются, если их нет,
+пользователи вставляются или обновляются по user_id, неизменённые строки
+не пишутся.
+"""
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+import csv
+from dataclasses import dataclass, field
+import json
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from app.core.config import settings
+from app.repositories.backend import get_repositories
+from app.repositories.outbox_repository import NewEvent
+from app.repositories.protocols import Session
+from app.repositories.version_repository import STATS_VERSION, reviewer_version, team_version
+from app.services import events
+from app.services.team_service import TeamService
+
+FORMATS = ("ndjson", "csv")
+# сколько ошибочных строк возвращать с описанием (считаются все)
+MAX_REPORTED_ERRORS = 100
+# предел записи CSV с переводами строк в кавычках: незакрытая кавычка не
+# должна собирать в память весь остаток файла
+MAX_CSV_RECORD = 64 * 1024
+
+
+class ImportRow(BaseModel):
+    """
+    One input row: a user of a team, or just a team if user_id is empty
+    """
+
+    team_name: str = Field(min_length=1)
+    user_id: str | None = None
+    username: str | None = None
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def _username_required(self) -> "ImportRow":
+        if self.user_id and not self.username:
+            raise ValueError("username is required when user_id is set")
+        return self
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    teams_created: int = 0
+    users_created: int = 0
+    users_updated: int = 0
+    users_unchanged: int = 0
+    reviews_reassigned: int = 0
+    error_count: int = 0
+    # (номер строки, описание), первые MAX_REPORTED_ERRORS
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def add_error(self, line_no: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream (e.g. a request body) into text lines
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def aiter_sync(lines: Iterable[str]) -> AsyncIterator[str]:
+    """
+    Adapt a sync line iterator (an open file) to ImportService.import_lines
+    """
+    for line in lines:
+        yield line.rstrip("\r\n")
+
+
+async def csv_records(
+    lines: AsyncIterable[str],
+) -> AsyncIterator[tuple[int, str | None, str | None]]:
+    """
+    Join physical lines into CSV records (RFC 4180: quoted fields may contain newlines)
+
+    Yields (number of the first line, record, error). A record is complete when
+    its quotes are balanced; escaped quotes are doubled, so counting works.
+    An unterminated or oversized record is yielded as an error and dropped.
+    """
+    parts: list[str] = []
+    size = quotes = start = line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not parts:
+            start = line_no
+        parts.append(line)
+        size += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield start, "\n".join(parts), None
+        elif size > MAX_CSV_RECORD:
+            yield start, None, f"quoted field longer than {MAX_CSV_RECORD} characters"
+        else:
+            continue
+        parts, size, quotes = [], 0, 0
+    if parts:
+        yield start, None, "unterminated quoted field"
+
+
+async def _numbered(lines: AsyncIterable[str]) -> AsyncIterator[tuple[int, str | None, None]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        yield line_no, line, None
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors()
+        )
+    return str(exc)
+
+
+class ImportService:
+    def __init__(self, db: Session, batch_size: int | None = None):
+        self.db = db
+        repos = get_repositories(db)
+        self.team_repo = repos.team
+        self.user_repo = repos.user
+        self.outbox_repo = repos.outbox
+        self.version_repo = repos.version
+        self.team_service = TeamService(db)
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    async def import_lines(self, lines: AsyncIterable[str], fmt: str = "ndjson") -> ImportResult:
+        """
+        Parse and upsert rows batch by batch, one commit per batch
+
+        Invalid rows are skipped and reported with their (first) line number.
+        CSV fields in quotes may span lines. A failed batch is rolled back and
+        re-raised, committed ones stay.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported format {fmt!r}, expected one of {FORMATS}")
+        result = ImportResult()
+        header: list[str] | None = None
+        batch: list[ImportRow] = []
+        records = csv_records(lines) if fmt == "csv" else _numbered(lines)
+        async for line_no, line, error in records:
+            if error is not None:
+                result.add_error(line_no, error)
+                continue
+            if not line.strip():
+                continue
+            try:
+                if fmt == "csv":
+                    values = next(csv.reader([line]))
+                    if header is None:
+                        header = [name.strip() for name in values]
+                        continue
+                    if len(values) != len(header):
+                        raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                    # пустая ячейка — значение по умолчанию
+                    data = {k: v for k, v in zip(header, values, strict=True) if v != ""}
+                else:
+                    data = json.loads(line)
+                    if not isinstance(data, dict):
+                        raise ValueError("expected a JSON object")
+                row = ImportRow.model_validate(data)
+            except (ValueError, csv.Error) as e:
+                result.add_error(line_no, _error_message(e))
+                continue
+
+            result.rows += 1
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch, result)
+                batch = []
+        if batch:
+            await self._write_batch(batch, result)
+        return result
+
+    async def _write_batch(self, batch: list[ImportRow], result: ImportResult) -> None:
+        teams = {row.team_name for row in batch}
+        # в пределах пакета побеждает последняя строка пользователя
+        users = {
+            row.user_id: (row.username, row.is_active, row.team_name)
+            for row in batch
+            if row.user_id
+        }
+        try:
+            created_teams = await self.team_repo.upsert_teams(teams)
+            existing = await self.user_repo.get_users_state(users) if users else {}
+            changed = [
+                {
+                    "user_id": user_id,
+                    "username": username,
+                    "is_active": is_active,
+                    "team_name": team,
+                }
+                for user_id, (username, is_active, team) in users.items()
+                if existing.get(user_id) != (username, is_active, team)
+            ]
+            await self.user_repo.upsert_users(changed)
+            reassignments, prs = await self._reassign_deactivated(changed, existing)
+            await self.outbox_repo.add(
+                [
+                    *self._events(changed, existing),
+                    *(events.reviewer_reassigned(*reassignment) for reassignment in reassignments),
+                ]
+            )
+            # версии только изменённых составов: новых команд, команд изменённых
+            # пользователей и команд, из которых они ушли
+            touched = {*created_teams, *(row["team_name"] for row in changed)}
+            touched |= {
+                existing[row["user_id"]][2] for row in changed if row["user_id"] in existing
+            }
+            names = [team_version(name) for name in touched if name]
+            if reassignments:
+                names.append(STATS_VERSION)
+                for _pr_id, old_id, new_id in reassignments:
+                    names += [reviewer_version(user_id) for user_id in (old_id, new_id) if user_id]
+            await self.version_repo.bump(names)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        TeamService._publish_reassignments(reassignments, prs)
+
+        # составы меняются и у команд, из которых пользователи ушли
+        for team_name in teams | {state[2] for state in existing.values() if state[2]}:
+            self.team_repo.invalidate_roster(team_name)
+
+        updated = sum(1 for row in changed if row["user_id"] in existing)
+        result.teams_created += len(created_teams)
+        result.users_created += len(changed) - updated
+        result.users_updated += updated
+        result.users_unchanged += len(users) - len(changed)
+        result.reviews_reassigned += len(reassignments)
+
+    async def _reassign_deactivated(
+        self, changed: list[dict], existing: dict[str, tuple[str, bool, str | None]]
+    ) -> tuple[list[tuple[str, str, str | None]], dict[str, tuple[str, str]]]:
+        """
+        Reassign OPEN reviews of users this batch deactivated, like /team/deactivateUsers
+
+        Replacements come from the team the user was in, where the reviews were assigned.
+        """
+        by_team: dict[str, list[str]] = {}
+        for row in changed:
+            state = existing.get(row["user_id"])
+            if state is not None and state[1] and not row["is_active"]:
+                by_team.setdefault(state[2] or row["team_name"], []).append(row["user_id"])
+        reassignments: list[tuple[str, str, str | None]] = []
+        prs: dict[str, tuple[str, str]] = {}
+        for team_name, user_ids in by_team.items():
+            team_reassignments, team_prs = await self.team_service._reassign_open_reviews(
+                team_name, sorted(user_ids)
+            )
+            reassignments += team_reassignments
+            prs.update(team_prs)
+        return reassignments, prs
+
+    @staticmethod
+    def _events(
+        changed: list[dict], existing: dict[str, tuple[str, bool, str | None]]
+    ) -> list[NewEvent]:
+        """
+        Events of existing users whose activity or team changed, as /team/sync writes them
+        """
+        result = []
+        for row in changed:
+            if row["user_id"] not in existing:
+                continue
+            _, was_active, old_team = existing[row["user_id"]]
+            if row["is_active"] != was_active:
+                result.append(events.user_activity_changed(row["user_id"], row["is_active"]))
+            if row["team_name"] != old_team:
+                result.append(events.user_team_changed(row["user_id"], old_team, row["team_name"]))
+        return result
@@ -0,0 +1,155 @@
+# Background delivery of outbox events
+#
+# Сервисы только вставляют строку в outbox_events в своей транзакции, поэтому
+# время ответа не зависит от синка. Диспетчер — задача asyncio в процессе
+# приложения: забирает пачку готовых событий (FOR UPDATE SKIP LOCKED — несколько
+# процессов делят очередь без двойной доставки), отдаёт её синку и в той же
+# транзакции удаляет доставленные события или откладывает пачку с
+# экспоненциальной задержкой. События, исчерпавшие OUTBOX_MAX_ATTEMPTS,
+# остаются в таблице и больше не выбираются (см. outbox_events_dead_total).
+import asyncio
+from collections.abc import Callable, Sequence
+import contextlib
+import datetime
+import logging
+import time
+
+from app.core.config import Settings, settings
+from app.core.metrics import (
+    OUTBOX_BATCH_DURATION,
+    OUTBOX_DEAD,
+    OUTBOX_DELIVERED,
+    OUTBOX_FAILED_BATCHES,
+    OUTBOX_LAG,
+)
+from app.core.sinks import Event, Sink, build_sink
+from app.repositories.backend import get_repositories
+from app.repositories.protocols import OutboxRepositoryProtocol, Session
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        sink: Sink,
+        session_factory: Callable[[], Session],
+        batch_size: int = 100,
+        poll_interval: float = 0.5,
+        sink_timeout: float = 5.0,
+        max_attempts: int = 10,
+        retry_base: float = 1.0,
+        retry_max: float = 300.0,
+    ):
+        self.sink = sink
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.sink_timeout = sink_timeout
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    async def dispatch_batch(self) -> int:
+        """
+        Deliver one batch in one transaction, return the number of delivered events
+        """
+        async with self.session_factory() as db:
+            outbox = get_repositories(db).outbox
+            batch = await outbox.claim(self.batch_size, self.max_attempts)
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.sink.send(batch), self.sink_timeout)
+            except Exception as e:  # noqa: BLE001 — любая ошибка синка: пачка уйдёт повторно
+                await self._reschedule(outbox, batch, e)
+                await db.commit()
+                return 0
+
+            await outbox.delete([event.id for event in batch])
+            await db.commit()
+
+        now = datetime.datetime.now(datetime.UTC)
+        OUTBOX_BATCH_DURATION.observe(time.perf_counter() - started, sink=self.sink.name)
+        OUTBOX_DELIVERED.inc(len(batch), sink=self.sink.name)
+        for event in batch:
+            # SQLite возвращает datetime без часового пояса (хранится UTC)
+            created_at = event.created_at.replace(tzinfo=event.created_at.tzinfo or datetime.UTC)
+            OUTBOX_LAG.observe((now - created_at).total_seconds())
+        return len(batch)
+
+    async def _reschedule(
+        self, outbox: OutboxRepositoryProtocol, batch: Sequence[Event], error: Exception
+    ) -> None:
+        OUTBOX_FAILED_BATCHES.inc(sink=self.sink.name)
+        now = datetime.datetime.now(datetime.UTC)
+        schedule = []
+        dead = 0
+        for event in batch:
+            attempts = event.attempts + 1
+            dead += attempts >= self.max_attempts
+            delay = datetime.timedelta(seconds=self.retry_delay(attempts))
+            schedule.append((event.id, attempts, now + delay))
+        message = f"{type(error).__name__}: {error}"[:1000]
+        await outbox.retry(schedule, message)
+        logger.warning(
+            "outbox: %s sink failed for %d events: %s", self.sink.name, len(batch), message
+        )
+        if dead:
+            OUTBOX_DEAD.inc(dead)
+            logger.error("outbox: %d events ran out of delivery attempts", dead)
+
+    async def run(self) -> None:
+        """
+        Deliver until stop(); a full batch is followed by the next one without waiting
+        """
+        while not self._stop.is_set():
+            try:
+                delivered = await self.dispatch_batch()
+            except Exception:
+                # база недоступна и т.п. — следующая попытка через poll_interval
+                logger.exception("outbox: dispatch failed")
+                delivered = 0
+            if delivered < self.batch_size:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+
+    def start(self) -> asyncio.Task:
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run(), name="outbox-dispatcher")
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        Finish the current batch and close the sink
+        """
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.sink.close()
+
+
+def build_dispatcher(
+    session_factory: Callable[[], Session], cfg: Settings = settings
+) -> OutboxDispatcher | None:
+    sink = build_sink(cfg.OUTBOX_SINK, timeout=cfg.OUTBOX_SINK_TIMEOUT)
+    if sink is None:
+        return None
+    return OutboxDispatcher(
+        sink,
+        session_factory,
+        batch_size=cfg.OUTBOX_BATCH_SIZE,
+        poll_interval=cfg.OUTBOX_POLL_INTERVAL,
+        sink_timeout=cfg.OUTBOX_SINK_TIMEOUT,
+        max_attempts=cfg.OUTBOX_MAX_ATTEMPTS,
+        retry_base=cfg.OUTBOX_RETRY_BASE,
+        retry_max=cfg.OUTBOX_RETRY_MAX,
+    )
@@ -1,14 +1,17 @@
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 import datetime
-import random
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 
-from app.models.models import PRStatus, PullRequest, PullRequestReviewer
-from app.repositories.pr_repository import PRRepository
-from app.repositories.reviewer_repository import ReviewerRepository
-from app.repositories.team_repository import TeamRepository
-from app.repositories.user_repository import UserRepository
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.query_budget import query_budget
+from app.models.models import PRStatus, PullRequest
+from app.repositories.backend import get_repositories
+from app.repositories.protocols import Session
+from app.repositories.stats_repository import TOTAL_PRS, TOTAL_REVIEWS, status_counter
+from app.repositories.version_repository import STATS_VERSION, reviewer_version
+from app.services import events, review_feed
 from app.services.pr_service_errors import (
     AuthorNotFoundError,
     NoCandidateError,
@@ -18,72 +21,255 @@ from app.services.pr_service_errors import (
     ReviewerNotAssignedError,
     TeamNotFoundError,
 )
+from app.services.reviewer_selection import SelectionState, get_strategy
+
+# максимальное количество ревьюверов на PR (по условию задачи)
+MAX_REVIEWERS = 2
+# максимум PR в одном /pullRequest/createBatch
+MAX_BATCH_SIZE = 1000
+
+# результат по элементу пакета: созданный PR или ошибка, как в create_pr
+BatchItemResult = PullRequest | PRExistsError | AuthorNotFoundError | TeamNotFoundError
 
 
 class PullRequestService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Session):
         self.db = db
-        self.pr_repo = PRRepository(db)
-        self.team_repo = TeamRepository(db)
-        self.user_repo = UserRepository(db)
-        self.reviewer_repo = ReviewerRepository(db)
+        repos = get_repositories(db)
+        self.pr_repo = repos.pr
+        self.team_repo = repos.team
+        self.user_repo = repos.user
+        self.reviewer_repo = repos.reviewer
+        self.stats_repo = repos.stats
+        self.outbox_repo = repos.outbox
+        self.version_repo = repos.version
+
+    async def _bump_versions(self, reviewer_ids: Iterable[str], pr_id: str) -> None:
+        # /stats и getReview затронутых ревьюверов; строки шарда PR — см. shard_of
+        await self.version_repo.bump(
+            [STATS_VERSION, *map(reviewer_version, reviewer_ids)], shard_key=pr_id
+        )
 
+    async def _pick_reviewers(self, team_name: str, exclude_ids: set[str], limit: int) -> list[str]:
+        """
+        Pick up to `limit` active members of the team with the team's strategy
+
+        Active members come from the roster cache; loads are queried only for
+        strategies that use them, the round-robin cursor is locked and moved.
+        """
+        roster = await self.team_repo.get_roster(team_name)
+        if roster is None:
+            return []
+        candidates = [user_id for user_id in roster.active_ids if user_id not in exclude_ids]
+        if not candidates:
+            return []
+        strategy = get_strategy(roster.strategy)
+        state = SelectionState()
+        if strategy.needs_loads:
+            state.loads = await self.reviewer_repo.count_open_reviews(candidates)
+        if strategy.uses_cursor:
+            state.cursor = (await self.team_repo.lock_rr_cursors([team_name])).get(team_name, 0)
+        chosen = strategy.pick(roster.active_ids, exclude_ids, limit, state)
+        if strategy.uses_cursor:
+            await self.team_repo.set_rr_cursors({team_name: state.cursor})
+        return chosen
+
+    @query_budget(10)
     async def create_pr(self, pr_id: str, pr_name: str, author_id: str) -> PullRequest:
-        # проверить, не существует ли уже PR
-        existing_pr = await self.pr_repo.get_pr(pr_id)
-        if existing_pr:
+        # проверить PR и автора одним запросом
+        context = await self.pr_repo.get_create_context(pr_id, author_id)
+        if context.pr_exists:
             raise PRExistsError("PR id already exists")
 
-        author = await self.user_repo.get_user(author_id)
-        if not author:
+        if not context.author_exists:
             raise AuthorNotFoundError("Author not found")
 
-        team = await self.team_repo.get_team(author.team_name)
-        if not team:
+        if not context.team_name:
             raise TeamNotFoundError("Team not found")
 
-        # выбрать до 2 активных ревьюверов из команды, кроме автора
-        candidates = [m for m in team.members if m.is_active and m.user_id != author_id]
-        reviewers = random.sample(candidates, min(2, len(candidates))) if candidates else []
-        pr = PullRequest(
-            pull_request_id=pr_id,
-            pull_request_name=pr_name,
-            author_id=author_id,
-            status=PRStatus.OPEN,
-            createdAt=datetime.datetime.now(datetime.UTC),
+        # выбрать до 2 наименее загруженных активных ревьюверов из команды, кроме автора
+        reviewer_ids = await self._pick_reviewers(
+            context.team_name, exclude_ids={author_id}, limit=MAX_REVIEWERS
         )
-        pr = await self.pr_repo.add_pr(pr)
-        for reviewer in reviewers:
-            await self.pr_repo.add_reviewer(pr_id, reviewer.user_id)
 
-        # вернуть PR с загруженными ревьюверами
-        return await self.pr_repo.get_pr_with_reviewers(pr_id)
+        # PR и ревьюверы пишутся в одной транзакции
+        try:
+            pr = await self.pr_repo.create_pr_with_reviewers(
+                pr_id, pr_name, author_id, reviewer_ids
+            )
+            await self.stats_repo.apply(
+                {
+                    TOTAL_PRS: 1,
+                    status_counter(PRStatus.OPEN): 1,
+                    TOTAL_REVIEWS: len(reviewer_ids),
+                },
+                dict.fromkeys(reviewer_ids, 1),
+                shard_key=pr_id,
+            )
+            await self.outbox_repo.add([events.pr_created(pr_id, author_id, reviewer_ids)])
+            await self._bump_versions(reviewer_ids, pr_id)
+            await self.db.commit()
+        except IntegrityError as e:
+            # параллельный запрос успел создать PR с тем же id
+            await self.db.rollback()
+            raise PRExistsError("PR id already exists") from e
+
+        review_feed.publish_assigned(reviewer_ids, pr_id, pr_name, author_id)
+        return pr
+
+    @query_budget(12)
+    async def create_batch(self, items: Sequence[tuple[str, str, str]]) -> list[BatchItemResult]:
+        """
+        Create (pr_id, pr_name, author_id) items in one transaction
+
+        Ids and authors are checked with set-based queries, reviewer loads are
+        loaded once and updated as the batch is assigned, so reviewers are
+        balanced within the batch and against existing assignments. Returns
+        a result per item in input order; failed items don't stop the others.
+        """
+        try:
+            return await self._create_batch(items)
+        except IntegrityError:
+            # параллельный запрос создал PR из пакета — повторяем, теперь он PR_EXISTS
+            await self.db.rollback()
+            return await self._create_batch(items)
+
+    async def _create_batch(self, items: Sequence[tuple[str, str, str]]) -> list[BatchItemResult]:
+        existing = await self.pr_repo.get_existing_ids({pr_id for pr_id, _, _ in items})
+        author_teams = await self.user_repo.get_team_names({author_id for _, _, author_id in items})
+        rosters = await self.team_repo.get_rosters(
+            {team for team in author_teams.values() if team is not None}
+        )
+
+        results: list[BatchItemResult | None] = []
+        accepted: list[tuple[int, str, str, str, str]] = []
+        seen = set(existing)
+        for i, (pr_id, pr_name, author_id) in enumerate(items):
+            team_name = author_teams.get(author_id)
+            if pr_id in seen:
+                results.append(PRExistsError("PR id already exists"))
+            elif author_id not in author_teams:
+                results.append(AuthorNotFoundError("Author not found"))
+            elif team_name not in rosters:
+                results.append(TeamNotFoundError("Team not found"))
+            else:
+                seen.add(pr_id)
+                results.append(None)
+                accepted.append((i, pr_id, pr_name, author_id, team_name))
+        if not accepted:
+            return results
+
+        strategies = {
+            team_name: get_strategy(rosters[team_name].strategy) for *_, team_name in accepted
+        }
+        # нагрузка всех кандидатов пакета и курсоры round-robin — по одному запросу
+        candidates = {
+            user_id
+            for team_name, strategy in strategies.items()
+            if strategy.needs_loads
+            for user_id in rosters[team_name].active_ids
+        }
+        loads = await self.reviewer_repo.count_open_reviews(candidates) if candidates else {}
+        rr_teams = [team_name for team_name, strategy in strategies.items() if strategy.uses_cursor]
+        cursors = await self.team_repo.lock_rr_cursors(rr_teams) if rr_teams else {}
+        # нагрузка общая: следующий PR видит уже сделанные назначения
+        states = {
+            team_name: SelectionState(loads, cursors.get(team_name, 0)) for team_name in strategies
+        }
 
+        rows = []
+        reviewer_counts: dict[str, int] = {}
+        for _, pr_id, pr_name, author_id, team_name in accepted:
+            reviewer_ids = strategies[team_name].pick(
+                rosters[team_name].active_ids, {author_id}, MAX_REVIEWERS, states[team_name]
+            )
+            for reviewer_id in reviewer_ids:
+                reviewer_counts[reviewer_id] = reviewer_counts.get(reviewer_id, 0) + 1
+            rows.append((pr_id, pr_name, author_id, reviewer_ids))
+        await self.team_repo.set_rr_cursors(
+            {team_name: states[team_name].cursor for team_name in rr_teams}
+        )
+
+        prs = await self.pr_repo.create_prs_with_reviewers(rows)
+        await self.stats_repo.apply(
+            {
+                TOTAL_PRS: len(prs),
+                status_counter(PRStatus.OPEN): len(prs),
+                TOTAL_REVIEWS: sum(reviewer_counts.values()),
+            },
+            reviewer_counts,
+            shard_key=rows[0][0],
+        )
+        await self.outbox_repo.add(
+            [
+                events.pr_created(pr_id, author_id, reviewer_ids)
+                for pr_id, _, author_id, reviewer_ids in rows
+            ]
+        )
+        await self._bump_versions(reviewer_counts, rows[0][0])
+        await self.db.commit()
+        for pr_id, pr_name, author_id, reviewer_ids in rows:
+            review_feed.publish_assigned(reviewer_ids, pr_id, pr_name, author_id)
+
+        for (i, *_), pr in zip(accepted, prs, strict=True):
+            results[i] = pr
+        return results
+
+    @query_budget(8)
     async def merge_pr(self, pr_id: str) -> PullRequest:
-        pr = await self.pr_repo.get_pr(pr_id)
+        # строка PR заблокирована до commit: параллельный merge или reassign ждёт
+        pr = await self.pr_repo.get_pr(pr_id, for_update=True)
 
         if not pr:
             raise PRNotFoundError("PR not found")
 
         if pr.status == PRStatus.MERGED:
             # идемпотентность — вернуть PR с ревьюверами
+            # писать нечего, блокировка снимется при закрытии сессии
             _res = await self.pr_repo.get_pr_with_reviewers(pr_id)
             return _res
 
         pr.status = PRStatus.MERGED
         pr.mergedAt = datetime.datetime.now(datetime.UTC)
+        await self.outbox_repo.add([events.pr_merged(pr_id, pr.mergedAt)])
+        # статус PR меняется в getReview каждого его ревьювера
+        reviewers = await self.reviewer_repo.get_reviewers_by_pr(pr_id)
+        # общие строки счётчиков и версий — последними перед commit, в шарде PR
+        await self.stats_repo.apply(
+            {status_counter(PRStatus.OPEN): -1, status_counter(PRStatus.MERGED): 1},
+            {},
+            shard_key=pr_id,
+        )
+        await self._bump_versions((r.reviewer_id for r in reviewers), pr_id)
         await self.db.commit()
         # вернуть PR с загруженными ревьюверами
         _res = await self.pr_repo.get_pr_with_reviewers(pr_id)
+        review_feed.publish_merged([r.reviewer_id for r in _res.reviewers], pr_id)
         return _res
 
+    @query_budget(13)
     async def reassign_reviewer(self, pr_id: str, old_user_id: str) -> tuple[PullRequest, str]:
-        pr = await self.pr_repo.get_pr(pr_id)
+        """
+        Replace a reviewer of an OPEN PR in one transaction
+
+        The PR row is locked first, so concurrent reassigns and merges of the
+        same PR run one after another and each sees the committed reviewers.
+        """
+        try:
+            return await self._reassign_reviewer(pr_id, old_user_id)
+        except Exception:
+            # снять блокировку строки PR и на ошибках проверки
+            await self.db.rollback()
+            raise
+
+    async def _reassign_reviewer(self, pr_id: str, old_user_id: str) -> tuple[PullRequest, str]:
+        pr = await self.pr_repo.get_pr(pr_id, for_update=True)
         if not pr:
             raise PRNotFoundError("PR not found")
 
         if pr.status == PRStatus.MERGED:
             raise PRMergedError("Cannot reassign on merged PR")
+        # читается под блокировкой PR — список ревьюверов не изменится до commit
         reviewers = await self.reviewer_repo.get_reviewers_by_pr(pr_id)
 
         if old_user_id not in [r.reviewer_id for r in reviewers]:
@@ -93,31 +279,61 @@ class PullRequestService:
         if not old_user:
             raise PRNotFoundError("Reviewer user not found")
 
-        team = await self.team_repo.get_team(old_user.team_name)
-        # исключить старого ревьювера и уже назначенных ревьюверов
+        # исключить автора, старого ревьювера и уже назначенных ревьюверов
         current_reviewer_ids = {r.reviewer_id for r in reviewers}
-        candidates = [
-            m
-            for m in team.members
-            if m.is_active and m.user_id != old_user_id and m.user_id not in current_reviewer_ids
-        ]
+        candidates = await self._pick_reviewers(
+            old_user.team_name, exclude_ids=current_reviewer_ids | {pr.author_id}, limit=1
+        )
 
         if not candidates:
             raise NoCandidateError("No active replacement candidate in team")
-        new_reviewer = random.choice(candidates)
+        new_reviewer_id = candidates[0]
 
-        # удалить старого ревьювера, добавить нового
+        # удалить старого ревьювера, добавить нового — в одной транзакции
         reviewer_obj = [r for r in reviewers if r.reviewer_id == old_user_id][0]
         await self.db.delete(reviewer_obj)
+        await self.pr_repo.add_reviewer(pr_id, new_reviewer_id)
+        await self.stats_repo.apply({}, {old_user_id: -1, new_reviewer_id: 1}, shard_key=pr_id)
+        await self.outbox_repo.add(
+            [events.reviewer_reassigned(pr_id, old_user_id, new_reviewer_id)]
+        )
+        await self._bump_versions([old_user_id, new_reviewer_id], pr_id)
         await self.db.commit()
-        await self.pr_repo.add_reviewer(pr_id, new_reviewer.user_id)
+        review_feed.publish_unassigned(old_user_id, pr_id)
+        review_feed.publish_assigned([new_reviewer_id], pr_id, pr.pull_request_name, pr.author_id)
 
         # вернуть PR с загруженными ревьюверами
         _pr: PullRequest = await self.pr_repo.get_pr_with_reviewers(pr_id)
-        return _pr, new_reviewer.user_id
+        return _pr, new_reviewer_id
 
-    async def get_prs_by_reviewer(self, user_id: str) -> list[PullRequest]:
-        reviewer_prs: Sequence[PullRequestReviewer] = await self.reviewer_repo.get_prs_by_reviewer(
-            user_id
+    @query_budget(1)
+    async def get_reviewer_version(self, user_id: str) -> int:
+        """
+        Version of the user's getReview list, for its ETag
+        """
+        return await self.version_repo.get(reviewer_version(user_id))
+
+    @query_budget(1)
+    async def get_prs_by_reviewer(
+        self,
+        user_id: str,
+        status: PRStatus | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[Sequence[Row], str | None]:
+        """
+        PRs of a reviewer page by page
+
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        Raises InvalidCursorError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # берём на одну строку больше, чтобы понять, есть ли следующая страница
+        rows = await self.reviewer_repo.get_prs_by_reviewer(
+            user_id, status=status, limit=limit + 1 if limit else None, after=after
         )
-        return [r.pull_request for r in reviewer_prs]
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            return rows, encode_cursor(last.createdAt, last.pull_request_id)
+        return rows, None
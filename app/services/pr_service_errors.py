@@ -38,3 +38,9 @@ class NoCandidateError(Exception):
     """
     No active candidates available for reassignment
     """
+
+
+class InvalidWindowError(Exception):
+    """
+    Statistics window is empty or has too many buckets
+    """
@@ -0,0 +1,79 @@
+# Assignment deltas for /users/reviewStream
+#
+# Сервисы публикуют дельты после commit — подписчик не увидит откатившееся
+# изменение. Топик — id ревьювера, данные в формате PullRequestShort из
+# /users/getReview. Дельты идемпотентны по pull_request_id: повтор того, что
+# уже есть в снимке, ничего не меняет у клиента.
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+
+from app.core.config import settings
+from app.core.pubsub import Hub, Subscription
+from app.models.models import PRStatus
+from app.schemas.encoders import encode_sse
+
+SNAPSHOT = "snapshot"
+ASSIGNED = "assigned"
+UNASSIGNED = "unassigned"
+MERGED = "merged"
+# подписчик отстал и отключён: клиент переподключается и получает новый снимок
+RESYNC = "resync"
+
+# комментарий SSE: держит соединение живым через прокси, клиент его игнорирует
+HEARTBEAT = b": ping\n\n"
+
+review_hub = Hub(settings.REVIEW_STREAM_QUEUE_SIZE, name="reviews")
+
+
+def publish_assigned(
+    reviewer_ids: Iterable[str],
+    pr_id: str,
+    pr_name: str,
+    author_id: str,
+    status: PRStatus = PRStatus.OPEN,
+) -> None:
+    short = {
+        "pull_request_id": pr_id,
+        "pull_request_name": pr_name,
+        "author_id": author_id,
+        "status": status,
+    }
+    for reviewer_id in reviewer_ids:
+        review_hub.publish(reviewer_id, (ASSIGNED, short))
+
+
+def publish_unassigned(reviewer_id: str, pr_id: str) -> None:
+    review_hub.publish(reviewer_id, (UNASSIGNED, {"pull_request_id": pr_id}))
+
+
+def publish_merged(reviewer_ids: Iterable[str], pr_id: str) -> None:
+    for reviewer_id in reviewer_ids:
+        review_hub.publish(
+            reviewer_id, (MERGED, {"pull_request_id": pr_id, "status": PRStatus.MERGED})
+        )
+
+
+async def event_stream(
+    subscription: Subscription, snapshot: dict[str, Any], heartbeat: float
+) -> AsyncIterator[bytes]:
+    """
+    SSE bytes: the snapshot, then deltas of the subscription until it falls behind
+
+    The subscription must be taken before the snapshot is read, so no change
+    committed in between is lost. It is closed when the client disconnects.
+    """
+    try:
+        yield encode_sse(SNAPSHOT, snapshot)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), heartbeat or None)
+            except TimeoutError:
+                yield HEARTBEAT
+                continue
+            if message is None:
+                yield encode_sse(RESYNC, {"user_id": subscription.topic})
+                return
+            yield encode_sse(*message)
+    finally:
+        subscription.close()
@@ -0,0 +1,183 @@
+"""
+Выбор ревьюверов: стратегии, выбираемые для каждой команды
+
+Кандидаты берутся из кэша составов команд. Нагрузка (ReviewerRepository.
+count_open_reviews) запрашивается только для стратегий, которые её используют,
+курсор round-robin хранится в teams.rr_cursor и читается под блокировкой строки
+команды. Пакетные операции загружают нагрузку один раз и распределяют
+назначения здесь, учитывая уже сделанный выбор.
+
+- least_loaded — наименее загруженные, равные в случайном порядке (по умолчанию);
+- weighted — случайный выбор с весом 1 / (1 + нагрузка): разгружает занятых,
+  но не отдаёт все PR одному свободному;
+- round_robin — по кругу в порядке user_id, нагрузка не читается;
+- random — равновероятно, нагрузка не читается.
+"""
+
+from collections.abc import Collection, Iterable, Sequence
+from dataclasses import dataclass, field
+import random
+from typing import ClassVar, Protocol
+
+from app.core.config import settings
+
+
+def pick_least_loaded(
+    candidates: Iterable[str],
+    loads: dict[str, int],
+    exclude_ids: Collection[str],
+    limit: int,
+) -> list[str]:
+    """
+    Pick up to `limit` candidates with the smallest load, ties are broken randomly.
+
+    `loads` is updated in place so the next call sees the assignments made here.
+    """
+    pool = [c for c in candidates if c not in exclude_ids]
+    random.shuffle(pool)
+    # sort стабилен — после shuffle равные по нагрузке идут в случайном порядке
+    pool.sort(key=lambda c: loads.get(c, 0))
+    chosen = pool[:limit]
+    for user_id in chosen:
+        loads[user_id] = loads.get(user_id, 0) + 1
+    return chosen
+
+
+@dataclass(slots=True)
+class SelectionState:
+    """
+    Mutable input of the picks for one team: shared loads and its round-robin cursor
+    """
+
+    loads: dict[str, int] = field(default_factory=dict)
+    cursor: int = 0
+
+
+class ReviewerSelectionStrategy(Protocol):
+    name: ClassVar[str]
+    # нужна ли нагрузка кандидатов и курсор команды — иначе их не запрашиваем
+    needs_loads: ClassVar[bool]
+    uses_cursor: ClassVar[bool]
+
+    def pick(
+        self,
+        candidates: Sequence[str],
+        exclude_ids: Collection[str],
+        limit: int,
+        state: SelectionState,
+    ) -> list[str]:
+        """
+        Pick up to `limit` of `candidates` not in `exclude_ids`
+
+        Updates `state` in place: loads of the chosen, the cursor if used.
+        """
+        ...
+
+
+def _count(chosen: list[str], state: SelectionState) -> list[str]:
+    for user_id in chosen:
+        state.loads[user_id] = state.loads.get(user_id, 0) + 1
+    return chosen
+
+
+class LeastLoadedStrategy:
+    name = "least_loaded"
+    needs_loads = True
+    uses_cursor = False
+
+    def pick(
+        self,
+        candidates: Sequence[str],
+        exclude_ids: Collection[str],
+        limit: int,
+        state: SelectionState,
+    ) -> list[str]:
+        return pick_least_loaded(candidates, state.loads, exclude_ids, limit)
+
+
+class WeightedLeastLoadedStrategy:
+    name = "weighted"
+    needs_loads = True
+    uses_cursor = False
+
+    def pick(
+        self,
+        candidates: Sequence[str],
+        exclude_ids: Collection[str],
+        limit: int,
+        state: SelectionState,
+    ) -> list[str]:
+        # выборка без возвращения по весам (Efraimidis–Spirakis): ключ u^(1/w),
+        # w = 1 / (1 + нагрузка), берутся наибольшие ключи
+        pool = [c for c in candidates if c not in exclude_ids]
+        keys = {c: random.random() ** (1 + state.loads.get(c, 0)) for c in pool}
+        pool.sort(key=keys.__getitem__, reverse=True)
+        return _count(pool[:limit], state)
+
+
+class RoundRobinStrategy:
+    name = "round_robin"
+    needs_loads = False
+    uses_cursor = True
+
+    def pick(
+        self,
+        candidates: Sequence[str],
+        exclude_ids: Collection[str],
+        limit: int,
+        state: SelectionState,
+    ) -> list[str]:
+        # порядок из базы не гарантирован — круг строится по user_id
+        ring = sorted(candidates)
+        if not ring or limit <= 0:
+            return []
+        start = state.cursor % len(ring)
+        chosen: list[str] = []
+        steps = 0
+        while steps < len(ring) and len(chosen) < limit:
+            user_id = ring[(start + steps) % len(ring)]
+            steps += 1
+            if user_id not in exclude_ids:
+                chosen.append(user_id)
+        # следующий выбор начнётся сразу за последним выбранным
+        state.cursor = (start + steps) % len(ring)
+        return _count(chosen, state)
+
+
+class RandomStrategy:
+    name = "random"
+    needs_loads = False
+    uses_cursor = False
+
+    def pick(
+        self,
+        candidates: Sequence[str],
+        exclude_ids: Collection[str],
+        limit: int,
+        state: SelectionState,
+    ) -> list[str]:
+        pool = [c for c in candidates if c not in exclude_ids]
+        return _count(random.sample(pool, min(limit, len(pool))), state)
+
+
+STRATEGIES: dict[str, ReviewerSelectionStrategy] = {
+    strategy.name: strategy
+    for strategy in (
+        LeastLoadedStrategy(),
+        WeightedLeastLoadedStrategy(),
+        RoundRobinStrategy(),
+        RandomStrategy(),
+    )
+}
+
+if settings.REVIEWER_STRATEGY not in STRATEGIES:
+    raise ValueError(
+        f"REVIEWER_STRATEGY must be one of {tuple(STRATEGIES)}, got {settings.REVIEWER_STRATEGY!r}"
+    )
+
+
+def get_strategy(name: str | None) -> ReviewerSelectionStrategy:
+    """
+    Strategy of a team; None — the default from REVIEWER_STRATEGY
+    """
+    return STRATEGIES[name or settings.REVIEWER_STRATEGY]
@@ -0,0 +1,163 @@
+import datetime
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.models import PRStatus
+from app.repositories.backend import get_repositories
+from app.repositories.protocols import Session
+from app.repositories.stats_repository import (
+    TOTAL_PRS,
+    TOTAL_REVIEWS,
+    Bucket,
+    status_counter,
+    truncate,
+)
+from app.repositories.version_repository import STATS_VERSION
+from app.services.pr_service_errors import InvalidWindowError
+
+LATENCY_QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+BUCKET_SIZES: dict[str, datetime.timedelta] = {
+    "hour": datetime.timedelta(hours=1),
+    "day": datetime.timedelta(days=1),
+}
+# окно по умолчанию для /stats/latency — заканчивается концом текущего интервала
+DEFAULT_WINDOWS: dict[str, datetime.timedelta] = {
+    "hour": datetime.timedelta(hours=48),
+    "day": datetime.timedelta(days=30),
+}
+MAX_BUCKETS = 2000
+
+# агрегаты по исходным таблицам дороги, а отчёт терпит устаревание на TTL;
+# окно по умолчанию выровнено по интервалу, поэтому повторы попадают в кэш
+latency_cache: LRUCache[tuple, dict] = LRUCache(
+    settings.LATENCY_CACHE_SIZE, ttl=settings.LATENCY_CACHE_TTL, name="latency"
+)
+
+
+def _utc(value: datetime.datetime | None) -> datetime.datetime | None:
+    # без часового пояса — UTC, как createdAt в базе
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.UTC)
+    return value.astimezone(datetime.UTC)
+
+
+class StatsService:
+    def __init__(self, db: Session):
+        self.db = db
+        repos = get_repositories(db)
+        self.stats_repo = repos.stats
+        self.version_repo = repos.version
+
+    async def get_version(self) -> int:
+        """
+        Version of the counters, for the /stats ETag
+        """
+        return await self.version_repo.get(STATS_VERSION)
+
+    async def get_stats(self, limit: int) -> dict:
+        """
+        Read precomputed counters: O(limit), no aggregates over the source tables
+        """
+        counters = await self.stats_repo.get_counters()
+        top = await self.stats_repo.get_top_reviewers(limit)
+        return {
+            "total_prs": counters.get(TOTAL_PRS, 0),
+            "total_reviews": counters.get(TOTAL_REVIEWS, 0),
+            "prs_by_status": [
+                {"status": status.value, "count": counters.get(status_counter(status), 0)}
+                for status in PRStatus
+            ],
+            "top_reviewers": [
+                {"user_id": reviewer_id, "review_count": count} for reviewer_id, count in top
+            ],
+        }
+
+    async def get_report(
+        self,
+        created_from: datetime.datetime | None,
+        created_to: datetime.datetime | None,
+        team_name: str | None,
+    ) -> dict:
+        """
+        Review counts per team and per user for PRs created in [from, to), one query
+
+        Unlike get_stats this aggregates the source tables, bounded by the window.
+        """
+        created_from, created_to = _utc(created_from), _utc(created_to)
+        if created_from is not None and created_to is not None and created_from >= created_to:
+            raise InvalidWindowError("from must be before to")
+        breakdown = await self.stats_repo.get_breakdown(created_from, created_to, team_name)
+        return {
+            "from": created_from,
+            "to": created_to,
+            "team_name": team_name,
+            "total": breakdown.total._asdict(),
+            "teams": [{"team_name": team, **counts._asdict()} for team, counts in breakdown.teams],
+            "users": [
+                {"user_id": user_id, "team_name": team, **counts._asdict()}
+                for user_id, team, counts in breakdown.users
+            ],
+        }
+
+    async def get_latency(
+        self,
+        bucket: Bucket,
+        since: datetime.datetime | None,
+        until: datetime.datetime | None,
+        team_name: str | None,
+    ) -> dict:
+        """
+        Time-to-merge quantiles and PRs created / merged per bucket, cached for a TTL
+
+        Quantiles cover PRs merged in [from, to), the series counts creations and
+        merges that fall into the window. The team is the author's team.
+        Raises InvalidWindowError for an empty window or more than MAX_BUCKETS buckets.
+        """
+        until = (
+            _utc(until)
+            or truncate(datetime.datetime.now(datetime.UTC), bucket) + BUCKET_SIZES[bucket]
+        )
+        since = _utc(since) or until - DEFAULT_WINDOWS[bucket]
+        if since >= until:
+            raise InvalidWindowError("from must be before to")
+        first = truncate(since, bucket)
+        if (until - first) / BUCKET_SIZES[bucket] > MAX_BUCKETS:
+            raise InvalidWindowError(f"window exceeds {MAX_BUCKETS} {bucket} buckets")
+
+        key = (bucket, since, until, team_name)
+        cached = latency_cache.get(key)
+        if cached is not None:
+            return cached
+
+        merged, values = await self.stats_repo.get_merge_latency(
+            since, until, team_name, tuple(LATENCY_QUANTILES.values())
+        )
+        counts = await self.stats_repo.get_throughput(since, until, team_name, bucket)
+        series = []
+        # пустые интервалы — нулями: ряд непрерывен, его можно рисовать как есть
+        start = first
+        while start < until:
+            created, merged_count = counts.get(start, (0, 0))
+            series.append({"bucket_start": start, "created": created, "merged": merged_count})
+            start += BUCKET_SIZES[bucket]
+
+        result = {
+            "bucket": bucket,
+            "from": since,
+            "to": until,
+            "team_name": team_name,
+            "time_to_merge": {
+                "merged": merged,
+                **dict(zip(LATENCY_QUANTILES, values, strict=True)),
+            },
+            "series": series,
+        }
+        latency_cache.set(key, result)
+        return result
+
+    async def rebuild(self) -> None:
+        await self.stats_repo.rebuild()
+        await self.version_repo.bump([STATS_VERSION])
+        await self.db.commit()
@@ -1,16 +1,272 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections.abc import Collection, Sequence
+from typing import NamedTuple
 
+from app.db.query_budget import query_budget
 from app.models.models import Team
-from app.repositories.team_repository import TeamRepository
+from app.repositories.backend import get_repositories
+from app.repositories.outbox_repository import NewEvent
+from app.repositories.protocols import Session
+from app.repositories.stats_repository import TOTAL_REVIEWS
+from app.repositories.team_repository import Roster, RosterMember
+from app.repositories.version_repository import STATS_VERSION, reviewer_version, team_version
+from app.services import events, review_feed
+from app.services.pr_service_errors import TeamNotFoundError
+from app.services.reviewer_selection import get_strategy, pick_least_loaded
+
+
+class TeamSyncResult(NamedTuple):
+    roster: Roster
+    created: bool
+    added: list[str]
+    updated: list[str]
+    deactivated: list[str]
+    reassignments: list[tuple[str, str, str | None]]
 
 
 class TeamService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Session):
         self.db = db
-        self.team_repo = TeamRepository(db)
+        repos = get_repositories(db)
+        self.team_repo = repos.team
+        self.user_repo = repos.user
+        self.reviewer_repo = repos.reviewer
+        self.stats_repo = repos.stats
+        self.outbox_repo = repos.outbox
+        self.version_repo = repos.version
 
-    async def get_team(self, team_name: str) -> Team | None:
-        return await self.team_repo.get_team(team_name)
+    @query_budget(1)
+    async def get_team(
+        self, team_name: str, fresh: bool = False, version: int | None = None
+    ) -> Roster | None:
+        """
+        Team roster; with `version` a cached roster is used only if loaded at that version
+        """
+        return await self.team_repo.get_roster(team_name, fresh=fresh, version=version)
 
+    @query_budget(1)
+    async def get_team_version(self, team_name: str) -> int:
+        """
+        Version of the team roster, for the /team/get ETag
+        """
+        return await self.version_repo.get(team_version(team_name))
+
+    @query_budget(5)
     async def add_team(self, team_name: str, members: list[dict]) -> Team:
-        return await self.team_repo.add_team(team_name, members)
+        # /team/get отдаёт 304 без чтения состава только при ненулевой версии.
+        # Версия растёт отдельной транзакцией после создания, и у новой команды
+        # это первое изменение версии: состав в кэше помечается версией 1. Если
+        # раньше успеет другое изменение, версия будет больше 1 и запись из кэша
+        # не совпадёт с ней — /team/get перечитает состав
+        team = await self.team_repo.add_team(team_name, members, version=1)
+        try:
+            await self.version_repo.bump([team_version(team_name)], shard_key=team_name)
+            await self.db.commit()
+        except Exception:
+            # без версии 1 в базе метка в кэше могла бы совпасть с чужим изменением
+            self.team_repo.invalidate_roster(team_name)
+            raise
+        return team
+
+    @query_budget(2)
+    async def set_reviewer_strategy(self, team_name: str, strategy: str | None) -> str:
+        """
+        Set the reviewer selection strategy of the team, None resets it to the default
+
+        Returns the strategy in effect. The round-robin cursor is kept.
+        """
+        if not await self.team_repo.set_strategy(team_name, strategy):
+            await self.db.rollback()
+            raise TeamNotFoundError("Team not found")
+        await self.db.commit()
+        # стратегия хранится в кэше составов вместе с участниками
+        self.team_repo.invalidate_roster(team_name)
+        return get_strategy(strategy).name
+
+    @query_budget(12)
+    async def sync_team(self, team_name: str, members: list[dict]) -> TeamSyncResult:
+        """
+        Make the stored roster match `members` in one transaction
+
+        Only the diff is written: new and changed members with one upsert
+        (members of other teams move here), stored active members missing from
+        `members` are deactivated with one UPDATE, and OPEN reviews of everyone
+        deactivated are reassigned like in deactivate_users. An unchanged
+        roster costs one read and no writes.
+        """
+        roster = await self.team_repo.get_roster(team_name, fresh=True)
+        stored = {m.user_id: m for m in roster.members} if roster else {}
+        desired = {
+            m["user_id"]: RosterMember(m["user_id"], m["username"], m["is_active"]) for m in members
+        }
+
+        changed = [m for user_id, m in desired.items() if stored.get(user_id) != m]
+        missing = sorted(
+            user_id for user_id, m in stored.items() if m.is_active and user_id not in desired
+        )
+        if roster is not None and not changed and not missing:
+            return TeamSyncResult(roster, False, [], [], [], [])
+
+        if roster is None:
+            await self.team_repo.upsert_teams([team_name])
+        added = [m.user_id for m in changed if m.user_id not in stored]
+        # команды, из которых переходят участники, — для инвалидации их составов
+        previous_teams = await self.user_repo.get_team_names(added) if added else {}
+        await self.user_repo.upsert_users(
+            [{**m._asdict(), "team_name": team_name} for m in changed]
+        )
+        if missing:
+            await self.user_repo.deactivate_users(team_name, missing)
+
+        # деактивированы: пропавшие из списка и переданные с is_active=False
+        was_active = {user_id for user_id, m in stored.items() if m.is_active}
+        deactivated = sorted(
+            {*missing, *(m.user_id for m in changed if not m.is_active and m.user_id in was_active)}
+        )
+        reassignments, prs = (
+            await self._reassign_open_reviews(team_name, deactivated) if deactivated else ([], {})
+        )
+        await self._add_roster_events(
+            deactivated,
+            reassignments,
+            [events.user_team_changed(uid, old, team_name) for uid, old in previous_teams.items()],
+        )
+        await self._bump_versions(
+            {team_name, *previous_teams.values()} - {None}, reassignments, team_name
+        )
+        await self.db.commit()
+        self._publish_reassignments(reassignments, prs)
+
+        for name in {team_name, *previous_teams.values()}:
+            if name:
+                self.team_repo.invalidate_roster(name)
+
+        # итоговый состав собирается без повторного чтения: порядок хранимых, затем новые
+        final = dict(stored)
+        for user_id in missing:
+            final[user_id] = final[user_id]._replace(is_active=False)
+        final.update(desired)
+        return TeamSyncResult(
+            Roster.from_members(team_name, list(final.values()), roster and roster.strategy),
+            roster is None,
+            added,
+            sorted(m.user_id for m in changed if m.user_id in stored),
+            deactivated,
+            reassignments,
+        )
+
+    @query_budget(8)
+    async def deactivate_users(
+        self, team_name: str, user_ids: Collection[str] | None = None
+    ) -> tuple[list[str], list[tuple[str, str, str | None]]]:
+        """
+        Mass deactivation with safe reassignment of OPEN PRs in one transaction
+
+        Returns (deactivated ids, [(pr_id, old_user_id, new_user_id | None)]).
+        If no replacement is available the reviewer is just removed from the PR.
+        """
+        deactivated = await self.user_repo.deactivate_users(team_name, user_ids)
+        if not deactivated:
+            if not await self.team_repo.team_exists(team_name):
+                await self.db.rollback()
+                raise TeamNotFoundError("Team not found")
+            await self.db.commit()
+            return [], []
+
+        reassignments, prs = await self._reassign_open_reviews(team_name, deactivated)
+        await self._add_roster_events(deactivated, reassignments)
+        await self._bump_versions([team_name], reassignments, team_name)
+        await self.db.commit()
+        self._publish_reassignments(reassignments, prs)
+        # повторная инвалидация после commit: до него параллельный запрос
+        # мог успеть закэшировать старый состав команды
+        self.team_repo.invalidate_roster(team_name)
+        return deactivated, reassignments
+
+    async def _add_roster_events(
+        self,
+        deactivated: list[str],
+        reassignments: list[tuple[str, str, str | None]],
+        moves: Sequence[NewEvent] = (),
+    ) -> None:
+        await self.outbox_repo.add(
+            [
+                *moves,
+                *(events.user_activity_changed(user_id, False) for user_id in deactivated),
+                *(events.reviewer_reassigned(*reassignment) for reassignment in reassignments),
+            ]
+        )
+
+    async def _bump_versions(
+        self,
+        team_names: Collection[str],
+        reassignments: list[tuple[str, str, str | None]],
+        shard_key: str,
+    ) -> None:
+        names = [team_version(name) for name in team_names]
+        if reassignments:
+            # переназначения меняют getReview обоих ревьюверов и счётчики /stats
+            names.append(STATS_VERSION)
+            for _pr_id, old_id, new_id in reassignments:
+                names += [reviewer_version(user_id) for user_id in (old_id, new_id) if user_id]
+        await self.version_repo.bump(names, shard_key=shard_key)
+
+    @staticmethod
+    def _publish_reassignments(
+        reassignments: list[tuple[str, str, str | None]], prs: dict[str, tuple[str, str]]
+    ) -> None:
+        for pr_id, old_id, new_id in reassignments:
+            review_feed.publish_unassigned(old_id, pr_id)
+            if new_id:
+                review_feed.publish_assigned([new_id], pr_id, *prs[pr_id])
+
+    async def _reassign_open_reviews(
+        self, team_name: str, deactivated: list[str]
+    ) -> tuple[list[tuple[str, str, str | None]], dict[str, tuple[str, str]]]:
+        """
+        Replace just deactivated reviewers on OPEN PRs, without commit
+
+        Candidates are active members of `team_name`. Also used by the import.
+
+        Returns ([(pr_id, old_user_id, new_user_id | None)], {pr_id: (pr_name, author_id)}).
+        """
+        deactivated_set = set(deactivated)
+        assignments = await self.reviewer_repo.get_open_assignments(deactivated)
+        if not assignments:
+            return [], {}
+
+        # нагрузка активных участников (деактивированные уже исключены)
+        loads = await self.reviewer_repo.get_open_loads(team_name)
+
+        # текущие ревьюверы, название и автор каждого затронутого PR
+        current: dict[str, set[str]] = {}
+        prs: dict[str, tuple[str, str]] = {}
+        for pr_id, author_id, reviewer_id, pr_name in assignments:
+            current.setdefault(pr_id, set()).add(reviewer_id)
+            prs[pr_id] = (pr_name, author_id)
+
+        added: list[tuple[str, str]] = []
+        reassignments: list[tuple[str, str, str | None]] = []
+        for pr_id, author_id, reviewer_id, _pr_name in assignments:
+            if reviewer_id not in deactivated_set:
+                continue
+            picked = pick_least_loaded(
+                list(loads), loads, exclude_ids=current[pr_id] | {author_id}, limit=1
+            )
+            new_id = picked[0] if picked else None
+            if new_id:
+                current[pr_id].add(new_id)
+                added.append((pr_id, new_id))
+            reassignments.append((pr_id, reviewer_id, new_id))
+
+        await self.reviewer_repo.remove_from_open_prs(deactivated)
+        await self.reviewer_repo.add_reviewers(added)
+
+        reviewer_deltas: dict[str, int] = {}
+        for _pr_id, old_id, new_id in reassignments:
+            reviewer_deltas[old_id] = reviewer_deltas.get(old_id, 0) - 1
+            if new_id:
+                reviewer_deltas[new_id] = reviewer_deltas.get(new_id, 0) + 1
+        await self.stats_repo.apply(
+            {TOTAL_REVIEWS: len(added) - len(reassignments)}, reviewer_deltas, shard_key=team_name
+        )
+        return reassignments, prs
@@ -1,16 +1,35 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from app.db.query_budget import query_budget
 from app.models.models import User
-from app.repositories.user_repository import UserRepository
+from app.repositories.backend import get_repositories
+from app.repositories.protocols import Session
+from app.repositories.version_repository import team_version
+from app.services import events
 
 
 class UserService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Session):
         self.db = db
-        self.user_repo = UserRepository(db)
+        repos = get_repositories(db)
+        self.user_repo = repos.user
+        self.outbox_repo = repos.outbox
+        self.version_repo = repos.version
 
+    @query_budget(1)
     async def get_user(self, user_id: str) -> User | None:
         return await self.user_repo.get_user(user_id)
 
+    @query_budget(6)
     async def set_is_active(self, user_id: str, is_active: bool) -> User | None:
+        """
+        Set the flag; an actual change is committed with its outbox event
+
+        Setting the current value writes nothing.
+        """
+        user = await self.user_repo.get_user(user_id)
+        if user is None or user.is_active == is_active:
+            return user
+        # событие и версия команды коммитятся вместе с изменением внутри set_is_active
+        await self.outbox_repo.add([events.user_activity_changed(user_id, is_active)])
+        if user.team_name:
+            await self.version_repo.bump([team_version(user.team_name)])
         return await self.user_repo.set_is_active(user_id, is_active)
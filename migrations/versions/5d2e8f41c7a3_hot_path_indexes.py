@@ -0,0 +1,58 @@
+"""hot path indexes
+
+Revision ID: 5d2e8f41c7a3
+Revises: 240cc67a558b
+Create Date: 2025-11-28 12:00:00.000000
+
+- индексы под выборки по ревьюверу / PR, участникам команды и статусу PR
+- удаление ix_* индексов, дублирующих первичные ключи
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2e8f41c7a3"
+down_revision: str | Sequence[str] | None = "240cc67a558b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PK уже индексированы — отдельные индексы только замедляют запись
+    op.drop_index("ix_teams_team_name", table_name="teams")
+    op.drop_index("ix_users_user_id", table_name="users")
+    op.drop_index("ix_pull_requests_pull_request_id", table_name="pull_requests")
+
+    op.create_index(
+        "ix_pull_request_reviewers_reviewer_id",
+        "pull_request_reviewers",
+        ["reviewer_id"],
+        postgresql_include=["pull_request_id"],
+    )
+    op.create_index(
+        "ix_pull_request_reviewers_pull_request_id",
+        "pull_request_reviewers",
+        ["pull_request_id"],
+        postgresql_include=["reviewer_id"],
+    )
+    op.create_index("ix_users_team_name_is_active", "users", ["team_name", "is_active"])
+    op.create_index("ix_pull_requests_status_created_at", "pull_requests", ["status", "createdAt"])
+    op.create_index("ix_pull_requests_created_at", "pull_requests", ["createdAt"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_pull_requests_created_at", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_status_created_at", table_name="pull_requests")
+    op.drop_index("ix_users_team_name_is_active", table_name="users")
+    op.drop_index("ix_pull_request_reviewers_pull_request_id", table_name="pull_request_reviewers")
+    op.drop_index("ix_pull_request_reviewers_reviewer_id", table_name="pull_request_reviewers")
+
+    op.create_index(
+        "ix_pull_requests_pull_request_id", "pull_requests", ["pull_request_id"], unique=False
+    )
+    op.create_index("ix_users_user_id", "users", ["user_id"], unique=False)
+    op.create_index("ix_teams_team_name", "teams", ["team_name"], unique=False)
@@ -0,0 +1,63 @@
+"""stats counters
+
+Revision ID: 9a41b7e3d6f2
+Revises: 5d2e8f41c7a3
+Create Date: 2025-11-29 12:00:00.000000
+
+- счётчики для /stats, поддерживаемые в транзакциях записи
+- начальное заполнение из существующих данных
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9a41b7e3d6f2"
+down_revision: str | Sequence[str] | None = "5d2e8f41c7a3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stats_counters",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_table(
+        "reviewer_stats",
+        sa.Column("reviewer_id", sa.String(), nullable=False),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("reviewer_id"),
+    )
+    op.create_index("ix_reviewer_stats_review_count", "reviewer_stats", ["review_count"])
+
+    # заполнить счётчики по текущим данным (то же, что python -m app.cli.rebuild_stats)
+    op.execute(
+        """
+        INSERT INTO stats_counters (name, value)
+        SELECT 'total_prs', count(*) FROM pull_requests
+        UNION ALL SELECT 'total_reviews', count(*) FROM pull_request_reviewers
+        UNION ALL SELECT 'status:OPEN', count(*) FROM pull_requests WHERE status = 'OPEN'
+        UNION ALL SELECT 'status:MERGED', count(*) FROM pull_requests WHERE status = 'MERGED'
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO reviewer_stats (reviewer_id, review_count)
+        SELECT reviewer_id, count(*) FROM pull_request_reviewers
+        WHERE reviewer_id IS NOT NULL
+        GROUP BY reviewer_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reviewer_stats_review_count", table_name="reviewer_stats")
+    op.drop_table("reviewer_stats")
+    op.drop_table("stats_counters")
@@ -0,0 +1,35 @@
+"""stats window index
+
+Revision ID: a7d3e9b5c218
+Revises: f4a8c2e6b913
+Create Date: 2025-12-05 12:00:00.000000
+
+- ix_pull_requests_created_at покрывает отчёт /stats по окну (INCLUDE в PostgreSQL)
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e9b5c218"
+down_revision: str | Sequence[str] | None = "f4a8c2e6b913"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_pull_requests_created_at", table_name="pull_requests")
+    op.create_index(
+        "ix_pull_requests_created_at",
+        "pull_requests",
+        ["createdAt"],
+        postgresql_include=["pull_request_id", "status"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_pull_requests_created_at", table_name="pull_requests")
+    op.create_index("ix_pull_requests_created_at", "pull_requests", ["createdAt"])
@@ -0,0 +1,33 @@
+"""merged at index
+
+Revision ID: b2e6f1c9d437
+Revises: a7d3e9b5c218
+Create Date: 2025-12-06 12:00:00.000000
+
+- индекс по mergedAt для /stats/latency (INCLUDE createdAt, author_id в PostgreSQL)
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b2e6f1c9d437"
+down_revision: str | Sequence[str] | None = "a7d3e9b5c218"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_pull_requests_merged_at",
+        "pull_requests",
+        ["mergedAt"],
+        postgresql_include=["createdAt", "author_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_pull_requests_merged_at", table_name="pull_requests")
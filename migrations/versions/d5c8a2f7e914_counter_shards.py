@@ -0,0 +1,65 @@
+"""counter shards
+
+Revision ID: d5c8a2f7e914
+Revises: b2e6f1c9d437
+Create Date: 2025-12-07 12:00:00.000000
+
+- stats_counters и resource_versions: колонка shard в первичном ключе; значение
+  счётчика / версии — сумма по шардам, существующие строки — шард 0
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d5c8a2f7e914"
+down_revision: str | Sequence[str] | None = "b2e6f1c9d437"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# таблица -> колонка значения
+TABLES = {"stats_counters": "value", "resource_versions": "version"}
+
+
+def _set_primary_key(table: str, columns: list[str]) -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite не меняет первичный ключ на месте: таблица пересоздаётся
+        with op.batch_alter_table(table, recreate="always") as batch:
+            batch.create_primary_key(f"{table}_pkey", columns)
+        return
+    op.drop_constraint(f"{table}_pkey", table, type_="primary")
+    op.create_primary_key(f"{table}_pkey", table, columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column("shard", sa.Integer(), nullable=False, server_default="0"))
+        _set_primary_key(table, ["name", "shard"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, value in TABLES.items():
+        # свернуть шарды в шард 0
+        op.execute(
+            f"""
+            INSERT INTO {table} (name, shard, {value})
+            SELECT DISTINCT name, 0, 0 FROM {table} t
+            WHERE NOT EXISTS (SELECT 1 FROM {table} s WHERE s.name = t.name AND s.shard = 0)
+            """
+        )
+        op.execute(
+            f"""
+            UPDATE {table} SET {value} = (
+                SELECT SUM(s.{value}) FROM {table} s WHERE s.name = {table}.name
+            )
+            WHERE shard = 0
+            """
+        )
+        op.execute(f"DELETE FROM {table} WHERE shard <> 0")
+        _set_primary_key(table, ["name"])
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("shard")
@@ -0,0 +1,35 @@
+"""resource versions
+
+Revision ID: e7b2d4c81f05
+Revises: c3f1a9d27e64
+Create Date: 2025-12-03 12:00:00.000000
+
+- счётчики версий команд, ревьюверов и /stats для ETag
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b2d4c81f05"
+down_revision: str | Sequence[str] | None = "c3f1a9d27e64"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # без строк: версия существующих ресурсов — 0, первое изменение даст 1
+    op.create_table(
+        "resource_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("resource_versions")
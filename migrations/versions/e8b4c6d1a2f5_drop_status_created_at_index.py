@@ -0,0 +1,30 @@
+"""drop status created at index
+
+Revision ID: e8b4c6d1a2f5
+Revises: d5c8a2f7e914
+Create Date: 2025-12-08 12:00:00.000000
+
+- ix_pull_requests_status_created_at удалён: /stats читает счётчики, getReview
+  фильтрует статус после join по ревьюверу, окна отчётов идут по индексам
+  createdAt / mergedAt — индекс только замедлял запись PR
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b4c6d1a2f5"
+down_revision: str | Sequence[str] | None = "d5c8a2f7e914"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_pull_requests_status_created_at", table_name="pull_requests")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_pull_requests_status_created_at", "pull_requests", ["status", "createdAt"])
@@ -0,0 +1,31 @@
+"""team reviewer strategy
+
+Revision ID: f4a8c2e6b913
+Revises: e7b2d4c81f05
+Create Date: 2025-12-04 12:00:00.000000
+
+- стратегия выбора ревьюверов и курсор round-robin у команды
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a8c2e6b913"
+down_revision: str | Sequence[str] | None = "e7b2d4c81f05"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("teams", sa.Column("reviewer_strategy", sa.String(), nullable=True))
+    op.add_column("teams", sa.Column("rr_cursor", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("teams", "rr_cursor")
+    op.drop_column("teams", "reviewer_strategy")
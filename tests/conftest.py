@@ -8,7 +8,7 @@
 4. Корректная работа с asyncpg (NullPool для избежания проблем с event loop)
 """
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 import os
 
 from httpx import ASGITransport, AsyncClient
@@ -16,9 +16,13 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool, StaticPool
 
+from app.core.idempotency import idempotency_cache
+from app.db.query_budget import QueryCounter
 from app.db.session import get_db
 from app.main import app
 from app.models.models import Base
+from app.repositories.team_repository import roster_cache
+from app.services.stats_service import latency_cache
 
 # Определяем URL базы данных
 # По умолчанию SQLite, но можно переопределить для PostgreSQL
@@ -48,6 +52,11 @@ else:
         echo=False,
     )
 
+# тесты настоящей конкурентности: SQLite блокирует всю базу, а не строки
+requires_postgres = pytest.mark.skipif(
+    _is_sqlite, reason="нужен PostgreSQL: TEST_DATABASE_URL / make test-pg"
+)
+
 TestSessionLocal = async_sessionmaker(
     bind=test_engine,
     class_=AsyncSession,
@@ -66,6 +75,11 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     2. Возвращает сессию
     3. После теста — откатывает и дропает таблицы
     """
+    # кэш процесса переживает пересоздание таблиц — очищаем
+    roster_cache.clear()
+    idempotency_cache.clear()
+    latency_cache.clear()
+
     # создаём таблицы
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -105,6 +119,15 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_counter() -> Callable[[], QueryCounter]:
+    """
+    Фабрика счётчиков SQL-запросов на тестовом движке:
+    `with query_counter() as counter: ...`, затем counter.count / counter.statements
+    """
+    return lambda: QueryCounter(test_engine)
+
+
 # =============================================================================
 # Fixture-ы для создания тестовых данных
 # =============================================================================
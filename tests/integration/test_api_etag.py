@@ -0,0 +1,114 @@
+"""
+ETag / If-None-Match для /team/get, /users/getReview и /stats
+
+Версии ресурсов растут в транзакциях изменений; совпавший If-None-Match
+даёт 304 после одного чтения версии, без основных запросов.
+"""
+
+from httpx import AsyncClient
+
+PR = {"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"}
+
+
+async def _revalidate(client: AsyncClient, url: str, params: dict, etag: str):
+    return await client.get(url, params=params, headers={"If-None-Match": etag})
+
+
+class TestETag:
+    async def test_team_get_not_modified_until_roster_changes(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        params = {"team_name": "backend"}
+
+        response = await client.get("/team/get", params=params)
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        response = await _revalidate(client, "/team/get", params, etag)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # PR не меняет состав команды
+        await client.post("/pullRequest/create", json=PR)
+        assert (await _revalidate(client, "/team/get", params, etag)).status_code == 304
+
+        await client.post("/users/setIsActive", json={"user_id": "u3", "is_active": False})
+        response = await _revalidate(client, "/team/get", params, etag)
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    async def test_get_review_changes_only_for_affected_reviewers(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        sample_team_data["members"].append({"user_id": "u4", "username": "Dan", "is_active": True})
+        await client.post("/team/add", json=sample_team_data)
+        pr = (await client.post("/pullRequest/create", json=PR)).json()["pr"]
+        reviewer, other = pr["assigned_reviewers"][0], "u1"
+        etags = {}
+        for user_id in (reviewer, other):
+            response = await client.get("/users/getReview", params={"user_id": user_id})
+            etags[user_id] = response.headers["etag"]
+
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+
+        changed = await _revalidate(
+            client, "/users/getReview", {"user_id": reviewer}, etags[reviewer]
+        )
+        assert changed.status_code == 200
+        assert changed.json()["pull_requests"][0]["status"] == "MERGED"
+        # автор не ревьювер своего PR — его список не изменился
+        unchanged = await _revalidate(client, "/users/getReview", {"user_id": other}, etags[other])
+        assert unchanged.status_code == 304
+
+    async def test_stats_not_modified_until_counters_change(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        etag = (await client.get("/stats")).headers["etag"]
+
+        await client.post("/users/setIsActive", json={"user_id": "u3", "is_active": False})
+        assert (await _revalidate(client, "/stats", {}, etag)).status_code == 304
+
+        await client.post("/pullRequest/create", json=PR)
+        response = await _revalidate(client, "/stats", {}, etag)
+        assert response.status_code == 200
+        assert response.json()["total_prs"] == 1
+
+    async def test_if_none_match_list_weak_and_star(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        params = {"team_name": "backend"}
+        etag = (await client.get("/team/get", params=params)).headers["etag"]
+
+        for header in (f'"stale", {etag}', f"W/{etag}", "*"):
+            assert (await _revalidate(client, "/team/get", params, header)).status_code == 304
+        assert (await _revalidate(client, "/team/get", params, '"stale"')).status_code == 200
+
+    async def test_missing_resource_does_not_match(self, client: AsyncClient):
+        for header in ("*", '"0"'):
+            response = await _revalidate(client, "/team/get", {"team_name": "ghost"}, header)
+            assert response.status_code == 404
+            assert response.json()["detail"]["error"]["code"] == "NOT_FOUND"
+
+    async def test_not_modified_costs_one_query(
+        self, client: AsyncClient, sample_team_data: dict, query_counter
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/pullRequest/create", json=PR)
+        requests = [
+            ("/team/get", {"team_name": "backend"}),
+            ("/users/getReview", {"user_id": "u2"}),
+            ("/stats", {}),
+        ]
+        for url, params in requests:
+            etag = (await client.get(url, params=params)).headers["etag"]
+
+            with query_counter() as counter:
+                response = await _revalidate(client, url, params, etag)
+
+            assert response.status_code == 304
+            assert counter.count == 1, counter.report()
+            assert "RESOURCE_VERSIONS" in counter.statements[0].upper()
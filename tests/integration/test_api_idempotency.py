@@ -0,0 +1,117 @@
+"""
+Интеграционные тесты Idempotency-Key на POST-эндпойнтах
+"""
+
+from httpx import AsyncClient
+
+from app.core.idempotency import idempotency_cache
+
+
+class TestIdempotencyKey:
+    """
+    Повтор с тем же ключом получает сохранённый ответ
+    """
+
+    async def test_retried_create_replays_201(
+        self, client: AsyncClient, sample_team_data: dict, sample_pr_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        headers = {"Idempotency-Key": "create-1"}
+
+        first = await client.post("/pullRequest/create", json=sample_pr_data, headers=headers)
+        retry = await client.post("/pullRequest/create", json=sample_pr_data, headers=headers)
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.content == first.content
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+        # без ключа повтор по-прежнему конфликтует
+        again = await client.post("/pullRequest/create", json=sample_pr_data)
+        assert again.status_code == 409
+
+    async def test_retried_reassign_does_not_reassign_twice(
+        self, client: AsyncClient, sample_pr_data: dict
+    ):
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "backend",
+                "members": [
+                    {"user_id": f"u{i}", "username": f"User {i}", "is_active": True}
+                    for i in range(1, 7)
+                ],
+            },
+        )
+        pr = (await client.post("/pullRequest/create", json=sample_pr_data)).json()["pr"]
+        old = pr["assigned_reviewers"][0]
+        payload = {"pull_request_id": pr["pull_request_id"], "old_user_id": old}
+        headers = {"Idempotency-Key": "reassign-1"}
+
+        first = await client.post("/pullRequest/reassign", json=payload, headers=headers)
+        retry = await client.post("/pullRequest/reassign", json=payload, headers=headers)
+
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        new = first.json()["replaced_by"]
+        review = await client.get("/users/getReview", params={"user_id": new})
+        assert [p["pull_request_id"] for p in review.json()["pull_requests"]] == ["pr-1001"]
+
+    async def test_error_response_is_replayed(self, client: AsyncClient, sample_pr_data: dict):
+        headers = {"Idempotency-Key": "missing-author"}
+
+        first = await client.post("/pullRequest/create", json=sample_pr_data, headers=headers)
+        retry = await client.post("/pullRequest/create", json=sample_pr_data, headers=headers)
+
+        assert first.status_code == retry.status_code == 404
+        assert retry.content == first.content
+
+    async def test_same_key_other_body_rejected(self, client: AsyncClient, sample_team_data: dict):
+        headers = {"Idempotency-Key": "k"}
+        await client.post("/team/add", json=sample_team_data, headers=headers)
+
+        other = {**sample_team_data, "team_name": "other"}
+        response = await client.post("/team/add", json=other, headers=headers)
+
+        assert response.status_code == 422
+        assert response.json()["detail"]["error"]["code"] == "IDEMPOTENCY_KEY_REUSED"
+        missing = await client.get("/team/get", params={"team_name": "other"})
+        assert missing.status_code == 404
+
+    async def test_key_is_scoped_by_path(self, client: AsyncClient, sample_team_data: dict):
+        headers = {"Idempotency-Key": "shared"}
+        await client.post("/team/add", json=sample_team_data, headers=headers)
+
+        response = await client.post(
+            "/users/setIsActive", json={"user_id": "u1", "is_active": False}, headers=headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["user"]["is_active"] is False
+        assert len(idempotency_cache) == 2
+
+    async def test_streaming_import_is_replayed(self, client: AsyncClient):
+        body = '{"team_name": "backend", "user_id": "u1", "username": "Alice"}\n'
+        headers = {"Idempotency-Key": "import-1"}
+
+        first = await client.post("/team/import", content=body, headers=headers)
+        retry = await client.post("/team/import", content=body, headers=headers)
+
+        assert first.json()["users_created"] == 1
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+
+    async def test_import_format_is_part_of_request(self, client: AsyncClient):
+        body = "team_name,user_id,username\nbackend,u1,Alice\n"
+        headers = {"Idempotency-Key": "import-2"}
+
+        first = await client.post(
+            "/team/import", params={"format": "csv"}, content=body, headers=headers
+        )
+        other = await client.post(
+            "/team/import", params={"format": "ndjson"}, content=body, headers=headers
+        )
+
+        assert first.json()["users_created"] == 1
+        assert other.status_code == 422
+        assert other.json()["detail"]["error"]["code"] == "IDEMPOTENCY_KEY_REUSED"
@@ -0,0 +1,78 @@
+"""
+Интеграционные тесты для GET /metrics
+"""
+
+from httpx import AsyncClient
+import pytest
+
+from app.core.metrics import DB_QUERIES_PER_REQUEST, HTTP_REQUEST_DURATION, instrument_engine
+from tests.conftest import test_engine
+
+
+@pytest.fixture(autouse=True)
+def instrumented_engine():
+    # приложение в тестах работает через тестовый движок
+    instrument_engine(test_engine)
+
+
+class TestMetrics:
+    """
+    Тесты GET /metrics
+    """
+
+    async def test_request_latency_and_db_usage(self, client: AsyncClient, sample_team_data: dict):
+        before = HTTP_REQUEST_DURATION.count(method="POST", route="/team/add", status="201")
+        queries_before = DB_QUERIES_PER_REQUEST.count(method="POST", route="/team/add")
+
+        await client.post("/team/add", json=sample_team_data)
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert (
+            HTTP_REQUEST_DURATION.count(method="POST", route="/team/add", status="201")
+            == before + 1
+        )
+        assert DB_QUERIES_PER_REQUEST.count(method="POST", route="/team/add") == queries_before + 1
+        assert 'http_request_duration_seconds_bucket{method="POST",route="/team/add"' in text
+        assert 'db_time_per_request_seconds_count{method="POST",route="/team/add"}' in text
+        assert "db_query_duration_seconds_count" in text
+        # сам /metrics ещё выполняется
+        assert "http_requests_in_flight 1" in text
+
+    async def test_route_template_label(self, client: AsyncClient):
+        await client.get("/users/getReview", params={"user_id": "nobody"})
+        await client.get("/no/such/route")
+
+        text = (await client.get("/metrics")).text
+
+        assert 'route="/users/getReview",status="200"' in text
+        assert 'route="unmatched",status="404"' in text
+        assert "nobody" not in text
+
+    async def test_cache_metrics(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+        await client.get("/team/get", params={"team_name": "backend"})
+
+        text = (await client.get("/metrics")).text
+
+        assert 'cache_hits_total{cache="roster"}' in text
+        assert 'cache_hit_ratio{cache="roster"}' in text
+
+    async def test_db_queries_counted_per_request(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        before = DB_QUERIES_PER_REQUEST.total(method="POST", route="/pullRequest/create")
+
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-m", "pull_request_name": "m", "author_id": "u1"},
+        )
+
+        # контекст, нагрузка, 2 INSERT, 2 upsert счётчиков, outbox, версии
+        # — см. test_create_pr_round_trips
+        assert DB_QUERIES_PER_REQUEST.total(method="POST", route="/pullRequest/create") == (
+            before + 8
+        )
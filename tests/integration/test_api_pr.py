@@ -3,6 +3,7 @@
 
 Тестируемые эндпойнты по OpenAPI:
 - POST /pullRequest/create — создание PR с автоматическим назначением ревьюверов
+- POST /pullRequest/createBatch — пакетное создание PR с результатом по каждому элементу
 - POST /pullRequest/merge — merge PR (идемпотентная операция)
 - POST /pullRequest/reassign — переназначение ревьювера
 """
@@ -148,6 +149,132 @@ class TestPRCreate:
         data = response.json()
         assert data["detail"]["error"]["code"] == "NOT_FOUND"
 
+    async def test_create_pr_round_trips(
+        self, client: AsyncClient, sample_team_data: dict, query_counter
+    ):
+        """
+        Создание PR укладывается в одну транзакцию:
+        проверка PR/автора, выбор ревьюверов, INSERT PR, batched INSERT ревьюверов,
+        по одному upsert на таблицу счётчиков статистики, INSERT события в outbox
+        и upsert версий для ETag
+        """
+        await client.post("/team/add", json=sample_team_data)
+
+        with query_counter() as counter:
+            response = await client.post(
+                "/pullRequest/create",
+                json={
+                    "pull_request_id": "pr-rt",
+                    "pull_request_name": "Round trips",
+                    "author_id": "u1",
+                },
+            )
+        statements = counter.statements
+
+        assert response.status_code == 201
+        pr = response.json()["pr"]
+        assert sorted(pr["assigned_reviewers"]) == ["u2", "u3"]
+        assert pr["createdAt"] is not None
+
+        assert len(statements) == 8, counter.report()
+        inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+        assert len(inserts) == 6
+        assert all("RETURNING" in s.upper() for s in inserts[:2])
+        assert all("ON CONFLICT" in s.upper() for s in inserts[2:4])
+        assert "OUTBOX_EVENTS" in inserts[4].upper()
+        assert "RESOURCE_VERSIONS" in inserts[5].upper()
+
+
+class TestPRCreateBatch:
+    """
+    Тесты POST /pullRequest/createBatch
+    """
+
+    @staticmethod
+    def _item(pr_id: str, author_id: str = "u1") -> dict:
+        return {"pull_request_id": pr_id, "pull_request_name": "Sync", "author_id": author_id}
+
+    async def test_batch_per_item_results(self, client: AsyncClient, sample_team_data: dict):
+        """
+        Ошибки по элементам не мешают создать остальные PR
+        """
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/pullRequest/create", json=self._item("pr-old"))
+
+        response = await client.post(
+            "/pullRequest/createBatch",
+            json={
+                "pull_requests": [
+                    self._item("pr-1"),
+                    self._item("pr-old"),
+                    self._item("pr-2", author_id="ghost"),
+                    self._item("pr-1"),
+                    self._item("pr-3", author_id="u2"),
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 3
+        results = data["results"]
+        assert [r["pull_request_id"] for r in results] == ["pr-1", "pr-old", "pr-2", "pr-1", "pr-3"]
+        assert [r["error"]["code"] if r["error"] else None for r in results] == [
+            None,
+            "PR_EXISTS",
+            "NOT_FOUND",
+            "PR_EXISTS",
+            None,
+        ]
+        assert sorted(results[0]["pr"]["assigned_reviewers"]) == ["u2", "u3"]
+        assert "u2" not in results[4]["pr"]["assigned_reviewers"]
+
+        # созданные PR видны обычным API
+        merged = await client.post("/pullRequest/merge", json={"pull_request_id": "pr-3"})
+        assert merged.status_code == 200
+
+    async def test_batch_balances_reviewers(self, client: AsyncClient):
+        """
+        Нагрузка распределяется по всему пакету с учётом уже назначенных ревью
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "mono",
+                "members": [
+                    {"user_id": f"m{i}", "username": f"M{i}", "is_active": True} for i in range(5)
+                ],
+            },
+        )
+        # у m1 и m2 уже по одному открытому ревью
+        await client.post(
+            "/pullRequest/createBatch",
+            json={"pull_requests": [self._item("pr-0", author_id="m0")]},
+        )
+
+        response = await client.post(
+            "/pullRequest/createBatch",
+            json={"pull_requests": [self._item(f"pr-{i}", author_id="m0") for i in range(1, 9)]},
+        )
+
+        assert response.json()["created"] == 8
+        loads: dict[str, int] = {}
+        for user_id in ("m1", "m2", "m3", "m4"):
+            reviews = await client.get("/users/getReview", params={"user_id": user_id})
+            loads[user_id] = len(reviews.json()["pull_requests"])
+        # 18 назначений на 4 кандидатов — разброс не больше 1
+        assert sum(loads.values()) == 18
+        assert max(loads.values()) - min(loads.values()) <= 1
+
+    async def test_batch_validation(self, client: AsyncClient):
+        """
+        Пустой пакет отклоняется валидацией
+        """
+        response = await client.post("/pullRequest/createBatch", json={"pull_requests": []})
+
+        assert response.status_code == 422
+
 
 class TestPRMerge:
     """
@@ -2,8 +2,17 @@
 Интеграционные тесты для /stats
 """
 
+import datetime
+
 from httpx import AsyncClient
 import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import shard_of
+from app.models.models import PullRequest, ReviewerStats, StatsCounter
+from app.repositories.stats_repository import TOTAL_PRS, StatsRepository
+from app.services.stats_service import StatsService
 
 
 class TestStats:
@@ -124,3 +133,335 @@ class TestStats:
 
         data = response.json()
         assert len(data["top_reviewers"]) <= 1
+
+
+class TestStatsReport:
+    """
+    GET /stats с from / to / team_name — разбивка назначений по командам и пользователям
+    """
+
+    @staticmethod
+    async def _seed(client: AsyncClient) -> str:
+        """
+        Two teams, PRs before and after the returned moment
+        """
+        for team, prefix in (("alpha", "a"), ("beta", "b")):
+            await client.post(
+                "/team/add",
+                json={
+                    "team_name": team,
+                    "members": [
+                        {"user_id": f"{prefix}{i}", "username": f"{prefix}{i}", "is_active": True}
+                        for i in range(1, 4)
+                    ],
+                },
+            )
+        for pr_id, author_id in (("old-a", "a1"), ("old-b", "b1")):
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": pr_id, "pull_request_name": "old", "author_id": author_id},
+            )
+        moment = datetime.datetime.now(datetime.UTC).isoformat()
+        for pr_id in ("new-1", "new-2"):
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": pr_id, "pull_request_name": "new", "author_id": "a1"},
+            )
+        await client.post("/pullRequest/merge", json={"pull_request_id": "new-1"})
+        return moment
+
+    async def test_window_breakdown(self, client: AsyncClient):
+        moment = await self._seed(client)
+
+        response = await client.get("/stats", params={"from": moment})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["to"] is None
+        # 2 PR в окне по 2 ревьювера (a2, a3), один PR смёржен
+        assert data["total"] == {"created": 4, "merged": 2, "open": 2}
+        assert data["teams"] == [{"team_name": "alpha", "created": 4, "merged": 2, "open": 2}]
+        assert data["users"] == [
+            {"user_id": user_id, "team_name": "alpha", "created": 2, "merged": 1, "open": 1}
+            for user_id in ("a2", "a3")
+        ]
+
+        # до момента — только старые PR обеих команд
+        before = (await client.get("/stats", params={"to": moment})).json()
+        assert before["total"] == {"created": 4, "merged": 0, "open": 4}
+        assert [team["team_name"] for team in before["teams"]] == ["alpha", "beta"]
+        assert len(before["users"]) == 4
+
+    async def test_team_filter_uses_reviewer_team(self, client: AsyncClient):
+        await self._seed(client)
+        # a2 переходит в beta: его ревью считаются за текущую команду
+        await client.post(
+            "/team/sync",
+            json={
+                "team_name": "beta",
+                "members": [
+                    {"user_id": user_id, "username": user_id, "is_active": True}
+                    for user_id in ("b1", "b2", "b3", "a2")
+                ],
+            },
+        )
+
+        data = (await client.get("/stats", params={"team_name": "beta"})).json()
+
+        assert data["team_name"] == "beta"
+        assert [team["team_name"] for team in data["teams"]] == ["beta"]
+        by_user = {user["user_id"]: user["created"] for user in data["users"]}
+        assert by_user == {"a2": 3, "b2": 1, "b3": 1}
+        assert data["total"]["created"] == 5
+
+    async def test_empty_window(self, client: AsyncClient):
+        await self._seed(client)
+
+        data = (await client.get("/stats", params={"from": "2100-01-01T00:00:00Z"})).json()
+
+        assert data["total"] == {"created": 0, "merged": 0, "open": 0}
+        assert data["teams"] == data["users"] == []
+
+    async def test_invalid_window_returns_400(self, client: AsyncClient):
+        response = await client.get(
+            "/stats", params={"from": "2025-02-01T00:00:00Z", "to": "2025-01-01T00:00:00Z"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"]["code"] == "INVALID_WINDOW"
+
+    async def test_report_is_one_query(self, client: AsyncClient, query_counter):
+        moment = await self._seed(client)
+
+        with query_counter() as counter:
+            response = await client.get("/stats", params={"from": moment, "team_name": "alpha"})
+
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert counter.count == 1, counter.statements
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime(2025, 1, day, hour, minute, tzinfo=datetime.UTC)
+
+
+class TestStatsLatency:
+    """
+    GET /stats/latency — квантили времени до merge и созданные / смёрженные PR по интервалам
+    """
+
+    @pytest.fixture
+    def set_times(self, db_session: AsyncSession):
+        async def set_times(
+            pr_id: str, created: datetime.datetime, merged: datetime.datetime | None
+        ) -> None:
+            await db_session.execute(
+                update(PullRequest)
+                .where(PullRequest.pull_request_id == pr_id)
+                .values(createdAt=created, mergedAt=merged)
+            )
+            await db_session.commit()
+
+        return set_times
+
+    async def _seed(self, client: AsyncClient, set_times) -> None:
+        for team, prefix in (("alpha", "a"), ("beta", "b")):
+            await client.post(
+                "/team/add",
+                json={
+                    "team_name": team,
+                    "members": [
+                        {"user_id": f"{prefix}{i}", "username": f"{prefix}{i}", "is_active": True}
+                        for i in range(1, 4)
+                    ],
+                },
+            )
+        prs = {
+            # время до merge: 1 ч, 24 ч, 2 ч; p4 открыт
+            "p1": ("a1", _at(1, 10), _at(1, 11)),
+            "p2": ("a2", _at(1, 11, 30), _at(2, 11, 30)),
+            "p3": ("a1", _at(2, 9), _at(2, 11)),
+            "p4": ("b1", _at(2, 12), None),
+        }
+        for pr_id, (author_id, created, merged) in prs.items():
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": pr_id, "pull_request_name": pr_id, "author_id": author_id},
+            )
+            if merged:
+                await client.post("/pullRequest/merge", json={"pull_request_id": pr_id})
+            await set_times(pr_id, created, merged)
+
+    async def test_daily_percentiles_and_series(self, client: AsyncClient, set_times):
+        await self._seed(client, set_times)
+
+        response = await client.get(
+            "/stats/latency", params={"from": "2025-01-01T00:00:00Z", "to": "2025-01-03T00:00:00Z"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["bucket"] == "day"
+        ttm = data["time_to_merge"]
+        assert ttm["merged"] == 3
+        # percentile_cont по [3600, 7200, 86400]
+        assert ttm["p50"] == pytest.approx(7200, abs=0.01)
+        assert ttm["p90"] == pytest.approx(70560, abs=0.01)
+        assert ttm["p99"] == pytest.approx(84816, abs=0.01)
+        assert [
+            (item["bucket_start"][:10], item["created"], item["merged"]) for item in data["series"]
+        ] == [("2025-01-01", 2, 1), ("2025-01-02", 2, 2)]
+
+    async def test_hourly_series_fills_empty_buckets(self, client: AsyncClient, set_times):
+        await self._seed(client, set_times)
+
+        data = (
+            await client.get(
+                "/stats/latency",
+                params={
+                    "bucket": "hour",
+                    "from": "2025-01-01T10:00:00Z",
+                    "to": "2025-01-01T13:00:00",
+                },
+            )
+        ).json()
+
+        assert [(item["created"], item["merged"]) for item in data["series"]] == [
+            (1, 0),
+            (1, 1),
+            (0, 0),
+        ]
+        assert data["time_to_merge"]["merged"] == 1
+        assert data["time_to_merge"]["p99"] == pytest.approx(3600, abs=0.01)
+
+    async def test_team_filter_uses_author_team(self, client: AsyncClient, set_times):
+        await self._seed(client, set_times)
+        params = {"from": "2025-01-01T00:00:00Z", "to": "2025-01-03T00:00:00Z"}
+
+        data = (await client.get("/stats/latency", params={**params, "team_name": "beta"})).json()
+
+        assert data["time_to_merge"] == {"merged": 0, "p50": None, "p90": None, "p99": None}
+        assert [(item["created"], item["merged"]) for item in data["series"]] == [(0, 0), (1, 0)]
+
+    async def test_default_window_is_aligned(self, client: AsyncClient):
+        data = (await client.get("/stats/latency")).json()
+
+        assert len(data["series"]) == 30
+        until = datetime.datetime.fromisoformat(data["to"])
+        assert until.time() == datetime.time(0)
+        assert data["series"][-1]["bucket_start"] < data["to"]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"from": "2025-01-02T00:00:00Z", "to": "2025-01-01T00:00:00Z"},
+            # 4800 часовых интервалов
+            {"bucket": "hour", "from": "2025-01-01T00:00:00Z", "to": "2025-07-20T00:00:00Z"},
+        ],
+    )
+    async def test_invalid_window_returns_400(self, client: AsyncClient, params: dict):
+        response = await client.get("/stats/latency", params=params)
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"]["code"] == "INVALID_WINDOW"
+
+    async def test_cached_until_ttl(self, client: AsyncClient, set_times, query_counter):
+        await self._seed(client, set_times)
+        params = {"from": "2025-01-01T00:00:00Z", "to": "2025-01-03T00:00:00Z"}
+        first = (await client.get("/stats/latency", params=params)).json()
+
+        # изменения не сбрасывают кэш: отчёт устаревает не дольше LATENCY_CACHE_TTL
+        await set_times("p4", _at(2, 12), _at(2, 13))
+        with query_counter() as counter:
+            second = (await client.get("/stats/latency", params=params)).json()
+
+        assert second == first
+        assert counter.count == 0
+
+
+class TestStatsCounters:
+    """
+    Счётчики статистики поддерживаются записью и совпадают с живыми агрегатами
+    """
+
+    async def _scenario(self, client: AsyncClient) -> None:
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "counters",
+                "members": [
+                    {"user_id": f"c{i}", "username": f"C{i}", "is_active": True} for i in range(6)
+                ],
+            },
+        )
+        for i in range(8):
+            await client.post(
+                "/pullRequest/create",
+                json={
+                    "pull_request_id": f"pr-c-{i}",
+                    "pull_request_name": "c",
+                    "author_id": f"c{i % 6}",
+                },
+            )
+        for i in range(3):
+            await client.post("/pullRequest/merge", json={"pull_request_id": f"pr-c-{i}"})
+        # повторный merge не должен менять счётчики
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-c-0"})
+
+        pr = (await client.post("/pullRequest/merge", json={"pull_request_id": "pr-c-7"})).json()[
+            "pr"
+        ]
+        await client.post(
+            "/pullRequest/reassign",
+            json={"pull_request_id": "pr-c-6", "old_user_id": pr["assigned_reviewers"][0]},
+        )
+        await client.post(
+            "/team/deactivateUsers", json={"team_name": "counters", "user_ids": ["c1", "c2"]}
+        )
+
+    async def test_counters_match_live_aggregates(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
+        await self._scenario(client)
+
+        repo = StatsRepository(db_session)
+        live_counters, live_reviewers = await repo.compute_live()
+        stats = (await client.get("/stats", params={"limit": 100})).json()
+
+        assert stats["total_prs"] == live_counters["total_prs"] == 8
+        assert stats["total_reviews"] == live_counters["total_reviews"]
+        assert {s["status"]: s["count"] for s in stats["prs_by_status"]} == {
+            "OPEN": live_counters["status:OPEN"],
+            "MERGED": live_counters["status:MERGED"],
+        }
+        assert {r["user_id"]: r["review_count"] for r in stats["top_reviewers"]} == {
+            k: v for k, v in live_reviewers.items() if v
+        }
+
+    async def test_counters_are_sharded_by_pr(self, client: AsyncClient, db_session: AsyncSession):
+        await self._scenario(client)
+
+        rows = (
+            await db_session.execute(
+                select(StatsCounter.shard, StatsCounter.value).where(StatsCounter.name == TOTAL_PRS)
+            )
+        ).all()
+
+        # каждый create пишет в шард своего PR, /stats суммирует шарды
+        assert {shard for shard, _ in rows} == {shard_of(f"pr-c-{i}") for i in range(8)}
+        assert sum(value for _, value in rows) == 8
+        assert (await client.get("/stats")).json()["total_prs"] == 8
+
+    async def test_rebuild_restores_counters(self, client: AsyncClient, db_session: AsyncSession):
+        await self._scenario(client)
+        before = (await client.get("/stats", params={"limit": 100})).json()
+
+        # портим счётчики и пересчитываем с нуля
+        await db_session.execute(update(StatsCounter).values(value=0))
+        await db_session.execute(delete(ReviewerStats))
+        await db_session.commit()
+        assert (await client.get("/stats")).json()["total_prs"] == 0
+
+        await StatsService(db_session).rebuild()
+
+        assert (await client.get("/stats", params={"limit": 100})).json() == before
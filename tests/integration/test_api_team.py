@@ -4,10 +4,14 @@
 Тестируемые эндпоинты по OpenAPI:
 - POST /team/add — создание команды
 - GET /team/get — получение команды
+- POST /team/setReviewerStrategy — стратегия выбора ревьюверов команды
 """
 
 from httpx import AsyncClient
 
+from app.core.config import settings
+from app.repositories.team_repository import roster_cache
+
 
 class TestTeamAdd:
     """
@@ -68,6 +72,116 @@ class TestTeamAdd:
         assert inactive[0]["user_id"] == "f2"
 
 
+class TestTeamSync:
+    """
+    Тесты POST /team/sync — запись только разницы составов
+    """
+
+    @staticmethod
+    def _member(user_id: str, is_active: bool = True, username: str | None = None) -> dict:
+        return {"user_id": user_id, "username": username or user_id.upper(), "is_active": is_active}
+
+    async def test_sync_creates_team(self, client: AsyncClient):
+        response = await client.post(
+            "/team/sync",
+            json={"team_name": "new", "members": [self._member("n1"), self._member("n2")]},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] is True
+        assert data["added"] == ["n1", "n2"]
+        team = (await client.get("/team/get", params={"team_name": "new"})).json()
+        assert sorted(m["user_id"] for m in team["members"]) == ["n1", "n2"]
+
+    async def test_sync_applies_diff(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+        # u4 из другой команды переходит в backend
+        await client.post("/team/add", json={"team_name": "other", "members": [self._member("u4")]})
+        await client.get("/team/get", params={"team_name": "other"})
+
+        response = await client.post(
+            "/team/sync",
+            json={
+                "team_name": "backend",
+                "members": [
+                    {"user_id": "u1", "username": "Alice", "is_active": True},
+                    {"user_id": "u2", "username": "Robert", "is_active": True},
+                    self._member("u4"),
+                ],
+            },
+        )
+
+        data = response.json()
+        assert data["created"] is False
+        assert data["added"] == ["u4"]
+        assert data["updated"] == ["u2"]
+        # u3 нет в списке — деактивирован, но остаётся в команде
+        assert data["deactivated"] == ["u3"]
+        members = {m["user_id"]: m for m in data["team"]["members"]}
+        assert members["u2"]["username"] == "Robert"
+        assert members["u3"]["is_active"] is False
+
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {m["user_id"]: m for m in team["members"]} == members
+        other = (await client.get("/team/get", params={"team_name": "other"})).json()
+        assert other["members"] == []
+
+    async def test_sync_reassigns_deactivated_reviewers(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        sample_team_data["members"].append(self._member("u4"))
+        await client.post("/team/add", json=sample_team_data)
+        pr = (
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": "pr-1", "pull_request_name": "PR", "author_id": "u1"},
+            )
+        ).json()["pr"]
+        gone = pr["assigned_reviewers"][0]
+        members = [m for m in sample_team_data["members"] if m["user_id"] != gone]
+
+        data = (
+            await client.post("/team/sync", json={"team_name": "backend", "members": members})
+        ).json()
+
+        assert data["deactivated"] == [gone]
+        [reassignment] = data["reassignments"]
+        assert reassignment["old_user_id"] == gone
+        assert reassignment["new_user_id"] not in {gone, "u1", None}
+
+    async def test_unchanged_roster_costs_one_read(
+        self, client: AsyncClient, sample_team_data: dict, query_counter
+    ):
+        await client.post("/team/add", json=sample_team_data)
+
+        with query_counter() as counter:
+            response = await client.post("/team/sync", json=sample_team_data)
+
+        data = response.json()
+        assert (data["added"], data["updated"], data["deactivated"]) == ([], [], [])
+        assert counter.count == 1, counter.report()
+        assert counter.statements[0].lstrip().upper().startswith("SELECT")
+
+    async def test_changed_roster_one_batched_write(
+        self, client: AsyncClient, sample_team_data: dict, query_counter
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        members = [{**m, "username": m["username"] + "!"} for m in sample_team_data["members"]]
+
+        with query_counter() as counter:
+            response = await client.post(
+                "/team/sync", json={"team_name": "backend", "members": members}
+            )
+
+        assert response.json()["updated"] == ["u1", "u2", "u3"]
+        writes = [s for s in counter.statements if not s.lstrip().upper().startswith("SELECT")]
+        # upsert пользователей и upsert версии состава для ETag
+        assert len(writes) == 2, counter.report()
+        assert all("ON CONFLICT" in write.upper() for write in writes)
+        assert "RESOURCE_VERSIONS" in writes[1].upper()
+
+
 class TestTeamGet:
     """
     Тесты GET /team/get
@@ -134,3 +248,133 @@ class TestTeamMembers:
         assert member["user_id"] == "ft1"
         assert member["username"] == "FieldTest1"
         assert member["is_active"] is True
+
+
+class TestReviewerStrategy:
+    """
+    Тесты POST /team/setReviewerStrategy и выбора ревьюверов по стратегии команды
+    """
+
+    @staticmethod
+    async def _create(client: AsyncClient, pr_id: str, author_id: str = "u1") -> list[str]:
+        response = await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": pr_id, "pull_request_name": "PR", "author_id": author_id},
+        )
+        return response.json()["pr"]["assigned_reviewers"]
+
+    async def test_set_and_reset_strategy(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+
+        response = await client.post(
+            "/team/setReviewerStrategy", json={"team_name": "backend", "strategy": "random"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"team_name": "backend", "reviewer_strategy": "random"}
+
+        # без стратегии — снова по умолчанию
+        response = await client.post("/team/setReviewerStrategy", json={"team_name": "backend"})
+        assert response.json()["reviewer_strategy"] == settings.REVIEWER_STRATEGY
+
+    async def test_unknown_team_returns_404(self, client: AsyncClient):
+        response = await client.post(
+            "/team/setReviewerStrategy", json={"team_name": "nope", "strategy": "random"}
+        )
+
+        assert response.status_code == 404
+        assert response.json()["detail"]["error"]["code"] == "NOT_FOUND"
+
+    async def test_unknown_strategy_returns_422(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+
+        response = await client.post(
+            "/team/setReviewerStrategy", json={"team_name": "backend", "strategy": "fastest"}
+        )
+
+        assert response.status_code == 422
+
+    async def test_round_robin_cursor_persists(self, client: AsyncClient, sample_team_data: dict):
+        sample_team_data["members"].append({"user_id": "u4", "username": "Dan", "is_active": True})
+        await client.post("/team/add", json=sample_team_data)
+        await client.post(
+            "/team/setReviewerStrategy", json={"team_name": "backend", "strategy": "round_robin"}
+        )
+
+        assert await self._create(client, "pr-1") == ["u2", "u3"]
+        # курсор хранится в команде, а не в кэше составов
+        roster_cache.clear()
+        assert await self._create(client, "pr-2") == ["u4", "u2"]
+
+        response = await client.post(
+            "/pullRequest/createBatch",
+            json={
+                "pull_requests": [
+                    {"pull_request_id": "pr-3", "pull_request_name": "PR", "author_id": "u1"},
+                    {"pull_request_id": "pr-4", "pull_request_name": "PR", "author_id": "u2"},
+                ]
+            },
+        )
+        reviewers = [item["pr"]["assigned_reviewers"] for item in response.json()["results"]]
+        assert reviewers == [["u3", "u4"], ["u1", "u3"]]
+        assert await self._create(client, "pr-5") == ["u4", "u2"]
+
+
+class TestRosterCache:
+    """
+    Кэш составов команд: /team/get и выбор ревьюверов читают из кэша,
+    записи в команды и пользователей его обновляют
+    """
+
+    async def test_team_get_served_from_cache(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+        hits = roster_cache.hits
+
+        response = await client.get("/team/get", params={"team_name": "backend"})
+
+        assert response.status_code == 200
+        assert {m["user_id"] for m in response.json()["members"]} == {"u1", "u2", "u3"}
+        # add_team кладёт состав в кэш сразу (write-through)
+        assert roster_cache.hits == hits + 1
+
+    async def test_team_get_reloads_entry_older_than_version(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        etag = (await client.get("/team/get", params={"team_name": "backend"})).headers["etag"]
+        # состав из кэша до изменения, сделанного другим воркером: его версия старее
+        cached = roster_cache.get("backend")
+        roster_cache.set("backend", cached._replace(members=(), version=cached.version - 1))
+
+        response = await client.get("/team/get", params={"team_name": "backend"})
+
+        assert response.headers["etag"] == etag
+        assert {m["user_id"] for m in response.json()["members"]} == {"u1", "u2", "u3"}
+        # перечитанный состав снова в кэше с текущей версией
+        assert roster_cache.get("backend") == cached
+
+    async def test_set_is_active_invalidates(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/users/setIsActive", json={"user_id": "u3", "is_active": False})
+
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {m["user_id"]: m["is_active"] for m in team["members"]}["u3"] is False
+
+        # деактивированный пользователь больше не выбирается ревьювером
+        pr = (
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": "pr-c", "pull_request_name": "c", "author_id": "u1"},
+            )
+        ).json()["pr"]
+        assert pr["assigned_reviewers"] == ["u2"]
+
+    async def test_deactivate_users_invalidates(self, client: AsyncClient, sample_team_data: dict):
+        await client.post("/team/add", json=sample_team_data)
+        await client.get("/team/get", params={"team_name": "backend"})
+        await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2"]}
+        )
+
+        assert roster_cache.get("backend") is None
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {m["user_id"]: m["is_active"] for m in team["members"]}["u2"] is False
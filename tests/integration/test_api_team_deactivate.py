@@ -0,0 +1,201 @@
+"""
+Интеграционные тесты массовой деактивации (/team/deactivateUsers)
+
+- деактивация набора пользователей / всей команды одним UPDATE
+- безопасное переназначение открытых PR
+- объём из условий задачи: 20 команд, 200 пользователей, 3000 открытых PR
+"""
+
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bench.deactivate import DEACTIVATED, PRS, TEAM, TEAMS, USERS_PER_TEAM, seed
+from app.db.query_budget import get_query_budget
+from app.models.models import PullRequestReviewer
+from app.services.team_service import TeamService
+
+
+async def _create_pr(client: AsyncClient, pr_id: str, author_id: str) -> dict:
+    response = await client.post(
+        "/pullRequest/create",
+        json={"pull_request_id": pr_id, "pull_request_name": pr_id, "author_id": author_id},
+    )
+    return response.json()["pr"]
+
+
+class TestDeactivateUsers:
+    """
+    Тесты POST /team/deactivateUsers
+    """
+
+    async def test_deactivate_reassigns_open_prs(self, client: AsyncClient):
+        """
+        Деактивированный ревьювер заменяется активным участником команды
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "ops",
+                "members": [
+                    {"user_id": "o1", "username": "Author", "is_active": True},
+                    {"user_id": "o2", "username": "Two", "is_active": True},
+                    {"user_id": "o3", "username": "Three", "is_active": True},
+                    {"user_id": "o4", "username": "Four", "is_active": False},
+                ],
+            },
+        )
+        # o2 и o3 — ревьюверы; затем включаем o4 как будущую замену
+        pr = await _create_pr(client, "pr-ops", "o1")
+        assert sorted(pr["assigned_reviewers"]) == ["o2", "o3"]
+        await client.post("/users/setIsActive", json={"user_id": "o4", "is_active": True})
+
+        response = await client.post(
+            "/team/deactivateUsers", json={"team_name": "ops", "user_ids": ["o2"]}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["deactivated"] == ["o2"]
+        assert data["reassignments"] == [
+            {"pull_request_id": "pr-ops", "old_user_id": "o2", "new_user_id": "o4"}
+        ]
+
+        reviews = await client.get("/users/getReview", params={"user_id": "o4"})
+        assert [p["pull_request_id"] for p in reviews.json()["pull_requests"]] == ["pr-ops"]
+        team = (await client.get("/team/get", params={"team_name": "ops"})).json()
+        assert {m["user_id"]: m["is_active"] for m in team["members"]}["o2"] is False
+
+    async def test_deactivate_without_candidates_removes_reviewer(self, client: AsyncClient):
+        """
+        Если заменить некем — ревьювер просто снимается с PR (new_user_id = null)
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "pair",
+                "members": [
+                    {"user_id": "pa1", "username": "Author", "is_active": True},
+                    {"user_id": "pa2", "username": "Reviewer", "is_active": True},
+                ],
+            },
+        )
+        await _create_pr(client, "pr-pair", "pa1")
+
+        response = await client.post("/team/deactivateUsers", json={"team_name": "pair"})
+
+        assert response.status_code == 200
+        data = response.json()
+        # без user_ids деактивируется вся команда
+        assert data["deactivated"] == ["pa1", "pa2"]
+        assert data["reassignments"] == [
+            {"pull_request_id": "pr-pair", "old_user_id": "pa2", "new_user_id": None}
+        ]
+        reviews = await client.get("/users/getReview", params={"user_id": "pa2"})
+        assert reviews.json()["pull_requests"] == []
+
+    async def test_deactivate_skips_merged_prs(self, client: AsyncClient, sample_team_data: dict):
+        """
+        Смердженные PR не меняются
+        """
+        await client.post("/team/add", json=sample_team_data)
+        pr = await _create_pr(client, "pr-done", "u1")
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-done"})
+
+        response = await client.post(
+            "/team/deactivateUsers",
+            json={"team_name": "backend", "user_ids": pr["assigned_reviewers"]},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["reassignments"] == []
+        merged = await client.post("/pullRequest/merge", json={"pull_request_id": "pr-done"})
+        assert merged.json()["pr"]["assigned_reviewers"] == pr["assigned_reviewers"]
+
+    async def test_deactivate_unknown_team_returns_404(self, client: AsyncClient):
+        """
+        Несуществующая команда — 404 NOT_FOUND
+        """
+        response = await client.post("/team/deactivateUsers", json={"team_name": "ghost"})
+
+        assert response.status_code == 404
+        assert response.json()["detail"]["error"]["code"] == "NOT_FOUND"
+
+    async def test_deactivate_foreign_user_is_ignored(
+        self, client: AsyncClient, sample_team_data: dict, sample_team_with_inactive: dict
+    ):
+        """
+        Пользователи другой команды не деактивируются
+        """
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/team/add", json=sample_team_with_inactive)
+
+        response = await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2", "f1"]}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["deactivated"] == ["u2"]
+        team = (await client.get("/team/get", params={"team_name": "frontend"})).json()
+        assert {m["user_id"]: m["is_active"] for m in team["members"]}["f1"] is True
+
+    async def test_deactivate_already_inactive_changes_nothing(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        """
+        Уже неактивный участник не попадает в deactivated, ETag команды не меняется
+        """
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/users/setIsActive", json={"user_id": "u2", "is_active": False})
+        etag = (await client.get("/team/get", params={"team_name": "backend"})).headers["etag"]
+
+        response = await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2"]}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"team_name": "backend", "deactivated": [], "reassignments": []}
+        team = await client.get("/team/get", params={"team_name": "backend"})
+        assert team.headers["etag"] == etag
+
+
+class TestDeactivateUsersAtScale:
+    """
+    Объём из условий задачи: 20 команд, 200 пользователей, 3000 открытых PR
+
+    Время операции замеряется отдельно: make bench-deactivate (app.bench.deactivate)
+    """
+
+    async def test_deactivate_half_team(
+        self, client: AsyncClient, db_session: AsyncSession, query_counter
+    ):
+        """
+        Деактивация половины команды с переназначением всех её открытых ревью
+        """
+        await seed(db_session)
+
+        with query_counter() as counter:
+            response = await client.post(
+                "/team/deactivateUsers", json={"team_name": TEAM, "user_ids": DEACTIVATED}
+            )
+
+        assert response.status_code == 200
+        reassignments = response.json()["reassignments"]
+        # у каждого пользователя t0 ~30 открытых ревью
+        assert len(reassignments) > 100
+        assert all(r["new_user_id"] not in DEACTIVATED for r in reassignments)
+        # число запросов не зависит от числа переназначений
+        assert counter.count <= get_query_budget(TeamService.deactivate_users), counter.report()
+
+        # инварианты: по 2 разных ревьювера на PR, автор не ревьюит сам себя
+        rows = (
+            await db_session.execute(
+                select(PullRequestReviewer.pull_request_id, PullRequestReviewer.reviewer_id)
+            )
+        ).all()
+        by_pr: dict[str, list[str]] = {}
+        for pr_id, reviewer_id in rows:
+            by_pr.setdefault(pr_id, []).append(reviewer_id)
+        assert all(len(r) == len(set(r)) == 2 for r in by_pr.values())
+        authors = {f"pr{i}": f"t{i % TEAMS}u{i % USERS_PER_TEAM}" for i in range(PRS)}
+        assert all(authors[pr_id] not in r for pr_id, r in by_pr.items())
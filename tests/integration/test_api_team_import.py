@@ -0,0 +1,256 @@
+"""
+Интеграционные тесты потокового импорта (POST /team/import)
+"""
+
+import io
+import json
+from pathlib import Path
+import tracemalloc
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cli import import_users
+from app.core.config import settings
+from app.repositories import backend
+from app.repositories.memory_store import MemoryStore
+from app.services import import_service
+from app.services.import_service import ImportService, aiter_sync
+
+
+def _ndjson(rows: list[dict]) -> str:
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+def _user(user_id: str, team_name: str = "backend", **extra) -> dict:
+    return {"team_name": team_name, "user_id": user_id, "username": user_id.upper(), **extra}
+
+
+class TestTeamImport:
+    """
+    Тесты POST /team/import
+    """
+
+    async def test_import_ndjson(self, client: AsyncClient):
+        body = _ndjson(
+            [
+                _user("u1"),
+                _user("u2", is_active=False),
+                _user("u3", "frontend"),
+                {"team_name": "empty"},
+            ]
+        )
+
+        response = await client.post(
+            "/team/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "rows": 4,
+            "teams_created": 3,
+            "users_created": 3,
+            "users_updated": 0,
+            "users_unchanged": 0,
+            "reviews_reassigned": 0,
+            "error_count": 0,
+            "errors": [],
+        }
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {(m["user_id"], m["is_active"]) for m in team["members"]} == {
+            ("u1", True),
+            ("u2", False),
+        }
+        empty = await client.get("/team/get", params={"team_name": "empty"})
+        assert empty.json()["members"] == []
+
+    async def test_import_csv(self, client: AsyncClient):
+        body = (
+            'team_name,user_id,username,is_active\nbackend,u1,Alice,true\nbackend,u2,"Bob, Jr",0\n'
+        )
+
+        response = await client.post(
+            "/team/import", content=body, headers={"Content-Type": "text/csv"}
+        )
+
+        data = response.json()
+        assert data["users_created"] == 2
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {(m["username"], m["is_active"]) for m in team["members"]} == {
+            ("Alice", True),
+            ("Bob, Jr", False),
+        }
+
+    async def test_reimport_is_idempotent(self, client: AsyncClient):
+        body = _ndjson([_user(f"u{i}") for i in range(10)])
+        await client.post("/team/import", content=body)
+
+        response = await client.post("/team/import", content=body)
+
+        data = response.json()
+        assert data["teams_created"] == 0
+        assert data["users_created"] == 0
+        assert data["users_updated"] == 0
+        assert data["users_unchanged"] == 10
+
+    async def test_import_updates_existing_users_and_rosters(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        # состав "backend" попадает в кэш
+        await client.get("/team/get", params={"team_name": "backend"})
+
+        response = await client.post(
+            "/team/import",
+            content=_ndjson([_user("u2", "platform"), _user("u3", is_active=False), _user("u4")]),
+        )
+
+        data = response.json()
+        assert (data["users_created"], data["users_updated"], data["teams_created"]) == (1, 2, 1)
+        # кэш составов инвалидирован и у старой, и у новой команды
+        backend = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {(m["user_id"], m["is_active"]) for m in backend["members"]} == {
+            ("u1", True),
+            ("u3", False),
+            ("u4", True),
+        }
+        platform = (await client.get("/team/get", params={"team_name": "platform"})).json()
+        assert [m["user_id"] for m in platform["members"]] == ["u2"]
+
+    async def test_import_deactivation_reassigns_open_reviews(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        sample_team_data["members"].append({"user_id": "u4", "username": "Dan", "is_active": True})
+        await client.post("/team/add", json=sample_team_data)
+        pr = {"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"}
+        reviewers = (await client.post("/pullRequest/create", json=pr)).json()["pr"][
+            "assigned_reviewers"
+        ]
+        spare = ({"u2", "u3", "u4"} - set(reviewers)).pop()
+
+        response = await client.post(
+            "/team/import", content=_ndjson([_user(reviewers[0], is_active=False)])
+        )
+
+        assert response.json()["reviews_reassigned"] == 1
+        review = await client.get("/users/getReview", params={"user_id": spare})
+        assert [p["pull_request_id"] for p in review.json()["pull_requests"]] == ["pr-1"]
+        review = await client.get("/users/getReview", params={"user_id": reviewers[0]})
+        assert review.json()["pull_requests"] == []
+
+    async def test_invalid_rows_reported_and_skipped(self, client: AsyncClient):
+        body = "\n".join(
+            [
+                json.dumps(_user("u1")),
+                "{not json",
+                json.dumps({"team_name": "backend", "user_id": "u2"}),
+                json.dumps([1, 2]),
+                "",
+                json.dumps(_user("u3", team_name="")),
+                json.dumps(_user("u4")),
+            ]
+        )
+
+        response = await client.post("/team/import", params={"format": "ndjson"}, content=body)
+
+        data = response.json()
+        assert data["rows"] == 2
+        assert data["users_created"] == 2
+        assert data["error_count"] == 4
+        assert [e["line"] for e in data["errors"]] == [2, 3, 4, 6]
+        assert "username is required" in data["errors"][1]["message"]
+
+    async def test_csv_quoted_field_spans_lines(self, client: AsyncClient):
+        body = (
+            "team_name,user_id,username\n"
+            'backend,u1,"Alice\nSmith"\n'
+            'backend,u2,"Bob ""B"", Jr."\n'
+            'backend,u3,"unterminated\n'
+            "backend,u4,Dan\n"
+        )
+
+        response = await client.post("/team/import", params={"format": "csv"}, content=body)
+
+        data = response.json()
+        assert (data["rows"], data["users_created"]) == (2, 2)
+        # незакрытая кавычка забирает строки до конца файла, ошибка — на её первой строке
+        assert data["errors"] == [{"line": 5, "message": "unterminated quoted field"}]
+        team = (await client.get("/team/get", params={"team_name": "backend"})).json()
+        assert {m["user_id"]: m["username"] for m in team["members"]} == {
+            "u1": "Alice\nSmith",
+            "u2": 'Bob "B", Jr.',
+        }
+
+    async def test_csv_oversized_record_is_dropped(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(import_service, "MAX_CSV_RECORD", 50)
+        body = 'team_name,user_id,username\nbackend,u1,Alice\nbackend,u2,"' + "x\n" * 30
+
+        response = await client.post("/team/import", params={"format": "csv"}, content=body)
+
+        data = response.json()
+        assert data["users_created"] == 1
+        assert data["errors"][0]["line"] == 3
+        assert "longer than 50" in data["errors"][0]["message"]
+
+    async def test_csv_wrong_column_count(self, client: AsyncClient):
+        body = "team_name,user_id,username\nbackend,u1\nbackend,u2,Bob\n"
+
+        response = await client.post("/team/import", params={"format": "csv"}, content=body)
+
+        data = response.json()
+        assert data["users_created"] == 1
+        assert data["errors"] == [{"line": 2, "message": "expected 3 columns, got 2"}]
+
+    async def test_duplicate_user_in_batch_last_wins(self, client: AsyncClient):
+        body = _ndjson([_user("u1"), _user("u1", "frontend", is_active=False)])
+
+        data = (await client.post("/team/import", content=body)).json()
+
+        assert data["users_created"] == 1
+        team = (await client.get("/team/get", params={"team_name": "frontend"})).json()
+        assert team["members"] == [{"user_id": "u1", "username": "U1", "is_active": False}]
+
+
+class TestImportStreaming:
+    """
+    Импорт пакетами: память не растёт с размером входа
+    """
+
+    @staticmethod
+    def _rows(prefix: str, n: int):
+        for i in range(n):
+            yield json.dumps(_user(f"{prefix}-{i:07d}", team_name=f"team-{i % 50}"))
+
+    async def _peak_memory(self, db: AsyncSession, n: int) -> int:
+        tracemalloc.start()
+        try:
+            result = await ImportService(db, batch_size=200).import_lines(
+                aiter_sync(self._rows(f"n{n}", n))
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert result.users_created == n
+        return peak
+
+    async def test_memory_flat_in_input_size(self, db_session: AsyncSession):
+        small = await self._peak_memory(db_session, 1_000)
+        large = await self._peak_memory(db_session, 5_000)
+
+        # 5x строк — пик памяти почти тот же, растёт только на размер пакета
+        assert large < small * 1.5, (small, large)
+
+
+class TestImportCLI:
+    async def test_memory_backend_writes_snapshot(self, monkeypatch, tmp_path: Path):
+        path = tmp_path / "store.log"
+        monkeypatch.setattr(settings, "STORAGE_BACKEND", "memory")
+        monkeypatch.setattr(settings, "MEMORY_SNAPSHOT_PATH", str(path))
+        monkeypatch.setattr(backend, "_memory_store", None)
+
+        source = io.StringIO(_ndjson([_user("u1"), _user("u2", "frontend")]))
+        result = await import_users.run(source, "ndjson", None)
+
+        assert (result.teams_created, result.users_created) == (2, 2)
+        # импорт попал в журнал memory, а не в SQL
+        assert set(MemoryStore(str(path)).users) == {"u1", "u2"}
@@ -141,6 +141,77 @@ class TestUserGetReview:
 
         assert response.status_code == 422
 
+    async def test_get_review_keyset_pagination(self, client: AsyncClient):
+        """
+        Постраничная выдача: limit + next_cursor, без пропусков и повторов
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "pages",
+                "members": [
+                    {"user_id": "pg1", "username": "Author", "is_active": True},
+                    {"user_id": "pg2", "username": "Reviewer", "is_active": True},
+                ],
+            },
+        )
+        for i in range(5):
+            await client.post(
+                "/pullRequest/create",
+                json={
+                    "pull_request_id": f"pr-pg-{i}",
+                    "pull_request_name": "p",
+                    "author_id": "pg1",
+                },
+            )
+
+        seen: list[str] = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"user_id": "pg2", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = (await client.get("/users/getReview", params=params)).json()
+            seen += [p["pull_request_id"] for p in data["pull_requests"]]
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert seen == [f"pr-pg-{i}" for i in range(5)]
+
+    async def test_get_review_status_filter(self, client: AsyncClient, sample_team_data: dict):
+        """
+        status=OPEN — смердженные PR не возвращаются
+        """
+        await client.post("/team/add", json=sample_team_data)
+        for pr_id in ("pr-open", "pr-merged"):
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": pr_id, "pull_request_name": pr_id, "author_id": "u1"},
+            )
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-merged"})
+
+        response = await client.get("/users/getReview", params={"user_id": "u2", "status": "OPEN"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["pull_request_id"] for p in data["pull_requests"]] == ["pr-open"]
+        assert data["next_cursor"] is None
+
+    async def test_get_review_invalid_cursor_returns_400(self, client: AsyncClient):
+        """
+        Некорректный курсор — 400 INVALID_CURSOR
+        """
+        response = await client.get(
+            "/users/getReview", params={"user_id": "u1", "limit": 10, "cursor": "garbage!"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"]["code"] == "INVALID_CURSOR"
+
 
 class TestUserActivation:
     """
@@ -0,0 +1,174 @@
+"""
+Конкурентные reassign / merge (только PostgreSQL: `make test-pg`)
+
+Сотни параллельных вызовов в отдельных сессиях; после них проверяются
+инварианты: у каждого PR ровно MAX_REVIEWERS разных ревьюверов не из авторов,
+ревьюверы смердженного PR не менялись после merge, счётчики статистики
+совпадают с пересчётом. Блокировка строки PR не задерживает другие PR,
+в том числе открытая транзакция merge: общие счётчики /stats и версии
+пишутся в шард своего PR.
+"""
+
+import asyncio
+import random
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import shard_of
+from app.models.models import PRStatus
+from app.repositories.stats_repository import StatsRepository
+from app.services.pr_service import MAX_REVIEWERS, PullRequestService
+from app.services.pr_service_errors import (
+    NoCandidateError,
+    PRMergedError,
+    ReviewerNotAssignedError,
+)
+from app.services.team_service import TeamService
+from tests.conftest import TestSessionLocal, requires_postgres
+
+pytestmark = requires_postgres
+
+TEAM_SIZE = 12
+PR_COUNT = 30
+OPERATIONS = 400
+# одновременных сессий (соединений) — меньше max_connections тестового PostgreSQL
+CONCURRENCY = 40
+
+
+async def _seed(db: AsyncSession) -> None:
+    await TeamService(db).add_team(
+        "stress",
+        [
+            {"user_id": f"s{i:02d}", "username": f"User {i}", "is_active": True}
+            for i in range(TEAM_SIZE)
+        ],
+    )
+    service = PullRequestService(db)
+    for i in range(PR_COUNT):
+        await service.create_pr(f"pr-{i:03d}", f"Stress {i}", f"s{i % TEAM_SIZE:02d}")
+
+
+async def _reviewers(pr_id: str) -> list[str]:
+    async with TestSessionLocal() as session:
+        pr = await PullRequestService(session).pr_repo.get_pr_with_reviewers(pr_id)
+        return sorted(r.reviewer_id for r in pr.reviewers)
+
+
+class TestConcurrentReassignMerge:
+    async def test_invariants_hold_under_concurrency(self, db_session: AsyncSession):
+        await _seed(db_session)
+        rng = random.Random(17)
+        gate = asyncio.Semaphore(CONCURRENCY)
+        merged_with: dict[str, list[str]] = {}
+        outcomes: dict[str, int] = {}
+
+        async def operation(pr_id: str, merge: bool) -> None:
+            async with gate, TestSessionLocal() as session:
+                service = PullRequestService(session)
+                try:
+                    if merge:
+                        pr = await service.merge_pr(pr_id)
+                        reviewers = sorted(r.reviewer_id for r in pr.reviewers)
+                        # повторный merge возвращает тех же ревьюверов
+                        assert merged_with.setdefault(pr_id, reviewers) == reviewers
+                        outcome = "merged"
+                    else:
+                        # ревьювер из устаревшего снимка — как у клиента без блокировок
+                        old = rng.choice(snapshot[pr_id])
+                        await service.reassign_reviewer(pr_id, old)
+                        outcome = "reassigned"
+                except (PRMergedError, ReviewerNotAssignedError, NoCandidateError) as e:
+                    outcome = type(e).__name__
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        pr_ids = [f"pr-{i:03d}" for i in range(PR_COUNT)]
+        snapshot = {pr_id: await _reviewers(pr_id) for pr_id in pr_ids}
+        await asyncio.gather(
+            *(operation(rng.choice(pr_ids), rng.random() < 0.15) for _ in range(OPERATIONS))
+        )
+
+        assert outcomes.get("reassigned", 0) > 0
+        assert outcomes.get("merged", 0) > 0
+        async with TestSessionLocal() as session:
+            service = PullRequestService(session)
+            for pr_id in pr_ids:
+                pr = await service.pr_repo.get_pr_with_reviewers(pr_id)
+                reviewers = sorted(r.reviewer_id for r in pr.reviewers)
+                assert len(reviewers) == MAX_REVIEWERS, (pr_id, reviewers)
+                assert pr.author_id not in reviewers
+                if pr.status == PRStatus.MERGED:
+                    assert merged_with[pr_id] == reviewers
+
+            stats = StatsRepository(session)
+            counters, reviewer_counts = await stats.compute_live()
+            stored = await stats.get_counters()
+            assert {k: v for k, v in stored.items() if v} == {
+                k: v for k, v in counters.items() if v
+            }
+            top = dict(await stats.get_top_reviewers(TEAM_SIZE))
+            assert top == {k: v for k, v in reviewer_counts.items() if v}
+
+    async def test_lock_does_not_block_other_prs(self, db_session: AsyncSession):
+        await _seed(db_session)
+
+        async with TestSessionLocal() as holder:
+            # держим блокировку pr-000 в открытой транзакции
+            await PullRequestService(holder).pr_repo.get_pr("pr-000", for_update=True)
+
+            async with TestSessionLocal() as other:
+                merged = await asyncio.wait_for(
+                    PullRequestService(other).merge_pr("pr-001"), timeout=5
+                )
+                assert merged.status == PRStatus.MERGED
+
+            async with TestSessionLocal() as blocked:
+                old = (await _reviewers("pr-000"))[0]
+                reassign = asyncio.create_task(
+                    PullRequestService(blocked).reassign_reviewer("pr-000", old)
+                )
+                await asyncio.sleep(0.5)
+                assert not reassign.done()
+
+                await holder.rollback()
+                _, new_id = await asyncio.wait_for(reassign, timeout=5)
+                assert new_id != old
+
+    async def test_open_merge_does_not_block_merge_of_other_pr(self, db_session: AsyncSession):
+        await _seed(db_session)
+        # PR из разных шардов счётчиков и версий
+        first = "pr-000"
+        second = next(
+            f"pr-{i:03d}" for i in range(1, PR_COUNT) if shard_of(f"pr-{i:03d}") != shard_of(first)
+        )
+        release = asyncio.Event()
+
+        async with TestSessionLocal() as holder:
+            commit = holder.commit
+
+            async def held_commit() -> None:
+                # merge first прошёл все записи и держит блокировки до commit
+                await release.wait()
+                await commit()
+
+            holder.commit = held_commit
+            merge_first = asyncio.create_task(PullRequestService(holder).merge_pr(first))
+            await asyncio.sleep(0.5)
+            assert not merge_first.done()
+
+            other = TestSessionLocal()
+            try:
+                merged = await asyncio.wait_for(
+                    PullRequestService(other).merge_pr(second), timeout=5
+                )
+                assert merged.status == PRStatus.MERGED
+            finally:
+                # отпустить first до закрытия other: иначе при ошибке other ждёт его блокировок
+                release.set()
+                first_merged = await asyncio.wait_for(merge_first, timeout=5)
+                await other.close()
+            assert first_merged.status == PRStatus.MERGED
+
+        async with TestSessionLocal() as session:
+            counters = await StatsRepository(session).get_counters()
+        assert counters["status:MERGED"] == 2
+        assert counters["status:OPEN"] == PR_COUNT - 2
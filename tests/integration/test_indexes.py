@@ -0,0 +1,134 @@
+"""
+Проверка, что горячие запросы используют индексы (EXPLAIN на засеянных данных)
+
+- SQLite: EXPLAIN QUERY PLAN
+- PostgreSQL: EXPLAIN с enable_seqscan = off (на маленьких таблицах планировщик
+  иначе предпочитает seq scan — нас интересует, что индекс применим)
+"""
+
+import datetime
+
+import pytest
+from sqlalchemy import insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.models import PRStatus, PullRequest, PullRequestReviewer, Team, User
+
+
+async def _seed(db: AsyncSession) -> None:
+    now = datetime.datetime.now(datetime.UTC)
+    await db.execute(insert(Team), [{"team_name": f"t{t}"} for t in range(20)])
+    await db.execute(
+        insert(User),
+        [
+            {
+                "user_id": f"u{i}",
+                "username": f"user {i}",
+                "is_active": i % 7 != 0,
+                "team_name": f"t{i % 20}",
+            }
+            for i in range(200)
+        ],
+    )
+    await db.execute(
+        insert(PullRequest),
+        [
+            {
+                "pull_request_id": f"pr{i}",
+                "pull_request_name": f"PR {i}",
+                "author_id": f"u{i % 200}",
+                "status": PRStatus.OPEN if i % 3 else PRStatus.MERGED,
+                "createdAt": now - datetime.timedelta(minutes=i),
+                "mergedAt": None if i % 3 else now - datetime.timedelta(minutes=i // 2),
+            }
+            for i in range(2000)
+        ],
+    )
+    await db.execute(
+        insert(PullRequestReviewer),
+        [
+            {
+                "id": f"pr{i}_u{(i + s) % 200}",
+                "pull_request_id": f"pr{i}",
+                "reviewer_id": f"u{(i + s) % 200}",
+            }
+            for i in range(2000)
+            for s in (1, 2)
+        ],
+    )
+    await db.commit()
+
+
+async def _plan(db: AsyncSession, query: Select) -> str:
+    dialect = db.get_bind().dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        await db.execute(text("ANALYZE"))
+        rows = (await db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+        return "\n".join(row[-1] for row in rows)
+
+    await db.execute(text("ANALYZE"))
+    await db.execute(text("SET enable_seqscan = off"))
+    rows = (await db.execute(text(f"EXPLAIN {sql}"))).all()
+    return "\n".join(row[0] for row in rows)
+
+
+_now = datetime.datetime.now(datetime.UTC)
+
+HOT_QUERIES = {
+    # ReviewerRepository.get_prs_by_reviewer
+    "ix_pull_request_reviewers_reviewer_id": select(PullRequestReviewer.pull_request_id).where(
+        PullRequestReviewer.reviewer_id == "u5"
+    ),
+    # ReviewerRepository.get_reviewers_by_pr
+    "ix_pull_request_reviewers_pull_request_id": select(PullRequestReviewer.reviewer_id).where(
+        PullRequestReviewer.pull_request_id == "pr5"
+    ),
+    # активные участники команды
+    "ix_users_team_name_is_active": select(User.user_id).where(
+        User.team_name == "t3", User.is_active.is_(True)
+    ),
+    # отчёт /stats по окну: PR, созданные в окне, и их статус
+    "ix_pull_requests_created_at": select(PullRequest.pull_request_id, PullRequest.status).where(
+        PullRequest.createdAt >= _now - datetime.timedelta(days=1),
+        PullRequest.createdAt < _now,
+    ),
+    # /stats/latency: PR, смёрженные в окне
+    "ix_pull_requests_merged_at": select(PullRequest.createdAt, PullRequest.author_id).where(
+        PullRequest.mergedAt >= _now - datetime.timedelta(days=1),
+        PullRequest.mergedAt < _now,
+    ),
+}
+
+
+@pytest.mark.parametrize("index_name", list(HOT_QUERIES))
+async def test_hot_query_uses_index(db_session: AsyncSession, index_name: str):
+    await _seed(db_session)
+
+    plan = await _plan(db_session, HOT_QUERIES[index_name])
+
+    assert index_name in plan, plan
+
+
+async def test_primary_key_indexes_are_not_duplicated(db_session: AsyncSession):
+    """
+    Отдельных ix_* индексов на первичные ключи нет
+    """
+
+    def index_names(sync_conn) -> set[str]:
+        inspector = inspect(sync_conn)
+        return {
+            ix["name"]
+            for table in ("teams", "users", "pull_requests")
+            for ix in inspector.get_indexes(table)
+        }
+
+    async with db_session.bind.connect() as conn:
+        names = await conn.run_sync(index_names)
+
+    assert not names & {
+        "ix_teams_team_name",
+        "ix_users_user_id",
+        "ix_pull_requests_pull_request_id",
+    }
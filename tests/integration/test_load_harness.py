@@ -0,0 +1,49 @@
+"""
+Интеграционный тест нагрузочного генератора (app.bench.load) на тестовом приложении
+"""
+
+from httpx import AsyncClient
+import pytest
+
+from app.bench.load import ENDPOINTS, LoadConfig, parse_mix, percentile, run_load
+
+
+class TestLoadHarness:
+    """
+    Короткий прогон на in-process приложении: все операции выполняются без ошибок
+    """
+
+    async def test_run_load_report(self, client: AsyncClient):
+        # одна сессия БД на тест — запросы строго последовательно
+        cfg = LoadConfig(
+            duration=0.5,
+            rps=200,
+            concurrency=1,
+            teams=3,
+            users_per_team=4,
+            seed_prs=10,
+            random_seed=1,
+        )
+
+        report = await run_load(client, cfg)
+
+        assert report["total"]["requests"] > 0
+        assert report["total"]["errors"] == 0
+        assert report["sli"]["success_ok"] is True
+        assert set(report["endpoints"]) <= set(ENDPOINTS.values())
+        for summary in report["endpoints"].values():
+            assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+        stats = (await client.get("/stats")).json()
+        assert stats["total_prs"] >= cfg.seed_prs
+
+    async def test_unknown_operation_rejected(self, client: AsyncClient):
+        with pytest.raises(ValueError):
+            await run_load(client, LoadConfig(mix=parse_mix("create=1,delete_all=1")))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([], 99) == 0.0
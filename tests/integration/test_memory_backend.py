@@ -0,0 +1,172 @@
+"""
+API-тесты на бэкенде в памяти (STORAGE_BACKEND=memory)
+
+Классы тестов API наследуются без изменений, модульная фикстура `client`
+подменяет get_db на MemorySession — сервисы те же, что и на SQL. Тесты,
+проверяющие SQL (счётчики запросов, кэш составов, прямые запросы в
+db_session), здесь не повторяются.
+"""
+
+from collections.abc import AsyncGenerator
+import datetime
+
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from app.core.idempotency import idempotency_cache
+from app.db.session import get_db
+from app.main import app
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.services.stats_service import latency_cache
+from tests.integration import (
+    test_api_etag,
+    test_api_idempotency,
+    test_api_pr,
+    test_api_stats,
+    test_api_team,
+    test_api_team_deactivate,
+    test_api_team_import,
+    test_api_user,
+    test_scenarios,
+)
+
+skip_sql_only = pytest.mark.skip(reason="проверяет SQL-бэкенд")
+
+
+@pytest.fixture
+def memory_store() -> MemoryStore:
+    return MemoryStore()
+
+
+@pytest.fixture
+async def client(memory_store: MemoryStore) -> AsyncGenerator[AsyncClient, None]:
+    async def override_get_db() -> AsyncGenerator[MemorySession, None]:
+        async with MemorySession(memory_store) as session:
+            yield session
+
+    idempotency_cache.clear()
+    latency_cache.clear()
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+class TestPRCreateMemory(test_api_pr.TestPRCreate):
+    @skip_sql_only
+    async def test_create_pr_round_trips(self):
+        pass
+
+
+class TestPRCreateBatchMemory(test_api_pr.TestPRCreateBatch):
+    pass
+
+
+class TestPRMergeMemory(test_api_pr.TestPRMerge):
+    pass
+
+
+class TestPRReassignMemory(test_api_pr.TestPRReassign):
+    pass
+
+
+class TestTeamAddMemory(test_api_team.TestTeamAdd):
+    pass
+
+
+class TestTeamSyncMemory(test_api_team.TestTeamSync):
+    @skip_sql_only
+    async def test_unchanged_roster_costs_one_read(self):
+        pass
+
+    @skip_sql_only
+    async def test_changed_roster_one_batched_write(self):
+        pass
+
+
+class TestTeamGetMemory(test_api_team.TestTeamGet):
+    pass
+
+
+class TestTeamMembersMemory(test_api_team.TestTeamMembers):
+    pass
+
+
+class TestReviewerStrategyMemory(test_api_team.TestReviewerStrategy):
+    pass
+
+
+class TestUserSetIsActiveMemory(test_api_user.TestUserSetIsActive):
+    pass
+
+
+class TestUserGetReviewMemory(test_api_user.TestUserGetReview):
+    pass
+
+
+class TestUserActivationMemory(test_api_user.TestUserActivation):
+    pass
+
+
+class TestStatsMemory(test_api_stats.TestStats):
+    pass
+
+
+class TestStatsReportMemory(test_api_stats.TestStatsReport):
+    @skip_sql_only
+    async def test_report_is_one_query(self):
+        pass
+
+
+class TestStatsLatencyMemory(test_api_stats.TestStatsLatency):
+    @pytest.fixture
+    def set_times(self, memory_store: MemoryStore):
+        async def set_times(
+            pr_id: str, created: datetime.datetime, merged: datetime.datetime | None
+        ) -> None:
+            pr = memory_store.prs[pr_id]
+            pr.createdAt, pr.mergedAt = created, merged
+
+        return set_times
+
+    @skip_sql_only
+    async def test_cached_until_ttl(self):
+        pass
+
+
+class TestDeactivateUsersMemory(test_api_team_deactivate.TestDeactivateUsers):
+    pass
+
+
+class TestTeamImportMemory(test_api_team_import.TestTeamImport):
+    pass
+
+
+class TestIdempotencyKeyMemory(test_api_idempotency.TestIdempotencyKey):
+    pass
+
+
+class TestETagMemory(test_api_etag.TestETag):
+    @skip_sql_only
+    async def test_not_modified_costs_one_query(self):
+        pass
+
+
+class TestFullPRLifecycleMemory(test_scenarios.TestFullPRLifecycle):
+    pass
+
+
+class TestDeactivationAffectsNewPRsMemory(test_scenarios.TestDeactivationAffectsNewPRs):
+    pass
+
+
+class TestReassignFromReviewerTeamMemory(test_scenarios.TestReassignFromReviewerTeam):
+    pass
+
+
+class TestEdgeCasesMemory(test_scenarios.TestEdgeCases):
+    pass
+
+
+class TestLoadBalancingMemory(test_scenarios.TestLoadBalancing):
+    pass
@@ -0,0 +1,51 @@
+"""
+Миграции Alembic на SQLite: схема после upgrade head совпадает с моделями
+
+Alembic запускается отдельным процессом: env.py сам вызывает asyncio.run.
+"""
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.repositories.outbox_repository import OutboxRepository
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _alembic(url: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "alembic", *args],
+        check=False,
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": url},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+class TestMigrationsSQLite:
+    async def test_upgrade_head_matches_models_and_accepts_outbox_events(self, tmp_path: Path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}"
+
+        upgrade = _alembic(url, "upgrade", "head")
+        assert upgrade.returncode == 0, upgrade.stderr
+        check = _alembic(url, "check")
+        assert check.returncode == 0, check.stdout + check.stderr
+
+        # id должен заполняться сам: в SQLite это INTEGER PRIMARY KEY (rowid)
+        engine = create_async_engine(url)
+        try:
+            async with async_sessionmaker(engine)() as session:
+                repo = OutboxRepository(session)
+                await repo.add([("test.event", {"n": 1}), ("test.event", {"n": 2})])
+                await session.commit()
+                claimed = await repo.claim(10, max_attempts=1)
+        finally:
+            await engine.dispose()
+
+        assert [(event.id, event.payload) for event in claimed] == [(1, {"n": 1}), (2, {"n": 2})]
@@ -0,0 +1,318 @@
+"""
+Transactional outbox: события пишутся в транзакции изменения, диспетчер доставляет
+
+Диспетчер работает с TestSessionLocal, как в приложении с SessionLocal.
+Конкурентный захват пачек (SKIP LOCKED) проверяется только на PostgreSQL.
+"""
+
+import asyncio
+from pathlib import Path
+
+from httpx import AsyncClient
+import orjson
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import OUTBOX_DEAD, OUTBOX_DELIVERED
+from app.core.sinks import FileSink, NullSink
+from app.models.models import OutboxEvent
+from app.repositories.outbox_repository import OutboxRepository
+from app.services.outbox_dispatcher import OutboxDispatcher
+from tests.conftest import TestSessionLocal, requires_postgres
+
+
+async def _events(db: AsyncSession) -> list[tuple[str, dict]]:
+    result = await db.execute(
+        select(OutboxEvent.event_type, OutboxEvent.payload).order_by(OutboxEvent.id)
+    )
+    return [(event_type, payload) for event_type, payload in result.all()]
+
+
+async def _count(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count(OutboxEvent.id)))
+
+
+class FailingSink(NullSink):
+    name = "failing"
+
+    async def send(self, events) -> None:
+        raise ConnectionError("sink is down")
+
+
+class BlockingSink(NullSink):
+    name = "blocking"
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def send(self, events) -> None:
+        self.started.set()
+        await self.release.wait()
+
+
+class TestOutboxEvents:
+    async def test_assignment_changes_write_events(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        sample_team_data["members"].append({"user_id": "u4", "username": "Dan", "is_active": True})
+        await client.post("/team/add", json=sample_team_data)
+        response = await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"},
+        )
+        reviewers = response.json()["pr"]["assigned_reviewers"]
+        response = await client.post(
+            "/pullRequest/reassign", json={"pull_request_id": "pr-1", "old_user_id": reviewers[0]}
+        )
+        replaced_by = response.json()["replaced_by"]
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+        await client.post("/users/setIsActive", json={"user_id": "u1", "is_active": False})
+
+        events = await _events(db_session)
+
+        assert [event_type for event_type, _ in events] == [
+            "pr.created",
+            "pr.reviewer_reassigned",
+            "pr.merged",
+            "user.activity_changed",
+        ]
+        assert events[0][1] == {
+            "pull_request_id": "pr-1",
+            "author_id": "u1",
+            "assigned_reviewers": reviewers,
+        }
+        assert events[1][1] == {
+            "pull_request_id": "pr-1",
+            "old_user_id": reviewers[0],
+            "new_user_id": replaced_by,
+        }
+        assert events[2][1]["pull_request_id"] == "pr-1"
+        assert events[3][1] == {"user_id": "u1", "is_active": False}
+
+    async def test_failed_or_noop_requests_write_nothing(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        pr = {"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"}
+        await client.post("/pullRequest/create", json=pr)
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+        before = await _count(db_session)
+
+        # 409, повторный merge, тот же is_active, неизвестный автор
+        await client.post("/pullRequest/create", json=pr)
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+        await client.post("/users/setIsActive", json={"user_id": "u2", "is_active": True})
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-2", "pull_request_name": "X", "author_id": "nobody"},
+        )
+
+        assert await _count(db_session) == before
+
+    async def test_deactivation_writes_user_and_reassignment_events(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"},
+        )
+        await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2"]}
+        )
+
+        events = await _events(db_session)
+
+        assert events[1:] == [
+            ("user.activity_changed", {"user_id": "u2", "is_active": False}),
+            (
+                "pr.reviewer_reassigned",
+                {"pull_request_id": "pr-1", "old_user_id": "u2", "new_user_id": None},
+            ),
+        ]
+
+    async def test_deactivating_inactive_user_writes_nothing(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post("/users/setIsActive", json={"user_id": "u2", "is_active": False})
+        before = await _count(db_session)
+
+        await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2"]}
+        )
+        await client.post("/team/deactivateUsers", json={"team_name": "backend"})
+
+        # вторая деактивация всей команды пишет события только для u1 и u3
+        assert [payload["user_id"] for _, payload in (await _events(db_session))[before:]] == [
+            "u1",
+            "u3",
+        ]
+
+    async def test_import_writes_activity_and_team_events(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        rows = [
+            {"team_name": "platform", "user_id": "u1", "username": "Alice"},
+            {"team_name": "backend", "user_id": "u2", "username": "Bob", "is_active": False},
+            {"team_name": "backend", "user_id": "u3", "username": "Charlie"},
+            {"team_name": "backend", "user_id": "u9", "username": "New", "is_active": False},
+        ]
+        before = await _count(db_session)
+
+        await client.post(
+            "/team/import", content="\n".join(orjson.dumps(row).decode() for row in rows)
+        )
+
+        # u3 не изменился, u9 — новый пользователь; открытых PR нет — переназначений нет
+        assert (await _events(db_session))[before:] == [
+            (
+                "user.team_changed",
+                {"user_id": "u1", "old_team_name": "backend", "new_team_name": "platform"},
+            ),
+            ("user.activity_changed", {"user_id": "u2", "is_active": False}),
+        ]
+
+    async def test_import_deactivation_writes_reassignment_events(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"},
+        )
+        before = await _count(db_session)
+
+        await client.post(
+            "/team/import",
+            content='{"team_name": "backend", "user_id": "u2", "username": "Bob", '
+            '"is_active": false}',
+        )
+
+        # u3 уже ревьювер pr-1, u1 — автор: замены нет
+        assert (await _events(db_session))[before:] == [
+            ("user.activity_changed", {"user_id": "u2", "is_active": False}),
+            (
+                "pr.reviewer_reassigned",
+                {"pull_request_id": "pr-1", "old_user_id": "u2", "new_user_id": None},
+            ),
+        ]
+
+    async def test_sync_writes_team_change_events(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        before = await _count(db_session)
+
+        await client.post(
+            "/team/sync",
+            json={
+                "team_name": "platform",
+                "members": [{"user_id": "u1", "username": "Alice", "is_active": True}],
+            },
+        )
+
+        assert (await _events(db_session))[before:] == [
+            (
+                "user.team_changed",
+                {"user_id": "u1", "old_team_name": "backend", "new_team_name": "platform"},
+            ),
+        ]
+
+
+class TestDispatcher:
+    async def _seed_events(self, db: AsyncSession, n: int) -> None:
+        await OutboxRepository(db).add([("test.event", {"n": i}) for i in range(n)])
+        await db.commit()
+
+    async def test_delivers_in_order_and_deletes(self, db_session: AsyncSession, tmp_path: Path):
+        await self._seed_events(db_session, 5)
+        path = tmp_path / "events.ndjson"
+        dispatcher = OutboxDispatcher(FileSink(path), TestSessionLocal, batch_size=3)
+        delivered_before = OUTBOX_DELIVERED.value(sink="file")
+
+        assert await dispatcher.dispatch_batch() == 3
+        assert await dispatcher.dispatch_batch() == 2
+        assert await dispatcher.dispatch_batch() == 0
+
+        lines = [orjson.loads(line) for line in path.read_bytes().splitlines()]
+        assert [line["payload"]["n"] for line in lines] == [0, 1, 2, 3, 4]
+        assert all(line["type"] == "test.event" for line in lines)
+        assert len({line["id"] for line in lines}) == 5
+        assert await _count(db_session) == 0
+        assert OUTBOX_DELIVERED.value(sink="file") == delivered_before + 5
+
+    async def test_failure_reschedules_with_backoff(self, db_session: AsyncSession):
+        await self._seed_events(db_session, 2)
+        dispatcher = OutboxDispatcher(FailingSink(), TestSessionLocal, retry_base=60)
+
+        assert await dispatcher.dispatch_batch() == 0
+
+        async with TestSessionLocal() as session:
+            events = (await session.execute(select(OutboxEvent))).scalars().all()
+            assert [event.attempts for event in events] == [1, 1]
+            assert all(event.last_error == "ConnectionError: sink is down" for event in events)
+            assert all(event.available_at > event.created_at for event in events)
+            # до available_at события не выбираются
+            assert await OutboxRepository(session).claim(10, max_attempts=10) == []
+
+    async def test_exhausted_events_are_parked(self, db_session: AsyncSession):
+        await self._seed_events(db_session, 1)
+        dispatcher = OutboxDispatcher(FailingSink(), TestSessionLocal, max_attempts=2, retry_base=0)
+        dead_before = OUTBOX_DEAD.value()
+
+        await dispatcher.dispatch_batch()
+        await dispatcher.dispatch_batch()
+        await dispatcher.dispatch_batch()
+
+        async with TestSessionLocal() as session:
+            event = (await session.execute(select(OutboxEvent))).scalar_one()
+            assert event.attempts == 2
+        assert OUTBOX_DEAD.value() == dead_before + 1
+
+        # после ручного сброса попыток событие снова доставляется
+        await db_session.execute(update(OutboxEvent).values(attempts=0))
+        await db_session.commit()
+        assert await OutboxDispatcher(NullSink(), TestSessionLocal).dispatch_batch() == 1
+
+    async def test_slow_sink_does_not_block_requests(
+        self, client: AsyncClient, db_session: AsyncSession, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await self._seed_events(db_session, 1)
+        sink = BlockingSink()
+        dispatcher = OutboxDispatcher(sink, TestSessionLocal, poll_interval=0.01)
+        dispatcher.start()
+        await asyncio.wait_for(sink.started.wait(), 5)
+
+        # синк завис — а запросы продолжают выполняться и писать события
+        response = await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "Feature", "author_id": "u1"},
+        )
+        assert response.status_code == 201
+
+        sink.release.set()
+        await asyncio.sleep(0.1)
+        await dispatcher.stop()
+        assert await _count(db_session) == 0
+
+
+@requires_postgres
+class TestConcurrentClaim:
+    async def test_skip_locked_splits_backlog(self, db_session: AsyncSession):
+        await OutboxRepository(db_session).add([("test.event", {"n": i}) for i in range(10)])
+        await db_session.commit()
+
+        async with TestSessionLocal() as first, TestSessionLocal() as second:
+            claimed_first = await OutboxRepository(first).claim(6, max_attempts=10)
+            # строки первой пачки заблокированы — вторая сессия их пропускает
+            claimed_second = await OutboxRepository(second).claim(6, max_attempts=10)
+
+            first_ids = {event.id for event in claimed_first}
+            second_ids = {event.id for event in claimed_second}
+            assert len(first_ids) == 6
+            assert len(second_ids) == 4
+            assert not first_ids & second_ids
@@ -0,0 +1,199 @@
+"""
+Бюджеты SQL-запросов публичных методов сервисов
+
+Каждый публичный метод PullRequestService, TeamService и UserService объявляет
+@query_budget(n); здесь он вызывается на засеянной БД с холодным кэшем составов
+и не должен выполнить больше n запросов. Тест идёт на том же бэкенде, что и
+остальные (SQLite или TEST_DATABASE_URL).
+"""
+
+from collections.abc import Awaitable, Callable
+import inspect
+
+from httpx import AsyncClient
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.query_budget import (
+    QueryBudgetExceeded,
+    expect_max_queries,
+    get_query_budget,
+)
+from app.repositories.reviewer_repository import ReviewerRepository
+from app.repositories.team_repository import roster_cache
+from app.services.pr_service import PullRequestService
+from app.services.team_service import TeamService
+from app.services.user_service import UserService
+from tests.conftest import test_engine
+
+SERVICES = (PullRequestService, TeamService, UserService)
+
+# сценарий получает сессию, готовит данные вне подсчёта и возвращает измеряемый вызов
+Scenario = Callable[[AsyncSession], Awaitable[Callable[[], Awaitable[object]]]]
+
+
+async def _round_robin(db: AsyncSession, team_name: str = "backend") -> None:
+    # round-robin дороже всех: курсор читается под блокировкой и записывается
+    await TeamService(db).set_reviewer_strategy(team_name, "round_robin")
+    roster_cache.clear()
+
+
+async def _create_pr(db: AsyncSession):
+    await _round_robin(db)
+    return lambda: PullRequestService(db).create_pr("pr-new", "New", "u1")
+
+
+async def _create_batch(db: AsyncSession):
+    # худший случай: в пакете команды и с нагрузкой, и с курсором
+    await TeamService(db).add_team(
+        "other", [{"user_id": f"o{i}", "username": f"O{i}", "is_active": True} for i in range(3)]
+    )
+    await _round_robin(db, "other")
+    items = [(f"pr-batch-{i}", "Batch", f"u{i % 5 + 1}") for i in range(20)]
+    items += [(f"pr-other-{i}", "Batch", f"o{i % 3}") for i in range(5)]
+    return lambda: PullRequestService(db).create_batch([*items, ("pr-1", "Exists", "u1")])
+
+
+async def _merge_pr(db: AsyncSession):
+    return lambda: PullRequestService(db).merge_pr("pr-1")
+
+
+async def _reassign_reviewer(db: AsyncSession):
+    reviewers = await ReviewerRepository(db).get_reviewers_by_pr("pr-1")
+    old_user_id = reviewers[0].reviewer_id
+    await _round_robin(db)
+    return lambda: PullRequestService(db).reassign_reviewer("pr-1", old_user_id)
+
+
+async def _get_prs_by_reviewer(db: AsyncSession):
+    return lambda: PullRequestService(db).get_prs_by_reviewer("u2", limit=10)
+
+
+async def _get_reviewer_version(db: AsyncSession):
+    return lambda: PullRequestService(db).get_reviewer_version("u2")
+
+
+async def _get_team(db: AsyncSession):
+    return lambda: TeamService(db).get_team("backend")
+
+
+async def _get_team_version(db: AsyncSession):
+    return lambda: TeamService(db).get_team_version("backend")
+
+
+async def _add_team(db: AsyncSession):
+    members = [{"user_id": f"n{i}", "username": f"N{i}", "is_active": True} for i in range(5)]
+    return lambda: TeamService(db).add_team("new-team", members)
+
+
+async def _set_reviewer_strategy(db: AsyncSession):
+    return lambda: TeamService(db).set_reviewer_strategy("backend", "round_robin")
+
+
+async def _sync_team(db: AsyncSession):
+    # худший случай: переход из другой команды, изменения и деактивация ревьювера
+    await TeamService(db).add_team(
+        "other", [{"user_id": "o1", "username": "O1", "is_active": True}]
+    )
+    members = [
+        {"user_id": "u1", "username": "U1", "is_active": True},
+        {"user_id": "u2", "username": "U2", "is_active": False},
+        {"user_id": "u3", "username": "Renamed", "is_active": True},
+        {"user_id": "o1", "username": "O1", "is_active": True},
+    ]
+    return lambda: TeamService(db).sync_team("backend", members)
+
+
+async def _deactivate_users(db: AsyncSession):
+    return lambda: TeamService(db).deactivate_users("backend", ["u2"])
+
+
+async def _get_user(db: AsyncSession):
+    return lambda: UserService(db).get_user("u1")
+
+
+async def _set_is_active(db: AsyncSession):
+    return lambda: UserService(db).set_is_active("u4", False)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "PullRequestService.create_pr": _create_pr,
+    "PullRequestService.create_batch": _create_batch,
+    "PullRequestService.merge_pr": _merge_pr,
+    "PullRequestService.reassign_reviewer": _reassign_reviewer,
+    "PullRequestService.get_prs_by_reviewer": _get_prs_by_reviewer,
+    "PullRequestService.get_reviewer_version": _get_reviewer_version,
+    "TeamService.get_team": _get_team,
+    "TeamService.get_team_version": _get_team_version,
+    "TeamService.add_team": _add_team,
+    "TeamService.set_reviewer_strategy": _set_reviewer_strategy,
+    "TeamService.sync_team": _sync_team,
+    "TeamService.deactivate_users": _deactivate_users,
+    "UserService.get_user": _get_user,
+    "UserService.set_is_active": _set_is_active,
+}
+
+
+def _public_methods() -> dict[str, Callable]:
+    return {
+        f"{service.__name__}.{name}": method
+        for service in SERVICES
+        for name, method in inspect.getmembers(service, inspect.iscoroutinefunction)
+        if not name.startswith("_")
+    }
+
+
+@pytest.fixture
+async def seeded(client: AsyncClient) -> None:
+    await client.post(
+        "/team/add",
+        json={
+            "team_name": "backend",
+            "members": [
+                {"user_id": f"u{i}", "username": f"U{i}", "is_active": True} for i in range(1, 6)
+            ],
+        },
+    )
+    for i in range(1, 4):
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": f"pr-{i}", "pull_request_name": "PR", "author_id": "u1"},
+        )
+    await client.post("/pullRequest/merge", json={"pull_request_id": "pr-3"})
+    # бюджет рассчитан на худший случай — холодный кэш
+    roster_cache.clear()
+
+
+class TestQueryBudgets:
+    """
+    Публичные методы сервисов укладываются в объявленные бюджеты запросов
+    """
+
+    def test_every_public_method_declares_budget(self):
+        methods = _public_methods()
+        missing = [name for name, method in methods.items() if get_query_budget(method) is None]
+        assert not missing, f"declare @query_budget for: {missing}"
+        assert set(methods) == set(SCENARIOS), "add a scenario for every budgeted method"
+
+    @pytest.mark.parametrize("name", sorted(SCENARIOS))
+    async def test_method_within_budget(self, name: str, seeded, db_session: AsyncSession):
+        budget = get_query_budget(_public_methods()[name])
+        call = await SCENARIOS[name](db_session)
+
+        with expect_max_queries(test_engine, budget, label=name) as counter:
+            await call()
+
+        assert counter.count > 0
+
+    async def test_budget_exceeded_lists_statements(self, db_session: AsyncSession):
+        with (
+            pytest.raises(QueryBudgetExceeded) as exc_info,
+            expect_max_queries(test_engine, 1, label="two selects"),
+        ):
+            await UserService(db_session).get_user("a")
+            await UserService(db_session).get_user("b")
+
+        message = str(exc_info.value)
+        assert message.startswith("two selects: 2 statements, budget 1")
+        # запрос сверх бюджета помечен "+"
+        assert "\n+  2 SELECT" in message
@@ -0,0 +1,180 @@
+"""
+Интеграционные тесты GET /users/reviewStream (Server-Sent Events)
+
+httpx ASGITransport отдаёт тело ответа только целиком, поэтому бесконечный
+поток читается прямым вызовом ASGI-приложения: сообщения http.response.body
+приходят по мере отправки, отключение клиента — сообщение http.disconnect.
+"""
+
+import asyncio
+
+from httpx import AsyncClient
+import orjson
+
+from app.main import app
+from app.services.review_feed import review_hub
+
+
+def _parse(chunk: bytes) -> list[tuple[str, dict]]:
+    events = []
+    for message in chunk.decode().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], orjson.loads(lines["data"])))
+    return events
+
+
+class StreamClient:
+    """
+    Reads an SSE response chunk by chunk until disconnect() is called
+    """
+
+    def __init__(self, path: str, query: str):
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [(b"host", b"test")],
+            "server": ("test", 80),
+            "client": ("127.0.0.1", 1),
+        }
+        self.start: dict | None = None
+        self.events: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        self._request_sent = False
+        self._disconnected = asyncio.Event()
+        self.task = asyncio.create_task(app(self.scope, self._receive, self._send))
+
+    async def _receive(self) -> dict:
+        if not self._request_sent:
+            self._request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+        elif message["type"] == "http.response.body":
+            for event in _parse(message.get("body", b"")):
+                self.events.put_nowait(event)
+
+    async def next_event(self) -> tuple[str, dict]:
+        return await asyncio.wait_for(self.events.get(), 5)
+
+    async def disconnect(self) -> None:
+        self._disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+class TestReviewStream:
+    async def test_snapshot_then_assignment_deltas(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "First", "author_id": "u1"},
+        )
+
+        stream = StreamClient("/users/reviewStream", "user_id=u2")
+        event, snapshot = await stream.next_event()
+
+        headers = dict(stream.start["headers"])
+        assert headers[b"content-type"].startswith(b"text/event-stream")
+        assert headers[b"cache-control"] == b"no-cache"
+        assert event == "snapshot"
+        assert snapshot["user_id"] == "u2"
+        assert [pr["pull_request_id"] for pr in snapshot["pull_requests"]] == ["pr-1"]
+
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-2", "pull_request_name": "Second", "author_id": "u1"},
+        )
+        assert await stream.next_event() == (
+            "assigned",
+            {
+                "pull_request_id": "pr-2",
+                "pull_request_name": "Second",
+                "author_id": "u1",
+                "status": "OPEN",
+            },
+        )
+
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+        assert await stream.next_event() == (
+            "merged",
+            {"pull_request_id": "pr-1", "status": "MERGED"},
+        )
+
+        await stream.disconnect()
+        assert not review_hub.has_subscribers("u2")
+
+    async def test_reassign_notifies_both_reviewers(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        sample_team_data["members"].append({"user_id": "u4", "username": "Dan", "is_active": True})
+        await client.post("/team/add", json=sample_team_data)
+        response = await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "First", "author_id": "u1"},
+        )
+        old_id = response.json()["pr"]["assigned_reviewers"][0]
+        old_stream = StreamClient("/users/reviewStream", f"user_id={old_id}")
+        await old_stream.next_event()
+        # новый ревьювер заранее неизвестен — слушаем всех остальных
+        others = {
+            user_id: review_hub.subscribe(user_id)
+            for user_id in ("u2", "u3", "u4")
+            if user_id != old_id
+        }
+
+        response = await client.post(
+            "/pullRequest/reassign", json={"pull_request_id": "pr-1", "old_user_id": old_id}
+        )
+        new_id = response.json()["replaced_by"]
+
+        assert await old_stream.next_event() == ("unassigned", {"pull_request_id": "pr-1"})
+        event, data = await others[new_id].get()
+        assert (event, data["pull_request_id"], data["author_id"]) == ("assigned", "pr-1", "u1")
+
+        await old_stream.disconnect()
+        for subscription in others.values():
+            subscription.close()
+
+    async def test_deactivation_publishes_unassigned(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        await client.post(
+            "/pullRequest/create",
+            json={"pull_request_id": "pr-1", "pull_request_name": "First", "author_id": "u1"},
+        )
+        subscription = review_hub.subscribe("u2")
+
+        await client.post(
+            "/team/deactivateUsers", json={"team_name": "backend", "user_ids": ["u2"]}
+        )
+
+        assert await subscription.get() == ("unassigned", {"pull_request_id": "pr-1"})
+        subscription.close()
+
+    async def test_failed_request_publishes_nothing(
+        self, client: AsyncClient, sample_team_data: dict
+    ):
+        await client.post("/team/add", json=sample_team_data)
+        pr = {"pull_request_id": "pr-1", "pull_request_name": "First", "author_id": "u1"}
+        await client.post("/pullRequest/create", json=pr)
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+        subscription = review_hub.subscribe("u2")
+
+        # 409 и повторный merge ничего не меняют — и ничего не публикуют
+        await client.post("/pullRequest/create", json=pr)
+        await client.post("/pullRequest/merge", json={"pull_request_id": "pr-1"})
+
+        assert subscription.queue.empty()
+        subscription.close()
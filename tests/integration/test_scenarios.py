@@ -273,3 +273,101 @@ class TestEdgeCases:
         # и m2 может быть ревьювером в pr1
         assert len(pr1["assigned_reviewers"]) == 2
         assert len(pr2["assigned_reviewers"]) == 2
+
+
+class TestLoadBalancing:
+    """
+    Выбор ревьюверов с наименьшим количеством открытых назначений
+    """
+
+    async def test_least_loaded_reviewers_picked_first(self, client: AsyncClient):
+        """
+        - Команда из 4 человек, все PR от одного автора
+        - Второй PR обязательно достаётся тому, кто не получил первый
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "balanced",
+                "members": [
+                    {"user_id": "l1", "username": "Lead", "is_active": True},
+                    {"user_id": "l2", "username": "Two", "is_active": True},
+                    {"user_id": "l3", "username": "Three", "is_active": True},
+                    {"user_id": "l4", "username": "Four", "is_active": True},
+                ],
+            },
+        )
+
+        pr1 = (
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": "pr-lb-1", "pull_request_name": "1", "author_id": "l1"},
+            )
+        ).json()["pr"]
+        pr2 = (
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": "pr-lb-2", "pull_request_name": "2", "author_id": "l1"},
+            )
+        ).json()["pr"]
+
+        # свободный после первого PR участник обязан попасть во второй
+        (idle,) = {"l2", "l3", "l4"} - set(pr1["assigned_reviewers"])
+        assert idle in pr2["assigned_reviewers"]
+
+    async def test_merged_prs_do_not_count_as_load(self, client: AsyncClient):
+        """
+        - Нагрузка считается только по OPEN PR
+        - У mb2 много смердженных ревью, у mb3 — одно открытое: выбирается mb2
+        """
+        await client.post(
+            "/team/add",
+            json={
+                "team_name": "merged_load",
+                "members": [
+                    {"user_id": "mb1", "username": "Author", "is_active": True},
+                    {"user_id": "mb2", "username": "Two", "is_active": True},
+                    {"user_id": "mb3", "username": "Three", "is_active": False},
+                    {"user_id": "mb4", "username": "Four", "is_active": True},
+                ],
+            },
+        )
+        # mb2 и mb4 ревьюят 3 PR, которые затем мерджатся
+        for i in range(3):
+            pr_id = f"pr-mb-merged-{i}"
+            await client.post(
+                "/pullRequest/create",
+                json={"pull_request_id": pr_id, "pull_request_name": "m", "author_id": "mb1"},
+            )
+            await client.post("/pullRequest/merge", json={"pull_request_id": pr_id})
+
+        # mb3 получает один открытый PR
+        await client.post("/users/setIsActive", json={"user_id": "mb3", "is_active": True})
+        await client.post("/users/setIsActive", json={"user_id": "mb4", "is_active": False})
+        await client.post("/users/setIsActive", json={"user_id": "mb2", "is_active": False})
+        opened = (
+            await client.post(
+                "/pullRequest/create",
+                json={
+                    "pull_request_id": "pr-mb-open",
+                    "pull_request_name": "o",
+                    "author_id": "mb1",
+                },
+            )
+        ).json()["pr"]
+        assert opened["assigned_reviewers"] == ["mb3"]
+
+        # mb2 снова активен: 0 открытых против 1 открытого у mb3
+        await client.post("/users/setIsActive", json={"user_id": "mb2", "is_active": True})
+        pr = (
+            await client.post(
+                "/pullRequest/create",
+                json={
+                    "pull_request_id": "pr-mb-next",
+                    "pull_request_name": "n",
+                    "author_id": "mb4",
+                },
+            )
+        ).json()["pr"]
+        # mb4 — автор; кандидаты mb1 (0 открытых), mb2 (0), mb3 (1) — mb3 не выбран
+        assert sorted(pr["assigned_reviewers"]) == ["mb1", "mb2"]
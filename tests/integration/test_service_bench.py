@@ -0,0 +1,100 @@
+"""
+Интеграционный тест бенчмарков сервисного слоя (app.bench.service, app.bench.deactivate,
+app.bench.latency)
+
+Прогоняется на том же бэкенде, что и остальные тесты (SQLite или TEST_DATABASE_URL)
+"""
+
+import json
+
+from app.bench.deactivate import run as run_deactivate
+from app.bench.latency import run as run_latency
+from app.bench.service import (
+    BENCHMARKS,
+    MEMORY_URL,
+    backend_name,
+    find_regressions,
+    main,
+    run_suite,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+
+class TestServiceBench:
+    """
+    Маленький прогон всех бенчмарков и сравнение с baseline
+    """
+
+    async def test_run_suite_small_scale(self):
+        results = await run_suite(TEST_DATABASE_URL, scales=[40], repeat=3, warmup=1)
+
+        backend = backend_name(TEST_DATABASE_URL)
+        assert set(results) == {f"{backend}/40/{name}" for name in BENCHMARKS}
+        for result in results.values():
+            assert result["n"] == 3
+            assert 0 < result["min_ms"] <= result["median_ms"] <= result["p95_ms"]
+
+    def test_find_regressions(self):
+        baseline = {
+            "sqlite/200/create_pr": {"median_ms": 10.0},
+            "sqlite/200/get_stats": {"median_ms": 0.2},
+            "sqlite/200/merge_pr": {"median_ms": 5.0},
+        }
+        results = {
+            # в 2 раза медленнее — регрессия
+            "sqlite/200/create_pr": {"median_ms": 20.0},
+            # в 2 раза, но на 0.2 мс — шум
+            "sqlite/200/get_stats": {"median_ms": 0.4},
+            "sqlite/200/merge_pr": {"median_ms": 5.5},
+            # нет в baseline — не сравнивается
+            "sqlite/200/add_team": {"median_ms": 100.0},
+        }
+
+        regressions = find_regressions(results, baseline, threshold=1.25)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("sqlite/200/create_pr")
+
+    def test_plain_run_does_not_touch_baseline(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        args = ["--database-url", MEMORY_URL, "--scales", "20", "--repeat", "2", "--warmup", "0"]
+
+        # сравнивать не с чем — прогон падает, а не сообщает «нет регрессий»
+        assert main([*args, "--baseline", str(baseline)]) == 2
+        assert not baseline.exists()
+
+        assert main([*args, "--baseline", str(baseline), "--update-baseline"]) == 0
+        written = baseline.read_text()
+        assert set(json.loads(written)) == {f"memory/20/{name}" for name in BENCHMARKS}
+
+        assert main([*args, "--baseline", str(baseline), "--threshold", "1000"]) == 0
+        assert baseline.read_text() == written
+
+
+class TestLatencyBench:
+    """
+    Маленький прогон бенчмарка /stats/latency (app.bench.latency)
+    """
+
+    async def test_run_small_seed(self):
+        results = await run_latency(TEST_DATABASE_URL, prs=300, repeat=2)
+
+        backend = backend_name(TEST_DATABASE_URL)
+        assert results[f"{backend}/seed"]["prs"] == 300
+        for bucket, scope in (("day", "all"), ("day", "team"), ("hour", "all"), ("hour", "team")):
+            result = results[f"{backend}/{bucket}/{scope}"]
+            assert result["buckets"] == (30 if bucket == "day" else 48)
+            assert result["warm"]["median_ms"] <= result["cold"]["median_ms"]
+
+
+class TestDeactivateBench:
+    """
+    Прогон бенчмарка массовой деактивации (app.bench.deactivate) без порога по времени
+    """
+
+    async def test_run(self):
+        result = await run_deactivate(TEST_DATABASE_URL, repeat=1)
+
+        assert result["n"] == 1
+        assert result["reassignments"] > 100
+        assert 0 < result["median_ms"] <= result["max_ms"]
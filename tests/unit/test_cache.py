@@ -0,0 +1,62 @@
+"""
+Unit тесты для LRUCache
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import LRUCache
+
+
+class TestLRUCache:
+    """
+    Тесты LRUCache
+    """
+
+    def test_hit_and_miss_counters(self):
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 0}
+
+    def test_size_bound_evicts_least_recently_used(self):
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # обращение к "a" делает самым старым "b"
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+
+    def test_ttl_expires_entries(self):
+        cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10)
+        with patch("app.core.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("app.core.cache.time.monotonic", return_value=109.0):
+            assert cache.get("a") == 1
+        with patch("app.core.cache.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_set_with_stale_token_is_ignored(self):
+        """
+        Значение, загруженное до инвалидации, не попадает в кэш после неё
+        """
+        cache: LRUCache[str, int] = LRUCache(maxsize=2)
+        token = cache.token()
+        cache.invalidate("a")
+        cache.set("a", 1, token=token)
+
+        assert cache.get("a") is None
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
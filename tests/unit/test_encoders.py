@@ -0,0 +1,222 @@
+"""
+Unit тесты быстрых JSON-ответов (app.schemas.encoders)
+
+Байты JSONBytesResponse сравниваются с прежним путём FastAPI: валидация и
+сериализация через response_model маршрута и JSONResponse.
+"""
+
+import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+import pytest
+
+from app.bench.serialization import make_rows, run
+from app.main import app
+from app.models.models import PRStatus, PullRequest, PullRequestReviewer, Team, User
+from app.repositories.team_repository import Roster, RosterMember
+from app.schemas.encoders import (
+    JSONBytesResponse,
+    encode_pr,
+    encode_pr_shorts,
+    encode_team,
+    encode_user,
+)
+from app.schemas.schemas import (
+    PullRequestSchema,
+    PullRequestShort,
+    Team as TeamSchema,
+    User as UserSchema,
+)
+
+
+def _route(path: str) -> APIRoute:
+    return next(r for r in app.routes if isinstance(r, APIRoute) and r.path == path)
+
+
+async def _pydantic_bytes(path: str, content) -> bytes:
+    field = _route(path).response_field
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+def _pr(merged_at: datetime.datetime | None) -> PullRequest:
+    pr = PullRequest(
+        pull_request_id="pr-1",
+        pull_request_name="Поиск",
+        author_id="u1",
+        status=PRStatus.MERGED if merged_at else PRStatus.OPEN,
+        createdAt=datetime.datetime(2025, 11, 20, 10, 0, 0, 123456, tzinfo=datetime.UTC),
+        mergedAt=merged_at,
+    )
+    pr.reviewers = [
+        PullRequestReviewer(pull_request_id="pr-1", reviewer_id="u2"),
+        PullRequestReviewer(pull_request_id="pr-1", reviewer_id="u3"),
+    ]
+    return pr
+
+
+class TestEncoders:
+    """
+    Кодировщики повторяют схемы Pydantic байт в байт
+    """
+
+    @pytest.mark.parametrize(
+        "merged_at",
+        [
+            None,
+            datetime.datetime(2025, 11, 21, tzinfo=datetime.UTC),
+            # SQLite возвращает datetime без tzinfo
+            datetime.datetime(2025, 11, 21, 8, 30),
+            datetime.datetime(2025, 11, 21, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+        ],
+    )
+    async def test_pr_matches_response_model(self, merged_at):
+        pr = _pr(merged_at)
+
+        fast = JSONBytesResponse({"pr": encode_pr(pr), "replaced_by": "u4"}).body
+        slow = await _pydantic_bytes(
+            "/pullRequest/reassign",
+            {"pr": PullRequestSchema.model_validate(encode_pr(pr)), "replaced_by": "u4"},
+        )
+
+        assert fast == slow
+
+    async def test_team_matches_response_model(self):
+        team = Team(team_name="backend")
+        team.members = [
+            User(user_id="u1", username="Алиса", is_active=True, team_name="backend"),
+            User(user_id="u2", username='Bob "B"', is_active=False, team_name="backend"),
+        ]
+        roster = Roster.from_members(
+            "backend", [RosterMember(m.user_id, m.username, m.is_active) for m in team.members]
+        )
+
+        for source in (team, roster):
+            fast = JSONBytesResponse(encode_team(source)).body
+            slow = await _pydantic_bytes(
+                "/team/get", TeamSchema.model_validate(encode_team(source))
+            )
+            assert fast == slow
+
+    async def test_user_matches_response_model(self):
+        user = User(user_id="u1", username="Alice", is_active=False, team_name="backend")
+
+        fast = JSONBytesResponse({"user": encode_user(user)}).body
+        slow = await _pydantic_bytes(
+            "/users/setIsActive", {"user": UserSchema.model_validate(user, from_attributes=True)}
+        )
+
+        assert fast == slow
+
+    async def test_review_list_matches_response_model(self):
+        rows = make_rows(5)
+        content = {"user_id": "u1", "pull_requests": encode_pr_shorts(rows), "next_cursor": "c"}
+
+        fast = JSONBytesResponse(content).body
+        slow = await _pydantic_bytes("/users/getReview", content)
+
+        assert fast == slow
+
+    async def test_stats_matches_response_model(self):
+        content = {
+            "total_prs": 3,
+            "total_reviews": 5,
+            "prs_by_status": [
+                {"status": PRStatus.OPEN.value, "count": 2},
+                {"status": PRStatus.MERGED.value, "count": 1},
+            ],
+            "top_reviewers": [{"user_id": "u2", "review_count": 3}],
+        }
+
+        fast = JSONBytesResponse(content).body
+        slow = await _pydantic_bytes("/stats", content)
+
+        assert fast == slow
+
+    async def test_stats_report_matches_response_model(self):
+        counts = {"created": 4, "merged": 1, "open": 3}
+        content = {
+            "from": datetime.datetime(2025, 11, 1, tzinfo=datetime.UTC),
+            "to": None,
+            "team_name": None,
+            "total": counts,
+            "teams": [{"team_name": "backend", **counts}, {"team_name": None, **counts}],
+            "users": [{"user_id": "u2", "team_name": "backend", **counts}],
+        }
+
+        fast = JSONBytesResponse(content).body
+        slow = await _pydantic_bytes("/stats", content)
+
+        assert fast == slow
+
+    async def test_latency_matches_response_model(self):
+        start = datetime.datetime(2025, 11, 20, 10, tzinfo=datetime.UTC)
+        content = {
+            "bucket": "hour",
+            "from": start,
+            "to": start + datetime.timedelta(hours=2, microseconds=5),
+            "team_name": "backend",
+            "time_to_merge": {"merged": 3, "p50": 3600.0, "p90": 5184.125, "p99": None},
+            "series": [
+                {"bucket_start": start, "created": 2, "merged": 1},
+                {"bucket_start": start + datetime.timedelta(hours=1), "created": 0, "merged": 0},
+            ],
+        }
+
+        fast = JSONBytesResponse(content).body
+        slow = await _pydantic_bytes("/stats/latency", content)
+
+        assert fast == slow
+
+    async def test_reviewer_strategy_matches_response_model(self):
+        content = {"team_name": "backend", "reviewer_strategy": "least_loaded"}
+
+        fast = JSONBytesResponse(content).body
+        slow = await _pydantic_bytes("/team/setReviewerStrategy", content)
+
+        assert fast == slow
+
+    @pytest.mark.parametrize(
+        ("encoded", "schema"),
+        [
+            (encode_pr(_pr(None)), PullRequestSchema),
+            (encode_pr_shorts(make_rows(1))[0], PullRequestShort),
+            (
+                encode_user(User(user_id="u", username="U", is_active=True, team_name="t")),
+                UserSchema,
+            ),
+            (encode_team(Roster.from_members("t", [])), TeamSchema),
+        ],
+    )
+    def test_fields_follow_schema(self, encoded: dict, schema):
+        # новое поле схемы должно попасть и в кодировщик
+        assert list(encoded) == list(schema.model_fields)
+
+    def test_fast_routes_keep_response_model(self):
+        for path in (
+            "/pullRequest/create",
+            "/pullRequest/createBatch",
+            "/pullRequest/merge",
+            "/pullRequest/reassign",
+            "/team/add",
+            "/team/sync",
+            "/team/get",
+            "/team/deactivateUsers",
+            "/team/setReviewerStrategy",
+            "/users/setIsActive",
+            "/users/getReview",
+            "/stats",
+            "/stats/latency",
+        ):
+            assert _route(path).response_model is not None, path
+
+
+class TestSerializationBench:
+    async def test_bench_reports_both_paths(self):
+        results = await run([100, 400], repeat=2)
+
+        assert set(results) == {100, 400}
+        for result in results.values():
+            assert result["bytes"] > 0
+            assert result["pydantic_us"] > 0
+            assert result["orjson_us"] > 0
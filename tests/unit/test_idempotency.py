@@ -0,0 +1,138 @@
+"""
+Unit тесты IdempotencyMiddleware на минимальном ASGI-приложении
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from app.core.cache import LRUCache
+from app.core.idempotency import MAX_KEY_LENGTH, IdempotencyMiddleware
+
+
+class CountingApp:
+    """
+    ASGI app answering with the call number; status and delay are configurable
+    """
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        while (await receive()).get("more_body"):
+            pass
+        await asyncio.sleep(self.delay)
+        await send({"type": "http.response.start", "status": self.status, "headers": []})
+        await send({"type": "http.response.body", "body": str(self.calls).encode()})
+
+
+def _client(app, ttl: float | None = None) -> tuple[AsyncClient, LRUCache]:
+    cache = LRUCache(maxsize=2, ttl=ttl)
+    middleware = IdempotencyMiddleware(app, cache=cache)
+    return AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test"), cache
+
+
+class TestIdempotencyMiddleware:
+    async def test_replay_without_calling_app(self):
+        app = CountingApp()
+        client, _ = _client(app)
+
+        responses = [
+            await client.post("/x", content=b"a", headers={"Idempotency-Key": "k"})
+            for _ in range(3)
+        ]
+
+        assert app.calls == 1
+        assert [r.text for r in responses] == ["1", "1", "1"]
+
+    @pytest.mark.parametrize(
+        ("params", "headers"),
+        [({"format": "ndjson"}, {}), ({}, {"Content-Type": "text/plain"})],
+    )
+    async def test_query_and_content_type_are_part_of_request(self, params, headers):
+        app = CountingApp()
+        client, _ = _client(app)
+        key = {"Idempotency-Key": "k"}
+
+        first = await client.post(
+            "/x",
+            params={"format": "csv"},
+            content=b"a",
+            headers={**key, "Content-Type": "text/csv"},
+        )
+        other = await client.post(
+            "/x",
+            params=params or {"format": "csv"},
+            content=b"a",
+            headers={**key, "Content-Type": "text/csv", **headers},
+        )
+
+        assert first.status_code == 200
+        assert other.status_code == 422
+        assert other.json()["detail"]["error"]["code"] == "IDEMPOTENCY_KEY_REUSED"
+        assert app.calls == 1
+
+    async def test_without_key_or_for_get_not_cached(self):
+        app = CountingApp()
+        client, cache = _client(app)
+
+        await client.post("/x")
+        await client.post("/x")
+        await client.get("/x", headers={"Idempotency-Key": "k"})
+
+        assert app.calls == 3
+        assert len(cache) == 0
+
+    async def test_server_error_not_stored(self):
+        app = CountingApp(status=503)
+        client, _ = _client(app)
+
+        for _ in range(2):
+            await client.post("/x", headers={"Idempotency-Key": "k"})
+
+        assert app.calls == 2
+
+    @pytest.mark.parametrize("key", ["", " ", "k" * (MAX_KEY_LENGTH + 1)])
+    async def test_invalid_key(self, key: str):
+        app = CountingApp()
+        client, _ = _client(app)
+
+        response = await client.post("/x", headers={"Idempotency-Key": key})
+
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"]["code"] == "INVALID_IDEMPOTENCY_KEY"
+        assert app.calls == 0
+
+    async def test_concurrent_duplicate_gets_409(self):
+        app = CountingApp(delay=0.05)
+        client, _ = _client(app)
+        headers = {"Idempotency-Key": "k"}
+
+        first, second = await asyncio.gather(
+            client.post("/x", headers=headers), client.post("/x", headers=headers)
+        )
+
+        assert sorted([first.status_code, second.status_code]) == [200, 409]
+        assert app.calls == 1
+        # после завершения первого повтор получает его ответ
+        assert (await client.post("/x", headers=headers)).text == "1"
+
+    async def test_bounded_and_ttl_evicted(self):
+        app = CountingApp()
+        client, cache = _client(app, ttl=60)
+
+        with patch("app.core.cache.time.monotonic", return_value=100.0):
+            for key in ("a", "b", "c"):
+                await client.post("/x", headers={"Idempotency-Key": key})
+            assert len(cache) == 2
+            # "a" вытеснен — выполняется заново
+            assert (await client.post("/x", headers={"Idempotency-Key": "a"})).text == "4"
+            assert (await client.post("/x", headers={"Idempotency-Key": "a"})).text == "4"
+
+        with patch("app.core.cache.time.monotonic", return_value=161.0):
+            assert (await client.post("/x", headers={"Idempotency-Key": "a"})).text == "5"
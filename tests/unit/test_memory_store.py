@@ -0,0 +1,210 @@
+"""
+Unit тесты бэкенда в памяти: индексы, транзакции, журнал
+"""
+
+import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models.models import PRStatus
+from app.repositories.backend import get_repositories
+from app.repositories.memory_repository import MemoryPRRepository
+from app.repositories.memory_store import MemorySession, MemoryStore
+from app.repositories.stats_repository import TOTAL_PRS, status_counter
+from app.services.pr_service import PullRequestService
+from app.services.team_service import TeamService
+
+
+def _state(store: MemoryStore) -> tuple:
+    return (
+        dict(store.users),
+        {team: dict(members) for team, members in store.team_members.items()},
+        {team: list(active) for team, active in store.team_active.items()},
+        {pr_id: (pr.status, pr.mergedAt, list(pr.reviewers)) for pr_id, pr in store.prs.items()},
+        {reviewer_id: set(prs) for reviewer_id, prs in store.reviewer_prs.items()},
+        dict(store.open_load),
+        dict(store.counters),
+        {k: v for k, v in store.reviewer_counts.items() if v},
+        {count: set(ids) for count, ids in store.reviewers_by_count.items()},
+        {k: v for k, v in store.versions.items() if v},
+        dict(store.team_strategy),
+        dict(store.rr_cursors),
+    )
+
+
+async def _seed(store: MemoryStore) -> None:
+    async with MemorySession(store) as db:
+        await TeamService(db).add_team(
+            "backend",
+            [
+                {"user_id": f"u{i}", "username": f"User {i}", "is_active": i != 5}
+                for i in range(1, 6)
+            ],
+        )
+        service = PullRequestService(db)
+        for i in range(4):
+            await service.create_pr(f"pr-{i}", f"PR {i}", "u1")
+
+
+class TestIndexes:
+    async def test_indexes_follow_writes(self):
+        store = MemoryStore()
+        await _seed(store)
+
+        assert list(store.team_active["backend"]) == ["u1", "u2", "u3", "u4"]
+        # 4 PR по 2 ревьювера из u2..u4 (u5 неактивен, u1 автор)
+        assert sum(store.open_load.values()) == 8
+        assert set(store.open_load) <= {"u2", "u3", "u4"}
+        assert store.counters[TOTAL_PRS] == 4
+
+        async with MemorySession(store) as db:
+            await PullRequestService(db).merge_pr("pr-0")
+        merged_reviewers = [r.reviewer_id for r in store.prs["pr-0"].reviewers]
+        assert sum(store.open_load.values()) == 6
+        assert all("pr-0" in store.reviewer_prs[r] for r in merged_reviewers)
+        assert store.counters[status_counter(PRStatus.MERGED)] == 1
+
+        counters, reviewers = store.compute_live()
+        assert {k: v for k, v in store.counters.items() if v} == {
+            k: v for k, v in counters.items() if v
+        }
+        assert {k: v for k, v in store.reviewer_counts.items() if v} == reviewers
+
+    async def test_deactivation_updates_active_index(self):
+        store = MemoryStore()
+        await _seed(store)
+
+        async with MemorySession(store) as db:
+            await TeamService(db).deactivate_users("backend", ["u2"])
+
+        assert "u2" not in store.team_active["backend"]
+        assert "u2" in store.team_members["backend"]
+        assert "u2" not in store.open_load
+
+    async def test_prs_by_reviewer_keyset_order(self):
+        store = MemoryStore()
+        await _seed(store)
+        reviewer_id = next(iter(store.open_load))
+        repo = get_repositories(MemorySession(store)).reviewer
+
+        rows = await repo.get_prs_by_reviewer(reviewer_id)
+        first = await repo.get_prs_by_reviewer(reviewer_id, limit=1)
+        rest = await repo.get_prs_by_reviewer(
+            reviewer_id, after=(first[0].createdAt, first[0].pull_request_id)
+        )
+
+        keys = [(r.createdAt, r.pull_request_id) for r in rows]
+        assert keys == sorted(keys)
+        assert first + rest == rows
+
+    async def test_top_reviewers_by_count_then_id(self):
+        store = MemoryStore()
+        async with MemorySession(store) as db:
+            await get_repositories(db).stats.apply({}, {"b": 2, "a": 2, "c": 5, "d": 1})
+            await db.commit()
+            top = await get_repositories(db).stats.get_top_reviewers(3)
+
+        assert top == [("c", 5), ("a", 2), ("b", 2)]
+
+
+class TestTransactions:
+    async def test_rollback_restores_state(self):
+        store = MemoryStore()
+        await _seed(store)
+        before = _state(store)
+
+        async with MemorySession(store) as db:
+            service = PullRequestService(db)
+            await service.pr_repo.create_pr_with_reviewers("pr-x", "x", "u2", ["u3", "u4"])
+            pr = await service.pr_repo.get_pr("pr-1", for_update=True)
+            pr.status = PRStatus.MERGED
+            await get_repositories(db).user.deactivate_users("backend")
+            await get_repositories(db).stats.apply({TOTAL_PRS: 1}, {"u3": 1})
+            # выход без commit — откат
+        assert _state(store) == before
+
+    async def test_for_update_copy_written_on_commit(self):
+        store = MemoryStore()
+        await _seed(store)
+
+        async with MemorySession(store) as db:
+            pr = await MemoryPRRepository(db).get_pr("pr-1", for_update=True)
+            pr.status = PRStatus.MERGED
+            pr.mergedAt = datetime.datetime.now(datetime.UTC)
+            assert store.prs["pr-1"].status == PRStatus.OPEN
+            await db.commit()
+
+        assert store.prs["pr-1"].status == PRStatus.MERGED
+        assert store.prs["pr-1"].mergedAt is not None
+        # ревью смерженного PR больше не считаются нагрузкой
+        assert sum(store.open_load.values()) == 6
+
+    async def test_for_update_copy_discarded_on_rollback(self):
+        store = MemoryStore()
+        await _seed(store)
+
+        async with MemorySession(store) as db:
+            pr = await MemoryPRRepository(db).get_pr("pr-1", for_update=True)
+            pr.status = PRStatus.MERGED
+            await db.rollback()
+            await db.commit()
+
+        assert store.prs["pr-1"].status == PRStatus.OPEN
+        assert sum(store.open_load.values()) == 8
+
+    async def test_integrity_errors_before_any_write(self):
+        store = MemoryStore()
+        await _seed(store)
+        before = _state(store)
+
+        async with MemorySession(store) as db:
+            repo = MemoryPRRepository(db)
+            with pytest.raises(IntegrityError):
+                await repo.create_prs_with_reviewers(
+                    [("pr-new", "n", "u1", []), ("pr-0", "dup", "u1", [])]
+                )
+            with pytest.raises(IntegrityError):
+                await repo.create_pr_with_reviewers("pr-y", "y", "nobody", [])
+            with pytest.raises(IntegrityError):
+                await TeamService(db).add_team("backend", [])
+            assert _state(store) == before
+
+
+class TestSnapshot:
+    async def test_replay_restores_state(self, tmp_path: Path):
+        path = tmp_path / "store.log"
+        store = MemoryStore(path)
+        await _seed(store)
+        async with MemorySession(store) as db:
+            await TeamService(db).set_reviewer_strategy("backend", "round_robin")
+            await PullRequestService(db).merge_pr("pr-2")
+            await PullRequestService(db).reassign_reviewer(
+                "pr-3", store.prs["pr-3"].reviewers[0].reviewer_id
+            )
+            await TeamService(db).deactivate_users("backend", ["u4"])
+        store.snapshot.close()
+
+        restored = MemoryStore(path)
+
+        assert _state(restored) == _state(store)
+        # при загрузке журнал сжат до одной транзакции
+        assert len(path.read_bytes().splitlines()) == 1
+
+    async def test_uncommitted_not_logged_and_torn_line_dropped(self, tmp_path: Path):
+        path = tmp_path / "store.log"
+        store = MemoryStore(path)
+        await _seed(store)
+        async with MemorySession(store) as db:
+            await get_repositories(db).team.upsert_teams(["not-committed"])
+        store.snapshot.close()
+        # запись последней транзакции оборвалась
+        with path.open("ab") as f:
+            f.write(b'[["team","torn"]')
+
+        restored = MemoryStore(path)
+
+        assert "not-committed" not in restored.team_members
+        assert "torn" not in restored.team_members
+        assert _state(restored) == _state(store)
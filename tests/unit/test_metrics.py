@@ -0,0 +1,92 @@
+"""
+Unit тесты для метрик в формате Prometheus
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import metrics
+from app.core.metrics import (
+    DB_POOL_CHECKOUT,
+    DB_POOL_WAITING,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    pool_checkout,
+)
+
+
+class TestMetrics:
+    """
+    Тесты Counter / Gauge / Histogram и текстового формата
+    """
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 0.5))
+        for value in (0.05, 0.2, 0.3, 2.0):
+            histogram.observe(value, route="/a")
+
+        lines = histogram.render()
+
+        assert lines == [
+            'latency_seconds_bucket{route="/a",le="0.1"} 1',
+            'latency_seconds_bucket{route="/a",le="0.5"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 2.55',
+            'latency_seconds_count{route="/a"} 4',
+        ]
+        assert histogram.count(route="/a") == 4
+
+    def test_labels_must_match(self):
+        counter = Counter("requests_total", "Requests", ("route",))
+        with pytest.raises(ValueError):
+            counter.inc(status="200")
+
+    def test_registry_render(self):
+        registry = Registry()
+        gauge = registry.register(Gauge("in_flight", "In flight"))
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        counter = registry.register(Counter("errors_total", "Errors", ("code",)))
+        counter.inc(code='bad"quote')
+        registry.add_collector(lambda: [("pool_size", "gauge", "Pool", [({}, 5.0)])])
+
+        text = registry.render()
+
+        assert "# TYPE in_flight gauge\nin_flight 1\n" in text
+        assert 'errors_total{code="bad\\"quote"} 1' in text
+        assert "# HELP pool_size Pool\n# TYPE pool_size gauge\npool_size 5\n" in text
+
+
+class TestPoolMetrics:
+    """
+    Состояние пула соединений и ожидание соединения
+    """
+
+    async def test_overflow_is_not_negative_below_capacity(self, monkeypatch):
+        engine = create_async_engine(
+            "postgresql+asyncpg://user@localhost/db", pool_size=5, max_overflow=10
+        )
+        monkeypatch.setattr(metrics, "_pool_engine", engine)
+        try:
+            families = {name: samples for name, _, _, samples in metrics._collect_pool()}
+        finally:
+            await engine.dispose()
+
+        # QueuePool.overflow() здесь -5
+        assert families["db_pool_overflow"] == [({}, 0.0)]
+        assert families["db_pool_size"] == [({}, 5.0)]
+        assert families["db_pool_checked_out"] == [({}, 0.0)]
+
+    def test_pool_checkout_counts_waiting(self):
+        waiting, checkouts = DB_POOL_WAITING.value(), DB_POOL_CHECKOUT.count()
+
+        with pool_checkout():
+            assert DB_POOL_WAITING.value() == waiting + 1
+        with pytest.raises(TimeoutError), pool_checkout():
+            raise TimeoutError
+
+        assert DB_POOL_WAITING.value() == waiting
+        assert DB_POOL_CHECKOUT.count() == checkouts + 2
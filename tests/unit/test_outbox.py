@@ -0,0 +1,142 @@
+"""
+Unit тесты outbox: синки, диспетчер и outbox бэкенда в памяти
+"""
+
+import datetime
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+from app.core.sinks import FileSink, HttpSink, NullSink, build_sink
+from app.repositories.backend import get_repositories
+from app.repositories.memory_store import MemorySession, MemoryStore, OutboxRecord
+from app.services.outbox_dispatcher import OutboxDispatcher
+
+CREATED = datetime.datetime(2025, 12, 1, 12, 0, tzinfo=datetime.UTC)
+
+
+def _event(event_id: int) -> OutboxRecord:
+    return OutboxRecord(
+        event_id, "pr.merged", {"pull_request_id": f"pr-{event_id}"}, CREATED, CREATED
+    )
+
+
+class TestSinks:
+    async def test_file_sink_appends_ndjson(self, tmp_path: Path):
+        sink = FileSink(tmp_path / "events.ndjson")
+
+        await sink.send([_event(1), _event(2)])
+        await sink.send([_event(3)])
+
+        lines = [orjson.loads(line) for line in sink.path.read_bytes().splitlines()]
+        assert [line["id"] for line in lines] == [1, 2, 3]
+        assert lines[0] == {
+            "id": 1,
+            "type": "pr.merged",
+            "createdAt": "2025-12-01T12:00:00+00:00",
+            "payload": {"pull_request_id": "pr-1"},
+        }
+
+    async def test_http_sink_posts_batch(self):
+        received = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            received.append(orjson.loads(request.content))
+            return httpx.Response(204)
+
+        sink = HttpSink("http://notify.local/events", transport=httpx.MockTransport(handler))
+        await sink.send([_event(1), _event(2)])
+        await sink.close()
+
+        assert [event["id"] for event in received[0]["events"]] == [1, 2]
+
+    async def test_http_sink_raises_on_error_status(self):
+        sink = HttpSink(
+            "http://notify.local/events",
+            transport=httpx.MockTransport(lambda request: httpx.Response(503)),
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            await sink.send([_event(1)])
+        await sink.close()
+
+    def test_build_sink(self):
+        assert build_sink("") is None
+        assert build_sink("none") is None
+        assert isinstance(build_sink("null"), NullSink)
+        assert build_sink("file:///tmp/events.ndjson").path == Path("/tmp/events.ndjson")
+        assert isinstance(build_sink("http://localhost:9000/events"), HttpSink)
+        with pytest.raises(ValueError):
+            build_sink("kafka://broker")
+
+
+class TestRetryDelay:
+    def test_exponential_and_capped(self):
+        dispatcher = OutboxDispatcher(NullSink(), MemorySession, retry_base=1, retry_max=10)
+
+        assert [dispatcher.retry_delay(n) for n in range(1, 7)] == [1, 2, 4, 8, 10, 10]
+
+
+class TestMemoryOutbox:
+    async def test_add_claim_delete(self):
+        store = MemoryStore()
+        async with MemorySession(store) as db:
+            await get_repositories(db).outbox.add([("a", {"n": 1}), ("b", {"n": 2})])
+            await db.commit()
+
+        async with MemorySession(store) as db:
+            outbox = get_repositories(db).outbox
+            claimed = await outbox.claim(1, max_attempts=3)
+            assert [event.event_type for event in claimed] == ["a"]
+            await outbox.delete([claimed[0].id])
+            # без commit удаление откатывается на своё место
+        assert [event.event_type for event in store.outbox.values()] == ["a", "b"]
+
+    async def test_rollback_discards_events(self):
+        store = MemoryStore()
+        async with MemorySession(store) as db:
+            await get_repositories(db).outbox.add([("a", {})])
+        assert store.outbox == {}
+        assert store.outbox_seq == 0
+
+    async def test_dispatcher_retries_then_delivers(self):
+        store = MemoryStore()
+        async with MemorySession(store) as db:
+            await get_repositories(db).outbox.add([("a", {"n": 1})])
+            await db.commit()
+
+        class FlakySink(NullSink):
+            calls = 0
+
+            async def send(self, events) -> None:
+                self.calls += 1
+                if self.calls == 1:
+                    raise TimeoutError
+
+        dispatcher = OutboxDispatcher(FlakySink(), lambda: MemorySession(store), retry_base=0)
+
+        assert await dispatcher.dispatch_batch() == 0
+        assert next(iter(store.outbox.values())).attempts == 1
+        assert await dispatcher.dispatch_batch() == 1
+        assert store.outbox == {}
+
+    async def test_ids_survive_snapshot_compaction(self, tmp_path: Path):
+        path = tmp_path / "store.log"
+        store = MemoryStore(path)
+        async with MemorySession(store) as db:
+            outbox = get_repositories(db).outbox
+            await outbox.add([("a", {}), ("b", {})])
+            await db.commit()
+            await outbox.retry([(2, 1, CREATED)], "boom")
+            await outbox.delete([1])
+            await db.commit()
+        store.snapshot.close()
+
+        restored = MemoryStore(path)
+
+        assert list(restored.outbox) == [2]
+        assert restored.outbox[2].attempts == 1
+        assert restored.outbox[2].last_error == "boom"
+        # доставленный id 1 не выдаётся повторно
+        assert restored.outbox_seq == 2
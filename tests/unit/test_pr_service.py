@@ -8,8 +8,12 @@ import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
-from app.models.models import PRStatus, PullRequest, PullRequestReviewer, Team, User
+from app.core.pagination import InvalidCursorError, decode_cursor
+from app.models.models import PRStatus, PullRequest, PullRequestReviewer, User
+from app.repositories.stats_repository import TOTAL_REVIEWS
+from app.repositories.team_repository import Roster, RosterMember
 from app.services.pr_service import PullRequestService
 from app.services.pr_service_errors import (
     AuthorNotFoundError,
@@ -41,6 +45,51 @@ def pr_service(mock_db):
     return PullRequestService(mock_db)
 
 
+# =============================================================================
+# PICK REVIEWERS
+# =============================================================================
+
+
+class TestPickReviewers:
+    """
+    Выбор ревьюверов: кандидаты из кэша состава, нагрузка одним запросом
+    """
+
+    @staticmethod
+    def _roster() -> Roster:
+        return Roster.from_members(
+            "team1",
+            [
+                RosterMember("author1", "Author", True),
+                RosterMember("m1", "M1", True),
+                RosterMember("m2", "M2", True),
+                RosterMember("m3", "M3", True),
+                RosterMember("off", "Off", False),
+            ],
+        )
+
+    async def test_picks_least_loaded_active(self, pr_service: PullRequestService):
+        pr_service.team_repo.get_roster = AsyncMock(return_value=self._roster())
+        pr_service.reviewer_repo.count_open_reviews = AsyncMock(return_value={"m1": 3, "m2": 1})
+
+        result = await pr_service._pick_reviewers("team1", exclude_ids={"author1"}, limit=2)
+
+        assert sorted(result) == ["m2", "m3"]
+        # нагрузка запрашивается только для активных кандидатов
+        pr_service.reviewer_repo.count_open_reviews.assert_called_once_with(["m1", "m2", "m3"])
+
+    async def test_no_candidates_skips_load_query(self, pr_service: PullRequestService):
+        pr_service.team_repo.get_roster = AsyncMock(return_value=self._roster())
+        pr_service.reviewer_repo.count_open_reviews = AsyncMock()
+
+        result = await pr_service._pick_reviewers(
+            "team1", exclude_ids={"author1", "m1", "m2", "m3"}, limit=2
+        )
+
+        assert result == []
+        pr_service.reviewer_repo.count_open_reviews.assert_not_called()
+
+
 # =============================================================================
 # CREATE PR
 # =============================================================================
@@ -51,17 +100,15 @@ class TestCreatePR:
     Тесты создания Pull Request
     """
 
+    @staticmethod
+    def _context(pr_exists=False, author_exists=True, team_name="team1") -> MagicMock:
+        return MagicMock(pr_exists=pr_exists, author_exists=author_exists, team_name=team_name)
+
     async def test_create_pr_success(self, pr_service: PullRequestService):
         """
         Успешное создание PR с назначением ревьюверов
         """
         # Arrange
-        author = User(user_id="author1", username="Author", is_active=True, team_name="team1")
-        member1 = User(user_id="m1", username="Member1", is_active=True, team_name="team1")
-        member2 = User(user_id="m2", username="Member2", is_active=True, team_name="team1")
-        team = MagicMock(spec=Team)
-        team.members = [author, member1, member2]
-
         created_pr = PullRequest(
             pull_request_id="pr-1",
             pull_request_name="Test PR",
@@ -74,12 +121,9 @@ class TestCreatePR:
             PullRequestReviewer(pull_request_id="pr-1", reviewer_id="m2"),
         ]
 
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=None)
-        pr_service.user_repo.get_user = AsyncMock(return_value=author)
-        pr_service.team_repo.get_team = AsyncMock(return_value=team)
-        pr_service.pr_repo.add_pr = AsyncMock(return_value=created_pr)
-        pr_service.pr_repo.add_reviewer = AsyncMock()
-        pr_service.pr_repo.get_pr_with_reviewers = AsyncMock(return_value=created_pr)
+        pr_service.pr_repo.get_create_context = AsyncMock(return_value=self._context())
+        pr_service._pick_reviewers = AsyncMock(return_value=["m1", "m2"])
+        pr_service.pr_repo.create_pr_with_reviewers = AsyncMock(return_value=created_pr)
 
         # act
         result = await pr_service.create_pr("pr-1", "Test PR", "author1")
@@ -88,47 +132,60 @@ class TestCreatePR:
         assert result.pull_request_id == "pr-1"
         assert result.status == PRStatus.OPEN
 
-        pr_service.pr_repo.add_pr.assert_called_once()
-        # должны быть назначены 2 ревьювера (не автор)
-        assert pr_service.pr_repo.add_reviewer.call_count == 2
+        # кандидаты выбираются из команды автора, сам автор исключён
+        pr_service._pick_reviewers.assert_called_once_with(
+            "team1", exclude_ids={"author1"}, limit=2
+        )
+        # PR и оба ревьювера пишутся одним вызовом и одним commit
+        pr_service.pr_repo.create_pr_with_reviewers.assert_called_once_with(
+            "pr-1", "Test PR", "author1", ["m1", "m2"]
+        )
+        pr_service.db.commit.assert_called_once()
 
     async def test_create_pr_already_exists(self, pr_service: PullRequestService):
         """
         PR с таким ID уже существует
         """
-        existing_pr = PullRequest(
-            pull_request_id="pr-1",
-            pull_request_name="Existing",
-            author_id="author1",
-            status=PRStatus.OPEN,
+        pr_service.pr_repo.get_create_context = AsyncMock(
+            return_value=self._context(pr_exists=True)
+        )
+
+        with pytest.raises(PRExistsError):
+            await pr_service.create_pr("pr-1", "New PR", "author1")
+
+    async def test_create_pr_concurrent_duplicate(self, pr_service: PullRequestService):
+        """
+        PR с тем же ID создан параллельно — IntegrityError превращается в PRExistsError
+        """
+        pr_service.pr_repo.get_create_context = AsyncMock(return_value=self._context())
+        pr_service._pick_reviewers = AsyncMock(return_value=[])
+        pr_service.pr_repo.create_pr_with_reviewers = AsyncMock(
+            side_effect=IntegrityError("INSERT", {}, Exception("duplicate key"))
         )
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=existing_pr)
 
         with pytest.raises(PRExistsError):
             await pr_service.create_pr("pr-1", "New PR", "author1")
+        pr_service.db.rollback.assert_called_once()
 
     async def test_create_pr_author_not_found(self, pr_service: PullRequestService):
         """
         Автор не найден в системе
         """
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=None)
-        pr_service.user_repo.get_user = AsyncMock(return_value=None)
+        pr_service.pr_repo.get_create_context = AsyncMock(
+            return_value=self._context(author_exists=False, team_name=None)
+        )
 
         with pytest.raises(AuthorNotFoundError):
             await pr_service.create_pr("pr-1", "Test PR", "unknown_author")
 
     async def test_create_pr_team_not_found(self, pr_service: PullRequestService):
         """
-        Команда автора не найдена (edge case)
+        Автор не состоит в команде (edge case)
         """
-        author = User(
-            user_id="author1", username="Author", is_active=True, team_name="missing_team"
+        pr_service.pr_repo.get_create_context = AsyncMock(
+            return_value=self._context(team_name=None)
         )
 
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=None)
-        pr_service.user_repo.get_user = AsyncMock(return_value=author)
-        pr_service.team_repo.get_team = AsyncMock(return_value=None)
-
         with pytest.raises(TeamNotFoundError):
             await pr_service.create_pr("pr-1", "Test PR", "author1")
 
@@ -136,11 +193,6 @@ class TestCreatePR:
         """
         Команда без активных участников кроме автора — PR создаётся без ревьюверов
         """
-        author = User(user_id="author1", username="Author", is_active=True, team_name="team1")
-        inactive = User(user_id="m1", username="Inactive", is_active=False, team_name="team1")
-        team = MagicMock(spec=Team)
-        team.members = [author, inactive]
-
         created_pr = PullRequest(
             pull_request_id="pr-1",
             pull_request_name="Test PR",
@@ -149,28 +201,22 @@ class TestCreatePR:
         )
         created_pr.reviewers = []
 
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=None)
-        pr_service.user_repo.get_user = AsyncMock(return_value=author)
-        pr_service.team_repo.get_team = AsyncMock(return_value=team)
-        pr_service.pr_repo.add_pr = AsyncMock(return_value=created_pr)
-        pr_service.pr_repo.add_reviewer = AsyncMock()
-        pr_service.pr_repo.get_pr_with_reviewers = AsyncMock(return_value=created_pr)
+        pr_service.pr_repo.get_create_context = AsyncMock(return_value=self._context())
+        pr_service._pick_reviewers = AsyncMock(return_value=[])
+        pr_service.pr_repo.create_pr_with_reviewers = AsyncMock(return_value=created_pr)
 
         result = await pr_service.create_pr("pr-1", "Test PR", "author1")
 
         assert result.pull_request_id == "pr-1"
-        # add_reviewer не вызывался — нет кандидатов
-        pr_service.pr_repo.add_reviewer.assert_not_called()
+        # PR создан без ревьюверов — нет кандидатов
+        pr_service.pr_repo.create_pr_with_reviewers.assert_called_once_with(
+            "pr-1", "Test PR", "author1", []
+        )
 
     async def test_create_pr_one_candidate(self, pr_service: PullRequestService):
         """
         Только один кандидат — назначается один ревьювер
         """
-        author = User(user_id="author1", username="Author", is_active=True, team_name="team1")
-        member = User(user_id="m1", username="Member", is_active=True, team_name="team1")
-        team = MagicMock(spec=Team)
-        team.members = [author, member]
-
         created_pr = PullRequest(
             pull_request_id="pr-1",
             pull_request_name="Test PR",
@@ -178,17 +224,110 @@ class TestCreatePR:
             status=PRStatus.OPEN,
         )
 
-        pr_service.pr_repo.get_pr = AsyncMock(return_value=None)
-        pr_service.user_repo.get_user = AsyncMock(return_value=author)
-        pr_service.team_repo.get_team = AsyncMock(return_value=team)
-        pr_service.pr_repo.add_pr = AsyncMock(return_value=created_pr)
-        pr_service.pr_repo.add_reviewer = AsyncMock()
-        pr_service.pr_repo.get_pr_with_reviewers = AsyncMock(return_value=created_pr)
+        pr_service.pr_repo.get_create_context = AsyncMock(return_value=self._context())
+        pr_service._pick_reviewers = AsyncMock(return_value=["m1"])
+        pr_service.pr_repo.create_pr_with_reviewers = AsyncMock(return_value=created_pr)
 
         await pr_service.create_pr("pr-1", "Test PR", "author1")
 
         # только 1 ревьювер назначен
-        pr_service.pr_repo.add_reviewer.assert_called_once_with("pr-1", "m1")
+        pr_service.pr_repo.create_pr_with_reviewers.assert_called_once_with(
+            "pr-1", "Test PR", "author1", ["m1"]
+        )
+
+
+# =============================================================================
+# CREATE BATCH
+# =============================================================================
+
+
+class TestCreateBatch:
+    """
+    Пакетное создание PR: ошибки по элементам, балансировка по всему пакету
+    """
+
+    @staticmethod
+    def _arrange(pr_service: PullRequestService, existing=(), loads=None) -> None:
+        roster = Roster.from_members(
+            "team1",
+            [RosterMember(user_id, user_id, True) for user_id in ("a1", "m1", "m2", "m3")],
+        )
+        pr_service.pr_repo.get_existing_ids = AsyncMock(return_value=set(existing))
+        pr_service.user_repo.get_team_names = AsyncMock(return_value={"a1": "team1", "nomad": None})
+        pr_service.team_repo.get_rosters = AsyncMock(return_value={"team1": roster})
+        pr_service.reviewer_repo.count_open_reviews = AsyncMock(return_value=loads or {})
+        pr_service.stats_repo.apply = AsyncMock()
+
+        async def create(rows):
+            return [
+                PullRequest(pull_request_id=pr_id, pull_request_name=name, author_id=author_id)
+                for pr_id, name, author_id, _ in rows
+            ]
+
+        pr_service.pr_repo.create_prs_with_reviewers = AsyncMock(side_effect=create)
+
+    async def test_per_item_errors(self, pr_service: PullRequestService):
+        self._arrange(pr_service, existing={"pr-old"})
+
+        results = await pr_service.create_batch(
+            [
+                ("pr-1", "ok", "a1"),
+                ("pr-old", "exists", "a1"),
+                ("pr-1", "duplicate in batch", "a1"),
+                ("pr-2", "unknown author", "ghost"),
+                ("pr-3", "no team", "nomad"),
+            ]
+        )
+
+        assert isinstance(results[0], PullRequest)
+        assert isinstance(results[1], PRExistsError)
+        assert isinstance(results[2], PRExistsError)
+        assert isinstance(results[3], AuthorNotFoundError)
+        assert isinstance(results[4], TeamNotFoundError)
+        # создаётся только валидный элемент, одним вызовом и одним commit
+        pr_service.pr_repo.create_prs_with_reviewers.assert_called_once()
+        pr_service.db.commit.assert_called_once()
+
+    async def test_balances_within_batch_and_existing_load(self, pr_service: PullRequestService):
+        # у m1 уже 3 открытых ревью — в пакете из 3 PR он получает меньше остальных
+        self._arrange(pr_service, loads={"m1": 3})
+
+        await pr_service.create_batch([(f"pr-{i}", "PR", "a1") for i in range(3)])
+
+        rows = pr_service.pr_repo.create_prs_with_reviewers.call_args.args[0]
+        assigned = [reviewer for *_, reviewer_ids in rows for reviewer in reviewer_ids]
+        assert len(assigned) == 6
+        assert "a1" not in assigned
+        assert assigned.count("m2") == assigned.count("m3") == 3
+        # нагрузка загружается один раз на весь пакет
+        pr_service.reviewer_repo.count_open_reviews.assert_called_once()
+        counters, reviewers = pr_service.stats_repo.apply.call_args.args
+        assert counters[TOTAL_REVIEWS] == 6
+        assert reviewers == {"m2": 3, "m3": 3}
+
+    async def test_all_invalid_writes_nothing(self, pr_service: PullRequestService):
+        self._arrange(pr_service, existing={"pr-1"})
+
+        results = await pr_service.create_batch([("pr-1", "PR", "a1")])
+
+        assert isinstance(results[0], PRExistsError)
+        pr_service.pr_repo.create_prs_with_reviewers.assert_not_called()
+        pr_service.db.commit.assert_not_called()
+
+    async def test_concurrent_duplicate_retried_as_pr_exists(self, pr_service: PullRequestService):
+        """
+        PR из пакета создан параллельно — пакет повторяется, элемент получает PR_EXISTS
+        """
+        self._arrange(pr_service)
+        pr_service.pr_repo.get_existing_ids.side_effect = [set(), {"pr-1"}]
+        pr_service.pr_repo.create_prs_with_reviewers.side_effect = IntegrityError(
+            "INSERT", {}, Exception("duplicate key")
+        )
+
+        results = await pr_service.create_batch([("pr-1", "PR", "a1")])
+
+        assert isinstance(results[0], PRExistsError)
+        pr_service.db.rollback.assert_called_once()
 
 
 # =============================================================================
@@ -221,6 +360,7 @@ class TestMergePR:
 
         pr_service.pr_repo.get_pr = AsyncMock(return_value=pr)
         pr_service.pr_repo.get_pr_with_reviewers = AsyncMock(return_value=merged_pr)
+        pr_service.reviewer_repo.get_reviewers_by_pr = AsyncMock(return_value=[])
 
         result = await pr_service.merge_pr("pr-1")
 
@@ -256,6 +396,7 @@ class TestMergePR:
 
         # не должно быть повторного commit
         pr_service.db.commit.assert_not_called()
+        pr_service.pr_repo.get_pr.assert_awaited_once_with("pr-1", for_update=True)
         assert result.status == PRStatus.MERGED
 
 
@@ -280,24 +421,23 @@ class TestReassignReviewer:
             status=PRStatus.OPEN,
         )
         old_reviewer = User(user_id="old_rev", username="OldRev", is_active=True, team_name="team1")
-        new_candidate = User(
-            user_id="new_rev", username="NewRev", is_active=True, team_name="team1"
-        )
-        team = MagicMock(spec=Team)
-        team.members = [old_reviewer, new_candidate]
 
         reviewer_obj = PullRequestReviewer(pull_request_id="pr-1", reviewer_id="old_rev")
 
         pr_service.pr_repo.get_pr = AsyncMock(return_value=pr)
         pr_service.reviewer_repo.get_reviewers_by_pr = AsyncMock(return_value=[reviewer_obj])
         pr_service.user_repo.get_user = AsyncMock(return_value=old_reviewer)
-        pr_service.team_repo.get_team = AsyncMock(return_value=team)
+        pr_service._pick_reviewers = AsyncMock(return_value=["new_rev"])
         pr_service.pr_repo.add_reviewer = AsyncMock()
         pr_service.pr_repo.get_pr_with_reviewers = AsyncMock(return_value=pr)
 
         result_pr, new_reviewer_id = await pr_service.reassign_reviewer("pr-1", "old_rev")
 
         assert new_reviewer_id == "new_rev"
+        # замена ищется в команде заменяемого, без автора и текущих ревьюверов
+        pr_service._pick_reviewers.assert_called_once_with(
+            "team1", exclude_ids={"old_rev", "author1"}, limit=1
+        )
         pr_service.db.delete.assert_called_once_with(reviewer_obj)
         pr_service.pr_repo.add_reviewer.assert_called_once_with("pr-1", "new_rev")
 
@@ -325,6 +465,10 @@ class TestReassignReviewer:
         with pytest.raises(PRMergedError):
             await pr_service.reassign_reviewer("pr-1", "reviewer1")
 
+        # PR читается под блокировкой, ошибка откатывает транзакцию и снимает её
+        pr_service.pr_repo.get_pr.assert_awaited_once_with("pr-1", for_update=True)
+        pr_service.db.rollback.assert_awaited_once()
+
     async def test_reassign_reviewer_not_assigned(self, pr_service: PullRequestService):
         """
         Ревьювер не назначен на этот PR
@@ -354,16 +498,14 @@ class TestReassignReviewer:
             status=PRStatus.OPEN,
         )
         old_reviewer = User(user_id="old_rev", username="OldRev", is_active=True, team_name="team1")
-        inactive = User(user_id="inactive", username="Inactive", is_active=False, team_name="team1")
-        team = MagicMock(spec=Team)
-        team.members = [old_reviewer, inactive]  # только неактивный остался
 
         reviewer_obj = PullRequestReviewer(pull_request_id="pr-1", reviewer_id="old_rev")
 
         pr_service.pr_repo.get_pr = AsyncMock(return_value=pr)
         pr_service.reviewer_repo.get_reviewers_by_pr = AsyncMock(return_value=[reviewer_obj])
         pr_service.user_repo.get_user = AsyncMock(return_value=old_reviewer)
-        pr_service.team_repo.get_team = AsyncMock(return_value=team)
+        # в команде не осталось активных кандидатов
+        pr_service._pick_reviewers = AsyncMock(return_value=[])
 
         with pytest.raises(NoCandidateError):
             await pr_service.reassign_reviewer("pr-1", "old_rev")
@@ -379,34 +521,65 @@ class TestGetPRsByReviewer:
     Тесты получения PR по ревьюверу
     """
 
+    @staticmethod
+    def _row(pr_id: str, minute: int, status: PRStatus = PRStatus.OPEN) -> MagicMock:
+        return MagicMock(
+            pull_request_id=pr_id,
+            pull_request_name=pr_id.upper(),
+            author_id="a1",
+            status=status,
+            createdAt=datetime.datetime(2025, 1, 1, 12, minute, tzinfo=datetime.UTC),
+        )
+
     async def test_get_prs_by_reviewer_success(self, pr_service: PullRequestService):
         """
-        Получение списка PR для ревьювера
+        Получение списка PR для ревьювера (без пагинации)
         """
-        pr1 = PullRequest(
-            pull_request_id="pr-1", pull_request_name="PR1", author_id="a1", status=PRStatus.OPEN
-        )
-        pr2 = PullRequest(
-            pull_request_id="pr-2", pull_request_name="PR2", author_id="a2", status=PRStatus.MERGED
-        )
+        rows = [self._row("pr-1", 0), self._row("pr-2", 1, PRStatus.MERGED)]
+        pr_service.reviewer_repo.get_prs_by_reviewer = AsyncMock(return_value=rows)
 
-        reviewer_prs = [
-            MagicMock(pull_request=pr1),
-            MagicMock(pull_request=pr2),
-        ]
-
-        pr_service.reviewer_repo.get_prs_by_reviewer = AsyncMock(return_value=reviewer_prs)
-        result = await pr_service.get_prs_by_reviewer("reviewer1")
+        result, next_cursor = await pr_service.get_prs_by_reviewer("reviewer1")
 
-        assert len(result) == 2
-        assert result[0].pull_request_id == "pr-1"
-        assert result[1].pull_request_id == "pr-2"
+        assert [r.pull_request_id for r in result] == ["pr-1", "pr-2"]
+        assert next_cursor is None
+        pr_service.reviewer_repo.get_prs_by_reviewer.assert_called_once_with(
+            "reviewer1", status=None, limit=None, after=None
+        )
 
     async def test_get_prs_by_reviewer_empty(self, pr_service: PullRequestService):
         """
         Ревьювер не назначен ни на один PR
         """
         pr_service.reviewer_repo.get_prs_by_reviewer = AsyncMock(return_value=[])
-        result = await pr_service.get_prs_by_reviewer("reviewer_without_prs")
+        result, next_cursor = await pr_service.get_prs_by_reviewer("reviewer_without_prs")
 
         assert result == []
+        assert next_cursor is None
+
+    async def test_get_prs_by_reviewer_next_cursor(self, pr_service: PullRequestService):
+        """
+        Есть строка сверх limit — отдаётся курсор на последнюю строку страницы
+        """
+        rows = [self._row("pr-1", 0), self._row("pr-2", 1), self._row("pr-3", 2)]
+        pr_service.reviewer_repo.get_prs_by_reviewer = AsyncMock(return_value=rows)
+
+        result, next_cursor = await pr_service.get_prs_by_reviewer(
+            "reviewer1", status=PRStatus.OPEN, limit=2
+        )
+
+        assert [r.pull_request_id for r in result] == ["pr-1", "pr-2"]
+        assert decode_cursor(next_cursor) == (rows[1].createdAt, "pr-2")
+        # запрашивается limit + 1 строка
+        pr_service.reviewer_repo.get_prs_by_reviewer.assert_called_once_with(
+            "reviewer1", status=PRStatus.OPEN, limit=3, after=None
+        )
+
+    async def test_get_prs_by_reviewer_invalid_cursor(self, pr_service: PullRequestService):
+        """
+        Некорректный курсор — InvalidCursorError, в БД не ходим
+        """
+        pr_service.reviewer_repo.get_prs_by_reviewer = AsyncMock()
+
+        with pytest.raises(InvalidCursorError):
+            await pr_service.get_prs_by_reviewer("reviewer1", limit=2, cursor="not-a-cursor")
+        pr_service.reviewer_repo.get_prs_by_reviewer.assert_not_called()
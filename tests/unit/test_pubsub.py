@@ -0,0 +1,107 @@
+"""
+Unit тесты хаба pub/sub и SSE-потока /users/reviewStream
+"""
+
+import asyncio
+
+import orjson
+
+from app.core.pubsub import Hub
+from app.services import review_feed
+
+
+def _parse(chunk: bytes) -> tuple[str, dict]:
+    event, data = chunk.decode().strip().split("\n")
+    return event.removeprefix("event: "), orjson.loads(data.removeprefix("data: "))
+
+
+class TestHub:
+    async def test_publish_reaches_topic_subscribers_only(self):
+        hub = Hub()
+        first = hub.subscribe("u1")
+        second = hub.subscribe("u1")
+        other = hub.subscribe("u2")
+
+        assert hub.publish("u1", ("assigned", {"pull_request_id": "pr-1"})) == 2
+
+        assert await first.get() == ("assigned", {"pull_request_id": "pr-1"})
+        assert await second.get() == ("assigned", {"pull_request_id": "pr-1"})
+        assert other.queue.empty()
+
+    def test_topic_without_subscribers_costs_nothing(self):
+        hub = Hub()
+        subscription = hub.subscribe("u1")
+        subscription.close()
+
+        assert hub.publish("u1", ("assigned", {})) == 0
+        assert not hub.has_subscribers("u1")
+        assert hub.stats() == {"topics": 0, "subscribers": 0, "published": 0, "dropped": 0}
+
+    async def test_slow_subscriber_is_dropped(self):
+        hub = Hub(queue_size=2)
+        slow = hub.subscribe("u1")
+        fast = hub.subscribe("u1")
+
+        for n in range(3):
+            hub.publish("u1", ("assigned", {"n": n}))
+            # быстрый подписчик успевает читать
+            assert (await fast.get())[1] == {"n": n}
+
+        assert slow.closed
+        assert hub.stats()["subscribers"] == 1
+        assert hub.stats()["dropped"] == 1
+        # самое старое сообщение уступило место маркеру отставания
+        assert await slow.get() == ("assigned", {"n": 1})
+        assert await slow.get() is None
+        assert await slow.get() is None
+
+
+class TestEventStream:
+    async def test_snapshot_then_deltas(self):
+        hub = Hub()
+        subscription = hub.subscribe("u1")
+        stream = review_feed.event_stream(subscription, {"user_id": "u1"}, heartbeat=5)
+
+        assert _parse(await anext(stream)) == ("snapshot", {"user_id": "u1"})
+
+        hub.publish("u1", ("unassigned", {"pull_request_id": "pr-1"}))
+        assert _parse(await anext(stream)) == ("unassigned", {"pull_request_id": "pr-1"})
+
+        await stream.aclose()
+        assert not hub.has_subscribers("u1")
+
+    async def test_heartbeat_while_idle(self):
+        subscription = Hub().subscribe("u1")
+        stream = review_feed.event_stream(subscription, {}, heartbeat=0.01)
+        await anext(stream)
+
+        assert await anext(stream) == review_feed.HEARTBEAT
+        await stream.aclose()
+
+    async def test_resync_ends_stream(self):
+        hub = Hub(queue_size=1)
+        subscription = hub.subscribe("u1")
+        stream = review_feed.event_stream(subscription, {}, heartbeat=5)
+        await anext(stream)
+
+        hub.publish("u1", ("assigned", {"n": 0}))
+        hub.publish("u1", ("assigned", {"n": 1}))
+
+        assert _parse(await anext(stream)) == ("resync", {"user_id": "u1"})
+        assert [chunk async for chunk in stream] == []
+
+    async def test_disconnect_unsubscribes(self):
+        hub = Hub()
+        stream = review_feed.event_stream(hub.subscribe("u1"), {}, heartbeat=5)
+
+        async def consume():
+            async for _ in stream:
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        # клиент отключился — Starlette отменяет задачу ответа
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert not hub.has_subscribers("u1")
@@ -7,8 +7,11 @@ Unit тесты для репозиториев
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from app.models.models import Team, User
+from app.repositories.pr_repository import PRRepository
+from app.repositories.reviewer_repository import ReviewerRepository
 from app.repositories.team_repository import TeamRepository
 from app.repositories.user_repository import UserRepository
 
@@ -154,3 +157,32 @@ class TestUserRepository:
 
         assert result is None
         mock_db.commit.assert_not_called()
+
+
+def _pg_sql(mock_db: AsyncMock) -> str:
+    stmt = mock_db.execute.await_args.args[0]
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestRowLocks:
+    """
+    Запись в PR идёт под SELECT ... FOR UPDATE строки PR (на PostgreSQL)
+    """
+
+    async def test_get_pr_for_update(self, mock_db):
+        mock_db.execute.return_value = MagicMock()
+        repo = PRRepository(mock_db)
+
+        await repo.get_pr("pr-1")
+        assert "FOR UPDATE" not in _pg_sql(mock_db)
+
+        await repo.get_pr("pr-1", for_update=True)
+        assert _pg_sql(mock_db).endswith("FOR UPDATE")
+
+    async def test_open_assignments_lock_only_prs(self, mock_db):
+        mock_db.execute.return_value = MagicMock()
+        repo = ReviewerRepository(mock_db)
+
+        await repo.get_open_assignments(["u1"])
+
+        assert _pg_sql(mock_db).endswith("FOR UPDATE OF pull_requests")
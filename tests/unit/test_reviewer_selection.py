@@ -0,0 +1,130 @@
+"""
+Unit тесты стратегий выбора ревьюверов и офлайн-симулятора
+"""
+
+from collections import Counter
+import random
+
+import pytest
+
+from app.bench.selection import recorded_trace, run, simulate, synthetic_trace
+from app.core.config import settings
+from app.services.reviewer_selection import STRATEGIES, SelectionState, get_strategy
+
+MEMBERS = ["u1", "u2", "u3", "u4", "u5"]
+
+
+class TestStrategies:
+    @pytest.mark.parametrize("name", sorted(STRATEGIES))
+    def test_excludes_author_and_counts_load(self, name: str):
+        state = SelectionState()
+
+        chosen = get_strategy(name).pick(MEMBERS, {"u1"}, 2, state)
+
+        assert len(chosen) == len(set(chosen)) == 2
+        assert "u1" not in chosen
+        assert state.loads == dict.fromkeys(chosen, 1)
+
+    @pytest.mark.parametrize("name", sorted(STRATEGIES))
+    def test_small_team(self, name: str):
+        strategy = get_strategy(name)
+
+        assert strategy.pick(["u1", "u2"], {"u1"}, 2, SelectionState()) == ["u2"]
+        assert strategy.pick(["u1"], {"u1"}, 2, SelectionState()) == []
+
+    def test_default_strategy(self):
+        assert get_strategy(None).name == settings.REVIEWER_STRATEGY
+
+    def test_least_loaded_prefers_free(self):
+        state = SelectionState({"u2": 3, "u3": 1, "u4": 0, "u5": 2})
+
+        chosen = get_strategy("least_loaded").pick(MEMBERS, {"u1"}, 2, state)
+
+        assert sorted(chosen) == ["u3", "u4"]
+
+    def test_weighted_favours_free_but_not_always(self):
+        random.seed(1)
+        strategy = get_strategy("weighted")
+        counts: Counter[str] = Counter()
+        for _ in range(2000):
+            # нагрузка не копится: каждый раз одно и то же состояние
+            counts.update(strategy.pick(["u1", "u2"], set(), 1, SelectionState({"u1": 3})))
+
+        # вес 1/4 против 1: примерно 20% выборов у занятого
+        assert 250 < counts["u1"] < 550
+        assert counts["u1"] + counts["u2"] == 2000
+
+    def test_round_robin_walks_ring_in_user_id_order(self):
+        strategy = get_strategy("round_robin")
+        state = SelectionState()
+
+        picks = [strategy.pick(["u3", "u1", "u2"], set(), 1, state) for _ in range(4)]
+
+        assert picks == [["u1"], ["u2"], ["u3"], ["u1"]]
+        assert state.cursor == 1
+
+    def test_round_robin_skips_author_and_advances_past_last_chosen(self):
+        strategy = get_strategy("round_robin")
+        state = SelectionState(cursor=1)
+
+        assert strategy.pick(MEMBERS, {"u2"}, 2, state) == ["u3", "u4"]
+        assert state.cursor == 4
+        # курсор за концом круга (команда уменьшилась) берётся по модулю
+        state.cursor = 7
+        assert strategy.pick(MEMBERS, set(), 1, state) == ["u3"]
+        assert state.cursor == 3
+
+    def test_round_robin_is_fair(self):
+        strategy = get_strategy("round_robin")
+        state = SelectionState()
+        for i in range(100):
+            strategy.pick(MEMBERS, {MEMBERS[i % 5]}, 2, state)
+
+        assert set(state.loads.values()) == {40}
+
+
+class TestSelectionSimulator:
+    def test_synthetic_replay(self):
+
+        trace = synthetic_trace(teams=2, team_size=4, prs=300, rate=10, review_hours=1, seed=3)
+        results = run(trace, sorted(STRATEGIES))
+
+        assert set(results) == set(STRATEGIES)
+        for result in results.values():
+            assert result["decisions"] == 300
+            assert result["max_depth"] >= 1
+            assert 0 <= result["variance_mean"] <= result["variance_p95"] + 1
+            assert result["pick_us_p50"] <= result["pick_us_p99"]
+        # выбор по нагрузке ровнее случайного
+        assert results["least_loaded"]["variance_mean"] < results["random"]["variance_mean"]
+
+    def test_recorded_trace(self):
+
+        events = [
+            (
+                '{"id": 1, "type": "pr.created", "createdAt": "2025-01-01T10:00:00+00:00",'
+                ' "payload": {"pull_request_id": "pr-1", "author_id": "u1",'
+                ' "assigned_reviewers": ["u2", "u3"]}}'
+            ),
+            (
+                '{"id": 2, "type": "user.activity_changed",'
+                ' "createdAt": "2025-01-01T10:01:00+00:00",'
+                ' "payload": {"user_id": "u4", "is_active": false}}'
+            ),
+            (
+                '{"id": 3, "type": "pr.merged", "createdAt": "2025-01-01T11:00:00+00:00",'
+                ' "payload": {"pull_request_id": "pr-1", "mergedAt": "2025-01-01T11:00:00+00:00"}}'
+            ),
+        ]
+        roster = [
+            '{"user_id": "u1", "username": "A", "team_name": "backend"}',
+            '{"user_id": "u2", "username": "B", "team_name": "backend"}',
+            '{"user_id": "u3", "username": "C", "team_name": "backend", "is_active": false}',
+        ]
+
+        trace = recorded_trace(events, roster)
+
+        assert [(e.created, e.pr_id) for e in trace.events] == [(True, "pr-1"), (False, "pr-1")]
+        assert trace.teams == {"backend": ["u1", "u2"]}
+        assert recorded_trace(events).teams == {"all": ["u1", "u2", "u3"]}
+        assert simulate(trace, "round_robin")["max_depth"] == 1
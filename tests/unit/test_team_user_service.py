@@ -7,6 +7,8 @@ from unittest.mock import AsyncMock
 import pytest
 
 from app.models.models import Team, User
+from app.repositories.team_repository import Roster, RosterMember
+from app.services.pr_service_errors import TeamNotFoundError
 from app.services.team_service import TeamService
 from app.services.user_service import UserService
 
@@ -42,24 +44,24 @@ class TestTeamService:
         """
         Команда найдена
         """
-        team = Team(team_name="backend")
-        team.members = [
-            User(user_id="u1", username="User1", is_active=True, team_name="backend"),
-        ]
+        roster = Roster.from_members("backend", [RosterMember("u1", "User1", True)])
 
-        team_service.team_repo.get_team = AsyncMock(return_value=team)
+        team_service.team_repo.get_roster = AsyncMock(return_value=roster)
 
         result = await team_service.get_team("backend")
 
         assert result is not None
         assert result.team_name == "backend"
-        team_service.team_repo.get_team.assert_called_once_with("backend")
+        assert result.active_ids == ("u1",)
+        team_service.team_repo.get_roster.assert_called_once_with(
+            "backend", fresh=False, version=None
+        )
 
     async def test_get_team_not_found(self, team_service: TeamService):
         """
         Команда не найдена
         """
-        team_service.team_repo.get_team = AsyncMock(return_value=None)
+        team_service.team_repo.get_roster = AsyncMock(return_value=None)
 
         result = await team_service.get_team("nonexistent")
 
@@ -80,7 +82,52 @@ class TestTeamService:
         result = await team_service.add_team("new_team", members_data)
 
         assert result.team_name == "new_team"
-        team_service.team_repo.add_team.assert_called_once_with("new_team", members_data)
+        team_service.team_repo.add_team.assert_called_once_with("new_team", members_data, version=1)
+
+
+class TestTeamDeactivateUsers:
+    """
+    Тесты TeamService.deactivate_users
+    """
+
+    async def test_deactivate_unknown_team(self, team_service: TeamService):
+        """
+        Никто не деактивирован и команды нет — TeamNotFoundError
+        """
+        team_service.user_repo.deactivate_users = AsyncMock(return_value=[])
+        team_service.team_repo.team_exists = AsyncMock(return_value=False)
+
+        with pytest.raises(TeamNotFoundError):
+            await team_service.deactivate_users("ghost", ["u1"])
+
+    async def test_deactivate_balances_replacements(self, team_service: TeamService):
+        """
+        Замены распределяются по наименее загруженным с учётом уже сделанного выбора
+        """
+        team_service.user_repo.deactivate_users = AsyncMock(return_value=["old"])
+        team_service.reviewer_repo.get_open_assignments = AsyncMock(
+            return_value=[
+                ("pr-1", "a", "old", "PR 1"),
+                ("pr-2", "a", "old", "PR 2"),
+                ("pr-2", "a", "busy", "PR 2"),
+            ]
+        )
+        team_service.reviewer_repo.get_open_loads = AsyncMock(
+            return_value={"a": 5, "busy": 3, "free": 0}
+        )
+        team_service.reviewer_repo.remove_from_open_prs = AsyncMock()
+        team_service.reviewer_repo.add_reviewers = AsyncMock()
+
+        deactivated, reassignments = await team_service.deactivate_users("team", ["old"])
+
+        assert deactivated == ["old"]
+        # pr-1: free (нагрузка 0); в pr-2 автор a и busy исключены — снова free
+        assert reassignments == [("pr-1", "old", "free"), ("pr-2", "old", "free")]
+        team_service.reviewer_repo.remove_from_open_prs.assert_called_once_with(["old"])
+        team_service.reviewer_repo.add_reviewers.assert_called_once_with(
+            [("pr-1", "free"), ("pr-2", "free")]
+        )
+        team_service.db.commit.assert_called_once()
 
 
 # =============================================================================
@@ -118,30 +165,55 @@ class TestUserService:
         """
         Активация пользователя
         """
+        before = User(user_id="u1", username="TestUser", is_active=False, team_name="team1")
         user = User(user_id="u1", username="TestUser", is_active=True, team_name="team1")
+        user_service.user_repo.get_user = AsyncMock(return_value=before)
         user_service.user_repo.set_is_active = AsyncMock(return_value=user)
+        user_service.outbox_repo.add = AsyncMock()
         result = await user_service.set_is_active("u1", True)
 
         assert result is not None
         assert result.is_active is True
         user_service.user_repo.set_is_active.assert_called_once_with("u1", True)
+        user_service.outbox_repo.add.assert_called_once_with(
+            [("user.activity_changed", {"user_id": "u1", "is_active": True})]
+        )
 
     async def test_set_is_active_deactivate(self, user_service: UserService):
         """
         Деактивация пользователя
         """
+        before = User(user_id="u1", username="TestUser", is_active=True, team_name="team1")
         user = User(user_id="u1", username="TestUser", is_active=False, team_name="team1")
+        user_service.user_repo.get_user = AsyncMock(return_value=before)
         user_service.user_repo.set_is_active = AsyncMock(return_value=user)
+        user_service.outbox_repo.add = AsyncMock()
         result = await user_service.set_is_active("u1", False)
 
         assert result is not None
         assert result.is_active is False
 
+    async def test_set_is_active_unchanged_writes_nothing(self, user_service: UserService):
+        """
+        Тот же статус — ни записи, ни события
+        """
+        user = User(user_id="u1", username="TestUser", is_active=True, team_name="team1")
+        user_service.user_repo.get_user = AsyncMock(return_value=user)
+        user_service.user_repo.set_is_active = AsyncMock()
+        user_service.outbox_repo.add = AsyncMock()
+        result = await user_service.set_is_active("u1", True)
+
+        assert result is user
+        user_service.user_repo.set_is_active.assert_not_called()
+        user_service.outbox_repo.add.assert_not_called()
+
     async def test_set_is_active_user_not_found(self, user_service: UserService):
         """
         Пользователь не найден при изменении статуса
         """
-        user_service.user_repo.set_is_active = AsyncMock(return_value=None)
+        user_service.user_repo.get_user = AsyncMock(return_value=None)
+        user_service.user_repo.set_is_active = AsyncMock()
         result = await user_service.set_is_active("unknown", True)
 
         assert result is None
+        user_service.user_repo.set_is_active.assert_not_called()